@@ -0,0 +1,33 @@
+from gardeniq.base.utils import GardenEnum
+
+
+class Color(GardenEnum):
+    RED = "RED"
+    DARK_BLUE = "DARK_BLUE"
+
+
+class Shape(GardenEnum):
+    SQUARE = "SQUARE"
+
+
+def test_from_string_is_case_insensitive():
+    assert Color.from_string("red") is Color.RED
+    assert Color.from_string("Dark_Blue") is Color.DARK_BLUE
+
+
+def test_from_string_returns_none_for_unknown_value():
+    assert Color.from_string("green") is None
+
+
+def test_from_string_strict_skips_case_folding():
+    assert Color.from_string("RED", strict=True) is Color.RED
+    assert Color.from_string("red", strict=True) is None
+
+
+def test_from_string_builds_one_index_per_subclass():
+    Color.from_string("red")
+    Shape.from_string("square")
+
+    assert Color.__dict__["_garden_value_index"] == {"RED": Color.RED, "DARK_BLUE": Color.DARK_BLUE}
+    assert Shape.__dict__["_garden_value_index"] == {"SQUARE": Shape.SQUARE}
+    assert Shape.from_string("red") is None
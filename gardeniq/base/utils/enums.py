@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Dict
 from typing import Optional
 from typing import TypeVar
 
@@ -13,18 +14,30 @@ class GardenEnum(Enum):
     - IDE support: Better autocompletion and refactoring
 
     Performance note:
-    - Enum lookup is O(1) and very efficient
+    - `from_string` is O(1): each subclass builds its value index once, on first use
     - Enums are singletons, so memory footprint is minimal
     - Prefer identity checks (is) over equality (==) for best performance
     """
 
     @classmethod
-    def from_string(cls: type[T], value: str) -> Optional[T]:
+    def _value_index(cls: type[T]) -> Dict[str, T]:
+        """Return the value -> member index of this subclass, built on first call."""
+        # Read from the class own namespace: a subclass must not reuse the index of its parent.
+        index = cls.__dict__.get("_garden_value_index")
+        if index is None:
+            index = {member.value: member for member in cls}
+            cls._garden_value_index = index
+        return index
+
+    @classmethod
+    def from_string(cls: type[T], value: str, strict: bool = False) -> Optional[T]:
         """
         Get a Subclass Enum member from a string value (case-insensitive).
 
         Args:
             value (str): The value to look up, case-insensitive.
+            strict (bool, optional): Skip the case folding, for callers that already
+                receive upper-case values (e.g. firmware tokens). Defaults to False.
 
         Returns:
             The enum member with a matching value, or None if no match is found.
@@ -36,11 +49,12 @@ class GardenEnum(Enum):
             >>> Subclass.from_string("INVALID_param")
             <Subclass.INVALID_PARAM: 'INVALID_PARAM'>
 
+            >>> Subclass.from_string("invalid_param", strict=True)
+            None
+
             >>> Subclass.from_string("nonexistent")
             None
         """
-        value = value.upper()
-        for member in cls:
-            if member.value == value:
-                return member
-        return None
+        if not strict:
+            value = value.upper()
+        return cls._value_index().get(value)
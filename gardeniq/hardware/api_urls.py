@@ -1,3 +1,5 @@
+from django.urls import path
+
 from rest_framework.routers import DefaultRouter
 
 from gardeniq.hardware.views import ChannelAPIModelView
@@ -5,6 +7,7 @@ from gardeniq.hardware.views import ControllerAPIModelView
 from gardeniq.hardware.views import ControllerCategoryAPIModelView
 from gardeniq.hardware.views import DeviceAPIModelView
 from gardeniq.hardware.views import PinAPIModelView
+from gardeniq.hardware.views import ProtocolMetricsAPIView
 from gardeniq.hardware.views import SensorAPIModelView
 from gardeniq.hardware.views import SensorCategoryAPIModelView
 
@@ -47,4 +50,7 @@ router.register(
     basename="channels",
 )
 
-urlpatterns = router.urls
+urlpatterns = [
+    path("protocol-metrics/", ProtocolMetricsAPIView.as_view(), name="protocol-metrics"),
+    *router.urls,
+]
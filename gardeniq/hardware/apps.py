@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class HardwareConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "gardeniq.hardware"
+
+    def ready(self) -> None:
+        # Keep the device registry in sync with the database.
+        from . import signals  # noqa: F401
+        from .protocols.metrics import pipeline_metrics
+
+        pipeline_metrics.enabled = settings.PROTOCOL_METRICS_ENABLED
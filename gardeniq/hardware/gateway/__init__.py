@@ -0,0 +1,8 @@
+from .correlation import CommandCorrelator
+from .engine import Gateway
+from .heartbeat import HeartbeatScheduler
+from .heartbeat import TimingWheel
+from .language import LanguageSync
+from .outbound import OutboundJournal
+from .scheduler import CommandClass
+from .scheduler import OutboundScheduler
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from typing import Callable
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from django.conf import settings
+
+from gardeniq.hardware.protocols.errors import CommandError
+from gardeniq.hardware.protocols.errors import CommandTimeoutError
+from gardeniq.hardware.protocols.frame import Frame
+
+logger = logging.getLogger(__name__)
+
+# (device uid, command id)
+CommandKey = Tuple[str, int]
+
+
+class CommandCorrelator:
+    """
+    Match the ACK frames of the devices with the commands waiting for them.
+
+    Up to `window` commands can be in flight on each device at the same time, instead of
+    strict stop-and-wait: `submit` sends a frame and waits for the ACK with the same
+    `command_id`, resolved by `resolve` (registered as a FrameHandler response listener).
+    A command without ACK in time, or answered BUSY, is sent again with an exponential backoff.
+
+    `resolve` is thread-safe: the FrameHandler runs outside of the event loop thread.
+
+    Args:
+        send (Callable[[Frame], None]): Queues a frame on the device port (e.g. `Gateway.send`).
+        window (int, optional): Maximum in-flight commands per device. Defaults to settings.GATEWAY_INFLIGHT_WINDOW.
+        timeout (float, optional): Seconds to wait for an ACK. Defaults to settings.GATEWAY_COMMAND_TIMEOUT.
+        retries (int, optional): Attempts after the first one. Defaults to settings.GATEWAY_COMMAND_RETRIES.
+        backoff (float, optional): Base delay before a retry. Defaults to settings.GATEWAY_RETRY_BACKOFF.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Frame], None],
+        window: Optional[int] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        backoff: Optional[float] = None,
+    ) -> None:
+        self.send = send
+        self.window = window or settings.GATEWAY_INFLIGHT_WINDOW
+        self.timeout = timeout if timeout is not None else settings.GATEWAY_COMMAND_TIMEOUT
+        self.retries = retries if retries is not None else settings.GATEWAY_COMMAND_RETRIES
+        self.backoff = backoff if backoff is not None else settings.GATEWAY_RETRY_BACKOFF
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._windows: Dict[str, asyncio.Semaphore] = {}
+        self._key_locks: Dict[CommandKey, asyncio.Lock] = {}
+        # Submissions holding or waiting for the lock of each key
+        self._key_users: Dict[CommandKey, int] = {}
+        self._pending: Dict[CommandKey, asyncio.Future] = {}
+        self.completed = 0
+        self.retried = 0
+        self.timeouts = 0
+        self.unmatched = 0
+
+    def in_flight(self, device_uid: str) -> int:
+        """Number of commands sent to the device and waiting for their ACK."""
+        return sum(1 for uid, _ in self._pending if uid == device_uid)
+
+    async def submit(self, frame: Frame, timeout: Optional[float] = None) -> Frame:
+        """
+        Send a command frame and return the ACK frame of the device.
+
+        The ACK may be an error response (`has_response_error()`). Only BUSY errors are retried,
+        the last BUSY answer is returned once the retries are exhausted.
+
+        Args:
+            frame (Frame): The command frame to send.
+            timeout (float, optional): Seconds to wait for the ACK of this command. Defaults to `self.timeout`.
+
+        Raises:
+            CommandTimeoutError: If the device did not answer after every retry.
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        busy_response: Optional[Frame] = None
+        self._loop = asyncio.get_running_loop()
+        key = (frame.device_uid, frame.command_id)
+        window = self._windows.get(frame.device_uid)
+        if window is None:
+            window = self._windows[frame.device_uid] = asyncio.Semaphore(self.window)
+        # The ACK only carries the command id: the same command cannot be in flight twice,
+        # a second submission waits for the first one (retries included) before taking a window slot.
+        key_lock = self._key_locks.get(key)
+        if key_lock is None:
+            key_lock = self._key_locks[key] = asyncio.Lock()
+        self._key_users[key] = self._key_users.get(key, 0) + 1
+        try:
+            async with key_lock, window:
+                for attempt in range(self.retries + 1):
+                    if attempt:
+                        self.retried += 1
+                        await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+
+                    future = self._loop.create_future()
+                    self._pending[key] = future
+                    try:
+                        self.send(frame)
+                        response = await asyncio.wait_for(asyncio.shield(future), timeout)
+                    except asyncio.TimeoutError:
+                        logger.warning(
+                            f"No ACK from {frame.device_uid} for command {frame.command_id} (attempt {attempt})"
+                        )
+                        continue
+                    finally:
+                        del self._pending[key]
+                        future.cancel()
+
+                    if response.has_response_error() and response.err_msg is CommandError.BUSY:
+                        busy_response = response
+                        continue
+                    self.completed += 1
+                    return response
+        finally:
+            # Drop the lock of the key once no submission holds or waits for it: one entry per
+            # command in progress, not per command ever sent.
+            self._key_users[key] -= 1
+            if not self._key_users[key]:
+                del self._key_users[key]
+                del self._key_locks[key]
+
+        if busy_response is not None:
+            return busy_response
+        self.timeouts += 1
+        raise CommandTimeoutError(f"Device {frame.device_uid} did not acknowledge command {frame.command_id}")
+
+    def resolve(self, frame: Frame) -> None:
+        """Resolve the command waiting for this ACK frame. Can be called from any thread."""
+        if self._loop is None:
+            self.unmatched += 1
+            return
+        self._loop.call_soon_threadsafe(self._resolve, frame)
+
+    def _resolve(self, frame: Frame) -> None:
+        future = self._pending.get((frame.device_uid, frame.command_id))
+        if future is None or future.done():
+            # Late ACK of a timed out attempt, or an ACK nobody asked for.
+            self.unmatched += 1
+            return
+        future.set_result(frame)
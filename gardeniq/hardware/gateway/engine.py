@@ -0,0 +1,423 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from asgiref.sync import sync_to_async
+
+from gardeniq.hardware.gateway.correlation import CommandCorrelator
+from gardeniq.hardware.gateway.heartbeat import HeartbeatScheduler
+from gardeniq.hardware.gateway.language import LanguageSync
+from gardeniq.hardware.gateway.language import SyncResult
+from gardeniq.hardware.gateway.outbound import OutboundJournal
+from gardeniq.hardware.gateway.outbound import enable_sqlite_wal
+from gardeniq.hardware.gateway.outbound import prune_finished_commands
+from gardeniq.hardware.gateway.scheduler import CommandClass
+from gardeniq.hardware.gateway.scheduler import OutboundScheduler
+from gardeniq.hardware.models import Device
+from gardeniq.hardware.protocols.errors import FrameProcessingError
+from gardeniq.hardware.protocols.frame import CommandState
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameEncoding
+from gardeniq.hardware.protocols.frame import FrameType
+from gardeniq.hardware.protocols.metrics import pipeline_metrics
+from gardeniq.hardware.protocols.usb import FrameHandler
+from gardeniq.hardware.protocols.usb import FrameParser
+from gardeniq.hardware.protocols.usb.parser import encoding_option
+from gardeniq.hardware.protocols.usb.transport import SerialTransport
+from gardeniq.hardware.registry import device_registry
+
+logger = logging.getLogger(__name__)
+
+
+class Gateway:
+    """
+    Single process asyncio gateway between the serial devices and the frame handler.
+
+    One SerialTransport task runs per device port, all of them feed decoded frames to one shared
+    queue consumed in batches by `FrameHandler.handle_batch`. The handler is synchronous (ORM),
+    it runs in the single thread used by `sync_to_async(thread_sensitive=True)`, so database
+    access stays serialized while the serial I/O of every port goes on.
+
+    `send` writes a frame right away. `request` goes through the OutboundScheduler (priorities and
+    backpressure) then the CommandCorrelator, and returns the ACK of the device. `execute` does the
+    same for an order, persisted first by the OutboundJournal: the commands not acknowledged when the
+    gateway stops are sent again at the next start (`replay_outbound`). The finished commands are
+    deleted after settings.GATEWAY_OUTBOUND_RETENTION_DAYS.
+
+    Frames are sent in the encoding negotiated with each device: every PING offers the binary
+    encodings of settings.GATEWAY_FRAME_ENCODINGS, and the device names the one it accepts in its
+    response (none: TEXT). The port switches to it as soon as the response is received.
+
+    Args:
+        handler (FrameHandler, optional): Handler of the device responses. Defaults to a new FrameHandler.
+        baudrate (int, optional): Baudrate of every port. Defaults to settings.BAUDRATE.
+        transport_klass (type[SerialTransport], optional): Transport class, mainly for tests.
+        outbound_replay (bool, optional): Send again the pending commands of the journal at start.
+            Defaults to settings.GATEWAY_OUTBOUND_REPLAY_ENABLED.
+        language_sync (bool, optional): Run the language sync of the devices.
+            Defaults to settings.GATEWAY_LANGUAGE_SYNC_ENABLED.
+        sqlite_wal (bool, optional): Switch a SQLite database to WAL at start.
+            Defaults to settings.GATEWAY_OUTBOUND_SQLITE_WAL.
+
+    Example:
+        >>> gateway = Gateway()
+        >>> asyncio.run(gateway.run())  # Until gateway.stop() is called
+    """
+
+    def __init__(
+        self,
+        handler: Optional[FrameHandler] = None,
+        baudrate: Optional[int] = None,
+        transport_klass: type[SerialTransport] = SerialTransport,
+        outbound_replay: Optional[bool] = None,
+        language_sync: Optional[bool] = None,
+        sqlite_wal: Optional[bool] = None,
+    ) -> None:
+        self.handler = handler or FrameHandler()
+        self.baudrate = baudrate or settings.BAUDRATE
+        self.transport_klass = transport_klass
+        self.outbound_replay = settings.GATEWAY_OUTBOUND_REPLAY_ENABLED if outbound_replay is None else outbound_replay
+        self.language_sync = settings.GATEWAY_LANGUAGE_SYNC_ENABLED if language_sync is None else language_sync
+        self.sqlite_wal = settings.GATEWAY_OUTBOUND_SQLITE_WAL if sqlite_wal is None else sqlite_wal
+        self.transports: Dict[str, SerialTransport] = {}
+        # device uid -> port path, used to route outbound frames
+        self.device_paths: Dict[str, str] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._frames: Optional[asyncio.Queue[Frame]] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self.correlator = CommandCorrelator(self.send)
+        self.handler.add_response_listener(self.correlator.resolve)
+        self.scheduler = OutboundScheduler(self.correlator.submit, concurrency=self.correlator.window)
+        self.heartbeat = HeartbeatScheduler(self._ping, self._mark_offline)
+        self.language = LanguageSync(self.request)
+        self.outbound = OutboundJournal()
+        self._replays: Set[asyncio.Task] = set()
+        self.encodings = [FrameEncoding(name) for name in settings.GATEWAY_FRAME_ENCODINGS]
+        self.frames_received = 0
+        self.frames_dropped = 0
+        self.frames_handled = 0
+        self.handling_errors = 0
+
+    @staticmethod
+    def load_devices() -> List[Tuple[str, str]]:
+        """Return the (uid, path) of every registered device."""
+        return list(Device.objects.values_list("uid", "path"))
+
+    async def run(self, paths: Optional[Iterable[str]] = None) -> None:
+        """
+        Start one transport per port and handle the received frames until `stop` is called.
+
+        Args:
+            paths (Iterable[str], optional): Ports to open. Defaults to the paths of every registered device.
+        """
+        self._frames = asyncio.Queue(maxsize=settings.GATEWAY_FRAME_QUEUE_SIZE)
+        self._stopped = asyncio.Event()
+
+        await sync_to_async(device_registry.warm)()
+        devices = await sync_to_async(self.load_devices)()
+        self.scheduler.action_types = await sync_to_async(self.scheduler.load_action_types)()
+        self.device_paths.update(devices)
+        if paths is None:
+            paths = {path for _, path in devices}
+
+        for path in paths:
+            self.add_port(path)
+
+        if self.sqlite_wal:
+            await sync_to_async(enable_sqlite_wal, thread_sensitive=True)()
+        journal = asyncio.create_task(self.outbound.run())
+        if self.outbound_replay:
+            await self.replay_outbound()
+
+        consumer = asyncio.create_task(self._consume())
+        flusher = asyncio.create_task(self._flush_liveness())
+        telemetry_flusher = asyncio.create_task(self._flush_telemetry())
+        background = []
+        if settings.GATEWAY_HEARTBEAT_ENABLED:
+            for uid, _ in devices:
+                self.heartbeat.add(uid)
+            background.append(asyncio.create_task(self.heartbeat.run()))
+        if self.language_sync:
+            background.append(asyncio.create_task(self._sync_languages()))
+        if settings.GATEWAY_OUTBOUND_RETENTION_DAYS is not None:
+            background.append(asyncio.create_task(self._prune_outbound()))
+        if pipeline_metrics.enabled:
+            background.append(asyncio.create_task(self._publish_metrics()))
+        try:
+            await self._stopped.wait()
+        finally:
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+            flusher.cancel()
+            telemetry_flusher.cancel()
+            for path in list(self.transports):
+                self.remove_port(path)
+            await self.scheduler.close()
+            # The commands cancelled by the scheduler stay pending in the journal.
+            await asyncio.gather(*self._replays, return_exceptions=True)
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            self._tasks.clear()
+            # Handle the frames already received before leaving.
+            await self._frames.join()
+            consumer.cancel()
+            await asyncio.gather(consumer, flusher, telemetry_flusher, return_exceptions=True)
+            # Write the last_seen and the sensor readings still held in memory.
+            await sync_to_async(self.handler.liveness.flush, thread_sensitive=True)()
+            await sync_to_async(self.handler.telemetry.flush, thread_sensitive=True)()
+            journal.cancel()
+            await asyncio.gather(journal, return_exceptions=True)
+            await self.outbound.flush()
+            if pipeline_metrics.enabled:
+                self._write_metrics()
+
+    def stop(self) -> None:
+        """Ask `run` to close every port and return."""
+        if self._stopped is not None:
+            self._stopped.set()
+
+    def add_port(self, path: str) -> None:
+        """Start reading and writing a port, if not done yet."""
+        if path in self.transports:
+            return
+        transport = self.transport_klass(path, self._on_frame, baudrate=self.baudrate)
+        self.transports[path] = transport
+        self._tasks[path] = asyncio.create_task(transport.run(), name=f"serial:{path}")
+
+    def remove_port(self, path: str) -> None:
+        """Stop the transport of a port. Its task ends once the port is closed."""
+        transport = self.transports.pop(path, None)
+        if transport is not None:
+            transport.stop()
+
+    def send(self, frame: Frame) -> None:
+        """
+        Serialize a frame and queue it on the port of its device.
+
+        Raises:
+            FrameProcessingError: If the port of the device is unknown or not open by the gateway.
+        """
+        path = self.device_paths.get(frame.device_uid)
+        transport = self.transports.get(path) if path else None
+        if transport is None:
+            raise FrameProcessingError(f"No open port for device: {frame.device_uid}")
+        transport.write(FrameParser.encode(frame, transport.encoding))
+
+    async def request(self, frame: Frame, command_class: Optional[CommandClass] = None) -> Frame:
+        """
+        Schedule a command frame and wait for the ACK of its device, with retries.
+
+        Waits for room when the device already has a full queue of commands of the same class.
+
+        Args:
+            frame (Frame): The command frame to send.
+            command_class (CommandClass, optional): Overrides the class given by the action type of the order.
+
+        Raises:
+            FrameProcessingError: If the port of the device is unknown or not open by the gateway.
+            CommandTimeoutError: If the device did not answer after every retry.
+        """
+        return await self.scheduler.submit(frame, command_class)
+
+    async def execute(self, frame: Frame, command_class: Optional[CommandClass] = None) -> Frame:
+        """
+        Persist the CMD frame of an order in the outbound journal, then `request` it.
+
+        The command is committed before it is scheduled, and its state follows the answer of the
+        device (`acked` or `failed`). If the gateway stops first, it is sent again at the next start.
+
+        Args:
+            frame (Frame): The CMD frame of the order.
+            command_class (CommandClass, optional): Overrides the class given by the action type of the order.
+
+        Raises:
+            ValueError: If the frame is not the CMD frame of an order.
+            FrameProcessingError: If the device is unknown, or its port is not open by the gateway.
+            CommandTimeoutError: If the device did not answer after every retry.
+        """
+        pk = await self.outbound.enqueue(frame, command_class)
+        return await self._execute(pk, frame, command_class)
+
+    async def replay_outbound(self) -> int:
+        """
+        Send again the commands of the journal that were not acknowledged, oldest first. Their answers
+        update the journal in the background.
+
+        Returns:
+            int: Number of commands sent again.
+        """
+        commands = await self.outbound.replay()
+        for command in commands:
+            task = asyncio.create_task(self._execute(command.pk, command.frame, command.command_class))
+            self._replays.add(task)
+            task.add_done_callback(self._replays.discard)
+        if commands:
+            logger.info(f"{len(commands)} outbound commands replayed from the journal")
+        return len(commands)
+
+    async def _execute(self, pk: int, frame: Frame, command_class: Optional[CommandClass]) -> Frame:
+        self.outbound.mark_sent(pk)
+        try:
+            response = await self.request(frame, command_class)
+        except FrameProcessingError as e:
+            self.outbound.mark_failed(pk, str(e))
+            raise
+        if response.has_response_error():
+            self.outbound.mark_failed(pk, response.err_msg.value if response.err_msg else "Unknown error")
+        else:
+            self.outbound.mark_acked(pk)
+        return response
+
+    async def sync_language(self, device_uid: str) -> SyncResult:
+        """
+        Send the orders added, changed or removed since the last language sync of a device.
+
+        Raises:
+            FrameProcessingError: If the port of the device is unknown or not open by the gateway.
+            CommandTimeoutError: If the device stopped answering.
+        """
+        return await self.language.sync(device_uid)
+
+    def _on_frame(self, path: str, frame: Frame) -> None:
+        self.frames_received += 1
+        # A device answering on a port is the most reliable routing information, but only an intact
+        # frame names its device: a corrupted uid must not reroute the commands of another one.
+        if self._is_intact(frame):
+            self.device_paths[frame.device_uid] = path
+            # A garbled ENC= token would fall back to TEXT while the device keeps its encoding.
+            if frame.command_state is CommandState.OK and frame.is_ping_response():
+                self._negotiate(path, frame)
+        try:
+            self._frames.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.frames_dropped += 1
+            logger.warning(f"Frame queue full, dropped frame from {frame.device_uid} on {path}")
+
+    @staticmethod
+    def _is_intact(frame: Frame) -> bool:
+        # The checksum computed by the parser is reused: no second pass over the frame.
+        try:
+            return frame.verify_checksum()
+        except ValueError:
+            return False
+
+    async def _consume(self) -> None:
+        handle = sync_to_async(self._handle, thread_sensitive=True)
+        while True:
+            # Handle the frames already waiting together: one query per batch instead of per frame.
+            frames = [await self._frames.get()]
+            while len(frames) < settings.GATEWAY_HANDLE_BATCH_SIZE and not self._frames.empty():
+                frames.append(self._frames.get_nowait())
+            try:
+                await handle(frames)
+            finally:
+                for _ in frames:
+                    self._frames.task_done()
+
+    def _negotiate(self, path: str, frame: Frame) -> None:
+        transport = self.transports.get(path)
+        if transport is None:
+            return
+        encoding = frame.encoding if frame.encoding in self.encodings else FrameEncoding.TEXT
+        if encoding is not transport.encoding:
+            logger.info(f"Device {frame.device_uid} on {path} now uses the {encoding.value} encoding")
+            transport.encoding = encoding
+
+    async def _ping(self, device_uid: str) -> Frame:
+        options = [encoding_option(self.encodings)] if self.encodings else []
+        frame = Frame(
+            frame_type=FrameType.PING, device_uid=device_uid, command_id=0, command_slug="", args_values=options
+        )
+        return await self.request(frame)
+
+    async def _mark_offline(self, device_uid: str) -> None:
+        await sync_to_async(self._set_offline, thread_sensitive=True)(device_uid)
+
+    def _set_offline(self, device_uid: str) -> None:
+        close_old_connections()
+        self.handler.liveness.record(device_registry.get_device(device_uid), on=False)
+
+    async def _flush_liveness(self) -> None:
+        # Write the coalesced last_seen even when no frame comes to trigger `flush_due`.
+        flush = sync_to_async(self.handler.liveness.flush_due, thread_sensitive=True)
+        while True:
+            await asyncio.sleep(self.handler.liveness.flush_interval)
+            try:
+                await flush()
+            except Exception:
+                logger.exception("Failed to flush the device liveness")
+
+    async def _flush_telemetry(self) -> None:
+        # Write the buffered readings even when no frame comes to trigger `flush_due`.
+        flush = sync_to_async(self.handler.telemetry.flush_due, thread_sensitive=True)
+        while True:
+            await asyncio.sleep(self.handler.telemetry.flush_interval)
+            try:
+                await flush()
+            except Exception:
+                logger.exception("Failed to flush the sensor readings")
+
+    async def _sync_languages(self) -> None:
+        # First sync at startup, then catch up with the edits of the orders.
+        while True:
+            try:
+                await self.language.sync_all(list(self.device_paths))
+            except Exception:
+                logger.exception("Failed to sync the language of the devices")
+            await asyncio.sleep(settings.GATEWAY_LANGUAGE_SYNC_INTERVAL)
+
+    async def _prune_outbound(self) -> None:
+        # The journal only needs its pending commands for the replay.
+        prune = sync_to_async(self._prune_finished_commands, thread_sensitive=True)
+        while True:
+            try:
+                deleted = await prune()
+            except Exception:
+                logger.exception("Failed to delete the finished outbound commands")
+            else:
+                if deleted:
+                    logger.info(f"{deleted} finished outbound commands deleted")
+            await asyncio.sleep(settings.GATEWAY_OUTBOUND_PRUNE_INTERVAL)
+
+    @staticmethod
+    def _prune_finished_commands() -> int:
+        close_old_connections()
+        return prune_finished_commands(timezone.now() - timedelta(days=settings.GATEWAY_OUTBOUND_RETENTION_DAYS))
+
+    async def _publish_metrics(self) -> None:
+        # The metrics live in this process: publish them for the `protocol_metrics` command and the API.
+        while True:
+            await asyncio.sleep(settings.PROTOCOL_METRICS_PUBLISH_INTERVAL)
+            self._write_metrics()
+
+    @staticmethod
+    def _write_metrics() -> None:
+        try:
+            pipeline_metrics.publish(settings.PROTOCOL_METRICS_PATH)
+        except OSError:
+            logger.exception(f"Failed to publish the protocol metrics to {settings.PROTOCOL_METRICS_PATH}")
+
+    def _handle(self, frames: List[Frame]) -> None:
+        # Long-running process: drop the database connection if it is broken or too old.
+        close_old_connections()
+        try:
+            errors = self.handler.handle_batch(frames)
+        except Exception:
+            self.handling_errors += len(frames)
+            logger.exception(f"Unexpected error while handling a batch of {len(frames)} frames")
+            return
+
+        for frame, e in errors:
+            logger.error(f"Frame from {frame.device_uid} rejected: {e}")
+        self.handling_errors += len(errors)
+        self.frames_handled += len(frames) - len(errors)
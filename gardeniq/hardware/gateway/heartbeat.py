@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import math
+import random
+from dataclasses import dataclass
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import List
+from typing import Optional
+from typing import Set
+
+from django.conf import settings
+
+from gardeniq.hardware.protocols.errors import CommandError
+from gardeniq.hardware.protocols.errors import FrameProcessingError
+from gardeniq.hardware.protocols.frame import Frame
+
+logger = logging.getLogger(__name__)
+
+SendPing = Callable[[str], Awaitable[Frame]]
+OfflineCallback = Callable[[str], Awaitable[None]]
+
+
+class TimingWheel:
+    """
+    Hashed timing wheel: `slots` buckets of `tick` seconds, one bucket is expired per tick.
+
+    Delays are limited to `slots - 1` ticks, so every key of the expired bucket is due: the cost
+    of `advance` is the number of due keys, whatever the number of scheduled keys.
+    Scheduling, rescheduling and cancelling a key are O(1).
+
+    Args:
+        slots (int): Number of buckets.
+    """
+
+    def __init__(self, slots: int) -> None:
+        if slots < 2:
+            raise ValueError("A timing wheel needs at least 2 slots")
+        self._buckets: List[Set[Hashable]] = [set() for _ in range(slots)]
+        # key -> index of its bucket
+        self._slots: Dict[Hashable, int] = {}
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slots
+
+    @property
+    def max_ticks(self) -> int:
+        return len(self._buckets) - 1
+
+    def schedule(self, key: Hashable, ticks: int) -> None:
+        """Expire `key` in `ticks` ticks (at least 1, at most `max_ticks`), replacing its previous schedule."""
+        ticks = min(max(ticks, 1), self.max_ticks)
+        self.cancel(key)
+        slot = (self._cursor + ticks) % len(self._buckets)
+        self._buckets[slot].add(key)
+        self._slots[key] = slot
+
+    def cancel(self, key: Hashable) -> None:
+        slot = self._slots.pop(key, None)
+        if slot is not None:
+            self._buckets[slot].discard(key)
+
+    def advance(self) -> List[Hashable]:
+        """Move to the next tick and return the keys expiring on it."""
+        self._cursor = (self._cursor + 1) % len(self._buckets)
+        bucket = self._buckets[self._cursor]
+        expired = list(bucket)
+        bucket.clear()
+        for key in expired:
+            del self._slots[key]
+        return expired
+
+
+@dataclass(slots=True)
+class _Heartbeat:
+    interval: float
+    misses: int = 0
+    offline: bool = False
+
+
+class HeartbeatScheduler:
+    """
+    Ping every device at its own pace, spread over time with a timing wheel.
+
+    Devices are added with a random first delay, then each ping is scheduled `interval` seconds
+    (plus or minus `jitter`) after the previous answer, so pings never come in bursts. The interval
+    adapts to each device:
+
+    - an answered ping multiplies it by `backoff`, up to `max_interval` (stable boards are pinged less)
+    - a TIMEOUT error or a ping without answer brings it back to `min_interval`
+
+    After `max_misses` pings without answer in a row, `on_offline` is awaited once, until the device
+    answers again.
+
+    Args:
+        send_ping (SendPing): Sends a ping to a device uid and returns the ACK (e.g. through `Gateway.request`).
+        on_offline (OfflineCallback): Called with the uid of a device that stopped answering.
+        interval (float, optional): First interval. Defaults to settings.GATEWAY_HEARTBEAT_INTERVAL.
+        min_interval (float, optional): Defaults to settings.GATEWAY_HEARTBEAT_MIN_INTERVAL.
+        max_interval (float, optional): Defaults to settings.GATEWAY_HEARTBEAT_MAX_INTERVAL.
+        max_misses (int, optional): Defaults to settings.GATEWAY_HEARTBEAT_MAX_MISSES.
+        tick (float, optional): Wheel resolution in seconds. Defaults to settings.GATEWAY_HEARTBEAT_TICK.
+    """
+
+    def __init__(
+        self,
+        send_ping: SendPing,
+        on_offline: OfflineCallback,
+        interval: Optional[float] = None,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        max_misses: Optional[int] = None,
+        tick: Optional[float] = None,
+    ) -> None:
+        self.send_ping = send_ping
+        self.on_offline = on_offline
+        self.min_interval = min_interval or settings.GATEWAY_HEARTBEAT_MIN_INTERVAL
+        self.max_interval = max_interval or settings.GATEWAY_HEARTBEAT_MAX_INTERVAL
+        interval = interval or settings.GATEWAY_HEARTBEAT_INTERVAL
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+        self.max_misses = max_misses or settings.GATEWAY_HEARTBEAT_MAX_MISSES
+        self.tick = tick or settings.GATEWAY_HEARTBEAT_TICK
+        self.jitter = settings.GATEWAY_HEARTBEAT_JITTER
+        self.backoff = settings.GATEWAY_HEARTBEAT_BACKOFF
+        slots = math.ceil(self.max_interval * (1 + self.jitter) / self.tick) + 1
+        self.wheel = TimingWheel(slots)
+        self._devices: Dict[str, _Heartbeat] = {}
+        self._pings: Set[asyncio.Task] = set()
+        self.sent = 0
+        self.answered = 0
+        self.missed = 0
+
+    def add(self, device_uid: str) -> None:
+        """Start pinging a device, after a random delay within the interval."""
+        if device_uid in self._devices:
+            return
+        self._devices[device_uid] = _Heartbeat(self.interval)
+        self.wheel.schedule(device_uid, self._ticks(random.uniform(0, self.interval)))
+
+    def remove(self, device_uid: str) -> None:
+        self._devices.pop(device_uid, None)
+        self.wheel.cancel(device_uid)
+
+    def interval_of(self, device_uid: str) -> float:
+        return self._devices[device_uid].interval
+
+    async def run(self) -> None:
+        """Expire one wheel slot per tick and ping the due devices, until cancelled."""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        try:
+            while True:
+                # Absolute deadlines: the time spent starting the pings does not shift the wheel.
+                next_tick += self.tick
+                await asyncio.sleep(max(0.0, next_tick - loop.time()))
+                self.step()
+        finally:
+            for task in self._pings:
+                task.cancel()
+            await asyncio.gather(*self._pings, return_exceptions=True)
+
+    def step(self) -> List[str]:
+        """Advance the wheel by one tick and start a ping for every due device."""
+        due = [uid for uid in self.wheel.advance() if uid in self._devices]
+        for uid in due:
+            task = asyncio.create_task(self._ping(uid), name=f"heartbeat:{uid}")
+            self._pings.add(task)
+            task.add_done_callback(self._pings.discard)
+        return due
+
+    def _ticks(self, delay: float) -> int:
+        return max(1, round(delay / self.tick))
+
+    async def _ping(self, device_uid: str) -> None:
+        self.sent += 1
+        try:
+            response = await self.send_ping(device_uid)
+        except FrameProcessingError as e:
+            # No answer after the retries (CommandTimeoutError), or no open port.
+            logger.warning(f"Heartbeat of {device_uid} missed: {e}")
+            response = None
+        except Exception:
+            logger.exception(f"Heartbeat of {device_uid} failed")
+            response = None
+
+        heartbeat = self._devices.get(device_uid)
+        if heartbeat is None:
+            # Removed while the ping was in flight.
+            return
+
+        went_offline = False
+        if response is None:
+            self.missed += 1
+            heartbeat.misses += 1
+            heartbeat.interval = self.min_interval
+            went_offline = heartbeat.misses >= self.max_misses and not heartbeat.offline
+            heartbeat.offline = heartbeat.offline or went_offline
+        else:
+            self.answered += 1
+            heartbeat.misses = 0
+            heartbeat.offline = False
+            if response.err_msg is CommandError.TIMEOUT:
+                heartbeat.interval = self.min_interval
+            else:
+                heartbeat.interval = min(heartbeat.interval * self.backoff, self.max_interval)
+
+        delay = heartbeat.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        self.wheel.schedule(device_uid, self._ticks(delay))
+
+        if went_offline:
+            logger.warning(f"Device {device_uid} missed {heartbeat.misses} heartbeats, marked offline")
+            try:
+                await self.on_offline(device_uid)
+            except Exception:
+                logger.exception(f"Failed to mark device {device_uid} offline")
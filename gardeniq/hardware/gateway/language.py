@@ -0,0 +1,219 @@
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from asgiref.sync import sync_to_async
+
+from gardeniq.hardware.models import DeviceOrderSync
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameType
+from gardeniq.hardware.protocols.settings import fields_for_frame
+from gardeniq.hardware.registry import device_registry
+from gardeniq.orderlg.models import Order
+
+logger = logging.getLogger(__name__)
+
+SendRequest = Callable[[Frame], Awaitable[Frame]]
+# order pk -> digest
+Manifest = Dict[int, str]
+
+
+def order_fields_values(order: Order) -> Tuple[str, ...]:
+    """
+    Values of the LG_INIT fields of an order, in the order of `fields_for_frame["Order"]`.
+
+    A null value is sent empty. A declared field the model does not have raises AttributeError:
+    the device would learn an order with a value that does not exist.
+    """
+    values = []
+    for name in fields_for_frame["Order"]:
+        value = getattr(order, name)
+        values.append("" if value is None else str(value))
+    return tuple(values)
+
+
+def fields_digest(fields_values: Tuple[str, ...]) -> str:
+    """Content hash of LG_INIT fields values (32 hexadecimal characters)."""
+    # The unit separator cannot be confused with a field value, unlike the ';' of the frame.
+    return hashlib.blake2b("\x1f".join(fields_values).encode(), digest_size=16).hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
+class OrderEntry:
+    pk: int
+    digest: str
+    fields_values: Tuple[str, ...]
+
+
+@dataclass(slots=True)
+class SyncResult:
+    sent: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    failed: int = 0
+
+
+class LanguageSync:
+    """
+    Push the order language to the devices with LG_INIT frames, sending only what changed.
+
+    Every enabled Order gets a digest of its LG_INIT fields (see `fields_for_frame`). The digest
+    acknowledged by each device is stored in DeviceOrderSync, so a sync only sends the orders that
+    were added or changed since, and a removal for the orders acknowledged but gone (deleted or
+    disabled). A removal is an LG_INIT frame carrying only the pk of the order.
+
+    The manifest (entries of the orders) is loaded once for the whole fleet and the frame bodies
+    are cached by the parser (`_lg_init_body`), so an edited order is encoded once, not once per device.
+
+    Frames go through `request` (`Gateway.request`): LG_INIT frames of a device all have the
+    command id -1, the correlator sends them one at a time.
+
+    Args:
+        request (SendRequest): Sends a frame and returns the ACK of the device.
+    """
+
+    def __init__(self, request: SendRequest) -> None:
+        self.request = request
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.sent = 0
+        self.removed = 0
+        self.failed = 0
+
+    @staticmethod
+    def load_manifest() -> Dict[int, OrderEntry]:
+        """Return the entry of every enabled order, by pk."""
+        entries = {}
+        for order in Order.enabled.order_by("pk"):
+            fields_values = order_fields_values(order)
+            entries[order.pk] = OrderEntry(order.pk, fields_digest(fields_values), fields_values)
+        return entries
+
+    @staticmethod
+    def load_acked(device_uids: Iterable[str]) -> Dict[str, Manifest]:
+        """Return the digests acknowledged by each device, by device uid."""
+        device_uids = list(device_uids)
+        acked: Dict[str, Manifest] = {uid: {} for uid in device_uids}
+        rows = DeviceOrderSync.objects.filter(device__uid__in=device_uids).values_list(
+            "device__uid", "order_pk", "digest"
+        )
+        for uid, order_pk, digest in rows:
+            acked[uid][order_pk] = digest
+        return acked
+
+    @staticmethod
+    def save_acked(device_uid: str, acked: Manifest, removed: List[int]) -> None:
+        """Store the digests acknowledged by a device and drop the removals it acknowledged."""
+        device = device_registry.get_device(device_uid)
+        if acked:
+            DeviceOrderSync.objects.bulk_create(
+                [DeviceOrderSync(device=device, order_pk=pk, digest=digest) for pk, digest in acked.items()],
+                update_conflicts=True,
+                unique_fields=["device", "order_pk"],
+                update_fields=["digest", "synced_at"],
+            )
+        if removed:
+            DeviceOrderSync.objects.filter(device=device, order_pk__in=removed).delete()
+
+    @staticmethod
+    def diff(manifest: Dict[int, OrderEntry], acked: Manifest) -> Tuple[List[OrderEntry], List[int]]:
+        """Return the entries to send (added or changed) and the pks of the orders to remove."""
+        changed = [entry for pk, entry in manifest.items() if acked.get(pk) != entry.digest]
+        removed = sorted(pk for pk in acked if pk not in manifest)
+        return changed, removed
+
+    async def sync(self, device_uid: str, manifest: Optional[Dict[int, OrderEntry]] = None) -> SyncResult:
+        """
+        Send the changes of the order language to a device.
+
+        The orders acknowledged before an error are saved, the next sync resumes after them.
+
+        Args:
+            device_uid (str): The device to sync.
+            manifest (Dict[int, OrderEntry], optional): Entries loaded by `load_manifest`, to share between devices.
+
+        Raises:
+            FrameProcessingError: If the port of the device is unknown or not open.
+            CommandTimeoutError: If the device stopped answering, the sync is aborted.
+        """
+        lock = self._locks.get(device_uid)
+        if lock is None:
+            lock = self._locks[device_uid] = asyncio.Lock()
+        async with lock:
+            if manifest is None:
+                manifest = await sync_to_async(self.load_manifest)()
+            acked = (await sync_to_async(self.load_acked)([device_uid]))[device_uid]
+            changed, removed = self.diff(manifest, acked)
+            result = SyncResult(unchanged=len(manifest) - len(changed))
+
+            done: Manifest = {}
+            gone: List[int] = []
+            try:
+                for entry in changed:
+                    if await self._push(device_uid, entry.fields_values):
+                        done[entry.pk] = entry.digest
+                        result.sent += 1
+                    else:
+                        result.failed += 1
+                for pk in removed:
+                    if await self._push(device_uid, (str(pk),)):
+                        gone.append(pk)
+                        result.removed += 1
+                    else:
+                        result.failed += 1
+            finally:
+                if done or gone:
+                    await sync_to_async(self.save_acked)(device_uid, done, gone)
+                self.sent += result.sent
+                self.removed += result.removed
+                self.failed += result.failed
+
+            if changed or removed:
+                logger.info(
+                    f"Language of {device_uid} synced: {result.sent} sent, {result.removed} removed, "
+                    f"{result.failed} failed, {result.unchanged} unchanged"
+                )
+            return result
+
+    async def sync_all(self, device_uids: Iterable[str]) -> Dict[str, SyncResult]:
+        """
+        Sync every device that misses a change, concurrently. Errors are logged per device.
+
+        Returns:
+            Dict[str, SyncResult]: The result of each synced device, by uid.
+        """
+        manifest = await sync_to_async(self.load_manifest)()
+        acked = await sync_to_async(self.load_acked)(device_uids)
+        outdated = [uid for uid, digests in acked.items() if any(self.diff(manifest, digests))]
+
+        results = await asyncio.gather(*(self.sync(uid, manifest) for uid in outdated), return_exceptions=True)
+        synced = {}
+        for uid, result in zip(outdated, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Language sync of {uid} failed: {result}")
+            else:
+                synced[uid] = result
+        return synced
+
+    async def _push(self, device_uid: str, fields_values: Tuple[str, ...]) -> bool:
+        frame = Frame(
+            frame_type=FrameType.LG_INIT,
+            device_uid=device_uid,
+            command_id=-1,
+            command_slug="",
+            args_values=[],
+            model="Order",
+            fields_values=fields_values,
+        )
+        response = await self.request(frame)
+        if response.has_response_error():
+            logger.error(f"Device {device_uid} rejected order {fields_values[0]}: {response.err_msg}")
+            return False
+        return True
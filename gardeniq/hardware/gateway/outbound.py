@@ -0,0 +1,309 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db import connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from asgiref.sync import sync_to_async
+
+from gardeniq.hardware.gateway.scheduler import CommandClass
+from gardeniq.hardware.models import OutboundCommand
+from gardeniq.hardware.protocols.errors import FrameProcessingError
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameType
+from gardeniq.hardware.registry import device_registry
+
+logger = logging.getLogger(__name__)
+
+# Length of OutboundCommand.error
+MAX_ERROR_LENGTH = 255
+
+
+@dataclass(slots=True)
+class _Transition:
+    state: str
+    error: str
+    # Times the command was handed to the scheduler since the last commit.
+    sends: int
+
+
+@dataclass(slots=True)
+class JournaledCommand:
+    """A command still pending in the journal, read back by `OutboundJournal.replay`."""
+
+    pk: int
+    frame: Frame
+    command_class: Optional[CommandClass]
+    state: str
+
+
+def enable_sqlite_wal() -> bool:
+    """
+    Switch a SQLite database to WAL journaling, a persistent setting of the database file.
+
+    In WAL mode a commit appends to the log instead of rewriting the database: the readers (the web
+    process) are not blocked by the gateway writes, and each commit costs one sequential write.
+
+    Returns:
+        bool: Whether the database is in WAL mode (always False for another engine).
+    """
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        mode = cursor.fetchone()[0]
+    if mode != "wal":
+        logger.warning(f"SQLite database stays in {mode} journal mode")
+    return mode == "wal"
+
+
+def prune_finished_commands(before: datetime, chunk_size: int = 5000) -> int:
+    """
+    Delete the acknowledged and failed commands created before `before`, `chunk_size` rows per transaction.
+
+    The journal only needs its pending commands: without pruning, the finished ones pile up forever.
+    Run every settings.GATEWAY_OUTBOUND_PRUNE_INTERVAL seconds by the gateway owning the journal (see
+    `Gateway`), for the commands older than settings.GATEWAY_OUTBOUND_RETENTION_DAYS.
+
+    Returns:
+        int: The number of commands deleted.
+    """
+    finished = OutboundCommand.objects.filter(
+        state__in=(OutboundCommand.ACKED, OutboundCommand.FAILED), created_at__lt=before
+    )
+    total = 0
+    while True:
+        pks = list(finished.order_by("pk").values_list("pk", flat=True)[:chunk_size])
+        if not pks:
+            return total
+        with transaction.atomic():
+            deleted, _ = OutboundCommand.objects.filter(pk__in=pks).delete()
+        total += deleted
+
+
+class OutboundJournal:
+    """
+    Durable queue of the commands sent to the devices, persisted as OutboundCommand rows.
+
+    Writes are group-committed: `enqueue` and the state transitions (`mark_sent`, `mark_acked`,
+    `mark_failed`) are buffered and written together, in one transaction, by the `run` task, at most
+    `commit_interval` seconds after the first of them (or as soon as `commit_size` writes are waiting).
+    Many commands then share one commit, instead of one fsync per frame. Successive transitions of a
+    command waiting for the same commit are collapsed into the last one.
+
+    `enqueue` only returns once the command is committed: a command the caller was told about is never
+    lost. A transition is not waited for: if the process stops before its commit, the command is still
+    pending and `replay` returns it, the device may then receive it twice (at least once delivery).
+
+    Without a running `run` task, `enqueue` commits right away.
+
+    Args:
+        commit_interval (float, optional): Seconds a write waits for others.
+            Defaults to settings.GATEWAY_OUTBOUND_COMMIT_INTERVAL.
+        commit_size (int, optional): Pending writes committed without waiting.
+            Defaults to settings.GATEWAY_OUTBOUND_COMMIT_SIZE.
+    """
+
+    def __init__(self, commit_interval: Optional[float] = None, commit_size: Optional[int] = None) -> None:
+        self.commit_interval = (
+            commit_interval if commit_interval is not None else settings.GATEWAY_OUTBOUND_COMMIT_INTERVAL
+        )
+        self.commit_size = commit_size or settings.GATEWAY_OUTBOUND_COMMIT_SIZE
+        self._inserts: List[Tuple[Frame, Optional[CommandClass], asyncio.Future]] = []
+        # command pk -> last transition waiting for the commit
+        self._transitions: Dict[int, _Transition] = {}
+        self._has_writes = asyncio.Event()
+        self._full = asyncio.Event()
+        self._running = False
+        self.commits = 0
+        self.writes = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of writes waiting for the next commit."""
+        return len(self._inserts) + len(self._transitions)
+
+    async def enqueue(self, frame: Frame, command_class: Optional[CommandClass] = None) -> int:
+        """
+        Persist a command frame in the `queued` state.
+
+        Args:
+            frame (Frame): The CMD frame of an order.
+            command_class (CommandClass, optional): Scheduling class kept for the replay.
+
+        Returns:
+            int: The pk of the OutboundCommand, once committed.
+
+        Raises:
+            ValueError: If the frame is not the CMD frame of an order.
+            FrameProcessingError: If the device is unknown.
+        """
+        if frame.frame_type is not FrameType.CMD or frame.command_id <= 0:
+            raise ValueError(f"Only the CMD frames of orders are journaled, not {frame.frame_type.value}")
+        future = asyncio.get_running_loop().create_future()
+        self._inserts.append((frame, command_class, future))
+        self._wake()
+        if not self._running:
+            await self.flush()
+        return await future
+
+    def mark_sent(self, pk: int) -> None:
+        """Record that a command was handed to the scheduler."""
+        self._transition(pk, OutboundCommand.SENT, sent=True)
+
+    def mark_acked(self, pk: int) -> None:
+        """Record that the device acknowledged a command."""
+        self._transition(pk, OutboundCommand.ACKED)
+
+    def mark_failed(self, pk: int, error: str) -> None:
+        """Record that a command failed: error answer or no answer."""
+        self._transition(pk, OutboundCommand.FAILED, error)
+
+    async def replay(self) -> List[JournaledCommand]:
+        """Return the commands still `queued` or `sent`, oldest first, to send them again."""
+        return await sync_to_async(self._load_pending, thread_sensitive=True)()
+
+    async def run(self) -> None:
+        """Commit the pending writes in groups until cancelled."""
+        self._running = True
+        try:
+            while True:
+                await self._has_writes.wait()
+                if not self._full.is_set():
+                    try:
+                        await asyncio.wait_for(self._full.wait(), self.commit_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                await self.flush()
+        finally:
+            self._running = False
+
+    async def flush(self) -> None:
+        """Commit the pending writes now, in one transaction."""
+        if not self.pending:
+            return
+        inserts, self._inserts = self._inserts, []
+        transitions, self._transitions = self._transitions, {}
+        self._has_writes.clear()
+        self._full.clear()
+
+        commit = sync_to_async(self._commit, thread_sensitive=True)
+        try:
+            results = await commit([(frame, command_class) for frame, command_class, _ in inserts], transitions)
+        except Exception as e:
+            logger.exception(f"Failed to commit {len(inserts)} outbound commands and {len(transitions)} transitions")
+            for _, _, future in inserts:
+                if not future.done():
+                    future.set_exception(e)
+            # The transitions are tried again with the next commit. A newer transition of the same
+            # command replaces the state, but the sends of both are counted.
+            for pk, transition in transitions.items():
+                newer = self._transitions.get(pk)
+                if newer is None:
+                    self._transitions[pk] = transition
+                else:
+                    newer.sends += transition.sends
+            if transitions:
+                self._wake()
+            return
+
+        for (_, _, future), result in zip(inserts, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _transition(self, pk: int, state: str, error: str = "", sent: bool = False) -> None:
+        previous = self._transitions.get(pk)
+        sends = (previous.sends if previous else 0) + sent
+        self._transitions[pk] = _Transition(state, error[:MAX_ERROR_LENGTH], sends)
+        self._wake()
+
+    def _wake(self) -> None:
+        self._has_writes.set()
+        if self.pending >= self.commit_size:
+            self._full.set()
+
+    def _commit(
+        self,
+        inserts: List[Tuple[Frame, Optional[CommandClass]]],
+        transitions: Dict[int, _Transition],
+    ) -> List[int | Exception]:
+        # Long-running process: drop the database connection if it is broken or too old.
+        close_old_connections()
+        devices = device_registry.get_devices({frame.device_uid for frame, _ in inserts})
+        results: List[OutboundCommand | Exception] = []
+        for frame, command_class in inserts:
+            device = devices.get(frame.device_uid)
+            if device is None:
+                results.append(FrameProcessingError(f"Unknown device: {frame.device_uid}"))
+                continue
+            results.append(
+                OutboundCommand(
+                    device=device,
+                    order_pk=frame.command_id,
+                    command_slug=frame.command_slug,
+                    args=list(frame.args_values),
+                    command_class=command_class.name if command_class else "",
+                )
+            )
+        rows = [result for result in results if isinstance(result, OutboundCommand)]
+
+        # One UPDATE per distinct transition instead of one per command.
+        groups: Dict[Tuple[str, str, int], List[int]] = {}
+        for pk, transition in transitions.items():
+            groups.setdefault((transition.state, transition.error, transition.sends), []).append(pk)
+
+        now = timezone.now()
+        with transaction.atomic():
+            if connection.features.can_return_rows_from_bulk_insert:
+                OutboundCommand.objects.bulk_create(rows)
+            else:
+                for row in rows:
+                    row.save()
+            for (state, error, sends), pks in groups.items():
+                OutboundCommand.objects.filter(pk__in=pks).update(
+                    state=state, error=error, attempts=F("attempts") + sends, updated_at=now
+                )
+
+        self.commits += 1
+        self.writes += len(rows) + len(transitions)
+        return [result.pk if isinstance(result, OutboundCommand) else result for result in results]
+
+    @staticmethod
+    def _load_pending() -> List[JournaledCommand]:
+        close_old_connections()
+        commands = (
+            OutboundCommand.objects.filter(state__in=OutboundCommand.PENDING_STATES)
+            .select_related("device")
+            .order_by("created_at", "pk")
+        )
+        return [
+            JournaledCommand(
+                pk=command.pk,
+                frame=Frame(
+                    frame_type=FrameType.CMD,
+                    device_uid=command.device.uid,
+                    command_id=command.order_pk,
+                    command_slug=command.command_slug,
+                    args_values=list(command.args),
+                ),
+                command_class=(
+                    CommandClass.from_string(command.command_class, strict=True) if command.command_class else None
+                ),
+                state=command.state,
+            )
+            for command in commands
+        ]
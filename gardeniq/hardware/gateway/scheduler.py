@@ -0,0 +1,248 @@
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Awaitable
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import Mapping
+from typing import Optional
+from typing import Set
+
+from django.conf import settings
+
+from gardeniq.base.utils import GardenEnum
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameType
+from gardeniq.orderlg.models import Order
+
+logger = logging.getLogger(__name__)
+
+Dispatch = Callable[[Frame], Awaitable[Frame]]
+
+
+class CommandClass(GardenEnum):
+    """
+    Scheduling classes of the outbound commands.
+
+    - ACTUATOR: `set` orders, e.g. opening a valve
+    - TELEMETRY: `get` orders, e.g. polling a temperature
+    - HOUSEKEEPING: PING and LG_INIT frames
+    """
+
+    ACTUATOR = "ACTUATOR"
+    TELEMETRY = "TELEMETRY"
+    HOUSEKEEPING = "HOUSEKEEPING"
+
+
+ACTION_TYPE_CLASSES = {
+    "set": CommandClass.ACTUATOR,
+    "get": CommandClass.TELEMETRY,
+}
+
+
+@dataclass(slots=True)
+class _Pending:
+    finish: float
+    frame: Frame
+    future: asyncio.Future
+
+
+@dataclass(slots=True)
+class _DeviceQueues:
+    queues: Dict[CommandClass, Deque[_Pending]]
+    # Finish tag of the last command queued in each class.
+    last_finish: Dict[CommandClass, float]
+    changed: asyncio.Condition = field(default_factory=asyncio.Condition)
+    # Finish tag of the last dispatched command (self-clocked virtual time).
+    virtual_time: float = 0.0
+    slots: Optional[asyncio.Semaphore] = None
+    task: Optional[asyncio.Task] = None
+    # Dispatch tasks of the commands in flight.
+    in_flight: Set[asyncio.Task] = field(default_factory=set)
+
+    def depth(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+
+class OutboundScheduler:
+    """
+    Per-device priority scheduler of the outbound commands, in front of the command correlator.
+
+    Each device has one bounded queue per CommandClass. Queues are served with self-clocked weighted
+    fair queuing: a queued command gets the finish tag `max(virtual time, last tag of its class) + 1 / weight`
+    and the command with the lowest tag is dispatched first. A backlog of telemetry polls therefore
+    delays an actuator command by at most one poll, while the polls still get their share.
+
+    At most `concurrency` commands of a device are dispatched at the same time (the in-flight window of
+    the correlator), the next command is only chosen when a slot is free. When a queue is full, `submit`
+    waits for room: callers are slowed down to the pace of the device instead of piling up commands.
+
+    Args:
+        dispatch (Dispatch): Sends a command and returns its response (e.g. `CommandCorrelator.submit`).
+        concurrency (int, optional): Commands dispatched at the same time per device.
+            Defaults to settings.GATEWAY_INFLIGHT_WINDOW.
+        weights (Mapping[str, int], optional): Weight per class name. Defaults to settings.GATEWAY_SCHEDULER_WEIGHTS.
+        queue_size (int, optional): Queue bound per device and class. Defaults to settings.GATEWAY_SCHEDULER_QUEUE_SIZE.
+    """
+
+    def __init__(
+        self,
+        dispatch: Dispatch,
+        concurrency: Optional[int] = None,
+        weights: Optional[Mapping[str, int]] = None,
+        queue_size: Optional[int] = None,
+    ) -> None:
+        self.dispatch = dispatch
+        self.concurrency = concurrency or settings.GATEWAY_INFLIGHT_WINDOW
+        self.queue_size = queue_size or settings.GATEWAY_SCHEDULER_QUEUE_SIZE
+        weights = weights or settings.GATEWAY_SCHEDULER_WEIGHTS
+        self.costs = {command_class: 1 / weights[command_class.name] for command_class in CommandClass}
+        # Order pk (command id) -> action type, see `load_action_types`.
+        self.action_types: Dict[int, str] = {}
+        self._devices: Dict[str, _DeviceQueues] = {}
+        self.enqueued = {command_class: 0 for command_class in CommandClass}
+        self.dispatched = {command_class: 0 for command_class in CommandClass}
+        self.max_depth = {command_class: 0 for command_class in CommandClass}
+        self.blocked = 0
+
+    @staticmethod
+    def load_action_types() -> Dict[int, str]:
+        """Return the action type of every order, by pk (the command id of its frames)."""
+        return dict(Order.objects.values_list("pk", "action_type"))
+
+    def classify(self, frame: Frame) -> CommandClass:
+        """Return the scheduling class of an outbound frame, from the action type of its order."""
+        if frame.frame_type in (FrameType.PING, FrameType.LG_INIT) or frame.command_id <= 0:
+            return CommandClass.HOUSEKEEPING
+        action_type = self.action_types.get(frame.command_id)
+        if action_type is None:
+            # Order created after the last load: better delay a poll than a watering.
+            logger.debug(f"Unknown action type of command {frame.command_id}, scheduled as actuator")
+            return CommandClass.ACTUATOR
+        return ACTION_TYPE_CLASSES[action_type]
+
+    def depth(self, device_uid: Optional[str] = None) -> Dict[CommandClass, int]:
+        """Number of queued commands per class, for one device or for every device."""
+        if device_uid is None:
+            devices = list(self._devices.values())
+        else:
+            devices = [self._devices[device_uid]] if device_uid in self._devices else []
+        return {
+            command_class: sum(len(device.queues[command_class]) for device in devices)
+            for command_class in CommandClass
+        }
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Queue metrics per class name: current depth, high-water mark and counters."""
+        depth = self.depth()
+        return {
+            command_class.name: {
+                "depth": depth[command_class],
+                "max_depth": self.max_depth[command_class],
+                "enqueued": self.enqueued[command_class],
+                "dispatched": self.dispatched[command_class],
+            }
+            for command_class in CommandClass
+        }
+
+    async def submit(self, frame: Frame, command_class: Optional[CommandClass] = None) -> Frame:
+        """
+        Queue a command frame and return its response once dispatched.
+
+        Waits for room when the queue of the device and class is full.
+
+        Args:
+            frame (Frame): The command frame to send.
+            command_class (CommandClass, optional): Overrides the class given by `classify`.
+        """
+        command_class = command_class or self.classify(frame)
+        device = self._device(frame.device_uid)
+        queue = device.queues[command_class]
+
+        async with device.changed:
+            if len(queue) >= self.queue_size:
+                self.blocked += 1
+                logger.debug(f"{command_class.name} queue of {frame.device_uid} full, waiting for room")
+                await device.changed.wait_for(lambda: len(queue) < self.queue_size)
+
+            start = max(device.virtual_time, device.last_finish[command_class])
+            finish = start + self.costs[command_class]
+            device.last_finish[command_class] = finish
+            pending = _Pending(finish, frame, asyncio.get_running_loop().create_future())
+            queue.append(pending)
+            self.enqueued[command_class] += 1
+            self.max_depth[command_class] = max(self.max_depth[command_class], len(queue))
+            device.changed.notify_all()
+
+        return await pending.future
+
+    async def close(self) -> None:
+        """Stop dispatching. Commands still queued or in flight are cancelled."""
+        tasks = [device.task for device in self._devices.values() if device.task is not None]
+        tasks += [task for device in self._devices.values() for task in device.in_flight]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for device in self._devices.values():
+            for queue in device.queues.values():
+                for pending in queue:
+                    pending.future.cancel()
+                queue.clear()
+        self._devices.clear()
+
+    def _device(self, device_uid: str) -> _DeviceQueues:
+        device = self._devices.get(device_uid)
+        if device is None:
+            device = _DeviceQueues(
+                queues={command_class: deque() for command_class in CommandClass},
+                last_finish={command_class: 0.0 for command_class in CommandClass},
+                slots=asyncio.Semaphore(self.concurrency),
+            )
+            device.task = asyncio.create_task(self._run(device), name=f"scheduler:{device_uid}")
+            self._devices[device_uid] = device
+        return device
+
+    def _pop_next(self, device: _DeviceQueues) -> Optional[_Pending]:
+        # Lowest finish tag first, ties go to the first class of CommandClass.
+        best: Optional[CommandClass] = None
+        for command_class, queue in device.queues.items():
+            if queue and (best is None or queue[0].finish < device.queues[best][0].finish):
+                best = command_class
+        if best is None:
+            return None
+        pending = device.queues[best].popleft()
+        device.virtual_time = pending.finish
+        self.dispatched[best] += 1
+        return pending
+
+    async def _run(self, device: _DeviceQueues) -> None:
+        while True:
+            await device.slots.acquire()
+            async with device.changed:
+                await device.changed.wait_for(lambda: device.depth() > 0)
+                pending = self._pop_next(device)
+                # Wake up the callers waiting for room.
+                device.changed.notify_all()
+
+            if pending.future.cancelled():
+                device.slots.release()
+                continue
+            task = asyncio.create_task(self.dispatch(pending.frame))
+            device.in_flight.add(task)
+            task.add_done_callback(lambda task, pending=pending: self._done(device, pending, task))
+
+    @staticmethod
+    def _done(device: _DeviceQueues, pending: _Pending, task: asyncio.Task) -> None:
+        device.in_flight.discard(task)
+        device.slots.release()
+        if pending.future.cancelled():
+            return
+        if task.cancelled():
+            pending.future.cancel()
+        elif task.exception() is not None:
+            pending.future.set_exception(task.exception())
+        else:
+            pending.future.set_result(task.result())
@@ -0,0 +1,358 @@
+import asyncio
+import logging
+import os
+import queue
+import time
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from gardeniq.hardware.gateway.engine import Gateway
+from gardeniq.hardware.gateway.outbound import enable_sqlite_wal
+from gardeniq.hardware.gateway.scheduler import CommandClass
+from gardeniq.hardware.models import Device
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameType
+from gardeniq.hardware.protocols.usb import FrameHandler
+from gardeniq.hardware.protocols.usb.handler import FrameErrors
+from gardeniq.hardware.registry import device_registry
+from gardeniq.hardware.supervisor import ASSIGN
+from gardeniq.hardware.supervisor import FRAMES
+from gardeniq.hardware.supervisor import OFFLINE
+from gardeniq.hardware.supervisor import REQUEST
+from gardeniq.hardware.supervisor import STOP
+from gardeniq.hardware.supervisor import WRITER
+
+logger = logging.getLogger(__name__)
+
+
+class ForwardingHandler(FrameHandler):
+    """
+    Frame handler of a shard: checks the frames, then forwards them to the DatabaseWriter process.
+
+    The checksum verification runs in the shard, on its own CPU core, the database writes in the
+    writer. The response listeners (the correlator of the shard) are notified as soon as the frames
+    are forwarded.
+
+    Args:
+        writer_queue: multiprocessing queue read by the DatabaseWriter.
+        timeout (float, optional): Seconds to wait for room in a full queue before dropping the frames.
+            Defaults to settings.GATEWAY_SUPERVISOR_QUEUE_TIMEOUT.
+    """
+
+    def __init__(self, writer_queue: Any, timeout: Optional[float] = None) -> None:
+        super().__init__()
+        self.writer_queue = writer_queue
+        self.timeout = timeout if timeout is not None else settings.GATEWAY_SUPERVISOR_QUEUE_TIMEOUT
+        self.frames_forwarded = 0
+        self.frames_dropped = 0
+
+    def handle_batch(self, frames: Iterable[Frame]) -> FrameErrors:
+        errors: FrameErrors = []
+        valid: List[Frame] = []
+        for frame in frames:
+            try:
+                self._validate(frame)
+            except ValueError as e:
+                errors.append((frame, e))
+            else:
+                valid.append(frame)
+
+        # One message per batch: the pickling and the queue lock are paid once.
+        if valid:
+            if self.put((FRAMES, valid)):
+                self.frames_forwarded += len(valid)
+            else:
+                self.frames_dropped += len(valid)
+
+        for frame in valid:
+            if frame.frame_type is FrameType.ACK:
+                self._notify_response(frame)
+        return errors
+
+    def put(self, message: Tuple) -> bool:
+        """Send a message to the writer, False if its queue stayed full."""
+        try:
+            self.writer_queue.put(message, timeout=self.timeout)
+        except queue.Full:
+            logger.error(f"Database writer queue full, {message[0]} message dropped")
+            return False
+        return True
+
+
+class ShardGateway(Gateway):
+    """
+    Gateway of one worker process of the GatewaySupervisor, serving the ports assigned to it.
+
+    A shard never writes the database: the frames (and the devices to mark offline after missed
+    pings) go to the DatabaseWriter process through its queue. The outbound journal and the language
+    sync, which write the database, are not run by the shards: the GatewaySupervisor refuses to
+    start while they are enabled.
+
+    Args:
+        shard_id (int): Index of the worker.
+        devices (Iterable[Tuple[str, str]]): The (uid, path) of the devices assigned to the shard.
+        writer_queue: multiprocessing queue read by the DatabaseWriter.
+        baudrate (int, optional): Baudrate of every port. Defaults to settings.BAUDRATE.
+        transport_klass (type[SerialTransport], optional): Transport class, mainly for tests.
+    """
+
+    def __init__(self, shard_id: int, devices: Iterable[Tuple[str, str]], writer_queue: Any, **kwargs: Any) -> None:
+        # The database belongs to the DatabaseWriter: no journal replay, language sync nor WAL switch here.
+        super().__init__(
+            handler=ForwardingHandler(writer_queue),
+            outbound_replay=False,
+            language_sync=False,
+            sqlite_wal=False,
+            **kwargs,
+        )
+        self.shard_id = shard_id
+        # device uid -> port path of the devices assigned to the shard
+        self.assigned: Dict[str, str] = dict(devices)
+        self._requests: Set[asyncio.Task] = set()
+
+    def load_devices(self) -> List[Tuple[str, str]]:
+        return list(self.assigned.items())
+
+    def assign(self, devices: Iterable[Tuple[str, str]]) -> None:
+        """
+        Serve a new set of devices: open the ports added, close the ports removed.
+
+        Args:
+            devices (Iterable[Tuple[str, str]]): The (uid, path) of every device assigned to the shard.
+        """
+        assigned = dict(devices)
+        paths = set(assigned.values())
+        for uid in self.assigned.keys() - assigned.keys():
+            self.heartbeat.remove(uid)
+        for path in set(self.transports) - paths:
+            self.remove_port(path)
+
+        self.device_paths.update(assigned)
+        for path in paths:
+            self.add_port(path)
+        if settings.GATEWAY_HEARTBEAT_ENABLED:
+            for uid in assigned.keys() - self.assigned.keys():
+                self.heartbeat.add(uid)
+        self.assigned = assigned
+        logger.info(f"Shard {self.shard_id} now serves {len(assigned)} devices on {len(paths)} ports")
+
+    async def serve(self, commands: Any) -> None:
+        """
+        Apply the messages of the supervisor until STOP: ASSIGN (new devices) and REQUEST (a command
+        frame to schedule).
+
+        Args:
+            commands: multiprocessing queue written by the supervisor.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await loop.run_in_executor(None, self._next_command, commands)
+            if message is None:
+                continue
+            if message[0] == ASSIGN:
+                self.assign(message[1])
+            elif message[0] == REQUEST:
+                self._schedule(message[1], message[2])
+            else:
+                self.stop()
+                return
+
+    async def run_until_stopped(self, commands: Any) -> None:
+        """Run the gateway, serving the supervisor messages, until STOP is received."""
+        server = asyncio.create_task(self.serve(commands))
+        try:
+            # The ports come from `load_devices`: the assignment may change while the gateway starts.
+            await self.run()
+        finally:
+            server.cancel()
+            await asyncio.gather(server, *self._requests, return_exceptions=True)
+
+    @staticmethod
+    def _next_command(commands: Any) -> Optional[Tuple]:
+        # A bounded wait: the executor thread must not outlive the event loop.
+        try:
+            return commands.get(timeout=1.0)
+        except queue.Empty:
+            return None
+
+    def health(self) -> Dict[str, Any]:
+        """Counters of the shard, sent to the supervisor."""
+        return {
+            "pid": os.getpid(),
+            "time": time.time(),
+            "devices": len(self.assigned),
+            "ports": len(self.transports),
+            "open_ports": sum(transport.is_open for transport in self.transports.values()),
+            "frames_received": self.frames_received,
+            "frames_forwarded": self.handler.frames_forwarded,
+            "frames_dropped": self.frames_dropped + self.handler.frames_dropped,
+            "handling_errors": self.handling_errors,
+            "commands_completed": self.correlator.completed,
+            "commands_timed_out": self.correlator.timeouts,
+        }
+
+    def _schedule(self, frame: Frame, command_class: Optional[str]) -> None:
+        klass = CommandClass.from_string(command_class, strict=True) if command_class else None
+        task = asyncio.create_task(self._request(frame, klass))
+        self._requests.add(task)
+        task.add_done_callback(self._requests.discard)
+
+    async def _request(self, frame: Frame, command_class: Optional[CommandClass]) -> None:
+        try:
+            await self.request(frame, command_class)
+        except Exception as e:
+            logger.error(f"Command {frame.command_slug} to {frame.device_uid} failed: {e}")
+
+    def _set_offline(self, device_uid: str) -> None:
+        self.handler.put((OFFLINE, device_uid))
+
+
+class DatabaseWriter:
+    """
+    Single writer of the GatewaySupervisor: applies the messages of every shard to the database.
+
+    The frames of the messages already waiting are handled together by `FrameHandler.handle_batch`
+    (up to settings.GATEWAY_HANDLE_BATCH_SIZE frames per batch), so the writes of every shard share
+    the same transactions instead of contending for the SQLite lock.
+
+    Args:
+        handler (FrameHandler, optional): Handler of the frames. Defaults to a new FrameHandler.
+    """
+
+    def __init__(self, handler: Optional[FrameHandler] = None) -> None:
+        self.handler = handler or FrameHandler()
+        self.frames_handled = 0
+        self.handling_errors = 0
+        self.offline_marks = 0
+
+    def run(self, messages: Any, health: Any = None, health_interval: Optional[float] = None) -> None:
+        """
+        Apply the messages of the queue until STOP.
+
+        Args:
+            messages: multiprocessing queue written by the shards.
+            health: multiprocessing queue of the supervisor, receiving ("writer", counters) reports.
+            health_interval (float, optional): Seconds between two reports.
+                Defaults to settings.GATEWAY_SUPERVISOR_HEALTH_INTERVAL.
+        """
+        health_interval = health_interval or settings.GATEWAY_SUPERVISOR_HEALTH_INTERVAL
+        if settings.GATEWAY_OUTBOUND_SQLITE_WAL:
+            enable_sqlite_wal()
+        device_registry.warm()
+        # Wake up at least as often as the buffered readings must be written.
+        timeout = min(health_interval, self.handler.telemetry.flush_interval)
+        next_report = 0.0
+        stopped = False
+        while not stopped:
+            try:
+                pending = [messages.get(timeout=timeout)]
+            except queue.Empty:
+                pending = []
+            # Take the messages already waiting along.
+            while pending and len(pending) < settings.GATEWAY_HANDLE_BATCH_SIZE:
+                try:
+                    pending.append(messages.get_nowait())
+                except queue.Empty:
+                    break
+            stopped = self.apply(pending)
+
+            if health is not None and time.monotonic() >= next_report:
+                health.put((WRITER, self.health()))
+                next_report = time.monotonic() + health_interval
+            self.handler.liveness.flush_due()
+            self.handler.telemetry.flush_due()
+        self.handler.liveness.flush()
+        self.handler.telemetry.flush()
+
+    def apply(self, messages: List[Tuple]) -> bool:
+        """
+        Apply a list of messages in order.
+
+        Returns:
+            bool: Whether a STOP message was received.
+        """
+        # Long-running process: drop the database connection if it is broken or too old.
+        close_old_connections()
+        frames: List[Frame] = []
+        for message in messages:
+            if message[0] == FRAMES:
+                frames.extend(message[1])
+                continue
+            self._handle(frames)
+            frames = []
+            if message[0] == OFFLINE:
+                self._set_offline(message[1])
+            elif message[0] == STOP:
+                return True
+        self._handle(frames)
+        return False
+
+    def health(self) -> Dict[str, Any]:
+        """Counters of the writer, sent to the supervisor."""
+        return {
+            "pid": os.getpid(),
+            "time": time.time(),
+            "frames_handled": self.frames_handled,
+            "handling_errors": self.handling_errors,
+            "offline_marks": self.offline_marks,
+            "telemetry": self.handler.telemetry.stats(),
+        }
+
+    def _handle(self, frames: List[Frame]) -> None:
+        for start in range(0, len(frames), settings.GATEWAY_HANDLE_BATCH_SIZE):
+            batch = frames[start : start + settings.GATEWAY_HANDLE_BATCH_SIZE]
+            try:
+                errors = self.handler.handle_batch(batch)
+            except Exception:
+                self.handling_errors += len(batch)
+                logger.exception(f"Unexpected error while handling a batch of {len(batch)} frames")
+                continue
+            for frame, e in errors:
+                logger.error(f"Frame from {frame.device_uid} rejected: {e}")
+            self.handling_errors += len(errors)
+            self.frames_handled += len(batch) - len(errors)
+
+    def _set_offline(self, device_uid: str) -> None:
+        try:
+            device = device_registry.get_device(device_uid)
+        except Device.DoesNotExist:
+            logger.error(f"Device {device_uid} not found in database")
+            return
+        self.handler.liveness.record(device, on=False)
+        self.offline_marks += 1
+
+
+async def serve_shard(
+    shard_id: int,
+    devices: List[Tuple[str, str]],
+    commands: Any,
+    writer_queue: Any,
+    health: Any,
+    baudrate: Optional[int] = None,
+) -> None:
+    """
+    Run a ShardGateway until the supervisor sends STOP, reporting its counters to `health`
+    every settings.GATEWAY_SUPERVISOR_HEALTH_INTERVAL seconds.
+    """
+    gateway = ShardGateway(shard_id, devices, writer_queue, baudrate=baudrate)
+
+    async def report() -> None:
+        while True:
+            health.put(("worker", shard_id, gateway.health()))
+            await asyncio.sleep(settings.GATEWAY_SUPERVISOR_HEALTH_INTERVAL)
+
+    reporter = asyncio.create_task(report())
+    try:
+        await gateway.run_until_stopped(commands)
+    finally:
+        reporter.cancel()
+        await asyncio.gather(reporter, return_exceptions=True)
+        health.put(("worker", shard_id, gateway.health()))
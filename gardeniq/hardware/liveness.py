@@ -0,0 +1,99 @@
+import logging
+import time
+from typing import Dict
+from typing import Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from gardeniq.hardware.models import Device
+from gardeniq.hardware.protocols.metrics import instrumented
+from gardeniq.hardware.registry import device_registry
+
+logger = logging.getLogger(__name__)
+
+
+class LivenessTracker:
+    """
+    Coalesce the liveness writes of the devices (status and `last_seen`).
+
+    A device answering a ping is usually already ONLINE: only its `last_seen` changes, and that
+    change is kept in memory until the next `flush` (at most every `flush_interval` seconds, see
+    `flush_due`). Only a status flip (ONLINE <-> OFFLINE) is written through right away.
+
+    Writes are narrow: `save(update_fields=...)` for a flip, one `bulk_update` of `last_seen` for
+    a flush. The tracker keeps the Device instances given to `record` (the registry ones) until
+    they are flushed; call `flush` before leaving so no `last_seen` is lost.
+
+    Args:
+        flush_interval (float, optional): Seconds between two flushes of `last_seen`.
+            Defaults to settings.GATEWAY_LIVENESS_FLUSH_INTERVAL.
+    """
+
+    def __init__(self, flush_interval: Optional[float] = None) -> None:
+        self.flush_interval = flush_interval if flush_interval is not None else settings.GATEWAY_LIVENESS_FLUSH_INTERVAL
+        # device pk -> device with an unsaved `last_seen`
+        self._dirty: Dict[int, Device] = {}
+        self._last_flush = time.monotonic()
+        self.flips = 0
+        self.coalesced = 0
+        self.flushed = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of devices with a `last_seen` not written yet."""
+        return len(self._dirty)
+
+    @instrumented("mark_online")
+    def record(self, device: Device, on: bool = True, commit: bool = True) -> bool:
+        """
+        Record a communication with the device and its new online state.
+
+        Args:
+            device (Device): The device that answered (or timed out).
+            on (bool, optional): Whether the device is online. Defaults to True.
+            commit (bool, optional): Save a status flip right away. When False, the caller
+                saves `status` and `last_seen` itself (e.g. in a `bulk_update`). Defaults to True.
+
+        Returns:
+            bool: Whether the status of the device flipped.
+
+        Raises:
+            Status.DoesNotExist: If the ONLINE/OFFLINE device status is missing.
+        """
+        status = device_registry.get_status(on)
+        device.last_seen = timezone.now()
+        if device.status_id == status.pk:
+            self._dirty[device.pk] = device
+            self.coalesced += 1
+            return False
+
+        device.status = status
+        self._dirty.pop(device.pk, None)
+        self.flips += 1
+        if commit:
+            device.save(update_fields=["status", "last_seen"])
+        return True
+
+    def flush(self) -> int:
+        """Write the pending `last_seen` with one `bulk_update`. Returns the number of devices written."""
+        self._last_flush = time.monotonic()
+        if not self._dirty:
+            return 0
+
+        devices = list(self._dirty.values())
+        self._dirty.clear()
+        Device.objects.bulk_update(devices, ["last_seen"])
+        self.flushed += len(devices)
+        logger.debug(f"Flushed last_seen of {len(devices)} devices")
+        return len(devices)
+
+    def flush_due(self) -> int:
+        """Flush if `flush_interval` seconds passed since the last flush."""
+        if time.monotonic() - self._last_flush < self.flush_interval:
+            return 0
+        return self.flush()
+
+    def forget(self, device: Device) -> None:
+        """Drop the pending `last_seen` of a device, e.g. when its changes were rolled back."""
+        self._dirty.pop(device.pk, None)
@@ -0,0 +1,81 @@
+from io import StringIO
+
+from django.core.management import BaseCommand
+from django.core.management import CommandError
+from django.core.management import call_command
+from django.db import connection
+
+from gardeniq.hardware.protocols import benchmarks
+from gardeniq.hardware.registry import device_registry
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the frame pipeline (parse, serialize, checksum and handle): frames per second and "
+        "allocations per frame, stored and compared as JSON baselines."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=10_000, help="Frames per benchmark.")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark, the best one is kept.")
+        parser.add_argument("--devices", type=int, default=16, help="Number of device uids of the sample frames.")
+        parser.add_argument(
+            "--database",
+            action="store_true",
+            help="Also benchmark FrameHandler.handle_device_response, against a test database created for the run.",
+        )
+        parser.add_argument("--save", metavar="PATH", help="Write the report as a JSON baseline.")
+        parser.add_argument("--compare", metavar="PATH", help="Compare the report with a JSON baseline.")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.1,
+            help="Relative throughput drop or memory growth reported as a regression. Defaults to 0.1.",
+        )
+
+    def handle(self, *args, **options):
+        if options["database"]:
+            report = self._run_on_test_database(options)
+        else:
+            report = benchmarks.run_suite(options["count"], options["repeat"], devices=options["devices"])
+
+        self.stdout.write(f"{'benchmark':<26}{'frames/s':>14}{'bytes/frame':>14}{'allocs/frame':>14}")
+        for name, result in report["results"].items():
+            self.stdout.write(
+                f"{name:<26}{result['per_second']:>14,.0f}"
+                f"{result['bytes_per_item']:>14.1f}{result['allocations_per_item']:>14.2f}"
+            )
+
+        if options["save"]:
+            benchmarks.save_report(report, options["save"])
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['save']}"))
+
+        if options["compare"]:
+            baseline = benchmarks.load_report(options["compare"])
+            regressions = benchmarks.compare_reports(baseline, report, options["tolerance"])
+            for regression in regressions:
+                self.stdout.write(
+                    self.style.ERROR(
+                        f"{regression['benchmark']} {regression['metric']}: {regression['baseline']:,.1f} -> "
+                        f"{regression['current']:,.1f} ({regression['change']:+.1%})"
+                    )
+                )
+            if regressions:
+                raise CommandError(
+                    f"{len(regressions)} regression(s) against {options['compare']} "
+                    f"(commit {baseline['meta'].get('commit')})"
+                )
+            self.stdout.write(self.style.SUCCESS(f"No regression against {options['compare']}"))
+
+    def _run_on_test_database(self, options) -> dict:
+        # The handler writes the device statuses: never run it against the real database.
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        device_registry.clear()
+        try:
+            call_command("seed", stdout=StringIO())
+            benchmarks.create_sample_devices(options["devices"])
+            return benchmarks.run_suite(options["count"], options["repeat"], database=True, devices=options["devices"])
+        finally:
+            device_registry.clear()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,50 @@
+import json
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.core.management import CommandError
+
+from gardeniq.hardware.protocols.metrics import load_snapshot
+from gardeniq.hardware.protocols.metrics import snapshot_rows
+
+
+class Command(BaseCommand):
+    help = "Show the per-stage metrics of the frame pipeline published by the gateway."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default=settings.PROTOCOL_METRICS_PATH,
+            help="Snapshot published by the gateway. Defaults to settings.PROTOCOL_METRICS_PATH.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the raw snapshot as JSON.")
+
+    def handle(self, *args, **options):
+        snapshot = load_snapshot(options["path"])
+        if snapshot is None:
+            raise CommandError(
+                f"No metrics published at {options['path']}: run the gateway with PROTOCOL_METRICS_ENABLED "
+                "or `run_gateway --metrics`."
+            )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(snapshot, indent=2))
+            return
+
+        self.stdout.write(f"Gateway pid {snapshot['pid']}, measures from {snapshot['since']} to {snapshot['taken_at']}")
+        self.stdout.write(
+            f"{'stage':<16}{'frame':<14}{'count':>10}{'mean us':>12}{'p50 us':>10}{'p90 us':>10}"
+            f"{'p99 us':>10}{'max us':>12}"
+        )
+        for stage, label, histogram in snapshot_rows(snapshot):
+            self.stdout.write(
+                f"{stage:<16}{label:<14}{histogram['count']:>10}{histogram['mean_us']:>12.1f}"
+                f"{histogram['p50_us']:>10.0f}{histogram['p90_us']:>10.0f}{histogram['p99_us']:>10.0f}"
+                f"{histogram['max_us']:>12.1f}"
+            )
+
+        for title, errors in (("Command errors", "command_errors"), ("Parsing errors", "parsing_errors")):
+            if snapshot[errors]:
+                self.stdout.write(
+                    f"{title}: " + ", ".join(f"{name}={count}" for name, count in snapshot[errors].items())
+                )
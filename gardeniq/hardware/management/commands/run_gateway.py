@@ -0,0 +1,86 @@
+import asyncio
+import signal
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import BaseCommand
+from django.core.management import CommandError
+
+from gardeniq.hardware.gateway import Gateway
+from gardeniq.hardware.protocols.metrics import pipeline_metrics
+from gardeniq.hardware.supervisor import GatewaySupervisor
+
+
+class Command(BaseCommand):
+    help = "Run the serial gateway: read and write every device port until interrupted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--port",
+            action="append",
+            dest="ports",
+            help="Only open this port (repeatable). Defaults to the ports of every registered device.",
+        )
+        parser.add_argument("--baud", type=int, default=settings.BAUDRATE, help="Baudrate transmission with devices.")
+        parser.add_argument(
+            "--metrics",
+            action="store_true",
+            help="Record and publish the per-stage metrics of the frame pipeline (see the protocol_metrics command).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help=(
+                "Spread the ports of every registered device over this many worker processes, with one database "
+                "writer process (0: one per CPU core but one). The health of the processes is published to "
+                "settings.GATEWAY_SUPERVISOR_HEALTH_PATH. The workers do not journal the commands nor sync the "
+                "languages: requires GATEWAY_OUTBOUND_REPLAY_ENABLED and GATEWAY_LANGUAGE_SYNC_ENABLED set to False."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options["workers"] is not None:
+            self._supervise(options)
+            return
+
+        if options["metrics"]:
+            pipeline_metrics.enabled = True
+        gateway = Gateway(baudrate=options["baud"])
+        self.stdout.write(self.style.SUCCESS("Gateway started. Press CTRL+C to stop."))
+        asyncio.run(self._run(gateway, options["ports"]))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Gateway stopped. Frames received: {gateway.frames_received}, handled: {gateway.frames_handled}, "
+                f"errors: {gateway.handling_errors}, dropped: {gateway.frames_dropped}. "
+                f"Readings written: {gateway.handler.telemetry.flushed}, dropped: {gateway.handler.telemetry.dropped}"
+            )
+        )
+
+    async def _run(self, gateway: Gateway, ports):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, gateway.stop)
+        await gateway.run(ports)
+
+    def _supervise(self, options):
+        if options["ports"]:
+            raise CommandError("--port cannot be used with --workers: the workers serve every registered device.")
+        if options["metrics"]:
+            raise CommandError("--metrics cannot be used with --workers: the metrics are recorded per process.")
+
+        try:
+            supervisor = GatewaySupervisor(workers=options["workers"] or None, baudrate=options["baud"])
+        except ImproperlyConfigured as e:
+            raise CommandError(f"--workers cannot be used: {e}") from e
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: supervisor.stop())
+        self.stdout.write(
+            self.style.SUCCESS(f"Gateway started with {len(supervisor.workers)} workers. Press CTRL+C to stop.")
+        )
+        supervisor.run()
+
+        for name, health in supervisor.health().items():
+            report = health["report"]
+            counters = ", ".join(f"{key}: {value}" for key, value in report.items() if key not in ("pid", "time"))
+            self.stdout.write(f"{name}: restarts: {health['restarts']}, {counters}")
+        self.stdout.write(self.style.SUCCESS("Gateway stopped."))
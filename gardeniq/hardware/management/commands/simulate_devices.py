@@ -0,0 +1,70 @@
+import asyncio
+import signal
+
+from django.core.management import BaseCommand
+
+from gardeniq.hardware.protocols.frame import FrameEncoding
+from gardeniq.hardware.simulator import FirmwareProfile
+from gardeniq.hardware.simulator import VirtualFleet
+
+
+class Command(BaseCommand):
+    help = "Simulate devices over pseudo-terminals, answering the gateway like real boards, until interrupted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("count", type=int, help="Number of simulated devices.")
+        parser.add_argument("--prefix", default="SIM", help="Prefix of the device uids.")
+        parser.add_argument("--gd-version", default="1.0.0", help="GardenIQ firmware version answered to PING.")
+        parser.add_argument("--mp-version", default="1.0.0", help="MicroPython firmware version answered to PING.")
+        parser.add_argument("--latency", type=float, default=0.0, help="Seconds before each answer.")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an ERR answer (0-1).")
+        parser.add_argument(
+            "--corruption-rate", type=float, default=0.0, help="Probability of a corrupted answer (0-1)."
+        )
+        parser.add_argument(
+            "--encoding",
+            action="append",
+            dest="encodings",
+            default=[],
+            choices=[encoding.value for encoding in FrameEncoding if encoding is not FrameEncoding.TEXT],
+            help="Binary encoding accepted by the devices (repeatable).",
+        )
+        parser.add_argument("--seed", type=int, help="Seed of the random generators, for reproducible runs.")
+        parser.add_argument(
+            "--no-register",
+            action="store_true",
+            help="Do not create or update the Device rows of the simulated devices.",
+        )
+
+    def handle(self, *args, **options):
+        profile = FirmwareProfile(
+            gd_fw_version=options["gd_version"],
+            mp_fw_version=options["mp_version"],
+            latency=options["latency"],
+            error_rate=options["error_rate"],
+            corruption_rate=options["corruption_rate"],
+            encodings=tuple(FrameEncoding(name) for name in options["encodings"]),
+        )
+        fleet = VirtualFleet(options["count"], profile, uid_prefix=options["prefix"], seed=options["seed"])
+        if not options["no_register"]:
+            fleet.register()
+
+        for device in fleet.devices:
+            self.stdout.write(f"{device.device_uid}\t{device.path}")
+        self.stdout.write(self.style.SUCCESS(f"{len(fleet.devices)} devices simulated. Press CTRL+C to stop."))
+        asyncio.run(self._run(fleet))
+
+        stats = fleet.stats()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Simulation stopped. Frames received: {stats['frames_received']}, "
+                f"rejected: {stats['frames_rejected']}, errors sent: {stats['errors_sent']}, "
+                f"corrupted: {stats['frames_corrupted']}"
+            )
+        )
+
+    async def _run(self, fleet: VirtualFleet):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, fleet.stop)
+        await fleet.run()
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.6 on 2026-10-17 03:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hardware", "0002_channel_controllercategory_sensorcategory_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeviceOrderSync",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("order_pk", models.PositiveIntegerField(verbose_name="order pk")),
+                (
+                    "digest",
+                    models.CharField(
+                        help_text="Content hash of the LG_INIT fields of the order acknowledged by the device.",
+                        max_length=32,
+                        verbose_name="digest",
+                    ),
+                ),
+                ("synced_at", models.DateTimeField(auto_now=True, verbose_name="synced at")),
+                (
+                    "device",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="order_syncs",
+                        to="hardware.device",
+                        verbose_name="device",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "device order sync",
+                "verbose_name_plural": "device order syncs",
+                "constraints": [
+                    models.UniqueConstraint(fields=("device", "order_pk"), name="unique_device_order_sync")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.6 on 2026-10-17 04:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hardware', '0003_deviceordersync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundCommand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_pk', models.PositiveIntegerField(help_text='Command id of the frame.', verbose_name='order pk')),
+                ('command_slug', models.CharField(blank=True, max_length=100, verbose_name='command slug')),
+                ('args', models.JSONField(blank=True, default=list, verbose_name='arguments')),
+                ('command_class', models.CharField(blank=True, help_text='Scheduling class of the command. Empty: given by the action type of the order.', max_length=12, verbose_name='command class')),
+                ('state', models.CharField(choices=[('queued', 'queued'), ('sent', 'sent'), ('acked', 'acknowledged'), ('failed', 'failed')], default='queued', max_length=6, verbose_name='state')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='attempts')),
+                ('error', models.CharField(blank=True, max_length=255, verbose_name='error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+                ('device', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbound_commands', to='hardware.device', verbose_name='device')),
+            ],
+            options={
+                'verbose_name': 'outbound command',
+                'verbose_name_plural': 'outbound commands',
+                'indexes': [models.Index(fields=['state', 'created_at'], name='outbound_command_state_idx')],
+            },
+        ),
+    ]
@@ -1,6 +1,8 @@
 from .controller import Controller
 from .controller import ControllerCategory
 from .device import Device
+from .language import DeviceOrderSync
+from .outbound import OutboundCommand
 from .pin import Channel
 from .pin import Pin
 from .sensor import Sensor
@@ -121,13 +121,38 @@ class Device(NameMixinModel, OptionalDescriptionMixinModel):
             >>> device.mark_online()  # Marks device as online
             >>> device.mark_online(False)  # Marks device as offline
         """
-        status_enum = settings.DEFAULT_STATUS.ONLINE if on else settings.DEFAULT_STATUS.OFFLINE
-        device_status = Status.objects.get(models.Q(tag__icontains="device") & models.Q(name=status_enum.value))
-        self.status = device_status
-        self.save()
+        self.status = self.get_online_status(on)
+        self.save(update_fields=["status", "last_seen"])
 
-    def set_firmware_versions(self, garden_fw: str, micropython_fw: str) -> None:
-        error_msg = "Enter a valid value. Field : {f} | Bad value : {v}"
+    @staticmethod
+    def get_online_status(on: bool = True) -> Status:
+        """
+        Return the ONLINE (or OFFLINE) device status, cached by the device registry.
+
+        Raises:
+            Status.DoesNotExist: If no matching status is found in the database.
+        """
+        # The registry imports this module.
+        from gardeniq.hardware.registry import device_registry
+
+        return device_registry.get_status(on)
+
+    def set_firmware_versions(self, garden_fw: str, micropython_fw: str, commit: bool = True) -> bool:
+        """
+        Set the firmware versions reported by the device and refresh `need_upgrade`.
+
+        Args:
+            garden_fw (str): GardenIQ firmware version.
+            micropython_fw (str): MicroPython firmware version.
+            commit (bool, optional): Save the device when the versions changed. Defaults to True.
+
+        Returns:
+            bool: Whether the versions changed.
+
+        Raises:
+            ValueError: If a version is not a strict version string.
+        """
+        error_msg = "Enter a valid value. Field : {field} | Bad value : {value}"
         validator = RegexValidator(pattern_strict_version)
         try:
             validator(garden_fw)
@@ -142,4 +167,7 @@ class Device(NameMixinModel, OptionalDescriptionMixinModel):
             self.gd_firmware_version = garden_fw
             self.mp_firmware_version = micropython_fw
             self.need_upgrade = self._check_update()
-            self.save()
+            if commit:
+                # Only the fields set here: the instance may be older than the other fields in the database.
+                self.save(update_fields=["gd_firmware_version", "mp_firmware_version", "need_upgrade"])
+        return has_changed
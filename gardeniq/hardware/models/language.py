@@ -0,0 +1,36 @@
+from django.db import models
+
+from .device import Device
+
+
+class DeviceOrderSync(models.Model):
+    """
+    Last version of an Order acknowledged by a device through an LG_INIT frame.
+
+    `order_pk` is not a foreign key: the row must outlive a deleted order until the device
+    acknowledged its removal.
+    """
+
+    device = models.ForeignKey(
+        Device,
+        on_delete=models.CASCADE,
+        related_name="order_syncs",
+        verbose_name="device",
+    )
+    order_pk = models.PositiveIntegerField(verbose_name="order pk")
+    digest = models.CharField(
+        max_length=32,
+        verbose_name="digest",
+        help_text="Content hash of the LG_INIT fields of the order acknowledged by the device.",
+    )
+    synced_at = models.DateTimeField(auto_now=True, verbose_name="synced at")
+
+    class Meta:
+        verbose_name = "device order sync"
+        verbose_name_plural = "device order syncs"
+        constraints = [
+            models.UniqueConstraint(fields=["device", "order_pk"], name="unique_device_order_sync"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Device {self.device_id} : order {self.order_pk} : {self.digest}"
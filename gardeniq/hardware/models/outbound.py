@@ -0,0 +1,60 @@
+from django.db import models
+
+from .device import Device
+
+
+class OutboundCommand(models.Model):
+    """
+    An Order execution queued for a device by the gateway, kept until the device acknowledged it.
+
+    States:
+      - `queued`: persisted, not handed to the scheduler yet
+      - `sent`: handed to the scheduler, the device may or may not have executed it
+      - `acked`: acknowledged by the device (OK)
+      - `failed`: answered with an error, or not answered after every retry
+
+    `queued` and `sent` commands are sent again when the gateway starts (see gateway.outbound.OutboundJournal).
+    """
+
+    QUEUED = "queued"
+    SENT = "sent"
+    ACKED = "acked"
+    FAILED = "failed"
+    STATES_CHOICES = (
+        (QUEUED, "queued"),
+        (SENT, "sent"),
+        (ACKED, "acknowledged"),
+        (FAILED, "failed"),
+    )
+    PENDING_STATES = (QUEUED, SENT)
+
+    device = models.ForeignKey(
+        Device,
+        on_delete=models.CASCADE,
+        related_name="outbound_commands",
+        verbose_name="device",
+    )
+    order_pk = models.PositiveIntegerField(verbose_name="order pk", help_text="Command id of the frame.")
+    command_slug = models.CharField(max_length=100, blank=True, verbose_name="command slug")
+    args = models.JSONField(default=list, blank=True, verbose_name="arguments")
+    command_class = models.CharField(
+        max_length=12,
+        blank=True,
+        verbose_name="command class",
+        help_text="Scheduling class of the command. Empty: given by the action type of the order.",
+    )
+    state = models.CharField(max_length=6, choices=STATES_CHOICES, default=QUEUED, verbose_name="state")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="attempts")
+    error = models.CharField(max_length=255, blank=True, verbose_name="error")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="created at")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="updated at")
+
+    class Meta:
+        verbose_name = "outbound command"
+        verbose_name_plural = "outbound commands"
+        indexes = [
+            models.Index(fields=["state", "created_at"], name="outbound_command_state_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Device {self.device_id} : order {self.order_pk} : {self.state}"
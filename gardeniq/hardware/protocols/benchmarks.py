@@ -0,0 +1,424 @@
+"""
+Micro-benchmarks of the communication protocol hot path.
+
+These helpers can be run from a shell, a test or the `bench_protocol` management command. Only
+`bench_handle_device_response` touches the database (see `create_sample_devices`). Each benchmark
+returns a plain dict so results can be printed or stored as JSON.
+
+`run_suite` gathers the benchmarks of the frame pipeline in one report, stored as a JSON baseline
+with `save_report` and compared with the report of another commit with `compare_reports`.
+"""
+
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from dataclasses import field
+from dataclasses import fields
+from dataclasses import make_dataclass
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+from gardeniq.hardware.models import Device
+
+from .checksum import checksum_many
+from .checksum import fletcher8
+from .errors import CommandError
+from .frame import CommandState
+from .frame import Frame
+from .frame import FrameType
+from .settings import ETX
+from .settings import STX
+from .usb.handler import FrameHandler
+from .usb.parser import FrameParser
+
+# Realistic mix of device responses: mostly telemetry answers, some pings and a few errors.
+SAMPLE_DEVICE_BODIES = (
+    "ACK {uid} 12 OK 21.5",
+    "ACK {uid} 13 OK 64",
+    "ACK {uid} 14 OK 1",
+    "ACK {uid} 0 OK GDFW=1.2.3 MPFW=1.24.0",
+    "ACK {uid} 15 ERR TIMEOUT",
+)
+
+
+# Host frames of the same mix: commands with and without arguments, pings and language updates.
+SAMPLE_HOST_FRAMES = (
+    Frame(FrameType.CMD, "DEV0000", 12, "get_temp", []),
+    Frame(FrameType.CMD, "DEV0000", 13, "get_humidity", []),
+    Frame(FrameType.CMD, "DEV0000", 14, "open_van", ["1", "30"]),
+    Frame(FrameType.PING, "DEV0000", 0, "", []),
+    Frame(FrameType.LG_INIT, "DEV0000", -1, "", [], model="Order", fields_values=("12", "get_temp", "get", "")),
+)
+
+
+def build_device_frame(body: str) -> bytes:
+    """Build a raw device frame (newline included) around a frame body."""
+    frame_str = f"{STX} {body} {ETX}"
+    return f"{frame_str} {Frame.build_checksum(frame_str.encode()):02X}\n".encode()
+
+
+def sample_device_frames(count: int, devices: int = 16) -> List[bytes]:
+    """Return `count` raw device frames spread over `devices` device uids."""
+    return [
+        build_device_frame(SAMPLE_DEVICE_BODIES[i % len(SAMPLE_DEVICE_BODIES)].format(uid=f"DEV{i % devices:04d}"))
+        for i in range(count)
+    ]
+
+
+def sample_host_frames(count: int, devices: int = 16) -> List[Frame]:
+    """Return `count` host frames spread over `devices` device uids."""
+    frames = []
+    for i in range(count):
+        sample = SAMPLE_HOST_FRAMES[i % len(SAMPLE_HOST_FRAMES)]
+        kwargs = {f.name: getattr(sample, f.name) for f in fields(Frame)}
+        kwargs["device_uid"] = f"DEV{i % devices:04d}"
+        frames.append(Frame(**kwargs))
+    return frames
+
+
+def create_sample_devices(devices: int = 16) -> List[Device]:
+    """
+    Create the devices of `sample_device_frames`, if missing, for `bench_handle_device_response`.
+
+    Raises:
+        Status.DoesNotExist: If the OFFLINE device status is missing (see the `seed` command).
+    """
+    status = Device.get_online_status(False)
+    return [
+        Device.objects.get_or_create(
+            uid=f"DEV{i:04d}",
+            defaults={"name": f"Benchmark DEV{i:04d}", "path": f"/dev/bench{i}", "status": status},
+        )[0]
+        for i in range(devices)
+    ]
+
+
+def measure_throughput(func: Callable[[Any], Any], items: Sequence[Any], repeat: int = 3) -> Dict[str, float]:
+    """
+    Call `func` on every item and return the best run of `repeat` runs.
+
+    Returns:
+        Dict[str, float]: `items`, `seconds` of the best run and `per_second` throughput.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return {
+        "items": len(items),
+        "seconds": best,
+        "per_second": len(items) / best if best else float("inf"),
+    }
+
+
+def measure_allocations(func: Callable[[Any], Any], items: Sequence[Any]) -> Dict[str, float]:
+    """
+    Call `func` on every item and return the memory allocated per item.
+
+    The results are kept until the end of the measure: the figures are what an item costs while it
+    is alive (e.g. a parsed frame waiting in a batch), short-lived allocations are not counted.
+
+    Returns:
+        Dict[str, float]: `bytes_per_item` and `allocations_per_item` (memory blocks).
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        results = [func(item) for item in items]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del results
+
+    ignored = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    stats = after.filter_traces(ignored).compare_to(before.filter_traces(ignored), "filename")
+    return {
+        "bytes_per_item": sum(stat.size_diff for stat in stats) / len(items),
+        "allocations_per_item": sum(stat.count_diff for stat in stats) / len(items),
+    }
+
+
+def measure(func: Callable[[Any], Any], items: Sequence[Any], repeat: int = 3) -> Dict[str, float]:
+    """Throughput (`measure_throughput`) and memory (`measure_allocations`) of `func` over the items."""
+    return {**measure_throughput(func, items, repeat), **measure_allocations(func, items)}
+
+
+def _parse_str_path(raw: bytes) -> bool:
+    return FrameParser.parse_from_device(raw.decode("ascii")).verify_checksum()
+
+
+def _parse_bytes_path(raw: bytes) -> bool:
+    return FrameParser.parse_from_device_bytes(raw).verify_checksum()
+
+
+def bench_parse_paths(count: int = 10_000, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Compare the `str` and `bytes` ingest paths: parse a raw device frame and verify its checksum.
+
+    Returns:
+        Dict[str, Any]: Throughput of both paths and the speedup of the bytes path.
+    """
+    frames = sample_device_frames(count)
+    str_path = measure_throughput(_parse_str_path, frames, repeat)
+    bytes_path = measure_throughput(_parse_bytes_path, frames, repeat)
+    return {
+        "str": str_path,
+        "bytes": bytes_path,
+        "speedup": bytes_path["per_second"] / str_path["per_second"],
+    }
+
+
+def _per_byte_fletcher8(data: bytes) -> int:
+    # Original per-byte implementation, kept as the baseline of `bench_checksum`.
+    sum1 = 0
+    sum2 = 0
+    for b in data:
+        sum1 = (sum1 + b) % 255
+        sum2 = (sum2 + sum2) % 255
+    return ((sum2 << 4) ^ sum1) & 0xFF
+
+
+def bench_checksum(count: int = 10_000, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Compare the per-byte checksum loop, `fletcher8` and the batched `checksum_many`.
+
+    Returns:
+        Dict[str, Any]: Throughput of the three implementations, in frames per second.
+    """
+    frames = sample_device_frames(count)
+    # The batch API is called once per run: scale its result back to frames.
+    batch = measure_throughput(checksum_many, [frames], repeat)
+    return {
+        "per_byte": measure_throughput(_per_byte_fletcher8, frames, repeat),
+        "fletcher8": measure_throughput(fletcher8, frames, repeat),
+        "checksum_many": {"items": count, "seconds": batch["seconds"], "per_second": count / batch["seconds"]},
+    }
+
+
+def _dict_frame_klass() -> type:
+    # Same fields and validation as Frame, as a regular dataclass with a per-instance `__dict__`.
+    return make_dataclass(
+        "DictFrame",
+        [
+            (f.name, f.type, field(default=f.default, default_factory=f.default_factory, compare=f.compare))
+            for f in fields(Frame)
+        ],
+        namespace={"__post_init__": Frame.__post_init__},
+    )
+
+
+def _measure_frames(klass: type, kwargs: Dict[str, Any], count: int) -> Dict[str, float]:
+    start = time.perf_counter()
+    frames = [klass(**kwargs) for _ in range(count)]
+    seconds = time.perf_counter() - start
+    del frames
+
+    tracemalloc.start()
+    try:
+        frames = [klass(**kwargs) for _ in range(count)]
+        allocated, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del frames
+
+    return {
+        "items": count,
+        "seconds": seconds,
+        "per_second": count / seconds if seconds else float("inf"),
+        "bytes_per_frame": allocated / count,
+    }
+
+
+def bench_frame_representation(count: int = 1_000_000) -> Dict[str, Any]:
+    """
+    Build `count` device frames with the slotted Frame and with an equivalent `__dict__` based dataclass.
+
+    All frames share the same field values, so the memory figure is the overhead of the representation itself.
+
+    Returns:
+        Dict[str, Any]: Build throughput and allocated bytes per frame of both representations.
+    """
+    sample = FrameParser.parse_from_device_bytes(sample_device_frames(1)[0])
+    kwargs = {f.name: getattr(sample, f.name) for f in fields(Frame)}
+    slotted = _measure_frames(Frame, kwargs, count)
+    regular = _measure_frames(_dict_frame_klass(), kwargs, count)
+    return {
+        "slotted": slotted,
+        "dict": regular,
+        "memory_ratio": slotted["bytes_per_frame"] / regular["bytes_per_frame"],
+    }
+
+
+def _linear_from_string(enum_klass: type, value: str) -> Any:
+    # Previous `GardenEnum.from_string` implementation, kept as the baseline of `bench_enum_lookup`.
+    value = value.upper()
+    for member in enum_klass:
+        if member.value == value:
+            return member
+    return None
+
+
+def bench_enum_lookup(count: int = 100_000, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Compare enum token lookups as done by the parser (frame type, command state, command error).
+
+    Returns:
+        Dict[str, Any]: Throughput of the linear scan, the indexed lookup and the strict indexed lookup.
+    """
+    tokens = [(FrameType, "ACK"), (CommandState, "OK"), (CommandError, "DEV_NOT_READY")] * (count // 3)
+    return {
+        "linear": measure_throughput(lambda item: _linear_from_string(*item), tokens, repeat),
+        "indexed": measure_throughput(lambda item: item[0].from_string(item[1]), tokens, repeat),
+        "strict": measure_throughput(lambda item: item[0].from_string(item[1], strict=True), tokens, repeat),
+    }
+
+
+def bench_parse_from_device(count: int = 10_000, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Parse the sample device frames with `parse_from_device` (decoded `str`) and `parse_from_device_bytes`.
+
+    Returns:
+        Dict[str, Any]: `measure` of both parsers.
+    """
+    frames = sample_device_frames(count)
+    lines = [raw.decode("ascii") for raw in frames]
+    return {
+        "parse_from_device": measure(FrameParser.parse_from_device, lines, repeat),
+        "parse_from_device_bytes": measure(FrameParser.parse_from_device_bytes, frames, repeat),
+    }
+
+
+def bench_parse_from_frame_klass(count: int = 10_000, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Serialize the sample host frames with `parse_from_frame_klass`.
+
+    Returns:
+        Dict[str, Any]: `measure` of the serializer.
+    """
+    return {"parse_from_frame_klass": measure(FrameParser.parse_from_frame_klass, sample_host_frames(count), repeat)}
+
+
+def bench_frame_checksum(count: int = 10_000, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Measure `Frame.build_checksum` over the checksummed part of the sample device frames, and
+    `Frame.verify_checksum` of the frames parsed from `str` (the checksum is computed again).
+
+    Returns:
+        Dict[str, Any]: `measure` of both methods.
+    """
+    frames = sample_device_frames(count)
+    checksummed = [raw[: raw.rindex(ETX.encode()) + len(ETX)] for raw in frames]
+    parsed = [FrameParser.parse_from_device(raw.decode("ascii")) for raw in frames]
+    return {
+        "build_checksum": measure(Frame.build_checksum, checksummed, repeat),
+        "verify_checksum": measure(Frame.verify_checksum, parsed, repeat),
+    }
+
+
+def bench_handle_device_response(count: int = 10_000, repeat: int = 3, devices: int = 16) -> Dict[str, Any]:
+    """
+    Handle the parsed sample device frames with `FrameHandler.handle_device_response`.
+
+    Needs a database with the sample devices (see `create_sample_devices`): run it against a test
+    database, the devices are marked online and offline by the ping and TIMEOUT frames of the mix.
+
+    Returns:
+        Dict[str, Any]: `measure` of the handler.
+    """
+    handler = FrameHandler()
+    frames = [FrameParser.parse_from_device_bytes(raw) for raw in sample_device_frames(count, devices)]
+    try:
+        return {"handle_device_response": measure(handler.handle_device_response, frames, repeat)}
+    finally:
+        handler.liveness.flush()
+
+
+def run_suite(count: int = 10_000, repeat: int = 3, database: bool = False, devices: int = 16) -> Dict[str, Any]:
+    """
+    Run the frame pipeline benchmarks and return a report to store as a JSON baseline.
+
+    Args:
+        count (int, optional): Frames per benchmark. Defaults to 10_000.
+        repeat (int, optional): Runs per benchmark, the best one is kept. Defaults to 3.
+        database (bool, optional): Also run `bench_handle_device_response`, the sample devices must
+            exist. Defaults to False.
+        devices (int, optional): Number of device uids of the sample frames. Defaults to 16.
+
+    Returns:
+        Dict[str, Any]: `meta` (environment and parameters) and `results` (benchmark name -> measure).
+    """
+    results = {
+        **bench_parse_from_device(count, repeat),
+        **bench_parse_from_frame_klass(count, repeat),
+        **bench_frame_checksum(count, repeat),
+    }
+    if database:
+        results.update(bench_handle_device_response(count, repeat, devices))
+    return {"meta": environment(count=count, repeat=repeat), "results": results}
+
+
+def environment(**params: Any) -> Dict[str, Any]:
+    """Describe the run of a report: commit, interpreter, machine and the given parameters."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        **params,
+    }
+
+
+def save_report(report: Dict[str, Any], path: str | Path) -> None:
+    """Write a `run_suite` report as a JSON baseline."""
+    Path(path).write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+
+
+def load_report(path: str | Path) -> Dict[str, Any]:
+    """Read a JSON baseline written by `save_report`."""
+    return json.loads(Path(path).read_text())
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.1) -> List[Dict[str, Any]]:
+    """
+    List the regressions of `current` against `baseline`.
+
+    A benchmark regresses when its throughput drops, or its memory per frame grows, by more than
+    `tolerance` (a ratio). Benchmarks missing from one of the reports are ignored.
+
+    Returns:
+        List[Dict[str, Any]]: `benchmark`, `metric`, `baseline`, `current` and relative `change` of each regression.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        reference: Optional[Dict[str, float]] = baseline["results"].get(name)
+        if reference is None:
+            continue
+        for metric, higher_is_better in (("per_second", True), ("bytes_per_item", False)):
+            old = reference.get(metric)
+            new = result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                regressions.append(
+                    {"benchmark": name, "metric": metric, "baseline": old, "current": new, "change": change}
+                )
+    return regressions
@@ -0,0 +1,130 @@
+"""
+Fletcher8 checksum engine shared by the host and the GardenIQ firmware.
+
+The firmware algorithm keeps two running sums, but its second sum is only ever doubled
+(`sum2 = (sum2 + sum2) % 255`) from zero, so it stays zero and the checksum reduces to
+the first sum: the byte sum of the data modulo 255. The functions below compute exactly that
+with C-level loops instead of a per-byte Python loop, and must stay bit-identical to the
+firmware: the golden-value tests pin them to the original algorithm.
+
+NumPy is optional. When it is installed, `checksum_many` sums a whole batch of frames with
+one vectorized call, otherwise it falls back to pure Python.
+"""
+
+from itertools import accumulate
+from typing import Iterable
+from typing import List
+from typing import Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+Buffer = bytes | bytearray | memoryview
+
+# Below this number of frames the NumPy set-up costs more than the pure Python loop.
+NUMPY_MIN_BATCH = 64
+
+
+def checksummed_span(source: str | Buffer, checksum: str | bytes) -> Buffer:
+    """
+    Return the bytes of a text device frame covered by its checksum.
+
+    The checksum covers the frame up to and including the ETX marker: neither the separator
+    before the checksum token nor the token itself. Every check of an inbound frame (parsing,
+    `Frame.verify_checksum`, `verify_many`) hashes this span.
+
+    Args:
+        source (str | bytes | bytearray | memoryview): The frame without its newline, checksum token included.
+            A str is encoded, the raw frames are sliced as they are.
+        checksum (str | bytes): The checksum token ending the frame.
+
+    Example:
+        >>> checksummed_span("< ACK DEV-1 7 OK > FA", "FA")
+        b'< ACK DEV-1 7 OK >'
+    """
+    span = source[: len(source) - len(checksum) - 1]
+    return span.encode() if isinstance(span, str) else span
+
+
+def fletcher8(data: Buffer) -> int:
+    """
+    Calculate the Fletcher8 checksum of the given data.
+
+    Args:
+        data (bytes | bytearray | memoryview): The input data for which to calculate the checksum.
+
+    Returns:
+        int: An 8-bit checksum value (0-254).
+
+    Example:
+        >>> fletcher8(b"hello")
+        22
+    """
+    # Iterating bytes yields ints, so the sum runs in C without building intermediate objects.
+    return sum(data) % 255
+
+
+def checksum_many(buffers: Sequence[Buffer]) -> List[int]:
+    """
+    Calculate the Fletcher8 checksum of each buffer of a batch.
+
+    Args:
+        buffers (Sequence[bytes | bytearray | memoryview]): The frames to checksum.
+
+    Returns:
+        List[int]: The checksum of each buffer, in the same order.
+    """
+    if np is None or len(buffers) < NUMPY_MIN_BATCH or not all(buffers):
+        return [fletcher8(buffer) for buffer in buffers]
+
+    # One contiguous buffer and the start offset of each frame: `reduceat` sums every segment at once.
+    joined = np.frombuffer(b"".join(buffers), dtype=np.uint8)
+    offsets = [0, *accumulate(len(buffer) for buffer in buffers)][:-1]
+    sums = np.add.reduceat(joined, offsets, dtype=np.uint64)
+    return (sums % 255).tolist()
+
+
+def verify_many(frames: Iterable) -> List[bool]:
+    """
+    Verify the checksum of every device frame of a batch (e.g. a drained serial buffer).
+
+    The result of each frame is the same as `Frame.verify_checksum`, except that a frame with
+    a checksum that is not hexadecimal is reported as invalid instead of raising.
+
+    Args:
+        frames (Iterable[Frame]): The frames to verify.
+
+    Returns:
+        List[bool]: True for each frame whose checksum matches, in the same order.
+    """
+    results: List[bool] = []
+    # Index in `results` and checksummed bytes of the frames whose checksum is still to be computed.
+    pending_indexes: List[int] = []
+    pending_sources: List[bytes] = []
+    expected: List[int] = []
+
+    for frame in frames:
+        if not frame.from_device or not frame.source_frame_from_device or not frame.checksum:
+            results.append(False)
+            continue
+        try:
+            expected_checksum = int(frame.checksum, 16)
+        except ValueError:
+            results.append(False)
+            continue
+
+        if frame.computed_checksum is not None:
+            results.append(frame.computed_checksum == expected_checksum)
+            continue
+
+        results.append(False)
+        pending_indexes.append(len(results) - 1)
+        pending_sources.append(checksummed_span(frame.source_frame_from_device, frame.checksum))
+        expected.append(expected_checksum)
+
+    for index, calculated, expected_checksum in zip(pending_indexes, checksum_many(pending_sources), expected):
+        results[index] = calculated == expected_checksum
+
+    return results
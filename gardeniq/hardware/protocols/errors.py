@@ -35,3 +35,9 @@ class CommandError(GardenEnum):
     BUSY = "BUSY"
     CHECKSUM_ERR = "CHECKSUM_ERR"
     DEV_NOT_READY = "DEV_NOT_READY"
+
+
+class CommandTimeoutError(FrameProcessingError):
+    """Raised when a device did not acknowledge a command in time, after every retry."""
+
+    error = CommandError.TIMEOUT
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from dataclasses import field
 from typing import List
 from typing import Literal
 from typing import Optional
@@ -6,8 +7,11 @@ from typing import Tuple
 
 from gardeniq.base.utils import GardenEnum
 
+from .checksum import checksummed_span
+from .checksum import fletcher8
 from .errors import CommandError
 from .settings import pattern_recv_frame_version
+from .settings import pattern_recv_frame_version_bytes
 
 
 class FrameType(GardenEnum):
@@ -31,8 +35,33 @@ class CommandState(GardenEnum):
     ERROR = "ERR"
 
 
-@dataclass
+class FrameEncoding(GardenEnum):
+    """
+    Wire encodings of the frames.
+
+    - TEXT: space-separated ASCII frames with an hexadecimal checksum, understood by every firmware
+    - MSGPACK / CBOR: length-prefixed binary frames (see `protocols.usb.binary`), used once the
+      device accepted them in its answer to a PING
+    """
+
+    TEXT = "TEXT"
+    MSGPACK = "MSGPACK"
+    CBOR = "CBOR"
+
+
+# Typed value answered by a device. Text frames always carry a string, binary frames keep the type.
+OkData = str | int | float | bool
+
+
+@dataclass(slots=True)
 class Frame:
+    """
+    A frame exchanged with a device, outbound (host -> device) or inbound (`from_device=True`).
+
+    The class is slotted: instances have no `__dict__`, the fields of the unused direction only cost
+    one pointer each. This matters when frames are buffered for batch processing.
+    """
+
     frame_type: FrameType
     device_uid: str
     command_id: int  # If -1 -> LG_INIT frame / If 0 -> Ping frame / If >0 -> Order command id
@@ -47,12 +76,19 @@ class Frame:
 
     # Fields only present when from_device=True
     command_state: Optional[CommandState] = None  # State of the command on device
-    ok_data: Optional[str] = None  # Data received from device when command sent is OK state
+    ok_data: Optional[OkData] = None  # Data received from device when command sent is OK state
     err_msg: Optional[CommandError] = None  # Error message if cmd_state is ERROR
     gd_fw_version: Optional[str] = None  # GardenIQ Firmware Version
     mp_fw_version: Optional[str] = None  # MicroPython Firmware Version
     checksum: Optional[str] = None  # Checksum from device frame
-    source_frame_from_device: Optional[str] = None  # Original frame string from device without \n
+    # Original frame from device without \n, kept as raw bytes when parsed from the port
+    source_frame_from_device: Optional[str | bytes] = None
+    computed_checksum: Optional[int] = None  # Checksum computed while parsing the raw bytes of the frame
+    encoding: Optional[FrameEncoding] = None  # Encoding accepted by the device, in its PING response
+    # Whether the source frame carries the firmware versions. Set by the parser, computed once otherwise.
+    fw_versions_matched: Optional[bool] = field(default=None, compare=False, repr=False)
+    # Time the bytes of the frame were read from the port, epoch in milliseconds. Set by the transport.
+    received_ts: Optional[int] = field(default=None, compare=False, repr=False)
 
     def __post_init__(self):
         """
@@ -84,10 +120,8 @@ class Frame:
         """
         Calculate a Fletcher8 checksum for the given data.
 
-        This function implements the Fletcher8 checksum algorithm, which computes
-        a checksum value by maintaining two running sums of the input bytes.
-        The two sums are then combined using bitwise operations to produce a
-        single byte checksum value.
+        Kept on the Frame for backward compatibility, the algorithm lives in
+        `gardeniq.hardware.protocols.checksum` (see `fletcher8`).
 
         Args:
             data (bytes): The input data for which to calculate the checksum.
@@ -100,12 +134,7 @@ class Frame:
             >>> isinstance(checksum, int)
             True
         """
-        sum1 = 0
-        sum2 = 0
-        for b in data:
-            sum1 = (sum1 + b) % 255
-            sum2 = (sum2 + sum2) % 255
-        return ((sum2 << 4) ^ sum1) & 0xFF
+        return fletcher8(data)
 
     def verify_checksum(self) -> bool:
         """
@@ -113,6 +142,9 @@ class Frame:
         This method compares the checksum stored in the frame (self.cs) with a
         calculated checksum based on the source device frame data. The stored
         checksum is expected to be in hexadecimal format.
+        The checksum covers the source frame up to its ETX marker (see `checksummed_span`).
+        When the frame was parsed, the checksum computed during parsing is reused instead of
+        encoding the source frame again.
 
         Returns:
             bool: True if the calculated checksum matches the expected checksum,
@@ -127,16 +159,22 @@ class Frame:
         expected_checksum = int(self.checksum, 16)
 
         # Calculate the checksum for the data part
-        calculated_checksum = self.build_checksum(self.source_frame_from_device.encode())
+        if self.computed_checksum is not None:
+            calculated_checksum = self.computed_checksum
+        else:
+            calculated_checksum = self.build_checksum(checksummed_span(self.source_frame_from_device, self.checksum))
         return calculated_checksum == expected_checksum
 
-    def is_ping_response(self) -> bool:
-        if self.source_frame_from_device and pattern_recv_frame_version.match(self.source_frame_from_device):
-            found_versions = True
-        else:
-            found_versions = False
+    def has_fw_versions(self) -> bool:
+        """Return True if the source frame carries the firmware versions (the regex runs at most once)."""
+        if self.fw_versions_matched is None:
+            source = self.source_frame_from_device
+            pattern = pattern_recv_frame_version_bytes if isinstance(source, bytes) else pattern_recv_frame_version
+            self.fw_versions_matched = bool(source and pattern.match(source))
+        return self.fw_versions_matched
 
-        return self.from_device and self.frame_type is FrameType.ACK and self.command_id == 0 and found_versions
+    def is_ping_response(self) -> bool:
+        return self.from_device and self.frame_type is FrameType.ACK and self.command_id == 0 and self.has_fw_versions()
 
     def _is_order_response(self) -> bool:
         return self.from_device and self.frame_type is FrameType.ACK and self.command_id > 0
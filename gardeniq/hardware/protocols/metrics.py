@@ -0,0 +1,256 @@
+"""
+Per-stage instrumentation of the frame pipeline: parsing, serialization, checksum verification,
+device lookup, liveness writes and frame handling.
+
+The instrumented functions are decorated with `instrumented(stage)`. While `pipeline_metrics` is
+disabled (the default, see settings.PROTOCOL_METRICS_ENABLED), the decorator only checks one
+attribute before calling the function. Once enabled, every call is timed with the monotonic clock
+into a fixed-size latency histogram per stage and per frame kind (see `frame_label`), and the errors
+are counted: the FrameParsingError (and ValueError) raised by the stages, the CommandError answered
+by the devices.
+
+Metrics live in the process that records them. The gateway publishes a snapshot every
+settings.PROTOCOL_METRICS_PUBLISH_INTERVAL seconds (see `PipelineMetrics.publish`), read by the
+`protocol_metrics` command and the admin API.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from .errors import CommandError
+from .errors import FrameParsingError
+from .frame import Frame
+
+# Upper bounds of the latency buckets, in microseconds. The last bucket counts everything slower.
+LATENCY_BUCKETS_US = (
+    1,
+    2,
+    5,
+    10,
+    20,
+    50,
+    100,
+    200,
+    500,
+    1_000,
+    2_000,
+    5_000,
+    10_000,
+    20_000,
+    50_000,
+    100_000,
+    200_000,
+    500_000,
+    1_000_000,
+)
+_BUCKETS_NS = tuple(bound * 1000 for bound in LATENCY_BUCKETS_US)
+
+# Label of the calls without frame (e.g. a device lookup by uid).
+ANY_FRAME = "*"
+
+
+def frame_label(frame: Frame) -> str:
+    """
+    Return the kind of a frame: its type for a host frame, the kind of answer for a device frame
+    (ACK_PING, ACK_LG_INIT, ACK_DATA, ACK_OK or ACK_ERR).
+    """
+    if not frame.from_device:
+        return frame.frame_type.value
+    if frame.has_response_error():
+        return "ACK_ERR"
+    if frame.is_ping_response():
+        return "ACK_PING"
+    if frame.is_init_response():
+        return "ACK_LG_INIT"
+    return "ACK_OK" if frame.ok_data is None else "ACK_DATA"
+
+
+class LatencyHistogram:
+    """Fixed-size histogram of durations (see LATENCY_BUCKETS_US), with their count, total and maximum."""
+
+    __slots__ = ("buckets", "count", "total_ns", "max_ns")
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(_BUCKETS_NS) + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def observe(self, elapsed_ns: int) -> None:
+        self.buckets[bisect_left(_BUCKETS_NS, elapsed_ns)] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile (0-1) of the durations, in microseconds.
+
+        Returns:
+            Optional[float]: The upper bound of the bucket holding the quantile (the maximum for the
+                last bucket), or None without observation.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_US, self.buckets):
+            seen += count
+            if seen >= rank:
+                return float(min(bound, self.max_ns / 1000))
+        return self.max_ns / 1000
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": self.total_ns / 1_000_000,
+            "mean_us": self.total_ns / self.count / 1000 if self.count else None,
+            "max_us": self.max_ns / 1000,
+            "p50_us": self.quantile(0.5),
+            "p90_us": self.quantile(0.9),
+            "p99_us": self.quantile(0.99),
+            "buckets": list(self.buckets),
+        }
+
+
+class PipelineMetrics:
+    """
+    Timers and error counters of the frame pipeline stages of one process.
+
+    Args:
+        enabled (bool, optional): Record the instrumented calls. Defaults to False.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget every measure."""
+        with self._lock:
+            # (stage, frame label) -> histogram
+            self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+            self.command_errors: Counter[str] = Counter()
+            self.parsing_errors: Counter[str] = Counter()
+            self.since = time.time()
+
+    def observe(self, stage: str, label: str, elapsed_ns: int) -> None:
+        """Record the duration of one call of a stage."""
+        key = (stage, label)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.observe(elapsed_ns)
+
+    def count_command_error(self, error: Optional[CommandError]) -> None:
+        """Count an error answered by a device."""
+        with self._lock:
+            self.command_errors[error.value if error else "UNKNOWN"] += 1
+
+    def count_parsing_error(self, stage: str, error: Exception) -> None:
+        """Count an error raised by a stage, by stage and exception class."""
+        with self._lock:
+            self.parsing_errors[f"{stage}:{type(error).__name__}"] += 1
+
+    def call(self, stage: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Call `func` and record its duration (or its error) under `stage`."""
+        start = time.monotonic_ns()
+        try:
+            result = func(*args, **kwargs)
+        except (FrameParsingError, ValueError) as e:
+            self.count_parsing_error(stage, e)
+            raise
+        elapsed = time.monotonic_ns() - start
+
+        frame = result if isinstance(result, Frame) else next((arg for arg in args if isinstance(arg, Frame)), None)
+        self.observe(stage, frame_label(frame) if frame is not None else ANY_FRAME, elapsed)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return the measures as plain data (JSON serializable).
+
+        Returns:
+            Dict[str, Any]: `stages` (stage -> frame label -> histogram snapshot), `command_errors`,
+                `parsing_errors`, the `buckets_us` bounds and when the measures started (`since`).
+        """
+        with self._lock:
+            stages: Dict[str, Dict[str, Any]] = {}
+            for (stage, label), histogram in sorted(self._histograms.items()):
+                stages.setdefault(stage, {})[label] = histogram.snapshot()
+            return {
+                "enabled": self.enabled,
+                "pid": os.getpid(),
+                "since": _isoformat(self.since),
+                "taken_at": _isoformat(time.time()),
+                "buckets_us": list(LATENCY_BUCKETS_US),
+                "stages": stages,
+                "command_errors": dict(self.command_errors),
+                "parsing_errors": dict(self.parsing_errors),
+            }
+
+    def publish(self, path: str | Path) -> None:
+        """Write the snapshot to `path`, atomically: readers never see a partial file."""
+        path = Path(path)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(self.snapshot(), indent=2))
+        os.replace(tmp_path, path)
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds")
+
+
+def load_snapshot(path: str | Path) -> Optional[Dict[str, Any]]:
+    """Read a snapshot written by `PipelineMetrics.publish`, None if there is none."""
+    try:
+        return json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def snapshot_rows(snapshot: Dict[str, Any]) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """Flatten the stages of a snapshot into (stage, frame label, histogram snapshot) rows."""
+    return [
+        (stage, label, histogram) for stage, labels in snapshot["stages"].items() for label, histogram in labels.items()
+    ]
+
+
+# Metrics of the current process, enabled by the hardware app from settings.PROTOCOL_METRICS_ENABLED.
+pipeline_metrics = PipelineMetrics()
+
+
+def instrumented(stage: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Decorate a function of the frame pipeline: its calls are recorded under `stage` while
+    `pipeline_metrics` is enabled. The frame kind is taken from the returned frame, or else from
+    the first frame argument.
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not pipeline_metrics.enabled:
+                return func(*args, **kwargs)
+            return pipeline_metrics.call(stage, func, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
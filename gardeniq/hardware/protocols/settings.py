@@ -5,8 +5,11 @@ ETX = ">"
 
 # Regular expression patterns for strict version strings
 pattern_strict_version = re.compile(r"^\d{1,2}\.\d{1,2}\.\d{1,2}$")
-# Regular expression pattern for received frame version strings from devices
-pattern_recv_frame_version = re.compile(r"GDFW=\d{1,2}\.\d{1,2}\.\d{1,2}\s+MPFW=\d{1,2}\.\d{1,2}\.\d{1,2}")
+# Regular expression pattern for received frame version strings from devices.
+# Used with `match()` on the whole frame, so the versions may be preceded by the frame header.
+pattern_recv_frame_version = re.compile(r".*GDFW=\d{1,2}\.\d{1,2}\.\d{1,2}\s+MPFW=\d{1,2}\.\d{1,2}\.\d{1,2}")
+# Same pattern for raw frames, to avoid decoding the frame only to look for the versions.
+pattern_recv_frame_version_bytes = re.compile(pattern_recv_frame_version.pattern.encode())
 
 # Je le met ici pour le moment pour ne pas oublier mais il faudra peut-être le déplacer plus tard !
 # Define available fields by model to send with LG_INIT frame type.
@@ -15,7 +18,6 @@ fields_for_frame = {
         "pk",
         "slug",
         "action_type",
-        "arguments",
     ),
     "Argument": (
         "pk",
@@ -1,2 +1,3 @@
+from .decoder import FrameStreamDecoder
 from .handler import FrameHandler
 from .parser import FrameParser
@@ -0,0 +1,258 @@
+"""
+Length-prefixed binary frames, the compact alternative to the text protocol.
+
+A binary frame is:
+
+    marker (1 byte) | payload length (2 bytes, big endian) | payload | checksum (1 byte)
+
+- the marker gives the codec of the payload (see `MARKERS`). It is never an ASCII byte, so a
+  binary frame cannot be mistaken for a text frame ("< ...") and both can share a stream
+- the payload is a msgpack or CBOR array `[frame type, device uid, command id, a, b]`:
+    - CMD: a = command slug, b = list of arguments
+    - PING: a = None, b = list of options (e.g. the encodings offered by the host)
+    - LG_INIT: a = model name, b = list of fields values
+    - ACK: a = command state, b = the typed `ok_data`, the error code, or for a PING response
+      `[GD firmware version, MP firmware version, accepted encoding]`
+- the checksum is the Fletcher8 of the marker, the length and the payload, as a raw byte
+
+Enum members are sent as small integers (see the `*_CODES` maps): they are part of the wire format
+and must match the firmware, never renumber them.
+"""
+
+import struct
+from abc import ABC
+from abc import abstractmethod
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import cbor2
+import msgpack
+
+from ..checksum import fletcher8
+from ..errors import FrameParsingError
+from ..frame import CommandError
+from ..frame import CommandState
+from ..frame import Frame
+from ..frame import FrameEncoding
+from ..frame import FrameType
+from ..metrics import instrumented
+
+HEADER = struct.Struct(">BH")
+# Marker, length and checksum.
+OVERHEAD = HEADER.size + 1
+MAX_PAYLOAD_SIZE = 0xFFFF
+
+FRAME_TYPE_CODES: Dict[FrameType, int] = {
+    FrameType.CMD: 1,
+    FrameType.PING: 2,
+    FrameType.ACK: 3,
+    FrameType.LG_INIT: 4,
+}
+COMMAND_STATE_CODES: Dict[CommandState, int] = {
+    CommandState.OK: 0,
+    CommandState.ERROR: 1,
+}
+COMMAND_ERROR_CODES: Dict[CommandError, int] = {
+    CommandError.UNKNOW_CMD: 1,
+    CommandError.INVALID_PARAM: 2,
+    CommandError.TIMEOUT: 3,
+    CommandError.BUSY: 4,
+    CommandError.CHECKSUM_ERR: 5,
+    CommandError.DEV_NOT_READY: 6,
+}
+_FRAME_TYPES = {code: member for member, code in FRAME_TYPE_CODES.items()}
+_COMMAND_STATES = {code: member for member, code in COMMAND_STATE_CODES.items()}
+_COMMAND_ERRORS = {code: member for member, code in COMMAND_ERROR_CODES.items()}
+
+# Types of `ok_data` kept by binary frames.
+_OK_DATA_TYPES = (str, int, float, bool)
+
+
+class BinaryFrameCodec(ABC):
+    """
+    Encode and decode binary frames. Subclasses only provide the serialization of the payload.
+
+    Unlike the text parser, a codec encodes and decodes the frames of both directions.
+    """
+
+    encoding: FrameEncoding
+    marker: int
+
+    @abstractmethod
+    def dumps(self, payload: List[Any]) -> bytes:
+        """Serialize the payload array."""
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        """Deserialize a payload."""
+
+    @instrumented("serialize")
+    def encode(self, frame: Frame) -> bytes:
+        """
+        Serialize a frame into a binary frame.
+
+        Raises:
+            FrameParsingError: If the payload is bigger than MAX_PAYLOAD_SIZE.
+        """
+        payload = self.dumps(to_payload(frame))
+        if len(payload) > MAX_PAYLOAD_SIZE:
+            raise FrameParsingError(f"Binary payload too big: {len(payload)} bytes")
+        data = HEADER.pack(self.marker, len(payload)) + payload
+        return data + bytes((fletcher8(data),))
+
+    @instrumented("parse")
+    def decode(self, data: bytes | memoryview) -> Frame:
+        """
+        Parse one complete binary frame.
+
+        Raises:
+            FrameParsingError: If the marker, the length or the checksum is wrong, or if the payload
+                is not a valid frame.
+        """
+        data = data if isinstance(data, bytes) else bytes(data)
+        size = frame_size(data)
+        if size is None or data[0] != self.marker:
+            raise FrameParsingError(f"Invalid {self.encoding.value} frame header: {data[:HEADER.size]!r}")
+        if size != len(data):
+            raise FrameParsingError(f"Invalid {self.encoding.value} frame length: {len(data)} instead of {size}")
+
+        checksum = fletcher8(memoryview(data)[:-1])
+        if checksum != data[-1]:
+            raise FrameParsingError(f"Invalid {self.encoding.value} frame checksum: {data[-1]:02X}")
+
+        try:
+            items = self.loads(data[HEADER.size : -1])
+        except Exception as e:
+            raise FrameParsingError(f"Invalid {self.encoding.value} payload: {e}") from e
+        return from_payload(items, data, checksum)
+
+
+class MsgpackFrameCodec(BinaryFrameCodec):
+    encoding = FrameEncoding.MSGPACK
+    marker = 0xA7
+
+    def dumps(self, payload: List[Any]) -> bytes:
+        return msgpack.packb(payload, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+class CborFrameCodec(BinaryFrameCodec):
+    encoding = FrameEncoding.CBOR
+    marker = 0xCB
+
+    def dumps(self, payload: List[Any]) -> bytes:
+        return cbor2.dumps(payload)
+
+    def loads(self, data: bytes) -> Any:
+        return cbor2.loads(data)
+
+
+CODECS: Dict[FrameEncoding, BinaryFrameCodec] = {
+    codec.encoding: codec for codec in (MsgpackFrameCodec(), CborFrameCodec())
+}
+MARKERS: Dict[int, BinaryFrameCodec] = {codec.marker: codec for codec in CODECS.values()}
+
+
+def frame_size(buffer: bytes | bytearray | memoryview) -> Optional[int]:
+    """Return the total size of the binary frame starting the buffer, or None if its header is incomplete."""
+    if len(buffer) < HEADER.size:
+        return None
+    _, length = HEADER.unpack_from(buffer)
+    return length + OVERHEAD
+
+
+def is_checksum_valid(data: bytes | bytearray | memoryview) -> bool:
+    """Whether the last byte of a complete binary frame is the checksum of the others."""
+    return fletcher8(memoryview(data)[:-1]) == data[-1]
+
+
+def to_payload(frame: Frame) -> List[Any]:
+    header = [FRAME_TYPE_CODES[frame.frame_type], frame.device_uid, frame.command_id]
+    match frame.frame_type:
+        case FrameType.ACK:
+            return [*header, COMMAND_STATE_CODES[frame.command_state], _ack_value(frame)]
+        case FrameType.LG_INIT:
+            return [*header, frame.model, list(frame.fields_values)]
+        case FrameType.PING:
+            return [*header, None, list(frame.args_values)]
+        case _:
+            return [*header, frame.command_slug, list(frame.args_values)]
+
+
+def _ack_value(frame: Frame) -> Any:
+    if frame.command_state is CommandState.ERROR:
+        return COMMAND_ERROR_CODES[frame.err_msg]
+    if frame.command_id == 0 and frame.gd_fw_version and frame.mp_fw_version:
+        encoding = frame.encoding.value if frame.encoding else None
+        return [frame.gd_fw_version, frame.mp_fw_version, encoding]
+    return frame.ok_data
+
+
+def from_payload(items: Any, data: bytes, checksum: int) -> Frame:
+    """Build the Frame of a decoded payload. `data` is the whole binary frame, kept (in hexadecimal) as source."""
+    if not isinstance(items, list) or len(items) != 5:
+        raise FrameParsingError(f"Invalid binary payload: {items!r}")
+
+    type_code, device_uid, command_id, a, b = items
+    frame_type = _FRAME_TYPES.get(type_code)
+    if frame_type is None:
+        raise FrameParsingError(f"Invalid frame type in binary frame. Received: {type_code!r}")
+    if not isinstance(device_uid, str) or not isinstance(command_id, int):
+        raise FrameParsingError(f"Invalid device uid or command id in binary frame: {device_uid!r} {command_id!r}")
+
+    match frame_type:
+        case FrameType.ACK:
+            return _device_frame(device_uid, command_id, a, b, data, checksum)
+        case FrameType.LG_INIT:
+            return Frame(frame_type, device_uid, command_id, "", [], model=a, fields_values=tuple(b))
+        case FrameType.PING:
+            return Frame(frame_type, device_uid, command_id, "", list(b))
+        case _:
+            return Frame(frame_type, device_uid, command_id, a or "", list(b))
+
+
+def _device_frame(device_uid: str, command_id: int, state_code: Any, value: Any, data: bytes, checksum: int) -> Frame:
+    command_state = _COMMAND_STATES.get(state_code)
+    if command_state is None:
+        raise FrameParsingError(f"Invalid command state in binary frame. Received: {state_code!r}")
+
+    ok_data = None
+    error_msg = None
+    gd_fw_version = None
+    mp_fw_version = None
+    encoding = None
+
+    if command_state is CommandState.ERROR:
+        error_msg = _COMMAND_ERRORS.get(value)
+        if error_msg is None:
+            raise FrameParsingError(f"Invalid command error in binary frame. Received: {value!r}")
+    elif command_id == 0 and isinstance(value, list) and len(value) == 3:
+        gd_fw_version, mp_fw_version, encoding_name = value
+        encoding = FrameEncoding.from_string(encoding_name, strict=True) if encoding_name else None
+    elif command_id > 0 and value is not None:
+        if not isinstance(value, _OK_DATA_TYPES):
+            raise FrameParsingError(f"Invalid data type in binary frame: {type(value).__name__}")
+        ok_data = value
+
+    return Frame(
+        frame_type=FrameType.ACK,
+        device_uid=device_uid,
+        command_id=command_id,
+        command_slug="",
+        args_values=[],
+        from_device=True,
+        command_state=command_state,
+        ok_data=ok_data,
+        err_msg=error_msg,
+        gd_fw_version=gd_fw_version,
+        mp_fw_version=mp_fw_version,
+        checksum=f"{checksum:02X}",
+        source_frame_from_device=data[:-1].hex(),
+        computed_checksum=checksum,
+        fw_versions_matched=gd_fw_version is not None,
+        encoding=encoding,
+    )
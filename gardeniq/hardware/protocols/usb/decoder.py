@@ -0,0 +1,192 @@
+import logging
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+
+from ..errors import FrameParsingError
+from ..frame import Frame
+from ..settings import STX
+from .binary import MARKERS
+from .binary import frame_size
+from .binary import is_checksum_valid
+from .parser import FrameParser
+
+logger = logging.getLogger(__name__)
+
+# A frame always starts with the STX marker followed by a separator ("< ACK ...").
+# Matching the separator too avoids resynchronising on a "<" that is part of a payload.
+STX_MARKER = f"{STX} ".encode()
+EOL = b"\n"
+# Each binary frame starts with the one byte marker of its codec, never found in a text frame.
+BINARY_MARKERS = tuple(bytes((marker,)) for marker in MARKERS)
+
+# Default upper bound of the reassembly buffer. Device frames are a few dozen bytes long,
+# anything bigger than this without a newline is garbage or a lost end of frame.
+DEFAULT_MAX_FRAME_SIZE = 512
+
+
+class FrameStreamDecoder:
+    """
+    Stateful decoder turning a raw serial byte stream into Frame objects.
+
+    The decoder is fed with arbitrary ``bytes`` chunks (as returned by ``serial.Serial.read()``)
+    and keeps the incomplete tail in a bounded reassembly buffer until the end of the frame arrives.
+    Bytes received before a STX marker are dropped, and a frame truncated by the start of a new one
+    is skipped, so the decoder always resynchronises on the next valid frame.
+
+    Text frames end with a newline, binary frames (see `binary`) are length-prefixed: both can be mixed
+    in the stream, e.g. while the encoding is being negotiated. A binary frame with a wrong checksum
+    may have a corrupted length, so only its marker is dropped before looking for the next frame.
+
+    This class is responsible for framing only. Parsing is delegated to the bytes fast path of FrameParser and
+    invalid frames are counted and logged, never raised, so one corrupt frame does not stop the stream.
+
+    Attributes:
+        max_frame_size (int): Maximum number of buffered bytes without an end of frame.
+        frames_decoded (int): Number of frames successfully parsed.
+        parsing_errors (int): Number of complete frames rejected by the parser.
+        bytes_discarded (int): Number of bytes dropped while resynchronising.
+        overflows (int): Number of times the reassembly buffer exceeded max_frame_size.
+
+    Example:
+        >>> decoder = FrameStreamDecoder()
+        >>> for frame in decoder.feed(ser.read(ser.in_waiting or 1)):
+        ...     handler.handle_device_response(frame)
+    """
+
+    def __init__(self, max_frame_size: int = DEFAULT_MAX_FRAME_SIZE) -> None:
+        if max_frame_size <= len(STX_MARKER):
+            raise ValueError("max_frame_size is too small to hold a frame")
+        self.max_frame_size = max_frame_size
+        self._buffer = bytearray()
+        self.frames_decoded = 0
+        self.parsing_errors = 0
+        self.bytes_discarded = 0
+        self.overflows = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of bytes waiting in the reassembly buffer."""
+        return len(self._buffer)
+
+    def reset(self) -> None:
+        """Drop the reassembly buffer (e.g. after the port has been reopened)."""
+        self._discard(len(self._buffer))
+
+    def feed(self, data: bytes | bytearray | memoryview) -> Iterator[Frame]:
+        """
+        Append a chunk of bytes to the stream and yield every frame completed by it.
+
+        Args:
+            data (bytes | bytearray | memoryview): Raw bytes read from the serial port.
+
+        Yields:
+            Frame: Each complete and valid frame found in the stream, in order of arrival.
+        """
+        self._buffer += data
+
+        while self._buffer:
+            if self._buffer[0] in MARKERS or self._buffer.startswith(STX_MARKER):
+                # Usual case, checked first: looking for every marker would scan the whole buffer.
+                start = 0
+            else:
+                start = self._find_start(0, len(self._buffer))
+            if start == -1:
+                # No frame start at all: keep only the last byte, it may be the first half of the marker.
+                self._discard(len(self._buffer) - (len(STX_MARKER) - 1))
+                return
+            if start > 0:
+                self._discard(start)
+
+            if self._buffer[0] in MARKERS:
+                complete, line = self._cut_binary()
+            else:
+                complete, line = self._cut_text()
+            if not complete:
+                return
+            if line is None:
+                continue
+
+            frame = self._parse(line)
+            if frame is not None:
+                yield frame
+
+    def _find_start(self, start: int, end: int) -> int:
+        """Index of the first text or binary frame start in buffer[start:end], or -1."""
+        found = [
+            index
+            for index in (self._buffer.find(marker, start, end) for marker in (STX_MARKER, *BINARY_MARKERS))
+            if index != -1
+        ]
+        return min(found, default=-1)
+
+    def _cut_binary(self) -> Tuple[bool, Optional[bytes]]:
+        # (False, None) while the frame is incomplete, (True, None) when bytes were dropped.
+        size = frame_size(self._buffer)
+        if size is None:
+            return False, None
+        if size > self.max_frame_size:
+            self.parsing_errors += 1
+            logger.warning(f"Dropped binary frame of {size} bytes (max {self.max_frame_size})")
+            self._discard(1)
+            return True, None
+        if len(self._buffer) < size:
+            return False, None
+
+        line = bytes(self._buffer[:size])
+        if not is_checksum_valid(line):
+            self.parsing_errors += 1
+            logger.warning(f"Dropped binary frame with invalid checksum {line!r}")
+            self._discard(1)
+            return True, None
+        del self._buffer[:size]
+        return True, line
+
+    def _cut_text(self) -> Tuple[bool, Optional[bytes]]:
+        end = self._buffer.find(EOL)
+        if end == -1:
+            if len(self._buffer) > self.max_frame_size:
+                self._handle_overflow()
+                return True, None
+            return False, None
+
+        # A binary marker (never ASCII) before the end of line means the text frame was truncated.
+        restart = self._find_start(len(STX_MARKER), end)
+        if restart != -1 and self._buffer[restart] in MARKERS:
+            self._discard(restart)
+            return True, None
+
+        # A STX marker inside the line means the previous frame was truncated.
+        # Skip to the last frame start so only the newest frame is parsed.
+        restart = self._buffer.rfind(STX_MARKER, len(STX_MARKER), end)
+        if restart != -1:
+            self._discard(restart)
+            end -= restart
+
+        line = bytes(self._buffer[: end + 1])
+        del self._buffer[: end + 1]
+        return True, line
+
+    def _parse(self, line: bytes) -> Frame | None:
+        try:
+            frame = FrameParser.decode(line)
+        except (FrameParsingError, ValueError) as e:
+            # UnicodeDecodeError is a ValueError subclass.
+            self.parsing_errors += 1
+            logger.warning(f"Dropped invalid frame {line!r}: {e}")
+            return None
+        self.frames_decoded += 1
+        return frame
+
+    def _handle_overflow(self) -> None:
+        self.overflows += 1
+        logger.warning(f"Reassembly buffer overflow ({len(self._buffer)} bytes without end of frame)")
+        # Resynchronise on the next frame start, or drop everything if there is none.
+        restart = self._find_start(len(STX_MARKER), len(self._buffer))
+        self._discard(restart if restart != -1 else len(self._buffer))
+
+    def _discard(self, count: int) -> None:
+        if count <= 0:
+            return
+        self.bytes_discarded += count
+        del self._buffer[:count]
@@ -1,24 +1,132 @@
 import logging
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
 
+from django.db import DatabaseError
+from django.db import transaction
+from django.utils import timezone
+
+from gardeniq.base.models import Status
+from gardeniq.hardware.liveness import LivenessTracker
 from gardeniq.hardware.models import Device
+from gardeniq.hardware.registry import device_registry
+from gardeniq.telemetry.ingest import TelemetryWriter
 
 from ..errors import CommandError
 from ..errors import FrameProcessingError
 from ..frame import Frame
+from ..frame import FrameType
+from ..metrics import instrumented
+from ..metrics import pipeline_metrics
 
 logger = logging.getLogger(__name__)
 
 
+ResponseListener = Callable[[Frame], None]
+FrameErrors = List[Tuple[Frame, Exception]]
+
+
+class _DeviceBatch:
+    """Devices touched by a batch of frames: loaded from the registry, saved with one `bulk_update`."""
+
+    UPDATE_FIELDS = ("status", "last_seen", "gd_firmware_version", "mp_firmware_version", "need_upgrade")
+
+    def __init__(self, uids: Set[str], liveness: LivenessTracker) -> None:
+        self.devices: Dict[str, Device] = self._load(uids)
+        self.liveness = liveness
+        self.changed: Dict[str, Device] = {}
+
+    @staticmethod
+    @instrumented("device_lookup")
+    def _load(uids: Set[str]) -> Dict[str, Device]:
+        return device_registry.get_devices(uids)
+
+    def get(self, uid: str) -> Device:
+        try:
+            return self.devices[uid]
+        except KeyError:
+            logger.error(f"Device {uid} not found in database")
+            raise FrameProcessingError(f"Unknown device: {uid}")
+
+    def mark_online(self, device: Device, on: bool = True) -> None:
+        # Only a status flip is written with the batch, `last_seen` alone is coalesced.
+        try:
+            flipped = self.liveness.record(device, on, commit=False)
+        except Status.DoesNotExist:
+            logger.error(f"Device status {'ONLINE' if on else 'OFFLINE'} not found in database")
+            raise FrameProcessingError(f"Unknown device status: {'ONLINE' if on else 'OFFLINE'}")
+        if flipped:
+            self.changed[device.uid] = device
+
+    def set_firmware_versions(self, device: Device, garden_fw: str, micropython_fw: str) -> None:
+        if device.set_firmware_versions(garden_fw, micropython_fw, commit=False):
+            self.changed[device.uid] = device
+
+    def forget(self) -> None:
+        for device in self.changed.values():
+            device_registry.forget_device(device)
+
+    @instrumented("device_save")
+    def save(self) -> None:
+        if not self.changed:
+            return
+        # `bulk_update` does not run `auto_now`, as `save` does for each frame.
+        now = timezone.now()
+        for device in self.changed.values():
+            device.last_seen = now
+        Device.objects.bulk_update(self.changed.values(), self.UPDATE_FIELDS)
+
+
 class FrameHandler:
+    """
+    Process the response frames of the devices.
+
+    Args:
+        liveness (LivenessTracker, optional): Tracker of the device status and `last_seen` writes.
+            Defaults to a new LivenessTracker; call `liveness.flush()` before leaving.
+        telemetry (TelemetryWriter, optional): Buffer of the sensor readings answered by the devices.
+            Defaults to a new TelemetryWriter; call `telemetry.flush()` before leaving.
+    """
+
+    def __init__(
+        self,
+        liveness: Optional[LivenessTracker] = None,
+        telemetry: Optional[TelemetryWriter] = None,
+    ) -> None:
+        self._response_listeners: List[ResponseListener] = []
+        self.liveness = liveness or LivenessTracker()
+        self.telemetry = telemetry or TelemetryWriter()
 
+    def add_response_listener(self, listener: ResponseListener) -> None:
+        """
+        Register a callable notified with every ACK frame routed by `handle_device_response`.
+
+        Listeners are called from the thread running the handler, after the frame has been
+        processed (even if its processing failed), e.g. to resolve the command waiting for it.
+        """
+        self._response_listeners.append(listener)
+
+    def _notify_response(self, frame: Frame) -> None:
+        for listener in self._response_listeners:
+            try:
+                listener(frame)
+            except Exception:
+                logger.exception(f"Response listener failed for device {frame.device_uid}")
+
+    @instrumented("device_lookup")
     def _get_device(self, uid: str) -> Device:
         try:
-            device = Device.objects.get(uid=uid)
-            return device
+            return device_registry.get_device(uid)
         except Device.DoesNotExist:
             logger.error(f"Device {uid} not found in database")
             raise FrameProcessingError(f"Unknown device: {uid}")
 
+    @instrumented("handle")
     def handle_device_response(self, frame: Frame) -> None:
         """
         Handle and process a response frame received from a device.
@@ -48,24 +156,130 @@ class FrameHandler:
                - Order responses with data
                - Order responses without data
             5. Logs a warning for unrecognized frame types
+            6. Notifies the response listeners of ACK frames
         """
+        self._validate(frame)
+
+        try:
+            self._route(frame, self._handle_error_response, self._handle_ping_response)
+        finally:
+            if frame.frame_type is FrameType.ACK:
+                self._notify_response(frame)
+        self.telemetry.flush_due()
+
+    @instrumented("handle_batch")
+    def handle_batch(self, frames: Iterable[Frame]) -> FrameErrors:
+        """
+        Handle a burst of response frames with a constant number of queries.
+
+        Each frame gets the same processing as with `handle_device_response`, in order, but the
+        devices touched by the batch (ping responses, TIMEOUT errors) come from the device registry,
+        with one `in_bulk` query for the missing ones, and their status and firmware changes are
+        written with one `bulk_update` at the end of the batch. A `last_seen` update alone is
+        coalesced by the liveness tracker, the sensor readings by the telemetry writer (written in
+        their own transaction, after the batch). The response listeners are notified once the batch is saved.
+
+        A frame rejected by `handle_device_response` (ValueError, FrameProcessingError), or whose
+        processing raised any other error, does not stop the batch: it is returned with its error.
+        The frames are routed without writing to the database (the lookups map their errors to
+        FrameProcessingError), so a failed frame leaves the transaction usable, without a savepoint
+        (two more queries) per frame. Only a database error, after which the transaction cannot be
+        used, rolls the whole batch back and is raised.
+
+        Args:
+            frames (Iterable[Frame]): The frames received from the devices, in reception order.
+
+        Returns:
+            FrameErrors: The rejected frames, with their error.
+        """
+        errors: FrameErrors = []
+        valid: List[Frame] = []
+        for frame in frames:
+            try:
+                self._validate(frame)
+            except ValueError as e:
+                errors.append((frame, e))
+            else:
+                valid.append(frame)
+
+        batch = _DeviceBatch({frame.device_uid for frame in valid if self._needs_device(frame)}, self.liveness)
+
+        def handle_error(frame: Frame) -> None:
+            self._log_error_response(frame)
+            if frame.err_msg is CommandError.TIMEOUT:
+                batch.mark_online(batch.get(frame.device_uid), False)
+
+        def handle_ping(frame: Frame) -> None:
+            device = batch.get(frame.device_uid)
+            batch.mark_online(device)
+            if frame.gd_fw_version and frame.mp_fw_version:
+                batch.set_firmware_versions(device, frame.gd_fw_version, frame.mp_fw_version)
+
+        try:
+            with transaction.atomic():
+                for frame in valid:
+                    try:
+                        self._route(frame, handle_error, handle_ping)
+                    except (FrameProcessingError, ValueError) as e:
+                        errors.append((frame, e))
+                    except DatabaseError:
+                        raise
+                    except Exception as e:
+                        logger.exception(f"Failed to handle a frame from device {frame.device_uid}")
+                        errors.append((frame, e))
+                batch.save()
+                self.liveness.flush_due()
+        except Exception:
+            # The cached devices hold the changes that were rolled back.
+            batch.forget()
+            raise
+        finally:
+            for frame in valid:
+                if frame.frame_type is FrameType.ACK:
+                    self._notify_response(frame)
+
+        self.telemetry.flush_due()
+        return errors
+
+    @staticmethod
+    def _validate(frame: Frame) -> None:
         if not frame.from_device:
             raise ValueError("Frame is not from device. Cannot execute.")
 
         # Verify checksum
-        if not frame.verify_checksum():
+        if not FrameHandler._verify_checksum(frame):
             raise ValueError(
                 f"Checksum verification failed for device {frame.device_uid}. " "Possible command jailbreak detected !"
             )
 
+    @staticmethod
+    @instrumented("checksum")
+    def _verify_checksum(frame: Frame) -> bool:
+        return frame.verify_checksum()
+
+    @staticmethod
+    def _needs_device(frame: Frame) -> bool:
+        if frame.has_response_error():
+            return frame.err_msg is CommandError.TIMEOUT
+        return frame.is_ping_response()
+
+    @instrumented("route")
+    def _route(
+        self,
+        frame: Frame,
+        handle_error: Callable[[Frame], None],
+        handle_ping: Callable[[Frame], None],
+    ) -> None:
         # Handle errors
         if frame.has_response_error():
-            self._handle_error_response(frame)
+            if pipeline_metrics.enabled:
+                pipeline_metrics.count_command_error(frame.err_msg)
+            handle_error(frame)
             return
 
         # Route to appropriate handler
         if frame.is_ping_response():
-            self._handle_ping_response(frame)
+            handle_ping(frame)
         elif frame.is_init_response():
             self._handle_lg_init_response(frame)
         elif frame.is_order_response_with_data():
@@ -75,36 +289,41 @@ class FrameHandler:
         else:
             logger.warning(f"Unhandled frame type: {frame.frame_type}")
 
-    def _handle_error_response(self, frame: Frame) -> None:
+    @staticmethod
+    def _log_error_response(frame: Frame) -> None:
         logger.error(
             f"Device {frame.device_uid} returned error for command : "
             f"{frame.frame_type.value}|{frame.command_id}|{frame.command_slug}"
             f"{frame.err_msg.value if frame.err_msg else 'Unknow error'}"
         )
 
+    def _handle_error_response(self, frame: Frame) -> None:
+        self._log_error_response(frame)
+
         # TODO: register the device error response into database telemetry
         #   OR/AND SSE system for display response state to user dashboard.
         if frame.err_msg is CommandError.TIMEOUT:
             device = self._get_device(frame.device_uid)
-            device.mark_online(False)
+            self.liveness.record(device, False)
 
     def _handle_ping_response(self, frame: Frame) -> None:
         device = self._get_device(frame.device_uid)
-        device.mark_online()
+        self.liveness.record(device)
 
         if frame.gd_fw_version and frame.mp_fw_version:
             device.set_firmware_versions(frame.gd_fw_version, frame.mp_fw_version)
 
     def _handle_lg_init_response(self, frame: Frame) -> None:
-        # TODO: refresh the initial queue with langage to enable send next Order object.
+        # The ACK is matched with its LG_INIT frame by the response listeners (the gateway correlator),
+        # the language sync (gateway.language.LanguageSync) then stores the acknowledged order.
         pass
 
     def _handle_response_with_data(self, frame: Frame) -> None:
         # TODO: register the device response data into log system
-        #   OR database telemetry
         #   OR SSE system for display data to user dashboard.
         # e.g: back send `get_temp` order, device response with temp data.
-        pass
+        # The values measured by the sensors are buffered for the telemetry (written by `flush_due`).
+        self.telemetry.add_frame(frame)
 
     def _handle_response_without_data(self, frame: Frame) -> None:
         # TODO: register the device ok response state into log system
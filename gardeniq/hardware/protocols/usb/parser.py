@@ -1,11 +1,63 @@
+from functools import lru_cache
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from gardeniq.base.utils import GardenEnum
+
+from ..checksum import checksummed_span
 from ..errors import FrameParsingError
 from ..frame import CommandError
 from ..frame import CommandState
 from ..frame import Frame
+from ..frame import FrameEncoding
 from ..frame import FrameType
+from ..metrics import instrumented
 from ..settings import ETX
 from ..settings import STX
 from ..settings import pattern_recv_frame_version
+from ..settings import pattern_recv_frame_version_bytes
+from .binary import CODECS
+from .binary import MARKERS
+
+STX_BYTES = STX.encode()
+ETX_BYTES = ETX.encode()
+
+# Raw token -> enum member maps, so the bytes path resolves the usual upper-case tokens
+# without decoding them. Other spellings fall back to `GardenEnum.from_string`.
+_FRAME_TYPE_TOKENS = {member.value.encode(): member for member in FrameType}
+_COMMAND_STATE_TOKENS = {member.value.encode(): member for member in CommandState}
+_COMMAND_ERROR_TOKENS = {member.value.encode(): member for member in CommandError}
+
+# Option of a PING (host) or of its response (device) naming frame encodings, e.g. "ENC=MSGPACK,CBOR".
+ENCODING_OPTION = "ENC="
+
+
+def _enum_from_token(tokens: dict, enum_klass: type[GardenEnum], token: bytes) -> Optional[GardenEnum]:
+    member = tokens.get(token)
+    if member is None:
+        member = enum_klass.from_string(token.decode("ascii"))
+    return member
+
+
+def encoding_option(encodings: Iterable[FrameEncoding]) -> str:
+    """Build the PING option offering these encodings to a device, by order of preference."""
+    return ENCODING_OPTION + ",".join(encoding.value for encoding in encodings)
+
+
+def _encoding_from_options(options: List[str]) -> Optional[FrameEncoding]:
+    # Options after the firmware versions of a PING response; an unknown encoding means TEXT.
+    for option in options:
+        if option.startswith(ENCODING_OPTION):
+            return FrameEncoding.from_string(option.removeprefix(ENCODING_OPTION), strict=True)
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _lg_init_body(model_name: Optional[str], fields_values: Tuple[str, ...]) -> str:
+    # The body does not depend on the device: it is built once per model row version and reused.
+    return f"-1 {model_name} {';'.join(fields_values)}"
 
 
 class FrameParser:
@@ -20,6 +72,7 @@ class FrameParser:
     """
 
     @staticmethod
+    @instrumented("parse")
     def parse_from_device(recv_str: str) -> Frame:
         """
         Parse a frame string received from a device into a Frame object.
@@ -92,6 +145,9 @@ class FrameParser:
         error_msg = None
         garden_firmware_version = None
         micro_python_firmware_version = None
+        # Computed here once, so Frame.is_ping_response does not run the regex again.
+        fw_versions_matched = False
+        encoding = None
 
         if command_state is CommandState.ERROR:
             error_msg = CommandError.from_string(parts[5])
@@ -99,15 +155,18 @@ class FrameParser:
                 raise FrameParsingError(f"Invalid command error in received frame. Received: {parts[5]}")
         elif command_state is CommandState.OK:
             if command_id > 0:
-                # Classic order response (e.g, : response to get_temp order return temp)
-                ok_data = parts[5]
+                # Classic order response (e.g, : response to get_temp order return temp), if any data
+                ok_data = parts[5] if len(parts) > 7 else None
             else:
                 # PING response with firmware versions
                 if pattern_recv_frame_version.match(recv_str):
+                    fw_versions_matched = True
                     # GDFW=XX.XX.XX -> XX.XX.XX
                     garden_firmware_version = parts[5].split("=")[-1]
                     # MPFW=XX.XX.XX -> XX.XX.XX
                     micro_python_firmware_version = parts[6].split("=")[-1]
+                    # ENC=MSGPACK -> encoding accepted by the device, if any
+                    encoding = _encoding_from_options(parts[7:-2])
 
         return Frame(
             frame_type=frame_type_obj,
@@ -123,9 +182,110 @@ class FrameParser:
             mp_fw_version=micro_python_firmware_version,
             checksum=checksum,
             source_frame_from_device=recv_str,
+            computed_checksum=Frame.build_checksum(checksummed_span(recv_str, checksum)),
+            fw_versions_matched=fw_versions_matched,
+            encoding=encoding,
         )
 
     @staticmethod
+    @instrumented("parse")
+    def parse_from_device_bytes(buf: bytes | memoryview) -> Frame:
+        """
+        Parse a raw frame received from a device into a Frame object, without decoding it first.
+
+        Fast path of `parse_from_device` for frames read straight from the serial port.
+        The buffer is tokenized once, the Fletcher8 checksum is computed over the span given by
+        the tokens and stored in the frame, so `Frame.verify_checksum` does not encode the frame again.
+        Only the fields kept in the Frame are turned into strings: the source frame stays raw bytes.
+
+        Args:
+            buf (bytes | memoryview): The raw frame, newline included.
+                        Expected format: b"STX frame_type device_uid command_id command_state [data...] ETX checksum\n"
+
+        Returns:
+            Frame: A Frame object equal to the one returned by `parse_from_device` for the decoded frame,
+                   with `computed_checksum` set, but for `source_frame_from_device` which holds the bytes.
+
+        Raises:
+            FrameParsingError: For the same invalid frames as `parse_from_device`.
+            ValueError: If a field kept in the Frame is not ASCII or the command id is not an integer.
+
+        Notes:
+            - A memoryview is copied once into bytes, as memoryview has no tokenizer.
+        """
+        data = buf if isinstance(buf, bytes) else bytes(buf)
+
+        if not data.endswith(b"\n"):
+            raise FrameParsingError("The received string does not end with a newline character. It's invalid frame !")
+
+        data = data[:-1]
+        parts = data.split(b" ")
+
+        if len(parts) < 7:
+            raise FrameParsingError(
+                f"The received string is too short. Warning: the system may be infected. recv: {data!r}"
+            )
+
+        if parts[0] != STX_BYTES:
+            raise FrameParsingError(f"Invalid STX in received frame. Received: {parts[0]!r}")
+        if parts[-2] != ETX_BYTES:
+            raise FrameParsingError(f"Invalid ETX in received frame. Received: {parts[-2]!r}")
+        # The span is given by the checksum token: the frame is hashed as it is, never decoded.
+        computed_checksum = Frame.build_checksum(checksummed_span(data, parts[-1]))
+
+        frame_type_obj = _enum_from_token(_FRAME_TYPE_TOKENS, FrameType, parts[1])
+        if not frame_type_obj:
+            raise FrameParsingError(f"Invalid frame type in received frame. Received: {parts[1]!r}")
+
+        # int() accepts ASCII digits in bytes directly
+        command_id = int(parts[3])
+
+        command_state = _enum_from_token(_COMMAND_STATE_TOKENS, CommandState, parts[4])
+        if not command_state:
+            raise FrameParsingError(f"Invalid command state in received frame. Received: {parts[4]!r}")
+
+        ok_data = None
+        error_msg = None
+        garden_firmware_version = None
+        micro_python_firmware_version = None
+        fw_versions_matched = False
+        encoding = None
+
+        if command_state is CommandState.ERROR:
+            error_msg = _enum_from_token(_COMMAND_ERROR_TOKENS, CommandError, parts[5])
+            if not error_msg:
+                raise FrameParsingError(f"Invalid command error in received frame. Received: {parts[5]!r}")
+        elif command_state is CommandState.OK:
+            if command_id > 0:
+                ok_data = parts[5].decode("ascii") if len(parts) > 7 else None
+            elif pattern_recv_frame_version_bytes.match(data):
+                fw_versions_matched = True
+                garden_firmware_version = parts[5].split(b"=")[-1].decode("ascii")
+                micro_python_firmware_version = parts[6].split(b"=")[-1].decode("ascii")
+                if len(parts) > 9:
+                    encoding = _encoding_from_options([part.decode("ascii") for part in parts[7:-2]])
+
+        return Frame(
+            frame_type=frame_type_obj,
+            device_uid=parts[2].decode("ascii"),
+            command_id=command_id,
+            command_slug="",  # Not present in device responses
+            args_values=[],  # Not present in device responses
+            from_device=True,
+            command_state=command_state,
+            ok_data=ok_data,
+            err_msg=error_msg,
+            gd_fw_version=garden_firmware_version,
+            mp_fw_version=micro_python_firmware_version,
+            checksum=parts[-1].decode("ascii"),
+            source_frame_from_device=data,
+            computed_checksum=computed_checksum,
+            fw_versions_matched=fw_versions_matched,
+            encoding=encoding,
+        )
+
+    @staticmethod
+    @instrumented("serialize")
     def parse_from_frame_klass(frame_obj: Frame) -> str:
         """
         Serialize a Frame object into a string representation for transmission.
@@ -153,7 +313,7 @@ class FrameParser:
             - CMD with command_id > 0 and command_slug: "command_id command_slug args"
             - CMD with command_id > 0 (no slug): "command_id args"
             - LG_INIT with command_id = -1: "-1 model_name field1;field2;..."
-            - PING: "0"
+            - PING: "0 [options...]" (e.g. "0 ENC=MSGPACK,CBOR")
             - Other types: empty string
         """
         if frame_obj.from_device:
@@ -169,11 +329,9 @@ class FrameParser:
                 args_str = ",".join(frame_obj.args_values)
                 conditionnal_frame = f"{pk} {args_str}"
             case (FrameType.LG_INIT, pk, _) if pk == -1:
-                model_name = frame_obj.model
-                f_values = ";".join(frame_obj.fields_values)
-                conditionnal_frame = f"{pk} {model_name} {f_values}"
+                conditionnal_frame = _lg_init_body(frame_obj.model, tuple(frame_obj.fields_values))
             case (FrameType.PING, _, _):
-                conditionnal_frame = "0"
+                conditionnal_frame = " ".join(("0", *frame_obj.args_values))
             case (_, _, _):
                 conditionnal_frame = ""
 
@@ -188,3 +346,40 @@ class FrameParser:
         #   - 2: ensure at least 2 characters wide
         #   - X: use uppercase hexadecimal digits (A-F)
         return f"{frame_str} {checksum:02X}\n"
+
+    @staticmethod
+    def decode(buf: bytes | memoryview) -> Frame:
+        """
+        Parse a complete frame received from a device, text or binary, with the codec given by its first byte.
+
+        Args:
+            buf (bytes | memoryview): A text frame (newline included) or a binary frame (see `binary`).
+
+        Raises:
+            FrameParsingError: If the frame is invalid or starts with an unknown marker.
+            ValueError: For the invalid text frames, as `parse_from_device_bytes`.
+        """
+        if not buf:
+            raise FrameParsingError("Empty frame")
+        codec = MARKERS.get(buf[0])
+        if codec is not None:
+            return codec.decode(buf)
+        if buf[0] == STX_BYTES[0]:
+            return FrameParser.parse_from_device_bytes(buf)
+        raise FrameParsingError(f"Unknown frame marker: {buf[0]:#04x}")
+
+    @staticmethod
+    def encode(frame_obj: Frame, encoding: FrameEncoding = FrameEncoding.TEXT) -> bytes:
+        """
+        Serialize a frame to send to a device with the encoding negotiated with it.
+
+        Args:
+            frame_obj (Frame): The frame to send.
+            encoding (FrameEncoding, optional): Defaults to FrameEncoding.TEXT (`parse_from_frame_klass`).
+
+        Raises:
+            FrameParsingError: If the frame cannot be serialized.
+        """
+        if encoding is FrameEncoding.TEXT:
+            return FrameParser.parse_from_frame_klass(frame_obj).encode()
+        return CODECS[encoding].encode(frame_obj)
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import time
+from typing import Callable
+from typing import Optional
+
+from django.conf import settings
+
+import serial
+
+from ..frame import Frame
+from ..frame import FrameEncoding
+from .decoder import FrameStreamDecoder
+
+logger = logging.getLogger(__name__)
+
+FrameCallback = Callable[[str, Frame], None]
+
+
+class SerialTransport:
+    """
+    Non-blocking asyncio transport of one serial port.
+
+    The port is opened in non-blocking mode and watched by the event loop (``add_reader``),
+    every received chunk is fed to a FrameStreamDecoder and each decoded frame, stamped with the
+    time the chunk was read (``received_ts``), is passed to ``on_frame(path, frame)``. Outbound
+    bytes are queued with ``write`` and sent by the task running ``run``, which also reopens the
+    port after an error or an unplug.
+
+    ``encoding`` is the frame encoding negotiated with the device (set by the gateway), it goes back
+    to TEXT when the port is reopened: the device may have been reset.
+
+    This class is responsible for the serial I/O only. It does NOT access the database.
+
+    Args:
+        path (str): Serial port path (e.g. "/dev/ttyUSB0").
+        on_frame (FrameCallback): Called from the event loop for each decoded frame.
+        baudrate (int, optional): Transmission baudrate. Defaults to settings.BAUDRATE.
+        serial_factory (Callable[..., serial.Serial], optional): Builds the serial object, mainly for tests.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        on_frame: FrameCallback,
+        baudrate: Optional[int] = None,
+        serial_factory: Callable[..., serial.Serial] = serial.Serial,
+    ) -> None:
+        self.path = path
+        self.on_frame = on_frame
+        self.baudrate = baudrate or settings.BAUDRATE
+        self.decoder = FrameStreamDecoder()
+        self.encoding = FrameEncoding.TEXT
+        self._serial_factory = serial_factory
+        self._serial: Optional[serial.Serial] = None
+        self._outbound: asyncio.Queue[bytes] = asyncio.Queue()
+        self._failed: Optional[asyncio.Future] = None
+        self._stopping = False
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.reconnections = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self._serial is not None and self._serial.is_open
+
+    def write(self, data: bytes) -> None:
+        """Queue bytes to send to the device. They are sent in order by the `run` task."""
+        self._outbound.put_nowait(data)
+
+    def stop(self) -> None:
+        """Ask the `run` task to close the port and return."""
+        self._stopping = True
+        if self._failed is not None and not self._failed.done():
+            self._failed.set_result(None)
+
+    async def run(self) -> None:
+        """Open the port and send the queued bytes until `stop` is called, reopening the port after errors."""
+        loop = asyncio.get_running_loop()
+        while not self._stopping:
+            try:
+                self._open(loop)
+                await self._write_loop(loop)
+            except (serial.SerialException, OSError) as e:
+                logger.error(f"Serial port {self.path} failed: {e}")
+            finally:
+                self._close(loop)
+
+            if not self._stopping:
+                self.reconnections += 1
+                await asyncio.sleep(settings.GATEWAY_RECONNECT_DELAY)
+
+    def _open(self, loop: asyncio.AbstractEventLoop) -> None:
+        # timeout=0 / write_timeout=0: read and write return immediately with what could be transferred.
+        self._serial = self._serial_factory(port=self.path, baudrate=self.baudrate, timeout=0, write_timeout=0)
+        self.decoder.reset()
+        self.encoding = FrameEncoding.TEXT
+        self._failed = loop.create_future()
+        loop.add_reader(self._serial.fileno(), self._on_readable)
+        logger.info(f"Serial port {self.path} opened at {self.baudrate} bauds")
+
+    def _close(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._serial is None:
+            return
+        try:
+            loop.remove_reader(self._serial.fileno())
+        except (serial.SerialException, OSError, ValueError):
+            pass
+        self._serial.close()
+        self._serial = None
+        logger.info(f"Serial port {self.path} closed")
+
+    def _on_readable(self) -> None:
+        try:
+            data = self._serial.read(settings.GATEWAY_READ_CHUNK_SIZE)
+        except (serial.SerialException, OSError) as e:
+            self._fail(e)
+            return
+
+        # The frames keep the time they were received through the batching and the process hops.
+        received_ts = time.time_ns() // 1_000_000
+        self.bytes_read += len(data)
+        for frame in self.decoder.feed(data):
+            frame.received_ts = received_ts
+            try:
+                self.on_frame(self.path, frame)
+            except Exception:
+                logger.exception(f"Frame callback failed for {self.path}")
+
+    def _fail(self, exc: Exception) -> None:
+        # Called from the reader callback: wake the `run` task up so it reopens the port.
+        if self._serial is not None:
+            asyncio.get_running_loop().remove_reader(self._serial.fileno())
+        if self._failed is not None and not self._failed.done():
+            self._failed.set_exception(exc)
+
+    async def _write_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        while not self._stopping:
+            get_data = asyncio.ensure_future(self._outbound.get())
+            done, _ = await asyncio.wait({get_data, self._failed}, return_when=asyncio.FIRST_COMPLETED)
+            if self._failed in done:
+                if get_data.done():
+                    # Do not lose bytes dequeued at the same time as the failure.
+                    self._outbound.put_nowait(get_data.result())
+                get_data.cancel()
+                # Raises the read error, if any, so `run` reopens the port.
+                self._failed.result()
+                return
+            await self._write_all(loop, get_data.result())
+
+    async def _write_all(self, loop: asyncio.AbstractEventLoop, data: bytes) -> None:
+        view = memoryview(data)
+        while view and not self._stopping:
+            await self._wait_writable(loop)
+            written = self._serial.write(view)
+            self.bytes_written += written
+            view = view[written:]
+
+    async def _wait_writable(self, loop: asyncio.AbstractEventLoop) -> None:
+        fd = self._serial.fileno()
+        writable = loop.create_future()
+        loop.add_writer(fd, lambda: writable.done() or writable.set_result(None))
+        try:
+            await asyncio.wait({writable, self._failed}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            loop.remove_writer(fd)
+        if self._failed.done():
+            self._failed.result()
@@ -0,0 +1,173 @@
+import logging
+import threading
+import time
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+
+from django.conf import settings
+from django.db import models
+
+from gardeniq.base.models import Status
+from gardeniq.hardware.models import Device
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceRegistry:
+    """
+    In-process cache of the devices by uid and of the ONLINE/OFFLINE device statuses.
+
+    Resolving the device of every inbound frame, and the status set by every ping, are the most
+    frequent queries of the gateway. The registry keeps them in memory: a device is loaded on
+    first use (or by `warm`) and then served from memory.
+
+    Entries are kept in sync by the `post_save`/`post_delete` signals of Device and Status (see
+    `gardeniq.hardware.signals`): a saved device replaces its entry, a deleted one is dropped, any
+    status change reloads the statuses. Writes that do not send signals (`QuerySet.update`,
+    `bulk_update`) or that are done by another process (the admin, the API) are not seen: entries
+    are reloaded once they are older than `ttl`, or right away after `clear`.
+
+    The cached Device instances are shared, they must only be modified by the frame handler, which
+    saves only the fields it owns (status, last seen, firmware versions): a stale instance never
+    overwrites the other fields.
+
+    Args:
+        ttl (float, optional): Seconds an entry is served from memory before it is loaded again.
+            Defaults to settings.GATEWAY_REGISTRY_TTL.
+    """
+
+    def __init__(self, ttl: Optional[float] = None) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._devices: Dict[str, Device] = {}
+        # device pk -> cached uid, to drop the old entry of a device whose uid changed
+        self._uids: Dict[int, str] = {}
+        self._statuses: Dict[bool, Status] = {}
+        # Monotonic time each entry was loaded, by device uid and by status
+        self._device_times: Dict[str, float] = {}
+        self._status_times: Dict[bool, float] = {}
+        self.device_hits = 0
+        self.device_misses = 0
+        self.status_hits = 0
+        self.status_misses = 0
+
+    def get_device(self, uid: str) -> Device:
+        """
+        Return the device with this uid.
+
+        Raises:
+            Device.DoesNotExist: If no device has this uid.
+        """
+        device = self._devices.get(uid)
+        if device is not None and self._is_fresh(self._device_times.get(uid)):
+            self.device_hits += 1
+            return device
+
+        self.device_misses += 1
+        device = Device.objects.get(uid=uid)
+        self.store_device(device)
+        return device
+
+    def get_devices(self, uids: Iterable[str]) -> Dict[str, Device]:
+        """Return the devices with these uids, by uid. Unknown uids are missing from the result."""
+        found: Dict[str, Device] = {}
+        missing = set()
+        for uid in uids:
+            device = self._devices.get(uid)
+            if device is None or not self._is_fresh(self._device_times.get(uid)):
+                missing.add(uid)
+            else:
+                found[uid] = device
+        self.device_hits += len(found)
+
+        if missing:
+            self.device_misses += len(missing)
+            loaded = Device.objects.in_bulk(missing, field_name="uid")
+            for device in loaded.values():
+                self.store_device(device)
+            found.update(loaded)
+        return found
+
+    def get_status(self, on: bool = True) -> Status:
+        """
+        Return the ONLINE (or OFFLINE) device status.
+
+        Raises:
+            Status.DoesNotExist: If no matching status is found in the database.
+        """
+        status = self._statuses.get(on)
+        if status is not None and self._is_fresh(self._status_times.get(on)):
+            self.status_hits += 1
+            return status
+
+        self.status_misses += 1
+        status_enum = settings.DEFAULT_STATUS.ONLINE if on else settings.DEFAULT_STATUS.OFFLINE
+        status = Status.objects.get(models.Q(tag__icontains="device") & models.Q(name=status_enum.value))
+        with self._lock:
+            self._statuses[on] = status
+            self._status_times[on] = time.monotonic()
+        return status
+
+    def warm(self) -> None:
+        """Load every device and both device statuses, e.g. when the gateway starts."""
+        devices = list(Device.objects.all())
+        now = time.monotonic()
+        with self._lock:
+            self._devices = {device.uid: device for device in devices}
+            self._uids = {device.pk: device.uid for device in devices}
+            self._device_times = dict.fromkeys(self._devices, now)
+            self._statuses.clear()
+        for on in (True, False):
+            try:
+                self.get_status(on)
+            except Status.DoesNotExist:
+                logger.warning(f"Device status {'ONLINE' if on else 'OFFLINE'} not found in database")
+        logger.info(f"Device registry warmed with {len(devices)} devices")
+
+    def store_device(self, device: Device) -> None:
+        """Cache a device, replacing the entry of the same device (even if its uid changed)."""
+        with self._lock:
+            old_uid = self._uids.get(device.pk)
+            if old_uid is not None and old_uid != device.uid:
+                self._devices.pop(old_uid, None)
+                self._device_times.pop(old_uid, None)
+            self._devices[device.uid] = device
+            self._uids[device.pk] = device.uid
+            self._device_times[device.uid] = time.monotonic()
+
+    def forget_device(self, device: Device) -> None:
+        with self._lock:
+            uid = self._uids.pop(device.pk, device.uid)
+            self._devices.pop(uid, None)
+            self._device_times.pop(uid, None)
+
+    def forget_statuses(self) -> None:
+        with self._lock:
+            self._statuses.clear()
+            self._status_times.clear()
+
+    def clear(self) -> None:
+        """Drop every entry. Counters are kept."""
+        with self._lock:
+            self._devices.clear()
+            self._uids.clear()
+            self._statuses.clear()
+            self._device_times.clear()
+            self._status_times.clear()
+
+    def _is_fresh(self, loaded_at: Optional[float]) -> bool:
+        ttl = self.ttl if self.ttl is not None else settings.GATEWAY_REGISTRY_TTL
+        return loaded_at is not None and time.monotonic() - loaded_at < ttl
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "devices": len(self._devices),
+            "device_hits": self.device_hits,
+            "device_misses": self.device_misses,
+            "status_hits": self.status_hits,
+            "status_misses": self.status_misses,
+        }
+
+
+device_registry = DeviceRegistry()
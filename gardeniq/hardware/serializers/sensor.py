@@ -39,6 +39,11 @@ class SensorListReadOnlySerializer(ReadOnlySerializer, SensorSerializer):
     category = MinimalReadOnlySerializer(read_only=True)
     device = DeviceMinimalReadOnlySerializer(read_only=True)
     pin = PinMinimalReadOnlySerializer(read_only=True)
+    # Annotated by SensorAPIModelView from the telemetry LatestReading; None elsewhere and without reading.
+    latest_value = serializers.FloatField(allow_null=True, read_only=True)
+    latest_ts = serializers.IntegerField(
+        allow_null=True, read_only=True, help_text="Time of the latest value, epoch in milliseconds."
+    )
 
 
 class SensorDetailReadOnlySerializer(SensorListReadOnlySerializer):
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from gardeniq.base.models import Status
+from gardeniq.hardware.models import Device
+from gardeniq.hardware.registry import device_registry
+
+
+@receiver(post_save, sender=Device, dispatch_uid="device_registry_store")
+def store_saved_device(sender, instance: Device, **kwargs) -> None:
+    device_registry.store_device(instance)
+
+
+@receiver(post_delete, sender=Device, dispatch_uid="device_registry_forget")
+def forget_deleted_device(sender, instance: Device, **kwargs) -> None:
+    device_registry.forget_device(instance)
+
+
+@receiver(post_save, sender=Status, dispatch_uid="device_registry_status_save")
+@receiver(post_delete, sender=Status, dispatch_uid="device_registry_status_delete")
+def forget_statuses(sender, instance: Status, **kwargs) -> None:
+    device_registry.forget_statuses()
@@ -0,0 +1,382 @@
+import asyncio
+import logging
+import os
+import random
+import tty
+from dataclasses import dataclass
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from gardeniq.hardware.models import Device
+from gardeniq.hardware.protocols.errors import CommandError
+from gardeniq.hardware.protocols.errors import FrameParsingError
+from gardeniq.hardware.protocols.frame import CommandState
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameEncoding
+from gardeniq.hardware.protocols.frame import FrameType
+from gardeniq.hardware.protocols.settings import ETX
+from gardeniq.hardware.protocols.settings import STX
+from gardeniq.hardware.protocols.usb.binary import CODECS
+from gardeniq.hardware.protocols.usb.binary import MARKERS
+from gardeniq.hardware.protocols.usb.binary import frame_size
+from gardeniq.hardware.protocols.usb.parser import ENCODING_OPTION
+
+logger = logging.getLogger(__name__)
+
+STX_MARKER = f"{STX} ".encode()
+# Errors answered at random, see `FirmwareProfile.error_rate`.
+RANDOM_ERRORS = (CommandError.BUSY, CommandError.INVALID_PARAM, CommandError.DEV_NOT_READY)
+MAX_HOST_FRAME_SIZE = 1024
+
+
+@dataclass(slots=True)
+class FirmwareProfile:
+    """
+    Behaviour of the simulated firmware.
+
+    Attributes:
+        gd_fw_version (str): GardenIQ firmware version answered to a PING.
+        mp_fw_version (str): MicroPython firmware version answered to a PING.
+        latency (float): Seconds before each answer.
+        error_rate (float): Probability to answer a command with an ERR frame.
+        corruption_rate (float): Probability to corrupt one byte of an answer (the checksum no longer matches).
+        encodings (Tuple[FrameEncoding, ...]): Binary encodings accepted when the host offers them.
+    """
+
+    gd_fw_version: str = "1.0.0"
+    mp_fw_version: str = "1.0.0"
+    latency: float = 0.0
+    error_rate: float = 0.0
+    corruption_rate: float = 0.0
+    encodings: Tuple[FrameEncoding, ...] = ()
+
+
+def parse_host_frame(line: bytes) -> Frame:
+    """
+    Parse a text frame sent by the host (see `FrameParser.parse_from_frame_klass`), as the firmware does.
+
+    Raises:
+        FrameParsingError: If the frame is malformed or its checksum does not match.
+    """
+    text = line.decode("ascii").removesuffix("\n")
+    body, _, checksum = text.rpartition(" ")
+    if not body.startswith(STX_MARKER.decode()) or not body.endswith(f" {ETX}"):
+        raise FrameParsingError(f"Invalid host frame: {text}")
+    if Frame.build_checksum(body.encode()) != int(checksum, 16):
+        raise FrameParsingError(f"Invalid checksum in host frame: {text}")
+
+    parts = body.split(" ")[1:-1]
+    frame_type = FrameType.from_string(parts[0], strict=True)
+    device_uid, command_id, rest = parts[1], int(parts[2]), parts[3:]
+    match frame_type:
+        case FrameType.CMD:
+            slug, args = (rest[0], rest[1]) if len(rest) == 2 else ("", rest[0] if rest else "")
+            return Frame(frame_type, device_uid, command_id, slug, args.split(",") if args else [])
+        case FrameType.PING:
+            return Frame(frame_type, device_uid, command_id, "", rest)
+        case FrameType.LG_INIT:
+            fields_values = tuple(" ".join(rest[1:]).split(";"))
+            return Frame(frame_type, device_uid, command_id, "", [], model=rest[0], fields_values=fields_values)
+        case _:
+            raise FrameParsingError(f"Unexpected frame type from host: {parts[0]}")
+
+
+def build_device_frame(frame: Frame) -> bytes:
+    """Serialize a device response as a text frame, checksum included (see `FrameParser.parse_from_device`)."""
+    tokens = [STX, FrameType.ACK.value, frame.device_uid, str(frame.command_id), frame.command_state.value]
+    if frame.command_state is CommandState.ERROR:
+        tokens.append(frame.err_msg.value)
+    elif frame.gd_fw_version:
+        tokens += [f"GDFW={frame.gd_fw_version}", f"MPFW={frame.mp_fw_version}"]
+        if frame.encoding:
+            tokens.append(f"{ENCODING_OPTION}{frame.encoding.value}")
+    elif frame.ok_data is not None:
+        tokens.append(str(frame.ok_data))
+    body = " ".join([*tokens, ETX])
+    return f"{body} {Frame.build_checksum(body.encode()):02X}\n".encode()
+
+
+class FakeFirmware:
+    """
+    Firmware of one simulated device: turns the bytes written by the host into the answers of the device.
+
+    - PING: ACK with the firmware versions, and the first offered encoding the profile accepts
+    - LG_INIT: ACK, the order is learnt (or forgotten for a frame with only its pk)
+    - CMD: ACK with a reading for a `get` order, without data for a `set` order, ERR UNKNOW_CMD for an
+      order not learnt (any command is a `get` until the language was sent)
+
+    Each answer uses the encoding of the frame it answers. This class does no I/O, see SimulatedDevice.
+
+    Args:
+        device_uid (str): Uid answered in every frame.
+        profile (FirmwareProfile): Versions, error and corruption rates.
+        rng (random.Random, optional): Random generator, seeded for reproducible runs.
+    """
+
+    def __init__(self, device_uid: str, profile: FirmwareProfile, rng: Optional[random.Random] = None) -> None:
+        self.device_uid = device_uid
+        self.profile = profile
+        self.rng = rng or random.Random()
+        # Learnt language: order pk -> action type
+        self.orders: Dict[int, str] = {}
+        self._buffer = bytearray()
+        self.frames_received = 0
+        self.frames_rejected = 0
+        self.errors_sent = 0
+        self.frames_corrupted = 0
+
+    def receive(self, data: bytes) -> List[bytes]:
+        """Feed bytes written by the host, return the answers to send back, in order."""
+        self._buffer += data
+        answers = []
+        while self._buffer:
+            line, encoding = self._cut()
+            if line is None:
+                break
+            answer = self._answer(line, encoding)
+            if answer is not None:
+                answers.append(answer)
+        return answers
+
+    def _cut(self) -> Tuple[Optional[bytes], FrameEncoding]:
+        # Drop the bytes before a frame start, then cut one complete text or binary frame.
+        while self._buffer and self._buffer[0] not in MARKERS and not self._buffer.startswith(STX_MARKER):
+            del self._buffer[0]
+        if not self._buffer:
+            return None, FrameEncoding.TEXT
+
+        codec = MARKERS.get(self._buffer[0])
+        if codec is not None:
+            size = frame_size(self._buffer)
+            if size is not None and size > MAX_HOST_FRAME_SIZE:
+                # Corrupted length: drop the marker and look for the next frame.
+                del self._buffer[0]
+                return self._cut()
+            if size is None or len(self._buffer) < size:
+                return None, codec.encoding
+        else:
+            end = self._buffer.find(b"\n")
+            if end == -1:
+                if len(self._buffer) > MAX_HOST_FRAME_SIZE:
+                    self._buffer.clear()
+                return None, FrameEncoding.TEXT
+            size = end + 1
+        line = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return line, codec.encoding if codec else FrameEncoding.TEXT
+
+    def _answer(self, line: bytes, encoding: FrameEncoding) -> Optional[bytes]:
+        self.frames_received += 1
+        try:
+            frame = parse_host_frame(line) if encoding is FrameEncoding.TEXT else CODECS[encoding].decode(line)
+        except (FrameParsingError, ValueError, IndexError) as e:
+            self.frames_rejected += 1
+            logger.debug(f"Simulated device {self.device_uid} rejected {line!r}: {e}")
+            return None
+        if frame.device_uid != self.device_uid:
+            return None
+
+        answer = self._respond(frame)
+        data = build_device_frame(answer) if encoding is FrameEncoding.TEXT else CODECS[encoding].encode(answer)
+        if self.rng.random() < self.profile.corruption_rate:
+            data = self._corrupt(data)
+        return data
+
+    def _respond(self, frame: Frame) -> Frame:
+        fields = {}
+        match frame.frame_type:
+            case FrameType.PING:
+                fields = {
+                    "gd_fw_version": self.profile.gd_fw_version,
+                    "mp_fw_version": self.profile.mp_fw_version,
+                    "encoding": self._accepted_encoding(frame.args_values),
+                }
+            case FrameType.LG_INIT:
+                self._learn(frame.fields_values)
+            case _:
+                if frame.command_id in self.orders or not self.orders:
+                    if self.rng.random() < self.profile.error_rate:
+                        fields = {"err_msg": self.rng.choice(RANDOM_ERRORS)}
+                    elif self.orders.get(frame.command_id, "get") == "get":
+                        fields = {"ok_data": round(self.rng.uniform(10, 30), 1)}
+                else:
+                    fields = {"err_msg": CommandError.UNKNOW_CMD}
+
+        if "err_msg" in fields:
+            self.errors_sent += 1
+        return Frame(
+            frame_type=FrameType.ACK,
+            device_uid=self.device_uid,
+            command_id=frame.command_id,
+            command_slug="",
+            args_values=[],
+            from_device=True,
+            command_state=CommandState.ERROR if "err_msg" in fields else CommandState.OK,
+            checksum="00",
+            source_frame_from_device="",
+            **fields,
+        )
+
+    def _accepted_encoding(self, options: List[str]) -> Optional[FrameEncoding]:
+        for option in options:
+            if option.startswith(ENCODING_OPTION):
+                for name in option.removeprefix(ENCODING_OPTION).split(","):
+                    encoding = FrameEncoding.from_string(name, strict=True)
+                    if encoding in self.profile.encodings:
+                        return encoding
+        return None
+
+    def _learn(self, fields_values: Tuple[str, ...]) -> None:
+        pk = int(fields_values[0])
+        if len(fields_values) == 1:
+            self.orders.pop(pk, None)
+        else:
+            # pk;slug;action_type
+            self.orders[pk] = fields_values[2]
+
+    def _corrupt(self, data: bytes) -> bytes:
+        self.frames_corrupted += 1
+        corrupted = bytearray(data)
+        # Never the end of line or the frame marker: the frame must still be cut, then rejected.
+        index = self.rng.randrange(1, len(corrupted) - 1)
+        corrupted[index] ^= 0x01
+        return bytes(corrupted)
+
+
+class SimulatedDevice:
+    """
+    A FakeFirmware behind a pseudo-terminal: the host opens `path` as the serial port of the device.
+
+    The slave side is kept open (and in raw mode) by the simulator, so the host can close and reopen
+    the port like an unplugged board.
+    """
+
+    def __init__(self, firmware: FakeFirmware) -> None:
+        self.firmware = firmware
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        os.set_blocking(self._master, False)
+        self.path = os.ttyname(self._slave)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending = bytearray()
+        self._writing = False
+
+    @property
+    def device_uid(self) -> str:
+        return self.firmware.device_uid
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        loop.add_reader(self._master, self._on_readable)
+
+    def close(self) -> None:
+        if self._loop is not None:
+            self._loop.remove_reader(self._master)
+            if self._writing:
+                self._loop.remove_writer(self._master)
+        os.close(self._master)
+        os.close(self._slave)
+
+    def _on_readable(self) -> None:
+        try:
+            data = os.read(self._master, 4096)
+        except (BlockingIOError, OSError):
+            return
+        for answer in self.firmware.receive(data):
+            if self.firmware.profile.latency > 0:
+                self._loop.call_later(self.firmware.profile.latency, self._write, answer)
+            else:
+                self._write(answer)
+
+    def _write(self, data: bytes) -> None:
+        self._pending += data
+        self._flush()
+
+    def _flush(self) -> None:
+        try:
+            written = os.write(self._master, self._pending)
+        except BlockingIOError:
+            written = 0
+        del self._pending[:written]
+        # Wait for room in the pty buffer when the host does not read fast enough.
+        if self._pending and not self._writing:
+            self._writing = True
+            self._loop.add_writer(self._master, self._flush)
+        elif not self._pending and self._writing:
+            self._writing = False
+            self._loop.remove_writer(self._master)
+
+
+class VirtualFleet:
+    """
+    N simulated devices over pseudo-terminals, for load tests without boards (Linux and other POSIX systems).
+
+    Args:
+        count (int): Number of devices.
+        profile (FirmwareProfile, optional): Firmware behaviour shared by every device.
+        uid_prefix (str, optional): Device uids are `{uid_prefix}{index:04d}`. Defaults to "SIM".
+        seed (int, optional): Seed of the random generators, for reproducible runs.
+
+    Example:
+        >>> fleet = VirtualFleet(50, FirmwareProfile(latency=0.05, error_rate=0.01))
+        >>> fleet.register()
+        >>> asyncio.run(fleet.run())  # Until fleet.stop() is called
+    """
+
+    def __init__(
+        self,
+        count: int,
+        profile: Optional[FirmwareProfile] = None,
+        uid_prefix: str = "SIM",
+        seed: Optional[int] = None,
+    ) -> None:
+        profile = profile or FirmwareProfile()
+        self.devices = [
+            SimulatedDevice(
+                FakeFirmware(
+                    f"{uid_prefix}{index:04d}",
+                    profile,
+                    random.Random(None if seed is None else seed + index),
+                )
+            )
+            for index in range(count)
+        ]
+        self._stopped: Optional[asyncio.Event] = None
+
+    def register(self) -> None:
+        """Create or update the Device row of every simulated device, with the path of its pty."""
+        status = Device.get_online_status(False)
+        for device in self.devices:
+            Device.objects.update_or_create(
+                uid=device.device_uid,
+                defaults={"path": device.path},
+                create_defaults={"name": f"Simulated {device.device_uid}", "path": device.path, "status": status},
+            )
+
+    async def run(self) -> None:
+        """Answer the host on every pty until `stop` is called, then close them."""
+        self._stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for device in self.devices:
+            device.start(loop)
+        try:
+            await self._stopped.wait()
+        finally:
+            for device in self.devices:
+                device.close()
+
+    def stop(self) -> None:
+        if self._stopped is not None:
+            self._stopped.set()
+
+    def stats(self) -> Dict[str, int]:
+        firmwares = [device.firmware for device in self.devices]
+        return {
+            "devices": len(firmwares),
+            "frames_received": sum(firmware.frames_received for firmware in firmwares),
+            "frames_rejected": sum(firmware.frames_rejected for firmware in firmwares),
+            "errors_sent": sum(firmware.errors_sent for firmware in firmwares),
+            "frames_corrupted": sum(firmware.frames_corrupted for firmware in firmwares),
+        }
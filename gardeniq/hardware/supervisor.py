@@ -0,0 +1,490 @@
+"""
+Multi-process gateway: the device ports are spread over worker processes, each running a
+`ShardGateway` (see gateway.shard) on its own CPU core, so parsing and checksum verification of a
+large fleet are not bound to one interpreter.
+
+The ports are assigned by consistent hashing of `Device.path` (see HashRing): adding or removing a
+device only moves that device, and the assignment does not depend on the order of the devices. The
+workers never write the database, they send the frames over a multiprocessing queue to a single
+`DatabaseWriter` process. The `GatewaySupervisor` restarts the processes that exit or stop reporting
+their health, and rebalances the ports when devices are added, moved or removed.
+
+The shards do not journal the outbound commands nor sync the language of the devices (both write
+the database), so the supervisor refuses to start while settings.GATEWAY_OUTBOUND_REPLAY_ENABLED or
+settings.GATEWAY_LANGUAGE_SYNC_ENABLED is set: that durability is only provided by the single
+process `Gateway`.
+
+This module does not import the models: the processes are spawned (fresh interpreters, no copy of
+the database connections of the supervisor) and import it before Django is set up.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from bisect import bisect
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import django
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+# Messages of the queue read by the DatabaseWriter: frames and offline marks from the workers, STOP
+# from the supervisor.
+FRAMES = "frames"
+OFFLINE = "offline"
+STOP = "stop"
+# Messages of the command queue of a worker, sent by the supervisor (STOP included).
+ASSIGN = "assign"
+REQUEST = "request"
+
+WRITER = "writer"
+
+DeviceLoader = Callable[[], List[Tuple[str, str]]]
+
+
+class HashRing:
+    """
+    Consistent hashing ring: maps keys (the device paths) to nodes (the worker indexes).
+
+    Each node is placed `replicas` times on the ring, a key belongs to the first node found clockwise
+    from its own hash. Removing a node only moves its keys, adding one only takes keys from the others.
+
+    Args:
+        nodes (Iterable[int]): The nodes of the ring.
+        replicas (int, optional): Virtual nodes per node, the more the more even the spread.
+            Defaults to settings.GATEWAY_SUPERVISOR_RING_REPLICAS.
+    """
+
+    def __init__(self, nodes: Iterable[int], replicas: Optional[int] = None) -> None:
+        self.replicas = replicas or settings.GATEWAY_SUPERVISOR_RING_REPLICAS
+        self._points: List[Tuple[int, int]] = []
+        self._hashes: List[int] = []
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def hash(key: str) -> int:
+        # Stable across processes and runs, unlike `hash()`.
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+    @property
+    def nodes(self) -> List[int]:
+        return sorted({node for _, node in self._points})
+
+    def add(self, node: int) -> None:
+        if node in self.nodes:
+            return
+        self._points.extend((self.hash(f"{node}#{replica}"), node) for replica in range(self.replicas))
+        self._points.sort()
+        self._hashes = [point for point, _ in self._points]
+
+    def remove(self, node: int) -> None:
+        self._points = [(point, owner) for point, owner in self._points if owner != node]
+        self._hashes = [point for point, _ in self._points]
+
+    def node_for(self, key: str) -> int:
+        """
+        Return the node of a key.
+
+        Raises:
+            ValueError: If the ring has no node.
+        """
+        if not self._points:
+            raise ValueError("Empty hash ring")
+        return self._points[bisect(self._hashes, self.hash(key)) % len(self._points)][1]
+
+
+def partition(devices: Iterable[Tuple[str, str]], ring: HashRing) -> Dict[int, Dict[str, str]]:
+    """
+    Assign devices to the nodes of a ring by their path: the devices sharing a port stay together.
+
+    Args:
+        devices (Iterable[Tuple[str, str]]): The (uid, path) of the devices.
+        ring (HashRing): The ring of the workers.
+
+    Returns:
+        Dict[int, Dict[str, str]]: node -> {device uid: path}, with an entry for every node.
+    """
+    shards: Dict[int, Dict[str, str]] = {node: {} for node in ring.nodes}
+    for uid, path in devices:
+        shards[ring.node_for(path)][uid] = path
+    return shards
+
+
+def _setup_process() -> None:
+    # The supervisor stops its processes with a STOP message, CTRL+C is only for it.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    django.setup()
+
+
+def run_worker(
+    shard_id: int,
+    devices: List[Tuple[str, str]],
+    commands: Any,
+    writer_queue: Any,
+    health: Any,
+    baudrate: Optional[int] = None,
+) -> None:
+    """Entry point of a worker process: serve the assigned ports until STOP."""
+    _setup_process()
+
+    from gardeniq.hardware.gateway.shard import serve_shard
+
+    asyncio.run(serve_shard(shard_id, devices, commands, writer_queue, health, baudrate=baudrate))
+
+
+def run_writer(messages: Any, health: Any) -> None:
+    """Entry point of the database writer process: apply the messages of the workers until STOP."""
+    _setup_process()
+
+    from gardeniq.hardware.gateway.shard import DatabaseWriter
+
+    DatabaseWriter().run(messages, health)
+
+
+def _read_lock_held(messages: Any) -> bool:
+    # `multiprocessing.Queue.get` holds the read lock while it receives a message: a reader killed
+    # there leaves the lock taken for good, and a partial message in the pipe.
+    lock = messages._rlock
+    if not lock.acquire(False):
+        return True
+    lock.release()
+    return False
+
+
+def _load_devices() -> List[Tuple[str, str]]:
+    from django.db import close_old_connections
+
+    from gardeniq.hardware.gateway import Gateway
+
+    # Long-running process: drop the database connection if it is broken or too old.
+    close_old_connections()
+    return Gateway.load_devices()
+
+
+@dataclass(slots=True)
+class SupervisedProcess:
+    """
+    A process of the supervisor (a worker or the writer) and its last health report.
+
+    Attributes:
+        name (str): "worker-<index>" or "writer".
+        shard_id (Optional[int]): Index of a worker, None for the writer.
+        devices (Dict[str, str]): device uid -> path of the devices assigned to a worker.
+        process: The running multiprocessing process, None before the first start.
+        commands: Command queue of a worker, replaced at each start.
+        restarts (int): Times the process was started again after it stopped.
+        report (Dict[str, Any]): Last counters reported by the process.
+    """
+
+    name: str
+    shard_id: Optional[int] = None
+    devices: Dict[str, str] = field(default_factory=dict)
+    process: Any = None
+    commands: Any = None
+    restarts: int = 0
+    started_at: float = 0.0
+    died_at: Optional[float] = None
+    report: Dict[str, Any] = field(default_factory=dict)
+    reported_at: Optional[float] = None
+
+    @property
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def health(self, now: float) -> Dict[str, Any]:
+        health = {
+            "pid": self.process.pid if self.process is not None else None,
+            "alive": self.is_alive,
+            "exitcode": self.process.exitcode if self.process is not None else None,
+            "restarts": self.restarts,
+            "last_report_age": round(now - self.reported_at, 3) if self.reported_at is not None else None,
+            "report": dict(self.report),
+        }
+        if self.shard_id is not None:
+            health["devices"] = len(self.devices)
+            health["ports"] = len(set(self.devices.values()))
+        return health
+
+
+class GatewaySupervisor:
+    """
+    Run the gateway as worker processes (one per share of the ports) and one database writer process.
+
+    `run` starts the processes then, every `tick`, until `stop` is called:
+
+    - reads the health reports of the processes (see `health`, also published as JSON to
+      settings.GATEWAY_SUPERVISOR_HEALTH_PATH);
+    - starts again, after settings.GATEWAY_SUPERVISOR_RESTART_DELAY seconds, a process that exited,
+      and terminates one silent for more than settings.GATEWAY_SUPERVISOR_HEALTH_TIMEOUT seconds;
+    - reloads the devices every settings.GATEWAY_SUPERVISOR_RESCAN_INTERVAL seconds and sends their
+      new assignment to the workers whose devices changed (`rebalance`).
+
+    A restarted worker gets the current assignment of its index: the ring does not change with the
+    health of the workers, only with the devices. A restarted writer reads the queue of the previous
+    one, unless it died reading a message (see `_renew_writer_queue`).
+
+    Args:
+        workers (int, optional): Number of worker processes. Defaults to settings.GATEWAY_SUPERVISOR_WORKERS,
+            or one per CPU core but one (left to the writer).
+        baudrate (int, optional): Baudrate of every port. Defaults to settings.BAUDRATE.
+        load_devices (DeviceLoader, optional): Returns the (uid, path) of the devices.
+            Defaults to Gateway.load_devices.
+        mp_context (optional): multiprocessing context. Defaults to the "spawn" context.
+        tick (float, optional): Seconds between two checks of the processes. Defaults to 1.0.
+
+    Raises:
+        ImproperlyConfigured: If the outbound journal replay or the language sync is enabled.
+
+    Example:
+        >>> supervisor = GatewaySupervisor(workers=4)
+        >>> supervisor.run()  # Until supervisor.stop() is called
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        baudrate: Optional[int] = None,
+        load_devices: Optional[DeviceLoader] = None,
+        mp_context: Any = None,
+        tick: float = 1.0,
+    ) -> None:
+        if settings.GATEWAY_OUTBOUND_REPLAY_ENABLED or settings.GATEWAY_LANGUAGE_SYNC_ENABLED:
+            raise ImproperlyConfigured(
+                "The gateway workers neither journal the outbound commands nor sync the language of the devices: "
+                "set GATEWAY_OUTBOUND_REPLAY_ENABLED and GATEWAY_LANGUAGE_SYNC_ENABLED to False to run them."
+            )
+        workers = workers or settings.GATEWAY_SUPERVISOR_WORKERS or max(1, (os.cpu_count() or 2) - 1)
+        self.baudrate = baudrate or settings.BAUDRATE
+        self.load_devices = load_devices or _load_devices
+        self.context = mp_context or multiprocessing.get_context("spawn")
+        self.tick = tick
+        self.ring = HashRing(range(workers))
+        self.writer_queue = self.context.Queue(maxsize=settings.GATEWAY_SUPERVISOR_QUEUE_SIZE)
+        self.health_queue = self.context.Queue()
+        self.workers: Dict[int, SupervisedProcess] = {
+            index: SupervisedProcess(f"worker-{index}", shard_id=index) for index in range(workers)
+        }
+        self.writer = SupervisedProcess(WRITER)
+        # device uid -> port path of every device, used to route the commands
+        self.device_paths: Dict[str, str] = {}
+        self._stopping = threading.Event()
+        self._next_rescan = 0.0
+        self._next_publish = 0.0
+
+    @property
+    def processes(self) -> List[SupervisedProcess]:
+        return [self.writer, *self.workers.values()]
+
+    def run(self) -> None:
+        """Start the processes and supervise them until `stop` is called."""
+        self.start()
+        try:
+            while not self._stopping.is_set():
+                self.poll()
+                self._stopping.wait(self.tick)
+        finally:
+            self.shutdown()
+
+    def stop(self) -> None:
+        """Ask `run` to stop the processes and return. Safe to call from a signal handler."""
+        self._stopping.set()
+
+    def start(self) -> None:
+        """Assign the devices and start the writer and the workers."""
+        self.rebalance(self.load_devices())
+        self._next_rescan = time.monotonic() + settings.GATEWAY_SUPERVISOR_RESCAN_INTERVAL
+        self._start(self.writer)
+        for worker in self.workers.values():
+            self._start(worker)
+
+    def poll(self) -> None:
+        """Read the health reports, restart the stopped processes and rebalance the devices when due."""
+        self.collect_health()
+        now = time.monotonic()
+        for state in self.processes:
+            self._supervise(state, now)
+
+        if now >= self._next_rescan:
+            self._next_rescan = now + settings.GATEWAY_SUPERVISOR_RESCAN_INTERVAL
+            try:
+                self.rebalance(self.load_devices())
+            except Exception:
+                logger.exception("Failed to reload the devices")
+
+        if now >= self._next_publish:
+            self._next_publish = now + settings.GATEWAY_SUPERVISOR_HEALTH_INTERVAL
+            self.publish_health()
+
+    def rebalance(self, devices: Iterable[Tuple[str, str]]) -> List[int]:
+        """
+        Assign devices to the workers, and send their new devices to the running workers whose
+        assignment changed.
+
+        Args:
+            devices (Iterable[Tuple[str, str]]): The (uid, path) of every device.
+
+        Returns:
+            List[int]: The indexes of the workers whose devices changed.
+        """
+        devices = list(devices)
+        changed = []
+        for index, assigned in partition(devices, self.ring).items():
+            worker = self.workers[index]
+            if assigned == worker.devices:
+                continue
+            worker.devices = assigned
+            changed.append(index)
+            if worker.is_alive:
+                worker.commands.put((ASSIGN, list(assigned.items())))
+        self.device_paths = dict(devices)
+        if changed:
+            logger.info(f"Devices rebalanced over the workers {changed}")
+        return changed
+
+    def send(self, frame: Any, command_class: Any = None) -> bool:
+        """
+        Route a command frame to the worker serving its device, which schedules it (see `Gateway.request`).
+        The answer of the device reaches the database writer like every frame. The command is not
+        journaled: it is lost if its worker stops first.
+
+        Args:
+            frame (Frame): The command frame to send.
+            command_class (CommandClass, optional): Overrides the class given by the action type of the order.
+
+        Returns:
+            bool: False if the device is unknown or its worker is not running.
+        """
+        path = self.device_paths.get(frame.device_uid)
+        if path is None:
+            return False
+        worker = self.workers[self.ring.node_for(path)]
+        if not worker.is_alive:
+            return False
+        worker.commands.put((REQUEST, frame, command_class.value if command_class else None))
+        return True
+
+    def collect_health(self) -> None:
+        """Read the health reports waiting in the queue."""
+        while True:
+            try:
+                message = self.health_queue.get_nowait()
+            except queue.Empty:
+                return
+            state = self.writer if message[0] == WRITER else self.workers.get(message[1])
+            if state is not None:
+                state.report = message[-1]
+                state.reported_at = time.monotonic()
+
+    def health(self) -> Dict[str, Dict[str, Any]]:
+        """Return the health of every process: pid, alive, exit code, restarts, last report and its age."""
+        now = time.monotonic()
+        return {state.name: state.health(now) for state in self.processes}
+
+    def publish_health(self, path: Optional[str | Path] = None) -> None:
+        """Write `health` as JSON, atomically, to `path` (defaults to settings.GATEWAY_SUPERVISOR_HEALTH_PATH)."""
+        path = Path(path or settings.GATEWAY_SUPERVISOR_HEALTH_PATH)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(self.health(), indent=2))
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.exception(f"Failed to publish the gateway health to {path}")
+
+    def shutdown(self) -> None:
+        """Stop the workers, then the writer once it has received every frame."""
+        timeout = settings.GATEWAY_SUPERVISOR_STOP_TIMEOUT
+        for worker in self.workers.values():
+            if worker.is_alive:
+                worker.commands.put((STOP,))
+        for worker in self.workers.values():
+            self._join(worker, timeout)
+        if self.writer.is_alive:
+            self.writer_queue.put((STOP,))
+        self._join(self.writer, timeout)
+        self.collect_health()
+        self.publish_health()
+
+    def _start(self, state: SupervisedProcess) -> None:
+        # A fresh queue for the reader of a queue: the previous process may have died holding its lock.
+        if state.shard_id is None:
+            if state.process is not None and _read_lock_held(self.writer_queue):
+                self._renew_writer_queue()
+            target, args = run_writer, (self.writer_queue, self.health_queue)
+        else:
+            state.commands = self.context.Queue()
+            target = run_worker
+            args = (
+                state.shard_id,
+                list(state.devices.items()),
+                state.commands,
+                self.writer_queue,
+                self.health_queue,
+                self.baudrate,
+            )
+        state.process = self.context.Process(target=target, args=args, name=f"gateway-{state.name}", daemon=True)
+        state.process.start()
+        state.started_at = time.monotonic()
+        state.died_at = None
+        state.reported_at = None
+        logger.info(f"Gateway {state.name} started (pid {state.process.pid})")
+
+    def _supervise(self, state: SupervisedProcess, now: float) -> None:
+        if state.process is None:
+            return
+        if state.is_alive:
+            silent_since = state.reported_at if state.reported_at is not None else state.started_at
+            if now - silent_since > settings.GATEWAY_SUPERVISOR_HEALTH_TIMEOUT:
+                logger.error(f"Gateway {state.name} (pid {state.process.pid}) stopped reporting, terminating it")
+                state.process.terminate()
+            return
+
+        if state.died_at is None:
+            state.died_at = now
+            logger.error(f"Gateway {state.name} (pid {state.process.pid}) exited with code {state.process.exitcode}")
+        if now - state.died_at >= settings.GATEWAY_SUPERVISOR_RESTART_DELAY:
+            state.restarts += 1
+            self._start(state)
+
+    @staticmethod
+    def _join(state: SupervisedProcess, timeout: float) -> None:
+        if state.process is None:
+            return
+        state.process.join(timeout)
+        if state.process.is_alive():
+            logger.warning(f"Gateway {state.name} did not stop within {timeout} seconds, terminating it")
+            state.process.terminate()
+            state.process.join()
+
+    def _renew_writer_queue(self) -> None:
+        # The writer died in the middle of a message: the previous queue cannot be read anymore.
+        # The workers write it, they inherited it at their start: they are terminated, and
+        # `_supervise` starts them again on the new queue. The frames left in the previous queue
+        # are lost with the writer.
+        logger.error("Gateway writer died reading its queue, the frames still queued are lost")
+        previous = self.writer_queue
+        self.writer_queue = self.context.Queue(maxsize=settings.GATEWAY_SUPERVISOR_QUEUE_SIZE)
+        previous.cancel_join_thread()
+        previous.close()
+        for worker in self.workers.values():
+            if worker.is_alive:
+                logger.warning(f"Gateway {worker.name} restarted on the queue of the new writer")
+                worker.process.terminate()
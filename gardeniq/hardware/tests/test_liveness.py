@@ -0,0 +1,147 @@
+from datetime import timedelta
+from enum import Enum
+
+from django.conf import settings
+
+import pytest
+
+from gardeniq.base.models import Status
+from gardeniq.hardware.liveness import LivenessTracker
+from gardeniq.hardware.models import Device
+from gardeniq.hardware.registry import device_registry
+
+
+@pytest.fixture(autouse=True)
+def default_status_enum(settings):
+    class DummyStatus(Enum):
+        ONLINE = "En ligne"
+        OFFLINE = "Hors ligne"
+
+    settings.DEFAULT_STATUS = DummyStatus
+    return DummyStatus
+
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    device_registry.clear()
+    yield
+    device_registry.clear()
+
+
+@pytest.fixture
+def statuses(db):
+    return {
+        "online": Status.objects.create(
+            name=settings.DEFAULT_STATUS.ONLINE.value, tag="device-online", color="#00FF00"
+        ),
+        "offline": Status.objects.create(
+            name=settings.DEFAULT_STATUS.OFFLINE.value, tag="device-offline", color="#FF0000"
+        ),
+    }
+
+
+@pytest.fixture
+def device(statuses):
+    return Device.objects.create(name="Board", uid="DEV0001", path="/dev/ttyUSB0", status=statuses["online"])
+
+
+@pytest.mark.django_db
+class TestLivenessTracker:
+    def test_record_without_flip_does_not_write(self, device, django_assert_num_queries):
+        # GIVEN
+        tracker = LivenessTracker(flush_interval=60)
+        device_registry.get_status(True)
+
+        # WHEN
+        with django_assert_num_queries(0):
+            flipped = tracker.record(device)
+
+        # THEN
+        assert flipped is False
+        assert tracker.pending == 1
+        assert tracker.coalesced == 1
+
+    def test_flip_is_written_through_with_narrow_fields(self, device, statuses, mocker):
+        # GIVEN
+        tracker = LivenessTracker(flush_interval=60)
+        save_mock = mocker.patch.object(device, "save")
+
+        # WHEN
+        flipped = tracker.record(device, on=False)
+
+        # THEN
+        assert flipped is True
+        assert device.status == statuses["offline"]
+        save_mock.assert_called_once_with(update_fields=["status", "last_seen"])
+        assert tracker.pending == 0
+
+    def test_flip_without_commit_leaves_the_write_to_the_caller(self, device, mocker):
+        # GIVEN
+        tracker = LivenessTracker(flush_interval=60)
+        save_mock = mocker.patch.object(device, "save")
+
+        # WHEN
+        flipped = tracker.record(device, on=False, commit=False)
+
+        # THEN
+        assert flipped is True
+        save_mock.assert_not_called()
+
+    def test_flush_writes_last_seen_in_one_query(self, statuses, django_assert_num_queries):
+        # GIVEN
+        tracker = LivenessTracker(flush_interval=60)
+        devices = [
+            Device.objects.create(name=f"Board {i}", uid=f"DEV{i:04d}", path="/dev/ttyUSB0", status=statuses["online"])
+            for i in range(5)
+        ]
+        stale = Device.objects.get(pk=devices[0].pk).last_seen
+        for device in devices:
+            tracker.record(device)
+
+        # WHEN
+        with django_assert_num_queries(1):
+            written = tracker.flush()
+
+        # THEN
+        assert written == 5
+        assert tracker.pending == 0
+        assert Device.objects.get(pk=devices[0].pk).last_seen > stale
+
+    def test_flush_without_pending_devices_does_not_query(self, db, django_assert_num_queries):
+        # GIVEN
+        tracker = LivenessTracker(flush_interval=0)
+
+        # WHEN / THEN
+        with django_assert_num_queries(0):
+            assert tracker.flush() == 0
+
+    def test_flush_due_waits_for_the_interval(self, device, mocker):
+        # GIVEN
+        clock = mocker.patch("gardeniq.hardware.liveness.time.monotonic", return_value=1000.0)
+        tracker = LivenessTracker(flush_interval=30)
+        tracker.record(device)
+
+        # WHEN
+        clock.return_value = 1010.0
+        early = tracker.flush_due()
+        clock.return_value = 1031.0
+        due = tracker.flush_due()
+
+        # THEN
+        assert early == 0
+        assert due == 1
+
+    def test_repeated_records_keep_the_latest_last_seen(self, device):
+        # GIVEN
+        tracker = LivenessTracker(flush_interval=60)
+        tracker.record(device)
+        first = device.last_seen
+
+        # WHEN
+        tracker.record(device)
+        tracker.flush()
+
+        # THEN
+        assert tracker.flushed == 1
+        assert Device.objects.get(pk=device.pk).last_seen >= first
+        assert device.last_seen - first < timedelta(seconds=1)
@@ -0,0 +1,174 @@
+from enum import Enum
+
+from django.conf import settings
+
+import pytest
+
+from gardeniq.base.models import Status
+from gardeniq.hardware.models import Device
+from gardeniq.hardware.registry import DeviceRegistry
+from gardeniq.hardware.registry import device_registry
+
+
+@pytest.fixture(autouse=True)
+def default_status_enum(settings):
+    class DummyStatus(Enum):
+        ONLINE = "En ligne"
+        OFFLINE = "Hors ligne"
+
+    settings.DEFAULT_STATUS = DummyStatus
+    return DummyStatus
+
+
+@pytest.fixture
+def statuses(db):
+    return {
+        "online": Status.objects.create(
+            name=settings.DEFAULT_STATUS.ONLINE.value, tag="device-online", color="#00FF00"
+        ),
+        "offline": Status.objects.create(
+            name=settings.DEFAULT_STATUS.OFFLINE.value, tag="device-offline", color="#FF0000"
+        ),
+    }
+
+
+@pytest.fixture
+def device(statuses):
+    return Device.objects.create(name="Board", uid="DEV0001", path="/dev/ttyUSB0", status=statuses["offline"])
+
+
+@pytest.fixture
+def registry():
+    # The signals update the shared registry: tests use it, emptied.
+    device_registry.clear()
+    yield device_registry
+    device_registry.clear()
+
+
+@pytest.mark.django_db
+class TestDeviceRegistry:
+    def test_get_device_queries_only_on_miss(self, registry, device, django_assert_num_queries):
+        # GIVEN
+        registry.clear()
+
+        # WHEN
+        with django_assert_num_queries(1):
+            first = registry.get_device(device.uid)
+            second = registry.get_device(device.uid)
+
+        # THEN
+        assert first is second
+        assert first.pk == device.pk
+
+    def test_get_device_counts_hits_and_misses(self, device):
+        # GIVEN
+        registry = DeviceRegistry()
+
+        # WHEN
+        registry.get_device(device.uid)
+        registry.get_device(device.uid)
+
+        # THEN
+        assert registry.stats() == {
+            "devices": 1,
+            "device_hits": 1,
+            "device_misses": 1,
+            "status_hits": 0,
+            "status_misses": 0,
+        }
+
+    def test_get_unknown_device_raises(self, registry, db):
+        # WHEN / THEN
+        with pytest.raises(Device.DoesNotExist):
+            registry.get_device("UNKNOWN")
+
+    def test_get_devices_loads_missing_devices_in_one_query(
+        self, registry, device, statuses, django_assert_num_queries
+    ):
+        # GIVEN
+        other = Device.objects.create(name="Other", uid="DEV0002", path="/dev/ttyUSB1", status=statuses["offline"])
+        registry.clear()
+        registry.get_device(device.uid)
+
+        # WHEN
+        with django_assert_num_queries(1):
+            devices = registry.get_devices([device.uid, other.uid, "UNKNOWN"])
+
+        # THEN
+        assert set(devices) == {device.uid, other.uid}
+
+    def test_saved_device_replaces_its_entry(self, registry, device):
+        # GIVEN
+        registry.get_device(device.uid)
+        updated = Device.objects.get(pk=device.pk)
+        updated.uid = "DEV0099"
+
+        # WHEN
+        updated.save()
+
+        # THEN
+        assert registry.get_device("DEV0099") is updated
+        with pytest.raises(Device.DoesNotExist):
+            registry.get_device("DEV0001")
+
+    def test_deleted_device_is_dropped(self, registry, device):
+        # GIVEN
+        registry.get_device(device.uid)
+
+        # WHEN
+        Device.objects.get(pk=device.pk).delete()
+
+        # THEN
+        with pytest.raises(Device.DoesNotExist):
+            registry.get_device(device.uid)
+
+    def test_entries_are_reloaded_after_the_ttl(self, device, statuses, django_assert_num_queries):
+        # GIVEN
+        registry = DeviceRegistry(ttl=0)
+        registry.warm()
+        Device.objects.filter(pk=device.pk).update(name="Renamed by another process")
+
+        # WHEN
+        with django_assert_num_queries(3):
+            reloaded = registry.get_device(device.uid)
+            registry.get_devices([device.uid])
+            registry.get_status(True)
+
+        # THEN
+        assert reloaded.name == "Renamed by another process"
+
+    def test_get_status_is_cached_until_a_status_changes(self, registry, statuses, django_assert_num_queries):
+        # GIVEN
+        with django_assert_num_queries(1):
+            registry.get_status(True)
+            registry.get_status(True)
+
+        # WHEN
+        statuses["online"].color = "#00AA00"
+        statuses["online"].save()
+
+        # THEN
+        with django_assert_num_queries(1):
+            assert registry.get_status(True).color == "#00AA00"
+
+    def test_warm_loads_devices_and_statuses(self, registry, device, statuses, django_assert_num_queries):
+        # GIVEN
+        registry.clear()
+        registry.warm()
+
+        # WHEN / THEN
+        with django_assert_num_queries(0):
+            assert registry.get_device(device.uid).pk == device.pk
+            assert registry.get_status(False) == statuses["offline"]
+
+    def test_mark_online_uses_the_cached_status(self, registry, device, statuses, django_assert_num_queries):
+        # GIVEN
+        registry.warm()
+
+        # WHEN
+        with django_assert_num_queries(1):
+            device.mark_online()
+
+        # THEN
+        device.refresh_from_db()
+        assert device.status == statuses["online"]
@@ -0,0 +1,195 @@
+import asyncio
+import random
+
+import pytest
+
+from gardeniq.base.models import Status
+from gardeniq.hardware.gateway import Gateway
+from gardeniq.hardware.gateway import OutboundScheduler
+from gardeniq.hardware.models import Device
+from gardeniq.hardware.protocols.errors import CommandError
+from gardeniq.hardware.protocols.errors import FrameParsingError
+from gardeniq.hardware.protocols.frame import CommandState
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameEncoding
+from gardeniq.hardware.protocols.frame import FrameType
+from gardeniq.hardware.protocols.usb import FrameHandler
+from gardeniq.hardware.protocols.usb import FrameParser
+from gardeniq.hardware.protocols.usb.parser import encoding_option
+from gardeniq.hardware.registry import device_registry
+from gardeniq.hardware.simulator import FakeFirmware
+from gardeniq.hardware.simulator import FirmwareProfile
+from gardeniq.hardware.simulator import VirtualFleet
+
+
+def ping(device_uid: str = "SIM0000", *options: str) -> Frame:
+    return Frame(FrameType.PING, device_uid, 0, "", list(options))
+
+
+def command(command_id: int, device_uid: str = "SIM0000") -> Frame:
+    return Frame(FrameType.CMD, device_uid, command_id, "", ["1"])
+
+
+def lg_init(*fields_values: str, device_uid: str = "SIM0000") -> Frame:
+    return Frame(FrameType.LG_INIT, device_uid, -1, "", [], model="Order", fields_values=fields_values)
+
+
+def exchange(firmware: FakeFirmware, frame: Frame, encoding: FrameEncoding = FrameEncoding.TEXT) -> Frame:
+    [answer] = firmware.receive(FrameParser.encode(frame, encoding))
+    return FrameParser.decode(answer)
+
+
+class AnsweringHandler(FrameHandler):
+    """Only hands the responses to the listeners (the correlator), without database."""
+
+    def handle_batch(self, frames):
+        for frame in frames:
+            self._notify_response(frame)
+        return []
+
+
+class TestFakeFirmware:
+    def test_ping_is_answered_with_the_firmware_versions(self):
+        # GIVEN
+        firmware = FakeFirmware("SIM0000", FirmwareProfile(gd_fw_version="1.2.3", mp_fw_version="4.5.6"))
+
+        # WHEN
+        answer = exchange(firmware, ping())
+
+        # THEN
+        assert answer.is_ping_response() is True
+        assert (answer.gd_fw_version, answer.mp_fw_version) == ("1.2.3", "4.5.6")
+        assert answer.verify_checksum() is True
+
+    def test_command_is_answered_with_a_reading(self):
+        # GIVEN
+        firmware = FakeFirmware("SIM0000", FirmwareProfile())
+
+        # WHEN
+        answer = exchange(firmware, command(7))
+
+        # THEN
+        assert answer.command_state is CommandState.OK
+        assert answer.is_order_response_with_data() is True
+        assert answer.verify_checksum() is True
+
+    def test_error_rate(self):
+        # GIVEN
+        firmware = FakeFirmware("SIM0000", FirmwareProfile(error_rate=1.0))
+
+        # WHEN
+        answer = exchange(firmware, command(7))
+
+        # THEN
+        assert answer.command_state is CommandState.ERROR
+        assert firmware.errors_sent == 1
+
+    def test_corrupted_answers_fail_the_checksum(self):
+        # GIVEN
+        firmware = FakeFirmware("SIM0000", FirmwareProfile(corruption_rate=1.0), random.Random(1))
+
+        # WHEN
+        answers = [firmware.receive(FrameParser.encode(command(7)))[0] for _ in range(20)]
+
+        # THEN
+        for answer in answers:
+            try:
+                assert FrameParser.decode(answer).verify_checksum() is False
+            except (FrameParsingError, ValueError):
+                # The corrupted byte broke the frame itself.
+                pass
+        assert firmware.frames_corrupted == 20
+
+    def test_learnt_language_drives_the_answers(self):
+        # GIVEN
+        firmware = FakeFirmware("SIM0000", FirmwareProfile())
+        exchange(firmware, lg_init("1", "get_temp", "get"))
+        exchange(firmware, lg_init("2", "open_van", "set", ""))
+        exchange(firmware, lg_init("3", "close_van", "set", ""))
+
+        # WHEN
+        exchange(firmware, lg_init("3"))
+        getter, setter, removed = (exchange(firmware, command(pk)) for pk in (1, 2, 3))
+
+        # THEN
+        assert getter.ok_data is not None
+        assert setter.is_order_response_without_data() is True
+        assert removed.err_msg is CommandError.UNKNOW_CMD
+
+    def test_frames_for_another_device_are_ignored(self):
+        # GIVEN
+        firmware = FakeFirmware("SIM0000", FirmwareProfile())
+
+        # WHEN
+        answers = firmware.receive(FrameParser.encode(ping("SIM0001")))
+
+        # THEN
+        assert answers == []
+
+    def test_binary_encoding_is_negotiated_in_the_ping(self):
+        # GIVEN
+        firmware = FakeFirmware("SIM0000", FirmwareProfile(encodings=(FrameEncoding.CBOR,)))
+        offer = encoding_option([FrameEncoding.MSGPACK, FrameEncoding.CBOR])
+
+        # WHEN
+        answer = exchange(firmware, ping("SIM0000", offer))
+        reading = exchange(firmware, command(7), FrameEncoding.CBOR)
+
+        # THEN
+        assert answer.encoding is FrameEncoding.CBOR
+        assert isinstance(reading.ok_data, float)
+
+
+class TestVirtualFleet:
+    def test_gateway_pings_every_simulated_device(self, monkeypatch, settings):
+        # GIVEN
+        settings.GATEWAY_HEARTBEAT_ENABLED = False
+        settings.GATEWAY_LANGUAGE_SYNC_ENABLED = False
+        settings.GATEWAY_OUTBOUND_REPLAY_ENABLED = False
+        settings.GATEWAY_OUTBOUND_SQLITE_WAL = False
+        settings.GATEWAY_OUTBOUND_RETENTION_DAYS = None
+        fleet = VirtualFleet(3, FirmwareProfile(latency=0.01), seed=0)
+        devices = [(device.device_uid, device.path) for device in fleet.devices]
+        monkeypatch.setattr(Gateway, "load_devices", staticmethod(lambda: devices))
+        monkeypatch.setattr(OutboundScheduler, "load_action_types", staticmethod(lambda: {}))
+        monkeypatch.setattr(device_registry, "warm", lambda: None)
+        gateway = Gateway(handler=AnsweringHandler())
+
+        async def scenario():
+            simulation = asyncio.create_task(fleet.run())
+            task = asyncio.create_task(gateway.run())
+            while len(gateway.transports) < 3 or not all(t.is_open for t in gateway.transports.values()):
+                await asyncio.sleep(0.01)
+            answers = await asyncio.gather(*(gateway.request(ping(uid)) for uid, _ in devices))
+            gateway.stop()
+            await task
+            fleet.stop()
+            await simulation
+            return answers
+
+        # WHEN
+        answers = asyncio.run(asyncio.wait_for(scenario(), timeout=10))
+
+        # THEN
+        assert [answer.device_uid for answer in answers] == [uid for uid, _ in devices]
+        assert all(answer.is_ping_response() and answer.verify_checksum() for answer in answers)
+        assert fleet.stats()["frames_received"] == 3
+
+    @pytest.mark.django_db
+    def test_register_creates_the_devices_with_their_pty_path(self, settings):
+        # GIVEN
+        Status.objects.create(name=settings.DEFAULT_STATUS.OFFLINE.value, tag="device-offline", color="#FF0000")
+        device_registry.clear()
+        fleet = VirtualFleet(2, uid_prefix="LOAD")
+
+        # WHEN
+        fleet.register()
+        fleet.register()
+
+        # THEN
+        assert dict(Device.objects.filter(uid__startswith="LOAD").values_list("uid", "path")) == {
+            device.device_uid: device.path for device in fleet.devices
+        }
+        for device in fleet.devices:
+            device.close()
+        device_registry.clear()
@@ -0,0 +1,409 @@
+import json
+import queue
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+
+import pytest
+
+from gardeniq.hardware.gateway import CommandClass
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameType
+from gardeniq.hardware.supervisor import ASSIGN
+from gardeniq.hardware.supervisor import REQUEST
+from gardeniq.hardware.supervisor import STOP
+from gardeniq.hardware.supervisor import WRITER
+from gardeniq.hardware.supervisor import GatewaySupervisor
+from gardeniq.hardware.supervisor import HashRing
+from gardeniq.hardware.supervisor import partition
+from gardeniq.hardware.supervisor import run_worker
+from gardeniq.hardware.supervisor import run_writer
+
+
+class FakeProcess:
+    started = 0
+
+    def __init__(self, target, args, name, daemon):
+        self.target = target
+        self.args = args
+        self.name = name
+        self.pid = None
+        self.exitcode = None
+        self.alive = False
+
+    def start(self):
+        FakeProcess.started += 1
+        self.pid = 1000 + FakeProcess.started
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def join(self, timeout=None):
+        pass
+
+    def terminate(self):
+        self.exit(-15)
+
+    def exit(self, code):
+        self.alive = False
+        self.exitcode = code
+
+
+class FakeQueue(queue.Queue):
+    closed = False
+
+    def __init__(self, maxsize=0):
+        super().__init__(maxsize)
+        self._rlock = threading.Lock()
+
+    def cancel_join_thread(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    Process = FakeProcess
+
+    @staticmethod
+    def Queue(maxsize=0):
+        return FakeQueue(maxsize)
+
+
+def devices(count, start=0):
+    return [(f"DEV{i:04d}", f"/dev/ttyUSB{i}") for i in range(start, start + count)]
+
+
+def drain(commands):
+    messages = []
+    while not commands.empty():
+        messages.append(commands.get_nowait())
+    return messages
+
+
+@pytest.fixture(autouse=True)
+def supervisor_settings(settings, tmp_path):
+    settings.GATEWAY_SUPERVISOR_HEALTH_PATH = tmp_path / "gateway_health.json"
+    settings.GATEWAY_SUPERVISOR_RESTART_DELAY = 0
+    settings.GATEWAY_OUTBOUND_REPLAY_ENABLED = False
+    settings.GATEWAY_LANGUAGE_SYNC_ENABLED = False
+    return settings
+
+
+@pytest.fixture
+def supervisor_factory():
+    def _factory(workers=3, fleet=None):
+        fleet = devices(30) if fleet is None else fleet
+        return GatewaySupervisor(workers=workers, load_devices=lambda: list(fleet), mp_context=FakeContext())
+
+    return _factory
+
+
+class TestHashRing:
+    def test_keys_map_to_the_same_node_in_every_ring(self):
+        # GIVEN
+        first, second = HashRing(range(4)), HashRing([3, 2, 1, 0])
+
+        # WHEN
+        nodes = [(first.node_for(path), second.node_for(path)) for _, path in devices(100)]
+
+        # THEN
+        assert all(a == b for a, b in nodes)
+
+    def test_keys_are_spread_over_every_node(self):
+        # GIVEN
+        ring = HashRing(range(4))
+
+        # WHEN
+        shards = partition(devices(1000), ring)
+
+        # THEN
+        assert all(len(assigned) > 150 for assigned in shards.values())
+
+    def test_a_new_node_only_takes_keys_from_the_others(self):
+        # GIVEN
+        ring = HashRing(range(4))
+        before = {path: ring.node_for(path) for _, path in devices(1000)}
+
+        # WHEN
+        ring.add(4)
+        after = {path: ring.node_for(path) for _, path in devices(1000)}
+
+        # THEN
+        moved = [path for path in before if before[path] != after[path]]
+        assert moved
+        assert all(after[path] == 4 for path in moved)
+        assert len(moved) < 400
+
+    def test_removing_a_node_only_moves_its_keys(self):
+        # GIVEN
+        ring = HashRing(range(4))
+        before = {path: ring.node_for(path) for _, path in devices(1000)}
+
+        # WHEN
+        ring.remove(2)
+
+        # THEN
+        for path, node in before.items():
+            assert ring.node_for(path) == node or node == 2
+        assert ring.nodes == [0, 1, 3]
+
+    def test_empty_ring_has_no_node(self):
+        with pytest.raises(ValueError):
+            HashRing([]).node_for("/dev/ttyUSB0")
+
+
+class TestPartition:
+    def test_devices_sharing_a_port_stay_together(self):
+        # GIVEN
+        ring = HashRing(range(8))
+
+        # WHEN
+        shards = partition([("DEV0000", "/dev/ttyUSB0"), ("DEV0001", "/dev/ttyUSB0")], ring)
+
+        # THEN
+        assert sorted(shards) == list(range(8))
+        assert [assigned for assigned in shards.values() if assigned] == [
+            {"DEV0000": "/dev/ttyUSB0", "DEV0001": "/dev/ttyUSB0"}
+        ]
+
+
+class TestGatewaySupervisor:
+    @pytest.mark.parametrize("setting", ["GATEWAY_OUTBOUND_REPLAY_ENABLED", "GATEWAY_LANGUAGE_SYNC_ENABLED"])
+    def test_refuses_to_run_without_the_journal_or_the_language_sync(
+        self, supervisor_factory, supervisor_settings, setting
+    ):
+        # GIVEN
+        setattr(supervisor_settings, setting, True)
+
+        # WHEN / THEN
+        with pytest.raises(ImproperlyConfigured):
+            supervisor_factory()
+
+    def test_start_runs_the_writer_and_the_workers_with_their_devices(self, supervisor_factory):
+        # GIVEN
+        supervisor = supervisor_factory()
+
+        # WHEN
+        supervisor.start()
+
+        # THEN
+        assert supervisor.writer.process.target is run_writer
+        assert all(worker.process.target is run_worker for worker in supervisor.workers.values())
+        assigned = [dict(worker.process.args[1]) for worker in supervisor.workers.values()]
+        assert sum(len(devices_) for devices_ in assigned) == 30
+        assert {uid for devices_ in assigned for uid in devices_} == {uid for uid, _ in devices(30)}
+
+    def test_hot_plugged_device_is_only_sent_to_its_worker(self, supervisor_factory):
+        # GIVEN
+        fleet = devices(30)
+        supervisor = supervisor_factory(fleet=fleet)
+        supervisor.start()
+
+        # WHEN
+        fleet.append(("DEV0099", "/dev/ttyUSB99"))
+        changed = supervisor.rebalance(fleet)
+
+        # THEN
+        index = supervisor.ring.node_for("/dev/ttyUSB99")
+        assert changed == [index]
+        assert drain(supervisor.workers[index].commands) == [(ASSIGN, list(supervisor.workers[index].devices.items()))]
+        assert ("DEV0099", "/dev/ttyUSB99") in supervisor.workers[index].devices.items()
+        assert all(drain(worker.commands) == [] for worker in supervisor.workers.values())
+
+    def test_unplugged_device_is_removed_from_its_worker(self, supervisor_factory):
+        # GIVEN
+        fleet = devices(30)
+        supervisor = supervisor_factory(fleet=fleet)
+        supervisor.start()
+
+        # WHEN
+        uid, path = fleet.pop(0)
+        changed = supervisor.rebalance(fleet)
+
+        # THEN
+        index = supervisor.ring.node_for(path)
+        assert changed == [index]
+        assert uid not in supervisor.workers[index].devices
+
+    def test_poll_rescans_the_devices_when_due(self, supervisor_factory, supervisor_settings):
+        # GIVEN
+        fleet = devices(30)
+        supervisor = supervisor_factory(fleet=fleet)
+        supervisor_settings.GATEWAY_SUPERVISOR_RESCAN_INTERVAL = 0
+        supervisor.start()
+
+        # WHEN
+        fleet.append(("DEV0099", "/dev/ttyUSB99"))
+        supervisor.poll()
+
+        # THEN
+        assert supervisor.device_paths["DEV0099"] == "/dev/ttyUSB99"
+
+    def test_crashed_worker_is_restarted_with_its_current_devices(self, supervisor_factory):
+        # GIVEN
+        fleet = devices(30)
+        supervisor = supervisor_factory(fleet=fleet)
+        supervisor.start()
+        worker = supervisor.workers[1]
+        crashed, old_commands = worker.process, worker.commands
+
+        # WHEN
+        crashed.exit(1)
+        fleet.append(("DEV0099", "/dev/ttyUSB99"))
+        supervisor.rebalance(fleet)
+        supervisor.poll()
+
+        # THEN
+        assert worker.restarts == 1
+        assert worker.process is not crashed and worker.is_alive
+        assert worker.commands is not old_commands
+        assert dict(worker.process.args[1]) == worker.devices
+
+    def test_restarted_writer_reads_the_queue_of_the_previous_one(self, supervisor_factory):
+        # GIVEN
+        supervisor = supervisor_factory()
+        supervisor.start()
+        old_queue = supervisor.writer_queue
+        old_queue.put(("frames", []))
+        old_workers = [worker.process for worker in supervisor.workers.values()]
+
+        # WHEN
+        supervisor.writer.process.exit(1)
+        supervisor.poll()
+
+        # THEN
+        assert supervisor.writer.restarts == 1
+        assert supervisor.writer_queue is old_queue and not old_queue.closed
+        assert supervisor.writer.process.args[0] is old_queue
+        assert old_queue.qsize() == 1
+        assert all(process.is_alive() for process in old_workers)
+
+    def test_writer_dead_while_reading_gets_a_fresh_queue_shared_by_the_workers(self, supervisor_factory):
+        # GIVEN
+        supervisor = supervisor_factory()
+        supervisor.start()
+        old_queue = supervisor.writer_queue
+        old_workers = [worker.process for worker in supervisor.workers.values()]
+
+        # WHEN
+        old_queue._rlock.acquire()
+        supervisor.writer.process.exit(-9)
+        supervisor.poll()
+
+        # THEN
+        assert supervisor.writer.restarts == 1
+        assert supervisor.writer_queue is not old_queue and old_queue.closed
+        assert supervisor.writer.process.args[0] is supervisor.writer_queue
+        assert all(process.exitcode == -15 for process in old_workers)
+
+        # WHEN
+        supervisor.poll()
+
+        # THEN
+        for worker in supervisor.workers.values():
+            assert worker.restarts == 1 and worker.is_alive
+            assert worker.process.args[3] is supervisor.writer_queue
+
+    def test_restart_waits_for_the_delay(self, supervisor_factory, supervisor_settings):
+        # GIVEN
+        supervisor_settings.GATEWAY_SUPERVISOR_RESTART_DELAY = 60
+        supervisor = supervisor_factory()
+        supervisor.start()
+
+        # WHEN
+        supervisor.writer.process.exit(1)
+        supervisor.poll()
+
+        # THEN
+        assert supervisor.writer.restarts == 0
+        assert supervisor.health()[WRITER]["exitcode"] == 1
+
+    def test_silent_worker_is_terminated(self, supervisor_factory, supervisor_settings):
+        # GIVEN
+        supervisor = supervisor_factory()
+        supervisor.start()
+        supervisor_settings.GATEWAY_SUPERVISOR_HEALTH_TIMEOUT = -1
+        supervisor_settings.GATEWAY_SUPERVISOR_RESTART_DELAY = 60
+
+        # WHEN
+        supervisor.poll()
+
+        # THEN
+        assert all(state.process.exitcode == -15 for state in supervisor.processes)
+
+    def test_health_holds_the_last_report_of_every_process(self, supervisor_factory):
+        # GIVEN
+        supervisor = supervisor_factory(workers=2)
+        supervisor.start()
+        supervisor.health_queue.put(("worker", 1, {"frames_received": 3}))
+        supervisor.health_queue.put(("worker", 1, {"frames_received": 5}))
+        supervisor.health_queue.put((WRITER, {"frames_handled": 8}))
+
+        # WHEN
+        supervisor.collect_health()
+        health = supervisor.health()
+
+        # THEN
+        assert sorted(health) == ["worker-0", "worker-1", "writer"]
+        assert health["worker-1"]["report"] == {"frames_received": 5}
+        assert health["worker-1"]["last_report_age"] is not None
+        assert health["worker-0"]["last_report_age"] is None
+        assert health["writer"]["report"] == {"frames_handled": 8}
+        assert health["worker-0"]["devices"] + health["worker-1"]["devices"] == 30
+
+    def test_send_routes_the_command_to_the_worker_of_the_device(self, supervisor_factory):
+        # GIVEN
+        supervisor = supervisor_factory()
+        supervisor.start()
+        frame = Frame(FrameType.CMD, "DEV0007", 3, "open_van", ["1"])
+
+        # WHEN
+        sent = supervisor.send(frame, CommandClass.ACTUATOR)
+
+        # THEN
+        assert sent is True
+        worker = supervisor.workers[supervisor.ring.node_for("/dev/ttyUSB7")]
+        assert drain(worker.commands) == [(REQUEST, frame, "ACTUATOR")]
+
+    def test_send_to_an_unknown_device_or_a_stopped_worker_fails(self, supervisor_factory):
+        # GIVEN
+        supervisor = supervisor_factory()
+        supervisor.start()
+        supervisor.workers[supervisor.ring.node_for("/dev/ttyUSB7")].process.exit(1)
+
+        # WHEN
+        unknown = supervisor.send(Frame(FrameType.PING, "UNKNOWN", 0, "", []))
+        stopped = supervisor.send(Frame(FrameType.PING, "DEV0007", 0, "", []))
+
+        # THEN
+        assert unknown is False
+        assert stopped is False
+
+    def test_shutdown_stops_the_workers_then_the_writer(self, supervisor_factory, supervisor_settings):
+        # GIVEN
+        supervisor = supervisor_factory()
+        supervisor.start()
+
+        # WHEN
+        supervisor.shutdown()
+
+        # THEN
+        assert all(drain(worker.commands) == [(STOP,)] for worker in supervisor.workers.values())
+        assert drain(supervisor.writer_queue) == [(STOP,)]
+        published = json.loads(supervisor_settings.GATEWAY_SUPERVISOR_HEALTH_PATH.read_text())
+        assert sorted(published) == ["worker-0", "worker-1", "worker-2", "writer"]
+
+    def test_run_returns_once_stopped(self, supervisor_factory):
+        # GIVEN
+        supervisor = supervisor_factory()
+        supervisor.stop()
+
+        # WHEN
+        supervisor.run()
+
+        # THEN
+        assert supervisor.writer.process is not None
+        assert drain(supervisor.writer_queue) == [(STOP,)]
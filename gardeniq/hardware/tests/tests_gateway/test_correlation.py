@@ -0,0 +1,231 @@
+import asyncio
+
+import pytest
+
+from gardeniq.hardware.gateway.correlation import CommandCorrelator
+from gardeniq.hardware.protocols.errors import CommandError
+from gardeniq.hardware.protocols.errors import CommandTimeoutError
+from gardeniq.hardware.protocols.frame import CommandState
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameType
+
+
+def command(command_id: int, device_uid: str = "hw-01") -> Frame:
+    return Frame(
+        frame_type=FrameType.CMD, device_uid=device_uid, command_id=command_id, command_slug="", args_values=[]
+    )
+
+
+def ack(command_id: int, device_uid: str = "hw-01", error: CommandError | None = None) -> Frame:
+    return Frame(
+        frame_type=FrameType.ACK,
+        device_uid=device_uid,
+        command_id=command_id,
+        command_slug="",
+        args_values=[],
+        from_device=True,
+        command_state=CommandState.ERROR if error else CommandState.OK,
+        err_msg=error,
+        checksum="00",
+        source_frame_from_device="",
+    )
+
+
+class FakeDevice:
+    """Records sent frames and answers them when told to."""
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, frame):
+        self.sent.append(frame)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestCommandCorrelator:
+    def test_submit_returns_matching_ack(self):
+        # GIVEN
+        device = FakeDevice()
+        correlator = CommandCorrelator(device.send, window=4, timeout=1, retries=0, backoff=0)
+
+        async def scenario():
+            task = asyncio.create_task(correlator.submit(command(7)))
+            await settle()
+            correlator.resolve(ack(7))
+            return await task
+
+        # WHEN
+        response = asyncio.run(scenario())
+
+        # THEN
+        assert response.command_id == 7
+        assert correlator.completed == 1
+        assert correlator.in_flight("hw-01") == 0
+
+    def test_several_commands_are_pipelined_up_to_the_window(self):
+        # GIVEN
+        device = FakeDevice()
+        correlator = CommandCorrelator(device.send, window=2, timeout=1, retries=0, backoff=0)
+
+        async def scenario():
+            tasks = [asyncio.create_task(correlator.submit(command(i))) for i in (1, 2, 3)]
+            await settle()
+            sent_before_ack = [frame.command_id for frame in device.sent]
+            in_flight = correlator.in_flight("hw-01")
+            # Out of order ACKs are matched by command id.
+            correlator.resolve(ack(2))
+            await settle()
+            correlator.resolve(ack(1))
+            await settle()
+            correlator.resolve(ack(3))
+            responses = await asyncio.gather(*tasks)
+            return sent_before_ack, in_flight, responses
+
+        # WHEN
+        sent_before_ack, in_flight, responses = asyncio.run(scenario())
+
+        # THEN
+        assert sent_before_ack == [1, 2]
+        assert in_flight == 2
+        assert [response.command_id for response in responses] == [1, 2, 3]
+
+    def test_windows_are_per_device(self):
+        # GIVEN
+        device = FakeDevice()
+        correlator = CommandCorrelator(device.send, window=1, timeout=1, retries=0, backoff=0)
+
+        async def scenario():
+            tasks = [asyncio.create_task(correlator.submit(command(1, uid))) for uid in ("hw-01", "hw-02")]
+            await settle()
+            sent = [frame.device_uid for frame in device.sent]
+            correlator.resolve(ack(1, "hw-01"))
+            correlator.resolve(ack(1, "hw-02"))
+            await asyncio.gather(*tasks)
+            return sent
+
+        # WHEN
+        sent = asyncio.run(scenario())
+
+        # THEN
+        assert sent == ["hw-01", "hw-02"]
+
+    def test_timeout_retries_then_raises_command_timeout(self):
+        # GIVEN
+        device = FakeDevice()
+        correlator = CommandCorrelator(device.send, window=1, timeout=0.01, retries=2, backoff=0.001)
+
+        # WHEN
+        with pytest.raises(CommandTimeoutError) as exc_info:
+            asyncio.run(correlator.submit(command(7)))
+
+        # THEN
+        assert exc_info.value.error is CommandError.TIMEOUT
+        assert len(device.sent) == 3
+        assert correlator.retried == 2
+        assert correlator.timeouts == 1
+        assert correlator._key_locks == {}
+
+    def test_late_ack_after_retry_resolves_the_retry(self):
+        # GIVEN
+        device = FakeDevice()
+        correlator = CommandCorrelator(device.send, window=1, timeout=0.02, retries=1, backoff=0)
+
+        async def scenario():
+            task = asyncio.create_task(correlator.submit(command(7)))
+            while len(device.sent) < 2:
+                await asyncio.sleep(0.005)
+            correlator.resolve(ack(7))
+            return await task
+
+        # WHEN
+        response = asyncio.run(scenario())
+
+        # THEN
+        assert response.command_id == 7
+        assert correlator.retried == 1
+
+    def test_busy_answer_is_retried(self):
+        # GIVEN
+        device = FakeDevice()
+        correlator = CommandCorrelator(device.send, window=1, timeout=1, retries=1, backoff=0)
+
+        async def scenario():
+            task = asyncio.create_task(correlator.submit(command(7)))
+            await settle()
+            correlator.resolve(ack(7, error=CommandError.BUSY))
+            while len(device.sent) < 2:
+                await asyncio.sleep(0)
+            correlator.resolve(ack(7))
+            return await task
+
+        # WHEN
+        response = asyncio.run(scenario())
+
+        # THEN
+        assert response.has_response_error() is False
+        assert len(device.sent) == 2
+
+    def test_error_answer_is_returned_without_retry(self):
+        # GIVEN
+        device = FakeDevice()
+        correlator = CommandCorrelator(device.send, window=1, timeout=1, retries=2, backoff=0)
+
+        async def scenario():
+            task = asyncio.create_task(correlator.submit(command(7)))
+            await settle()
+            correlator.resolve(ack(7, error=CommandError.INVALID_PARAM))
+            return await task
+
+        # WHEN
+        response = asyncio.run(scenario())
+
+        # THEN
+        assert response.err_msg is CommandError.INVALID_PARAM
+        assert len(device.sent) == 1
+
+    def test_same_command_waits_for_the_previous_one(self):
+        # GIVEN
+        device = FakeDevice()
+        correlator = CommandCorrelator(device.send, window=4, timeout=1, retries=0, backoff=0)
+
+        async def scenario():
+            first = asyncio.create_task(correlator.submit(command(7)))
+            second = asyncio.create_task(correlator.submit(command(7)))
+            await settle()
+            sent_before_ack = len(device.sent)
+            correlator.resolve(ack(7))
+            await first
+            locks_while_waiting = len(correlator._key_locks)
+            await settle()
+            correlator.resolve(ack(7))
+            await second
+            return sent_before_ack, locks_while_waiting
+
+        # WHEN
+        sent_before_ack, locks_while_waiting = asyncio.run(scenario())
+
+        # THEN
+        assert sent_before_ack == 1
+        assert len(device.sent) == 2
+        # The lock is kept while a submission waits for it, dropped after the last one.
+        assert locks_while_waiting == 1
+        assert correlator._key_locks == {}
+
+    def test_unmatched_ack_is_counted(self):
+        # GIVEN
+        correlator = CommandCorrelator(FakeDevice().send, window=1, timeout=1, retries=0, backoff=0)
+
+        async def scenario():
+            correlator._loop = asyncio.get_running_loop()
+            correlator.resolve(ack(99))
+            await settle()
+
+        # WHEN
+        asyncio.run(scenario())
+
+        # THEN
+        assert correlator.unmatched == 1
@@ -0,0 +1,253 @@
+import asyncio
+import os
+
+import pytest
+
+from gardeniq.hardware.gateway import Gateway
+from gardeniq.hardware.gateway import OutboundScheduler
+from gardeniq.hardware.protocols.benchmarks import build_device_frame
+from gardeniq.hardware.protocols.errors import FrameProcessingError
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameEncoding
+from gardeniq.hardware.protocols.frame import FrameType
+from gardeniq.hardware.protocols.metrics import load_snapshot
+from gardeniq.hardware.protocols.metrics import pipeline_metrics
+from gardeniq.hardware.protocols.settings import ETX
+from gardeniq.hardware.protocols.settings import STX
+from gardeniq.hardware.protocols.usb import FrameHandler
+from gardeniq.hardware.protocols.usb import FrameParser
+from gardeniq.hardware.registry import device_registry
+from gardeniq.hardware.utils.tests import SerialPortTestMixin
+from gardeniq.hardware.utils.tests import read_fd
+from gardeniq.hardware.utils.tests import wait_for
+
+ORDER_FRAME = f"{STX} ACK hw-01 7 OK 24.5C {ETX} 00\n".encode()
+
+
+class RecordingHandler(FrameHandler):
+    def __init__(self, fail_on=None):
+        super().__init__()
+        self.frames = []
+        self.fail_on = fail_on
+
+    def handle_device_response(self, frame):
+        if frame.device_uid == self.fail_on:
+            raise FrameProcessingError(f"Unknown device: {frame.device_uid}")
+        self.frames.append(frame)
+        self._notify_response(frame)
+
+    def handle_batch(self, frames):
+        errors = []
+        for frame in frames:
+            try:
+                self.handle_device_response(frame)
+            except FrameProcessingError as e:
+                errors.append((frame, e))
+        return errors
+
+
+class FakeEncodingTransport:
+    encoding = FrameEncoding.MSGPACK
+
+
+@pytest.fixture
+def gateway_factory(monkeypatch, settings):
+    settings.GATEWAY_HEARTBEAT_ENABLED = False
+    settings.GATEWAY_LANGUAGE_SYNC_ENABLED = False
+    settings.GATEWAY_OUTBOUND_REPLAY_ENABLED = False
+    settings.GATEWAY_OUTBOUND_SQLITE_WAL = False
+    settings.GATEWAY_OUTBOUND_RETENTION_DAYS = None
+
+    def _factory(devices, handler=None):
+        monkeypatch.setattr(Gateway, "load_devices", staticmethod(lambda: devices))
+        monkeypatch.setattr(OutboundScheduler, "load_action_types", staticmethod(lambda: {}))
+        monkeypatch.setattr(device_registry, "warm", lambda: None)
+        return Gateway(handler=handler or RecordingHandler())
+
+    return _factory
+
+
+class TestGateway(SerialPortTestMixin):
+    def test_frames_of_every_port_reach_the_handler(self, gateway_factory, pty_port):
+        # GIVEN
+        master, path = pty_port
+        gateway = gateway_factory([("hw-01", path)])
+
+        async def scenario():
+            task = asyncio.create_task(gateway.run())
+            await wait_for(lambda: path in gateway.transports and gateway.transports[path].is_open)
+            os.write(master, ORDER_FRAME * 3)
+            await wait_for(lambda: gateway.frames_handled == 3)
+            gateway.stop()
+            await task
+
+        # WHEN
+        asyncio.run(scenario())
+
+        # THEN
+        assert [frame.command_id for frame in gateway.handler.frames] == [7, 7, 7]
+        assert gateway.frames_received == 3
+        assert gateway.transports == {}
+
+    def test_metrics_are_published_when_the_gateway_stops(self, gateway_factory, pty_port, settings, tmp_path):
+        # GIVEN
+        master, path = pty_port
+        settings.PROTOCOL_METRICS_PATH = tmp_path / "metrics.json"
+        gateway = gateway_factory([("hw-01", path)])
+        pipeline_metrics.reset()
+        pipeline_metrics.enabled = True
+
+        async def scenario():
+            task = asyncio.create_task(gateway.run())
+            await wait_for(lambda: path in gateway.transports and gateway.transports[path].is_open)
+            os.write(master, ORDER_FRAME * 2)
+            await wait_for(lambda: gateway.frames_handled == 2)
+            gateway.stop()
+            await task
+
+        # WHEN
+        try:
+            asyncio.run(scenario())
+        finally:
+            pipeline_metrics.enabled = False
+            pipeline_metrics.reset()
+
+        # THEN
+        snapshot = load_snapshot(settings.PROTOCOL_METRICS_PATH)
+        assert snapshot["stages"]["parse"]["ACK_DATA"]["count"] == 2
+
+    def test_handler_errors_are_counted_and_isolated(self, gateway_factory, pty_port):
+        # GIVEN
+        master, path = pty_port
+        gateway = gateway_factory([("hw-01", path)], handler=RecordingHandler(fail_on="bad"))
+        bad_frame = f"{STX} ACK bad 7 OK 1 {ETX} 00\n".encode()
+
+        async def scenario():
+            task = asyncio.create_task(gateway.run())
+            await wait_for(lambda: path in gateway.transports and gateway.transports[path].is_open)
+            os.write(master, bad_frame + ORDER_FRAME)
+            await wait_for(lambda: gateway.frames_handled == 1)
+            gateway.stop()
+            await task
+
+        # WHEN
+        asyncio.run(scenario())
+
+        # THEN
+        assert gateway.handling_errors == 1
+        assert gateway.frames_handled == 1
+
+    def test_send_writes_serialized_frame_on_device_port(self, gateway_factory, pty_port):
+        # GIVEN
+        master, path = pty_port
+        gateway = gateway_factory([("hw-01", path)])
+        frame = Frame(frame_type=FrameType.PING, device_uid="hw-01", command_id=0, command_slug="", args_values=[])
+        expected = FrameParser.parse_from_frame_klass(frame).encode()
+
+        async def scenario():
+            task = asyncio.create_task(gateway.run())
+            await wait_for(lambda: path in gateway.transports)
+            gateway.send(frame)
+            data = await read_fd(master, len(expected))
+            gateway.stop()
+            await task
+            return data
+
+        # WHEN
+        data = asyncio.run(scenario())
+
+        # THEN
+        assert data == expected
+
+    def test_port_switches_to_the_encoding_accepted_in_the_ping_response(self, gateway_factory, pty_port, settings):
+        # GIVEN
+        settings.GATEWAY_FRAME_ENCODINGS = ["MSGPACK"]
+        master, path = pty_port
+        gateway = gateway_factory([("hw-01", path)])
+        ping_response = build_device_frame("ACK hw-01 0 OK GDFW=1.0.0 MPFW=1.0.0 ENC=MSGPACK")
+        frame = Frame(frame_type=FrameType.CMD, device_uid="hw-01", command_id=7, command_slug="", args_values=["1"])
+        expected = FrameParser.encode(frame, FrameEncoding.MSGPACK)
+
+        async def scenario():
+            task = asyncio.create_task(gateway.run())
+            await wait_for(lambda: path in gateway.transports and gateway.transports[path].is_open)
+            ping = asyncio.create_task(gateway._ping("hw-01"))
+            offer = await read_fd(master, len(f"{STX} PING hw-01 0 ENC=MSGPACK {ETX} 00\n"))
+            os.write(master, ping_response)
+            await ping
+            gateway.send(frame)
+            data = await read_fd(master, len(expected))
+            gateway.stop()
+            await task
+            return offer, data
+
+        # WHEN
+        offer, data = asyncio.run(scenario())
+
+        # THEN
+        assert b" ENC=MSGPACK " in offer
+        assert data == expected
+
+    def test_only_intact_frames_update_the_routing(self, gateway_factory):
+        # GIVEN
+        gateway = gateway_factory([])
+        gateway._frames = asyncio.Queue()
+        valid = FrameParser.decode(build_device_frame("ACK hw-01 7 OK 1"))
+        corrupted = FrameParser.decode(build_device_frame("ACK hw-02 7 OK 1").replace(b"hw-02", b"hw-01"))
+
+        # WHEN
+        gateway._on_frame("/dev/a", valid)
+        gateway._on_frame("/dev/b", corrupted)
+
+        # THEN
+        assert gateway.device_paths == {"hw-01": "/dev/a"}
+        assert gateway._frames.qsize() == 2
+
+    def test_corrupted_ping_response_keeps_the_encoding(self, gateway_factory, settings):
+        # GIVEN
+        settings.GATEWAY_FRAME_ENCODINGS = ["MSGPACK"]
+        gateway = gateway_factory([("hw-01", "/dev/a")])
+        gateway._frames = asyncio.Queue()
+        gateway.transports["/dev/a"] = transport = FakeEncodingTransport()
+        corrupted = build_device_frame("ACK hw-01 0 OK GDFW=1.0.0 MPFW=1.0.0 ENC=MSGPACK").replace(b"ENC=", b"ENX=")
+
+        # WHEN
+        gateway._on_frame("/dev/a", FrameParser.decode(corrupted))
+
+        # THEN
+        assert transport.encoding is FrameEncoding.MSGPACK
+
+    def test_send_to_unknown_device_raises(self):
+        # GIVEN
+        gateway = Gateway(handler=RecordingHandler())
+        frame = Frame(frame_type=FrameType.PING, device_uid="nope", command_id=0, command_slug="", args_values=[])
+
+        # WHEN / THEN
+        with pytest.raises(FrameProcessingError, match="No open port"):
+            gateway.send(frame)
+
+    def test_request_returns_the_ack_of_the_command(self, gateway_factory, pty_port):
+        # GIVEN
+        master, path = pty_port
+        gateway = gateway_factory([("hw-01", path)])
+        frame = Frame(frame_type=FrameType.CMD, device_uid="hw-01", command_id=7, command_slug="", args_values=["1"])
+        expected = FrameParser.parse_from_frame_klass(frame).encode()
+
+        async def scenario():
+            task = asyncio.create_task(gateway.run())
+            await wait_for(lambda: path in gateway.transports)
+            request = asyncio.create_task(gateway.request(frame))
+            sent = await read_fd(master, len(expected))
+            os.write(master, ORDER_FRAME)
+            response = await request
+            gateway.stop()
+            await task
+            return sent, response
+
+        # WHEN
+        sent, response = asyncio.run(scenario())
+
+        # THEN
+        assert sent == expected
+        assert response.command_id == 7
+        assert response.ok_data == "24.5C"
@@ -0,0 +1,249 @@
+import asyncio
+import random
+
+import pytest
+
+from gardeniq.hardware.gateway.heartbeat import HeartbeatScheduler
+from gardeniq.hardware.gateway.heartbeat import TimingWheel
+from gardeniq.hardware.protocols.errors import CommandError
+from gardeniq.hardware.protocols.errors import CommandTimeoutError
+from gardeniq.hardware.protocols.frame import CommandState
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameType
+
+
+def ping_ack(device_uid: str, error: CommandError | None = None) -> Frame:
+    return Frame(
+        frame_type=FrameType.ACK,
+        device_uid=device_uid,
+        command_id=0,
+        command_slug="",
+        args_values=[],
+        from_device=True,
+        command_state=CommandState.ERROR if error else CommandState.OK,
+        err_msg=error,
+        checksum="00",
+        source_frame_from_device="",
+    )
+
+
+class FakeFleet:
+    """Answers the pings according to `answers`: a CommandError, None for OK, or an exception."""
+
+    def __init__(self):
+        self.pinged = []
+        self.offline = []
+        self.answers = {}
+
+    async def send_ping(self, device_uid):
+        self.pinged.append(device_uid)
+        answer = self.answers.get(device_uid)
+        if isinstance(answer, Exception):
+            raise answer
+        return ping_ack(device_uid, answer)
+
+    async def mark_offline(self, device_uid):
+        self.offline.append(device_uid)
+
+
+@pytest.fixture
+def heartbeat_settings(settings):
+    settings.GATEWAY_HEARTBEAT_JITTER = 0.0
+    settings.GATEWAY_HEARTBEAT_BACKOFF = 2.0
+    return settings
+
+
+def build_scheduler(fleet, **kwargs):
+    kwargs.setdefault("interval", 10)
+    kwargs.setdefault("min_interval", 2)
+    kwargs.setdefault("max_interval", 30)
+    kwargs.setdefault("max_misses", 3)
+    kwargs.setdefault("tick", 1)
+    return HeartbeatScheduler(fleet.send_ping, fleet.mark_offline, **kwargs)
+
+
+async def ticks_until_ping(scheduler, fleet, limit=100):
+    """Step the wheel until the next ping is answered, return the number of ticks."""
+    pinged = len(fleet.pinged)
+    for ticks in range(1, limit + 1):
+        scheduler.step()
+        for _ in range(5):
+            await asyncio.sleep(0)
+        if len(fleet.pinged) > pinged:
+            return ticks
+    raise AssertionError("No ping")
+
+
+class TestTimingWheel:
+    def test_key_expires_after_its_ticks(self):
+        # GIVEN
+        wheel = TimingWheel(slots=8)
+        wheel.schedule("a", 3)
+
+        # WHEN
+        expired = [wheel.advance() for _ in range(3)]
+
+        # THEN
+        assert expired == [[], [], ["a"]]
+        assert "a" not in wheel
+
+    def test_reschedule_replaces_the_previous_schedule(self):
+        # GIVEN
+        wheel = TimingWheel(slots=8)
+        wheel.schedule("a", 1)
+
+        # WHEN
+        wheel.schedule("a", 2)
+
+        # THEN
+        assert wheel.advance() == []
+        assert wheel.advance() == ["a"]
+        assert len(wheel) == 0
+
+    def test_cancel_removes_the_key(self):
+        # GIVEN
+        wheel = TimingWheel(slots=8)
+        wheel.schedule("a", 1)
+
+        # WHEN
+        wheel.cancel("a")
+
+        # THEN
+        assert wheel.advance() == []
+
+    def test_delays_are_clamped_to_the_wheel_size(self):
+        # GIVEN
+        wheel = TimingWheel(slots=4)
+
+        # WHEN
+        wheel.schedule("late", 100)
+        wheel.schedule("now", 0)
+
+        # THEN
+        assert [wheel.advance() for _ in range(3)] == [["now"], [], ["late"]]
+
+    def test_advance_only_returns_due_keys_of_a_large_wheel(self):
+        # GIVEN
+        wheel = TimingWheel(slots=601)
+        for i in range(10_000):
+            wheel.schedule(i, 1 + i % 600)
+
+        # WHEN
+        expired = wheel.advance()
+
+        # THEN
+        assert len(expired) == 17
+        assert len(wheel) == 10_000 - 17
+
+    def test_wheel_needs_two_slots(self):
+        # WHEN / THEN
+        with pytest.raises(ValueError):
+            TimingWheel(slots=1)
+
+
+class TestHeartbeatScheduler:
+    def test_first_pings_are_spread_over_the_interval(self, heartbeat_settings):
+        # GIVEN
+        random.seed(42)
+        scheduler = build_scheduler(FakeFleet(), interval=60, max_interval=600)
+
+        # WHEN
+        for i in range(6000):
+            scheduler.add(f"DEV{i:04d}")
+        per_tick = [len(scheduler.wheel.advance()) for _ in range(60)]
+
+        # THEN
+        # 100 pings per tick on average, never a burst of the whole fleet.
+        assert max(per_tick) < 160
+        assert sum(per_tick) == 6000
+
+    def test_answered_ping_backs_off_up_to_the_max_interval(self, heartbeat_settings):
+        # GIVEN
+        fleet = FakeFleet()
+        scheduler = build_scheduler(fleet)
+        scheduler.add("DEV0001")
+
+        async def scenario():
+            await ticks_until_ping(scheduler, fleet)
+            second = await ticks_until_ping(scheduler, fleet)
+            third = await ticks_until_ping(scheduler, fleet)
+            fourth = await ticks_until_ping(scheduler, fleet)
+            return second, third, fourth
+
+        # WHEN
+        delays = asyncio.run(scenario())
+
+        # THEN
+        assert delays == (20, 30, 30)
+
+    def test_timeout_error_pings_sooner(self, heartbeat_settings):
+        # GIVEN
+        fleet = FakeFleet()
+        fleet.answers["DEV0001"] = CommandError.TIMEOUT
+        scheduler = build_scheduler(fleet)
+        scheduler.add("DEV0001")
+
+        async def scenario():
+            await ticks_until_ping(scheduler, fleet)
+            return await ticks_until_ping(scheduler, fleet)
+
+        # WHEN
+        delay = asyncio.run(scenario())
+
+        # THEN
+        assert delay == 2
+        assert fleet.offline == []
+
+    def test_device_is_marked_offline_after_max_misses(self, heartbeat_settings):
+        # GIVEN
+        fleet = FakeFleet()
+        fleet.answers["DEV0001"] = CommandTimeoutError("no ack")
+        scheduler = build_scheduler(fleet)
+        scheduler.add("DEV0001")
+
+        async def scenario():
+            offline_after = []
+            for _ in range(5):
+                await ticks_until_ping(scheduler, fleet)
+                offline_after.append(len(fleet.offline))
+            return offline_after
+
+        # WHEN
+        offline_after = asyncio.run(scenario())
+
+        # THEN
+        assert offline_after == [0, 0, 1, 1, 1]
+        assert scheduler.missed == 5
+
+    def test_answer_after_misses_resets_the_device(self, heartbeat_settings):
+        # GIVEN
+        fleet = FakeFleet()
+        fleet.answers["DEV0001"] = CommandTimeoutError("no ack")
+        scheduler = build_scheduler(fleet, max_misses=1)
+        scheduler.add("DEV0001")
+
+        async def scenario():
+            await ticks_until_ping(scheduler, fleet)
+            fleet.answers.clear()
+            await ticks_until_ping(scheduler, fleet)
+            fleet.answers["DEV0001"] = CommandTimeoutError("no ack")
+            await ticks_until_ping(scheduler, fleet)
+
+        # WHEN
+        asyncio.run(scenario())
+
+        # THEN
+        assert fleet.offline == ["DEV0001", "DEV0001"]
+
+    def test_removed_device_is_not_pinged(self, heartbeat_settings):
+        # GIVEN
+        fleet = FakeFleet()
+        scheduler = build_scheduler(fleet)
+        scheduler.add("DEV0001")
+
+        # WHEN
+        scheduler.remove("DEV0001")
+        due = [scheduler.wheel.advance() for _ in range(scheduler.wheel.max_ticks)]
+
+        # THEN
+        assert not any(due)
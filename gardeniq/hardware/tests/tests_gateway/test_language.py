@@ -0,0 +1,205 @@
+import pytest
+from asgiref.sync import async_to_sync
+
+from gardeniq.base.models import Status
+from gardeniq.hardware.gateway.language import LanguageSync
+from gardeniq.hardware.gateway.language import fields_digest
+from gardeniq.hardware.gateway.language import order_fields_values
+from gardeniq.hardware.models import Device
+from gardeniq.hardware.models import DeviceOrderSync
+from gardeniq.hardware.protocols.errors import CommandError
+from gardeniq.hardware.protocols.errors import CommandTimeoutError
+from gardeniq.hardware.protocols.frame import CommandState
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameType
+from gardeniq.hardware.protocols.settings import fields_for_frame
+from gardeniq.hardware.registry import device_registry
+from gardeniq.orderlg.models import Order
+
+
+def lg_init_ack(device_uid: str, error: CommandError | None = None) -> Frame:
+    return Frame(
+        frame_type=FrameType.ACK,
+        device_uid=device_uid,
+        command_id=-1,
+        command_slug="",
+        args_values=[],
+        from_device=True,
+        command_state=CommandState.ERROR if error else CommandState.OK,
+        err_msg=error,
+        checksum="00",
+        source_frame_from_device="",
+    )
+
+
+class FakeBoards:
+    """Acknowledges the LG_INIT frames, except the order pks in `rejected` and from `timeout_after` frames."""
+
+    def __init__(self):
+        self.sent = []
+        self.rejected = set()
+        self.timeout_after = None
+
+    async def request(self, frame):
+        if self.timeout_after is not None and len(self.sent) >= self.timeout_after:
+            raise CommandTimeoutError(f"No ACK from {frame.device_uid}")
+        self.sent.append((frame.device_uid, frame.fields_values))
+        error = CommandError.INVALID_PARAM if frame.fields_values[0] in self.rejected else None
+        return lg_init_ack(frame.device_uid, error)
+
+    def pks(self, device_uid):
+        return [values[0] for uid, values in self.sent if uid == device_uid]
+
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    device_registry.clear()
+    yield
+    device_registry.clear()
+
+
+@pytest.fixture
+def orders(db):
+    Order.objects.all().delete()
+    return [
+        Order.objects.create(seed_id=90 + i, name=f"Order {i}", slug=f"order-{i}", action_type="get", is_ready=False)
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def devices(db):
+    status = Status.objects.create(name="Hors ligne", tag="device-offline", color="#FF0000")
+    return [
+        Device.objects.create(name=f"Board {i}", uid=f"DEV{i:04d}", path=f"/dev/ttyUSB{i}", status=status)
+        for i in range(2)
+    ]
+
+
+def acked_pks(device):
+    return set(DeviceOrderSync.objects.filter(device=device).values_list("order_pk", flat=True))
+
+
+@pytest.mark.django_db
+class TestLanguageSync:
+    def test_fields_values_follow_the_declared_fields(self, orders):
+        # WHEN
+        values = order_fields_values(orders[0])
+
+        # THEN
+        assert values == (str(orders[0].pk), "order-0", "get")
+
+    def test_fields_values_reject_an_unknown_field(self, orders, monkeypatch):
+        # GIVEN
+        monkeypatch.setitem(fields_for_frame, "Order", ("pk", "slug", "arguments"))
+
+        # WHEN / THEN
+        with pytest.raises(AttributeError):
+            order_fields_values(orders[0])
+
+    def test_digest_only_changes_with_the_sent_fields(self, orders):
+        # GIVEN
+        order = orders[0]
+        digest = fields_digest(order_fields_values(order))
+
+        # WHEN
+        order.description = "Not sent to the device"
+        same = fields_digest(order_fields_values(order))
+        order.slug = "renamed"
+        changed = fields_digest(order_fields_values(order))
+
+        # THEN
+        assert same == digest
+        assert changed != digest
+        assert len(digest) == 32
+
+    def test_first_sync_sends_every_order_then_nothing(self, orders, devices):
+        # GIVEN
+        boards = FakeBoards()
+        sync = LanguageSync(boards.request)
+
+        # WHEN
+        first = async_to_sync(sync.sync)(devices[0].uid)
+        second = async_to_sync(sync.sync)(devices[0].uid)
+
+        # THEN
+        assert boards.pks(devices[0].uid) == [str(order.pk) for order in orders]
+        assert (first.sent, second.sent, second.unchanged) == (3, 0, 3)
+        assert acked_pks(devices[0]) == {order.pk for order in orders}
+
+    def test_syncs_of_a_device_share_one_lock(self, orders, devices):
+        # GIVEN
+        sync = LanguageSync(FakeBoards().request)
+        async_to_sync(sync.sync)(devices[0].uid)
+        lock = sync._locks[devices[0].uid]
+
+        # WHEN
+        async_to_sync(sync.sync)(devices[0].uid)
+
+        # THEN
+        assert sync._locks[devices[0].uid] is lock
+
+    def test_only_changed_and_removed_orders_are_sent(self, orders, devices):
+        # GIVEN
+        boards = FakeBoards()
+        sync = LanguageSync(boards.request)
+        async_to_sync(sync.sync)(devices[0].uid)
+        boards.sent.clear()
+        orders[1].slug = "order-1-v2"
+        orders[1].save()
+        Order.objects.filter(pk=orders[2].pk).update(is_enabled=False)
+
+        # WHEN
+        result = async_to_sync(sync.sync)(devices[0].uid)
+
+        # THEN
+        assert boards.sent == [
+            (devices[0].uid, (str(orders[1].pk), "order-1-v2", "get")),
+            (devices[0].uid, (str(orders[2].pk),)),
+        ]
+        assert (result.sent, result.removed, result.unchanged) == (1, 1, 1)
+        assert acked_pks(devices[0]) == {orders[0].pk, orders[1].pk}
+
+    def test_rejected_order_is_sent_again_next_time(self, orders, devices):
+        # GIVEN
+        boards = FakeBoards()
+        boards.rejected = {str(orders[1].pk)}
+        sync = LanguageSync(boards.request)
+
+        # WHEN
+        result = async_to_sync(sync.sync)(devices[0].uid)
+        boards.sent.clear()
+        boards.rejected.clear()
+        async_to_sync(sync.sync)(devices[0].uid)
+
+        # THEN
+        assert result.failed == 1
+        assert boards.pks(devices[0].uid) == [str(orders[1].pk)]
+
+    def test_timeout_keeps_the_acknowledged_orders(self, orders, devices):
+        # GIVEN
+        boards = FakeBoards()
+        boards.timeout_after = 2
+        sync = LanguageSync(boards.request)
+
+        # WHEN
+        with pytest.raises(CommandTimeoutError):
+            async_to_sync(sync.sync)(devices[0].uid)
+
+        # THEN
+        assert acked_pks(devices[0]) == {orders[0].pk, orders[1].pk}
+
+    def test_sync_all_skips_up_to_date_devices(self, orders, devices):
+        # GIVEN
+        boards = FakeBoards()
+        sync = LanguageSync(boards.request)
+        async_to_sync(sync.sync)(devices[0].uid)
+        boards.sent.clear()
+
+        # WHEN
+        results = async_to_sync(sync.sync_all)([device.uid for device in devices])
+
+        # THEN
+        assert list(results) == [devices[1].uid]
+        assert boards.pks(devices[0].uid) == []
+        assert len(boards.pks(devices[1].uid)) == 3
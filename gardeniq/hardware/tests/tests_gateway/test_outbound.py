@@ -0,0 +1,319 @@
+import asyncio
+from datetime import timedelta
+
+from django.utils import timezone
+
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.sync import sync_to_async
+
+from gardeniq.base.models import Status
+from gardeniq.hardware.gateway import CommandClass
+from gardeniq.hardware.gateway import Gateway
+from gardeniq.hardware.gateway import OutboundJournal
+from gardeniq.hardware.gateway.outbound import prune_finished_commands
+from gardeniq.hardware.models import Device
+from gardeniq.hardware.models import OutboundCommand
+from gardeniq.hardware.protocols.errors import CommandError
+from gardeniq.hardware.protocols.errors import CommandTimeoutError
+from gardeniq.hardware.protocols.errors import FrameProcessingError
+from gardeniq.hardware.protocols.frame import CommandState
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameType
+from gardeniq.hardware.registry import device_registry
+
+
+def command(command_id: int = 7, device_uid: str = "DEV0000", *args: str) -> Frame:
+    return Frame(FrameType.CMD, device_uid, command_id, "open_van", list(args))
+
+
+def ack(frame: Frame, error: CommandError | None = None) -> Frame:
+    return Frame(
+        frame_type=FrameType.ACK,
+        device_uid=frame.device_uid,
+        command_id=frame.command_id,
+        command_slug="",
+        args_values=[],
+        from_device=True,
+        command_state=CommandState.ERROR if error else CommandState.OK,
+        err_msg=error,
+        checksum="00",
+        source_frame_from_device="",
+    )
+
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    device_registry.clear()
+    yield
+    device_registry.clear()
+
+
+@pytest.fixture
+def devices(db):
+    status = Status.objects.create(name="Hors ligne", tag="device-offline", color="#FF0000")
+    return [
+        Device.objects.create(name=f"Board {i}", uid=f"DEV{i:04d}", path=f"/dev/ttyUSB{i}", status=status)
+        for i in range(2)
+    ]
+
+
+def states():
+    return list(OutboundCommand.objects.order_by("pk").values_list("order_pk", "state", "attempts", "error"))
+
+
+@pytest.mark.django_db
+class TestOutboundJournal:
+    def test_enqueue_commits_the_command(self, devices):
+        # GIVEN
+        journal = OutboundJournal()
+
+        # WHEN
+        pk = async_to_sync(journal.enqueue)(command(7, "DEV0000", "1", "30"), CommandClass.ACTUATOR)
+
+        # THEN
+        stored = OutboundCommand.objects.get(pk=pk)
+        assert (stored.device, stored.order_pk, stored.args) == (devices[0], 7, ["1", "30"])
+        assert (stored.state, stored.command_class) == (OutboundCommand.QUEUED, "ACTUATOR")
+
+    def test_transitions_are_collapsed_until_the_commit(self, devices):
+        # GIVEN
+        journal = OutboundJournal()
+
+        async def scenario():
+            first = await journal.enqueue(command(7))
+            second = await journal.enqueue(command(8))
+            journal.mark_sent(first)
+            journal.mark_acked(first)
+            journal.mark_sent(second)
+            journal.mark_sent(second)
+            journal.mark_failed(second, "TIMEOUT")
+            await journal.flush()
+
+        # WHEN
+        async_to_sync(scenario)()
+
+        # THEN
+        assert states() == [(7, OutboundCommand.ACKED, 1, ""), (8, OutboundCommand.FAILED, 2, "TIMEOUT")]
+        assert journal.commits == 3
+
+    def test_concurrent_writes_share_one_commit(self, devices):
+        # GIVEN
+        journal = OutboundJournal(commit_interval=0.05)
+
+        async def scenario():
+            runner = asyncio.create_task(journal.run())
+            await asyncio.sleep(0)
+            pks = await asyncio.gather(*(journal.enqueue(command(i + 1, devices[i % 2].uid)) for i in range(50)))
+            for pk in pks:
+                journal.mark_sent(pk)
+            await asyncio.sleep(0.1)
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+            return pks
+
+        # WHEN
+        pks = async_to_sync(scenario)()
+
+        # THEN
+        assert len(set(pks)) == 50
+        assert journal.commits == 2
+        assert OutboundCommand.objects.filter(state=OutboundCommand.SENT, attempts=1).count() == 50
+
+    def test_commit_size_does_not_wait_for_the_interval(self, devices):
+        # GIVEN
+        journal = OutboundJournal(commit_interval=60, commit_size=10)
+
+        async def scenario():
+            runner = asyncio.create_task(journal.run())
+            await asyncio.sleep(0)
+            await asyncio.wait_for(asyncio.gather(*(journal.enqueue(command(i + 1)) for i in range(10))), 5)
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+
+        # WHEN
+        async_to_sync(scenario)()
+
+        # THEN
+        assert journal.commits == 1
+
+    def test_unknown_device_does_not_fail_the_group(self, devices):
+        # GIVEN
+        journal = OutboundJournal(commit_interval=0.05)
+
+        async def scenario():
+            runner = asyncio.create_task(journal.run())
+            await asyncio.sleep(0)
+            results = await asyncio.gather(
+                journal.enqueue(command(7, "UNKNOWN")), journal.enqueue(command(8)), return_exceptions=True
+            )
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+            return results
+
+        # WHEN
+        unknown, known = async_to_sync(scenario)()
+
+        # THEN
+        assert isinstance(unknown, FrameProcessingError)
+        assert OutboundCommand.objects.filter(pk=known).exists()
+
+    def test_failed_commit_keeps_the_sends_of_a_replaced_transition(self, devices, mocker):
+        # GIVEN
+        journal = OutboundJournal()
+        pk = async_to_sync(journal.enqueue)(command(7))
+        commit = journal._commit
+
+        def fail_while_acked(inserts, transitions):
+            # The ACK arrives while the commit of the sends fails.
+            journal.mark_acked(pk)
+            raise RuntimeError("database is locked")
+
+        async def scenario():
+            journal.mark_sent(pk)
+            journal.mark_sent(pk)
+            mocker.patch.object(journal, "_commit", side_effect=fail_while_acked)
+            await journal.flush()
+            mocker.patch.object(journal, "_commit", side_effect=commit)
+            await journal.flush()
+
+        # WHEN
+        async_to_sync(scenario)()
+
+        # THEN
+        assert states() == [(7, OutboundCommand.ACKED, 2, "")]
+
+    def test_finished_commands_are_pruned(self, devices):
+        # GIVEN
+        journal = OutboundJournal()
+        pks = [async_to_sync(journal.enqueue)(command(order_pk)) for order_pk in (7, 8, 9)]
+        journal.mark_acked(pks[0])
+        journal.mark_failed(pks[1], "TIMEOUT")
+        async_to_sync(journal.flush)()
+
+        # WHEN
+        deleted = prune_finished_commands(timezone.now() + timedelta(seconds=1), chunk_size=1)
+
+        # THEN
+        assert deleted == 2
+        assert states() == [(9, OutboundCommand.QUEUED, 0, "")]
+        assert prune_finished_commands(timezone.now() - timedelta(days=1)) == 0
+
+    def test_only_orders_are_journaled(self, devices):
+        # GIVEN
+        journal = OutboundJournal()
+        ping = Frame(FrameType.PING, "DEV0000", 0, "", [])
+
+        # WHEN / THEN
+        with pytest.raises(ValueError):
+            async_to_sync(journal.enqueue)(ping)
+
+    def test_replay_returns_the_pending_commands_oldest_first(self, devices):
+        # GIVEN
+        journal = OutboundJournal()
+
+        async def scenario():
+            pks = [await journal.enqueue(command(i + 1), CommandClass.TELEMETRY if i else None) for i in range(4)]
+            journal.mark_sent(pks[1])
+            journal.mark_acked(pks[2])
+            journal.mark_failed(pks[3], "BUSY")
+            await journal.flush()
+            return await OutboundJournal().replay()
+
+        # WHEN
+        replayed = async_to_sync(scenario)()
+
+        # THEN
+        assert [(entry.frame.command_id, entry.state) for entry in replayed] == [
+            (1, OutboundCommand.QUEUED),
+            (2, OutboundCommand.SENT),
+        ]
+        assert [entry.command_class for entry in replayed] == [None, CommandClass.TELEMETRY]
+        assert replayed[0].frame == command(1)
+
+
+@pytest.mark.django_db
+class TestGatewayExecute:
+    @pytest.fixture
+    def gateway(self, devices):
+        gateway = Gateway()
+        gateway.answers = {}
+        gateway.requested = []
+
+        async def request(frame, command_class=None):
+            gateway.requested.append(frame.command_id)
+            answer = gateway.answers.get(frame.command_id)
+            if isinstance(answer, Exception):
+                raise answer
+            return ack(frame, answer)
+
+        gateway.request = request
+        return gateway
+
+    def test_answers_update_the_journal(self, gateway):
+        # GIVEN
+        gateway.answers = {8: CommandError.BUSY, 9: CommandTimeoutError("No ACK")}
+
+        async def scenario():
+            await gateway.execute(command(7))
+            await gateway.execute(command(8))
+            with pytest.raises(CommandTimeoutError):
+                await gateway.execute(command(9))
+            await gateway.outbound.flush()
+
+        # WHEN
+        async_to_sync(scenario)()
+
+        # THEN
+        assert states() == [
+            (7, OutboundCommand.ACKED, 1, ""),
+            (8, OutboundCommand.FAILED, 1, "BUSY"),
+            (9, OutboundCommand.FAILED, 1, "No ACK"),
+        ]
+
+    def test_pending_commands_are_replayed(self, gateway):
+        # GIVEN
+        journal = OutboundJournal()
+        async_to_sync(journal.enqueue)(command(7))
+        async_to_sync(journal.enqueue)(command(8))
+
+        async def scenario():
+            count = await gateway.replay_outbound()
+            await asyncio.gather(*gateway._replays)
+            await gateway.outbound.flush()
+            return count
+
+        # WHEN
+        count = async_to_sync(scenario)()
+
+        # THEN
+        assert count == 2
+        assert gateway.requested == [7, 8]
+        assert [state for _, state, _, _ in states()] == [OutboundCommand.ACKED, OutboundCommand.ACKED]
+
+    def test_finished_commands_are_pruned_by_the_gateway(self, gateway, devices, settings):
+        # GIVEN
+        settings.GATEWAY_OUTBOUND_RETENTION_DAYS = 7
+        old, recent, pending = (
+            OutboundCommand.objects.create(device=devices[0], order_pk=order_pk, state=state)
+            for order_pk, state in ((1, OutboundCommand.ACKED), (2, OutboundCommand.FAILED), (3, OutboundCommand.SENT))
+        )
+        OutboundCommand.objects.filter(pk__in=[old.pk, pending.pk]).update(
+            created_at=timezone.now() - timedelta(days=8)
+        )
+
+        async def scenario():
+            task = asyncio.create_task(gateway._prune_outbound())
+            count = sync_to_async(OutboundCommand.objects.count, thread_sensitive=True)
+            for _ in range(200):
+                if await count() == 2:
+                    break
+                await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        # WHEN
+        async_to_sync(scenario)()
+
+        # THEN
+        assert set(OutboundCommand.objects.values_list("pk", flat=True)) == {recent.pk, pending.pk}
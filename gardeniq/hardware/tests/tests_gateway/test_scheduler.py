@@ -0,0 +1,214 @@
+import asyncio
+
+import pytest
+
+from gardeniq.hardware.gateway.scheduler import CommandClass
+from gardeniq.hardware.gateway.scheduler import OutboundScheduler
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameType
+from gardeniq.orderlg.models import Order
+
+WATERING = 1
+TEMPERATURE = 2
+ACTION_TYPES = {WATERING: "set", TEMPERATURE: "get"}
+
+
+def command(command_id: int, device_uid: str = "hw-01", frame_type: FrameType = FrameType.CMD) -> Frame:
+    model = "Order" if command_id == -1 else None
+    return Frame(
+        frame_type=frame_type,
+        device_uid=device_uid,
+        command_id=command_id,
+        command_slug="",
+        args_values=[],
+        model=model,
+    )
+
+
+class GatedDevice:
+    """Dispatch target answering the commands only when released, in order."""
+
+    def __init__(self):
+        self.sent = []
+        self.gate = asyncio.Event()
+
+    async def dispatch(self, frame):
+        self.sent.append(frame)
+        await self.gate.wait()
+        return frame
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def build_scheduler(device, **kwargs) -> OutboundScheduler:
+    kwargs.setdefault("concurrency", 1)
+    kwargs.setdefault("queue_size", 100)
+    scheduler = OutboundScheduler(device.dispatch, **kwargs)
+    scheduler.action_types = dict(ACTION_TYPES)
+    return scheduler
+
+
+class TestOutboundScheduler:
+    @pytest.mark.parametrize(
+        "frame, expected",
+        [
+            (command(WATERING), CommandClass.ACTUATOR),
+            (command(TEMPERATURE), CommandClass.TELEMETRY),
+            (command(0, frame_type=FrameType.PING), CommandClass.HOUSEKEEPING),
+            (command(-1, frame_type=FrameType.LG_INIT), CommandClass.HOUSEKEEPING),
+            (command(99), CommandClass.ACTUATOR),
+        ],
+    )
+    def test_classify_uses_the_action_type_of_the_order(self, frame, expected):
+        # GIVEN
+        scheduler = build_scheduler(GatedDevice())
+
+        # WHEN
+        command_class = scheduler.classify(frame)
+
+        # THEN
+        assert command_class is expected
+
+    @pytest.mark.django_db
+    def test_load_action_types_reads_the_orders(self):
+        # GIVEN
+        Order.objects.all().delete()
+        order = Order.objects.create(
+            seed_id=99, name="Get temperature", slug="get-temperature", action_type="get", is_ready=False
+        )
+
+        # WHEN
+        action_types = OutboundScheduler.load_action_types()
+
+        # THEN
+        assert action_types == {order.pk: "get"}
+
+    def test_watering_is_not_delayed_by_a_backlog_of_polls(self):
+        # GIVEN
+        device = GatedDevice()
+        scheduler = build_scheduler(device)
+
+        async def scenario():
+            polls = [asyncio.create_task(scheduler.submit(command(TEMPERATURE))) for _ in range(50)]
+            await settle()
+            watering = asyncio.create_task(scheduler.submit(command(WATERING)))
+            await settle()
+            device.gate.set()
+            await asyncio.gather(watering, *polls)
+            await scheduler.close()
+
+        # WHEN
+        asyncio.run(scenario())
+
+        # THEN
+        order = [frame.command_id for frame in device.sent]
+        # The first poll was already in flight when the watering command arrived.
+        assert order[:2] == [TEMPERATURE, WATERING]
+        assert len(order) == 51
+
+    def test_classes_share_a_busy_device_by_weight(self):
+        # GIVEN
+        device = GatedDevice()
+        scheduler = build_scheduler(device, weights={"ACTUATOR": 2, "TELEMETRY": 1, "HOUSEKEEPING": 1})
+
+        async def scenario():
+            blocker = asyncio.create_task(scheduler.submit(command(0, frame_type=FrameType.PING)))
+            await settle()
+            tasks = [asyncio.create_task(scheduler.submit(command(TEMPERATURE))) for _ in range(6)]
+            tasks += [asyncio.create_task(scheduler.submit(command(WATERING))) for _ in range(6)]
+            await settle()
+            device.gate.set()
+            await asyncio.gather(blocker, *tasks)
+            await scheduler.close()
+
+        # WHEN
+        asyncio.run(scenario())
+
+        # THEN
+        first_nine = [frame.command_id for frame in device.sent[1:10]]
+        assert first_nine.count(WATERING) == 6
+        assert first_nine.count(TEMPERATURE) == 3
+
+    def test_full_queue_pushes_back_on_callers(self):
+        # GIVEN
+        device = GatedDevice()
+        scheduler = build_scheduler(device, queue_size=2)
+
+        async def scenario():
+            tasks = [asyncio.create_task(scheduler.submit(command(TEMPERATURE))) for _ in range(5)]
+            await settle()
+            depth = scheduler.depth("hw-01")[CommandClass.TELEMETRY]
+            device.gate.set()
+            await asyncio.gather(*tasks)
+            await scheduler.close()
+            return depth
+
+        # WHEN
+        depth = asyncio.run(scenario())
+
+        # THEN
+        # The five callers arrive before the first dispatch: three of them wait for room,
+        # then one command is in flight, two are queued and two callers still wait.
+        assert depth == 2
+        assert scheduler.blocked == 3
+        assert len(device.sent) == 5
+
+    def test_devices_are_scheduled_independently(self):
+        # GIVEN
+        device = GatedDevice()
+        scheduler = build_scheduler(device)
+
+        async def scenario():
+            tasks = [asyncio.create_task(scheduler.submit(command(TEMPERATURE, uid))) for uid in ("hw-01", "hw-02")]
+            await settle()
+            sent = [frame.device_uid for frame in device.sent]
+            device.gate.set()
+            await asyncio.gather(*tasks)
+            await scheduler.close()
+            return sent
+
+        # WHEN
+        sent = asyncio.run(scenario())
+
+        # THEN
+        assert sent == ["hw-01", "hw-02"]
+
+    def test_dispatch_errors_reach_the_caller(self):
+        # GIVEN
+        async def failing_dispatch(frame):
+            raise ValueError("boom")
+
+        scheduler = OutboundScheduler(failing_dispatch, concurrency=1)
+
+        async def scenario():
+            try:
+                await scheduler.submit(command(WATERING))
+            finally:
+                await scheduler.close()
+
+        # WHEN / THEN
+        with pytest.raises(ValueError, match="boom"):
+            asyncio.run(scenario())
+
+    def test_stats_report_queue_depths_per_class(self):
+        # GIVEN
+        device = GatedDevice()
+        scheduler = build_scheduler(device)
+
+        async def scenario():
+            tasks = [asyncio.create_task(scheduler.submit(command(TEMPERATURE))) for _ in range(3)]
+            await settle()
+            stats = scheduler.stats()
+            await scheduler.close()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            return stats
+
+        # WHEN
+        stats = asyncio.run(scenario())
+
+        # THEN
+        assert stats["TELEMETRY"] == {"depth": 2, "max_depth": 3, "enqueued": 3, "dispatched": 1}
+        assert stats["ACTUATOR"]["enqueued"] == 0
@@ -0,0 +1,300 @@
+import asyncio
+import os
+import queue
+
+import pytest
+
+from gardeniq.base.models import Status
+from gardeniq.hardware.gateway import OutboundScheduler
+from gardeniq.hardware.gateway.shard import DatabaseWriter
+from gardeniq.hardware.gateway.shard import ForwardingHandler
+from gardeniq.hardware.gateway.shard import ShardGateway
+from gardeniq.hardware.models import Device
+from gardeniq.hardware.protocols.frame import CommandState
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameType
+from gardeniq.hardware.registry import device_registry
+from gardeniq.hardware.simulator import build_device_frame
+from gardeniq.hardware.supervisor import ASSIGN
+from gardeniq.hardware.supervisor import FRAMES
+from gardeniq.hardware.supervisor import OFFLINE
+from gardeniq.hardware.supervisor import REQUEST
+from gardeniq.hardware.supervisor import STOP
+from gardeniq.hardware.utils.tests import SerialPortTestMixin
+from gardeniq.hardware.utils.tests import read_fd
+from gardeniq.hardware.utils.tests import wait_for
+
+
+def ping_response(device_uid: str, checksum_ok: bool = True) -> Frame:
+    return Frame(
+        frame_type=FrameType.ACK,
+        device_uid=device_uid,
+        command_id=0,
+        command_slug="",
+        args_values=[],
+        from_device=True,
+        command_state=CommandState.OK,
+        gd_fw_version="1.0.0",
+        mp_fw_version="1.0.0",
+        checksum="2A",
+        source_frame_from_device="< ACK >",
+        computed_checksum=0x2A if checksum_ok else 0,
+        fw_versions_matched=True,
+    )
+
+
+class FakeTransport:
+    def __init__(self, path, on_frame, baudrate=None):
+        self.path = path
+        self.is_open = True
+        self._stopped = asyncio.Event()
+
+    async def run(self):
+        await self._stopped.wait()
+
+    def stop(self):
+        self._stopped.set()
+
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    device_registry.clear()
+    yield
+    device_registry.clear()
+
+
+@pytest.fixture
+def shard_settings(monkeypatch, settings):
+    settings.GATEWAY_HEARTBEAT_ENABLED = False
+    settings.GATEWAY_LANGUAGE_SYNC_ENABLED = False
+    settings.GATEWAY_OUTBOUND_REPLAY_ENABLED = False
+    settings.GATEWAY_OUTBOUND_SQLITE_WAL = False
+    settings.GATEWAY_OUTBOUND_RETENTION_DAYS = None
+    monkeypatch.setattr(OutboundScheduler, "load_action_types", staticmethod(lambda: {}))
+    monkeypatch.setattr(device_registry, "warm", lambda: None)
+    return settings
+
+
+class TestForwardingHandler:
+    def test_valid_frames_are_forwarded_in_one_message(self):
+        # GIVEN
+        writer_queue = queue.Queue()
+        handler = ForwardingHandler(writer_queue)
+        frames = [ping_response("DEV0000"), ping_response("DEV0001")]
+
+        # WHEN
+        errors = handler.handle_batch(frames)
+
+        # THEN
+        assert errors == []
+        assert writer_queue.get_nowait() == (FRAMES, frames)
+        assert writer_queue.empty()
+        assert handler.frames_forwarded == 2
+
+    def test_corrupted_frames_are_rejected_by_the_shard(self):
+        # GIVEN
+        writer_queue = queue.Queue()
+        handler = ForwardingHandler(writer_queue)
+        corrupted = ping_response("DEV0000", checksum_ok=False)
+
+        # WHEN
+        errors = handler.handle_batch([corrupted, ping_response("DEV0001")])
+
+        # THEN
+        assert [(frame, type(error)) for frame, error in errors] == [(corrupted, ValueError)]
+        assert [frame.device_uid for frame in writer_queue.get_nowait()[1]] == ["DEV0001"]
+
+    def test_response_listeners_are_notified(self):
+        # GIVEN
+        handler = ForwardingHandler(queue.Queue())
+        notified = []
+        handler.add_response_listener(notified.append)
+        frame = ping_response("DEV0000")
+
+        # WHEN
+        handler.handle_batch([frame])
+
+        # THEN
+        assert notified == [frame]
+
+    def test_frames_are_dropped_when_the_writer_queue_stays_full(self):
+        # GIVEN
+        writer_queue = queue.Queue(maxsize=1)
+        writer_queue.put((STOP,))
+        handler = ForwardingHandler(writer_queue, timeout=0.01)
+
+        # WHEN
+        errors = handler.handle_batch([ping_response("DEV0000")])
+
+        # THEN
+        assert errors == []
+        assert handler.frames_dropped == 1
+        assert handler.frames_forwarded == 0
+
+
+class TestShardGateway(SerialPortTestMixin):
+    def test_database_tasks_stay_off_whatever_the_settings(self, settings):
+        # GIVEN
+        settings.GATEWAY_LANGUAGE_SYNC_ENABLED = True
+        settings.GATEWAY_OUTBOUND_REPLAY_ENABLED = True
+        settings.GATEWAY_OUTBOUND_SQLITE_WAL = True
+
+        # WHEN
+        gateway = ShardGateway(0, [], queue.Queue())
+
+        # THEN
+        assert (gateway.language_sync, gateway.outbound_replay, gateway.sqlite_wal) == (False, False, False)
+
+    def test_assign_opens_the_new_ports_and_closes_the_removed_ones(self, shard_settings):
+        # GIVEN
+        shard_settings.GATEWAY_HEARTBEAT_ENABLED = True
+        gateway = ShardGateway(0, [("DEV0000", "/dev/a")], queue.Queue(), transport_klass=FakeTransport)
+
+        async def scenario():
+            gateway.assign([("DEV0000", "/dev/a"), ("DEV0001", "/dev/b")])
+            gateway.assign([("DEV0001", "/dev/b"), ("DEV0002", "/dev/c")])
+            ports = set(gateway.transports)
+            for path in list(gateway.transports):
+                gateway.remove_port(path)
+            await asyncio.gather(*gateway._tasks.values())
+            return ports
+
+        # WHEN
+        ports = asyncio.run(scenario())
+
+        # THEN
+        assert ports == {"/dev/b", "/dev/c"}
+        assert gateway.load_devices() == [("DEV0001", "/dev/b"), ("DEV0002", "/dev/c")]
+        assert gateway.device_paths["DEV0002"] == "/dev/c"
+        assert set(gateway.heartbeat._devices) == {"DEV0001", "DEV0002"}
+
+    def test_devices_marked_offline_are_sent_to_the_writer(self):
+        # GIVEN
+        writer_queue = queue.Queue()
+        gateway = ShardGateway(0, [], writer_queue)
+
+        # WHEN
+        asyncio.run(gateway._mark_offline("DEV0000"))
+
+        # THEN
+        assert writer_queue.get_nowait() == (OFFLINE, "DEV0000")
+
+    def test_requests_of_the_supervisor_reach_the_device(self, shard_settings, pty_port):
+        # GIVEN
+        master, path = pty_port
+        commands = queue.Queue()
+        writer_queue = queue.Queue()
+        gateway = ShardGateway(0, [("hw-01", path)], writer_queue)
+        ping = Frame(FrameType.PING, "hw-01", 0, "", [])
+        answer = build_device_frame(ping_response("hw-01"))
+
+        async def scenario():
+            task = asyncio.create_task(gateway.run_until_stopped(commands))
+            await wait_for(lambda: path in gateway.transports and gateway.transports[path].is_open)
+            commands.put((REQUEST, ping, None))
+            sent = await read_fd(master, 1024, timeout=1.0)
+            os.write(master, answer)
+            await wait_for(lambda: gateway.correlator.completed == 1)
+            commands.put((STOP,))
+            await asyncio.wait_for(task, 5)
+            return sent
+
+        # WHEN
+        sent = asyncio.run(scenario())
+
+        # THEN
+        assert sent.startswith(b"< PING hw-01 0")
+        kind, frames = writer_queue.get_nowait()
+        assert kind == FRAMES
+        assert [(frame.device_uid, frame.command_id) for frame in frames] == [("hw-01", 0)]
+        health = gateway.health()
+        assert health["frames_forwarded"] == 1
+        assert health["commands_completed"] == 1
+        assert not gateway.transports
+
+    def test_assign_message_changes_the_ports(self, shard_settings):
+        # GIVEN
+        commands = queue.Queue()
+        gateway = ShardGateway(0, [("DEV0000", "/dev/a")], queue.Queue(), transport_klass=FakeTransport)
+
+        async def scenario():
+            task = asyncio.create_task(gateway.run_until_stopped(commands))
+            await wait_for(lambda: "/dev/a" in gateway.transports)
+            commands.put((ASSIGN, [("DEV0001", "/dev/b")]))
+            await wait_for(lambda: "/dev/a" not in gateway.transports)
+            ports = set(gateway.transports)
+            commands.put((STOP,))
+            await asyncio.wait_for(task, 5)
+            return ports
+
+        # WHEN
+        ports = asyncio.run(scenario())
+
+        # THEN
+        assert ports == {"/dev/b"}
+
+
+@pytest.fixture
+def devices(db):
+    offline = Status.objects.create(name="Hors ligne", tag="device-offline", color="#FF0000")
+    Status.objects.create(name="En ligne", tag="device-online", color="#00FF00")
+    return [
+        Device.objects.create(name=f"Board {i}", uid=f"DEV{i:04d}", path=f"/dev/ttyUSB{i}", status=offline)
+        for i in range(2)
+    ]
+
+
+@pytest.mark.django_db
+class TestDatabaseWriter:
+    def test_frames_of_every_shard_are_handled(self, devices):
+        # GIVEN
+        writer = DatabaseWriter()
+        messages = [(FRAMES, [ping_response("DEV0000")]), (FRAMES, [ping_response("DEV0001")])]
+
+        # WHEN
+        stopped = writer.apply(messages)
+
+        # THEN
+        assert stopped is False
+        assert writer.frames_handled == 2
+        assert set(Device.objects.values_list("status__name", flat=True)) == {"En ligne"}
+
+    def test_offline_marks_are_applied_in_order(self, devices):
+        # GIVEN
+        writer = DatabaseWriter()
+
+        # WHEN
+        writer.apply([(FRAMES, [ping_response("DEV0000")]), (OFFLINE, "DEV0000"), (OFFLINE, "UNKNOWN")])
+
+        # THEN
+        assert Device.objects.get(uid="DEV0000").status.name == "Hors ligne"
+        assert writer.offline_marks == 1
+
+    def test_rejected_frames_are_counted(self, devices):
+        # GIVEN
+        writer = DatabaseWriter()
+
+        # WHEN
+        writer.apply([(FRAMES, [ping_response("UNKNOWN"), ping_response("DEV0000")])])
+
+        # THEN
+        assert writer.handling_errors == 1
+        assert writer.frames_handled == 1
+
+    def test_run_stops_on_stop_after_the_pending_messages(self, devices, settings):
+        # GIVEN
+        settings.GATEWAY_OUTBOUND_SQLITE_WAL = False
+        messages = queue.Queue()
+        health = queue.Queue()
+        messages.put((FRAMES, [ping_response("DEV0000")]))
+        messages.put((STOP,))
+        messages.put((FRAMES, [ping_response("DEV0001")]))
+        writer = DatabaseWriter()
+
+        # WHEN
+        writer.run(messages, health, health_interval=0.1)
+
+        # THEN
+        assert writer.frames_handled == 1
+        assert health.get_nowait()[1]["frames_handled"] == 1
+        assert Device.objects.get(uid="DEV0001").status.name == "Hors ligne"
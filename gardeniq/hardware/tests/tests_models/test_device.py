@@ -126,7 +126,19 @@ class TestDeviceModel:
         assert device.mp_firmware_version == new_versions[1]
         assert device.need_upgrade is True
         check_mock.assert_called_once_with()
-        save_mock.assert_called_once_with()
+        save_mock.assert_called_once_with(update_fields=["gd_firmware_version", "mp_firmware_version", "need_upgrade"])
+
+    def test_set_firmware_versions_keeps_the_fields_edited_meanwhile(self, device):
+        # GIVEN
+        stale = Device.objects.get(pk=device.pk)
+        Device.objects.filter(pk=device.pk).update(name="Renamed in the admin")
+
+        # WHEN
+        stale.set_firmware_versions("2.0.0", "3.0.0")
+
+        # THEN
+        device.refresh_from_db()
+        assert (device.name, device.gd_firmware_version) == ("Renamed in the admin", "2.0.0")
 
     def test_set_firmware_versions_skips_save_when_not_changed(self, device, mocker):
         # GIVEN
@@ -139,3 +151,21 @@ class TestDeviceModel:
         # THEN
         save_mock.assert_not_called()
         check_mock.assert_not_called()
+
+    def test_set_firmware_versions_without_commit_does_not_save(self, device, mocker):
+        # GIVEN
+        save_mock = mocker.patch.object(device, "save")
+        mocker.patch.object(device, "_check_update", return_value=False)
+
+        # WHEN
+        has_changed = device.set_firmware_versions("2.0.0", "3.0.0", commit=False)
+
+        # THEN
+        assert has_changed is True
+        assert device.gd_firmware_version == "2.0.0"
+        save_mock.assert_not_called()
+
+    def test_set_firmware_versions_rejects_invalid_versions(self, device):
+        # WHEN / THEN
+        with pytest.raises(ValueError, match="firmware_versions"):
+            device.set_firmware_versions("x", "1.0.0")
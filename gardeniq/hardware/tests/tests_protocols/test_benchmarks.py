@@ -0,0 +1,164 @@
+import pytest
+
+from gardeniq.base.models import Status
+from gardeniq.hardware.models import Device
+from gardeniq.hardware.protocols import benchmarks
+from gardeniq.hardware.protocols.usb import FrameParser
+from gardeniq.hardware.registry import device_registry
+
+
+class TestProtocolBenchmarks:
+    def test_sample_device_frames_are_parsable(self):
+        # GIVEN
+        frames = benchmarks.sample_device_frames(10, devices=3)
+
+        # WHEN
+        parsed = [FrameParser.parse_from_device_bytes(raw) for raw in frames]
+
+        # THEN
+        assert len(parsed) == 10
+        assert {frame.device_uid for frame in parsed} == {"DEV0000", "DEV0001", "DEV0002"}
+
+    def test_measure_throughput_reports_best_run(self):
+        # GIVEN
+        calls = []
+
+        # WHEN
+        result = benchmarks.measure_throughput(calls.append, [1, 2, 3], repeat=2)
+
+        # THEN
+        assert len(calls) == 6
+        assert result["items"] == 3
+        assert result["per_second"] > 0
+
+    def test_bench_parse_paths_compares_str_and_bytes_paths(self):
+        # GIVEN / WHEN
+        result = benchmarks.bench_parse_paths(count=50, repeat=1)
+
+        # THEN
+        assert result["str"]["items"] == result["bytes"]["items"] == 50
+        assert result["speedup"] > 0
+
+    def test_bench_checksum_reports_every_implementation(self):
+        # GIVEN / WHEN
+        result = benchmarks.bench_checksum(count=50, repeat=1)
+
+        # THEN
+        assert set(result) == {"per_byte", "fletcher8", "checksum_many"}
+        assert all(entry["items"] == 50 for entry in result.values())
+
+    def test_bench_frame_representation_slotted_frame_is_smaller(self):
+        # GIVEN / WHEN
+        result = benchmarks.bench_frame_representation(count=1000)
+
+        # THEN
+        assert result["slotted"]["items"] == result["dict"]["items"] == 1000
+        assert result["slotted"]["bytes_per_frame"] < result["dict"]["bytes_per_frame"]
+        assert result["memory_ratio"] < 1
+
+    def test_bench_enum_lookup_reports_every_lookup(self):
+        # GIVEN / WHEN
+        result = benchmarks.bench_enum_lookup(count=300, repeat=1)
+
+        # THEN
+        assert set(result) == {"linear", "indexed", "strict"}
+        assert all(entry["items"] == 300 for entry in result.values())
+
+    def test_sample_host_frames_are_serializable(self):
+        # GIVEN
+        frames = benchmarks.sample_host_frames(10, devices=2)
+
+        # WHEN
+        built = [FrameParser.parse_from_frame_klass(frame) for frame in frames]
+
+        # THEN
+        assert len(built) == 10
+        assert {frame.device_uid for frame in frames} == {"DEV0000", "DEV0001"}
+
+    def test_measure_allocations_counts_the_kept_results(self):
+        # GIVEN
+        items = list(range(100))
+
+        # WHEN
+        result = benchmarks.measure_allocations(lambda item: bytearray(1000), items)
+
+        # THEN
+        assert result["bytes_per_item"] >= 1000
+        assert result["allocations_per_item"] >= 1
+
+    def test_run_suite_without_database(self):
+        # GIVEN / WHEN
+        report = benchmarks.run_suite(count=50, repeat=1)
+
+        # THEN
+        assert set(report["results"]) == {
+            "parse_from_device",
+            "parse_from_device_bytes",
+            "parse_from_frame_klass",
+            "build_checksum",
+            "verify_checksum",
+        }
+        assert all(result["items"] == 50 and "bytes_per_item" in result for result in report["results"].values())
+        assert report["meta"]["count"] == 50
+
+    @pytest.mark.django_db
+    def test_bench_handle_device_response_against_the_database(self, settings):
+        # GIVEN
+        for status in settings.DEFAULT_STATUS:
+            Status.objects.create(name=status.value, tag="device", color="#FF0000")
+        device_registry.clear()
+        benchmarks.create_sample_devices(4)
+
+        # WHEN
+        result = benchmarks.bench_handle_device_response(count=20, repeat=1, devices=4)
+
+        # THEN
+        assert result["handle_device_response"]["items"] == 20
+        assert Device.objects.filter(uid="DEV0003", gd_firmware_version="1.2.3").exists()
+        device_registry.clear()
+
+    def test_save_and_load_report(self, tmp_path):
+        # GIVEN
+        report = benchmarks.run_suite(count=10, repeat=1)
+        path = tmp_path / "baseline.json"
+
+        # WHEN
+        benchmarks.save_report(report, path)
+
+        # THEN
+        assert benchmarks.load_report(path) == report
+
+
+class TestCompareReports:
+    @staticmethod
+    def report(per_second: float, bytes_per_item: float) -> dict:
+        return {"meta": {}, "results": {"parse": {"per_second": per_second, "bytes_per_item": bytes_per_item}}}
+
+    @pytest.mark.parametrize(
+        "per_second, bytes_per_item, expected",
+        [
+            (95.0, 105.0, []),
+            (80.0, 100.0, [("parse", "per_second")]),
+            (100.0, 130.0, [("parse", "bytes_per_item")]),
+            (200.0, 50.0, []),
+        ],
+    )
+    def test_regressions_beyond_the_tolerance(self, per_second, bytes_per_item, expected):
+        # GIVEN
+        baseline = self.report(100.0, 100.0)
+
+        # WHEN
+        regressions = benchmarks.compare_reports(baseline, self.report(per_second, bytes_per_item), tolerance=0.1)
+
+        # THEN
+        assert [(regression["benchmark"], regression["metric"]) for regression in regressions] == expected
+
+    def test_benchmarks_missing_from_the_baseline_are_ignored(self):
+        # GIVEN
+        baseline = {"meta": {}, "results": {}}
+
+        # WHEN
+        regressions = benchmarks.compare_reports(baseline, self.report(1.0, 1.0))
+
+        # THEN
+        assert regressions == []
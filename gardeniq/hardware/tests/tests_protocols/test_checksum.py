@@ -0,0 +1,167 @@
+import random
+
+import pytest
+
+from gardeniq.hardware.protocols import checksum as checksum_module
+from gardeniq.hardware.protocols.checksum import checksum_many
+from gardeniq.hardware.protocols.checksum import checksummed_span
+from gardeniq.hardware.protocols.checksum import fletcher8
+from gardeniq.hardware.protocols.checksum import verify_many
+from gardeniq.hardware.protocols.frame import CommandState
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameType
+from gardeniq.hardware.protocols.usb import FrameParser
+
+
+def reference_fletcher8(data: bytes) -> int:
+    """Original per-byte implementation, as run by the firmware."""
+    sum1 = 0
+    sum2 = 0
+    for b in data:
+        sum1 = (sum1 + b) % 255
+        sum2 = (sum2 + sum2) % 255
+    return ((sum2 << 4) ^ sum1) & 0xFF
+
+
+GOLDEN_VALUES = [
+    (b"", 0x00),
+    (b"hello", 0x16),
+    (b"< PING DEV-001 0 >", 0xF8),
+    (b"< ACK hw-01 0 OK GDFW=1.2.3 MPFW=4.5.6 > 1F", 0xC9),
+    (bytes(range(256)), 0x00),
+    (b"\xff" * 1000, 0x00),
+]
+
+
+def random_buffers(count: int) -> list[bytes]:
+    rng = random.Random(42)
+    return [bytes(rng.randrange(256) for _ in range(rng.randrange(1, 80))) for _ in range(count)]
+
+
+@pytest.fixture
+def device_frame():
+    def _factory(body: str, checksum: str | None = None, **overrides) -> Frame:
+        checksum = checksum if checksum is not None else f"{reference_fletcher8(body.encode()):02X}"
+        data = {
+            "frame_type": FrameType.ACK,
+            "device_uid": "DEV-001",
+            "command_id": 7,
+            "command_slug": "",
+            "args_values": [],
+            "from_device": True,
+            "command_state": CommandState.OK,
+            "checksum": checksum,
+            "source_frame_from_device": f"{body} {checksum}",
+        }
+        data.update(overrides)
+        return Frame(**data)
+
+    return _factory
+
+
+class TestFletcher8:
+    @pytest.mark.parametrize(("data", "expected"), GOLDEN_VALUES)
+    def test_fletcher8_golden_values(self, data, expected):
+        # GIVEN / WHEN / THEN
+        assert fletcher8(data) == expected
+        assert reference_fletcher8(data) == expected
+
+    def test_fletcher8_matches_reference_on_random_data(self):
+        # GIVEN
+        buffers = random_buffers(200)
+
+        # WHEN / THEN
+        assert [fletcher8(buffer) for buffer in buffers] == [reference_fletcher8(buffer) for buffer in buffers]
+
+    def test_fletcher8_accepts_bytearray_and_memoryview(self):
+        # GIVEN
+        data = b"< PING DEV-001 0 >"
+
+        # WHEN / THEN
+        assert fletcher8(bytearray(data)) == fletcher8(memoryview(data)) == 0xF8
+
+    def test_frame_build_checksum_uses_engine(self):
+        # GIVEN / WHEN / THEN
+        assert Frame.build_checksum(b"hello") == 0x16
+
+
+class TestChecksumMany:
+    def test_checksum_many_matches_reference(self):
+        # GIVEN
+        buffers = random_buffers(checksum_module.NUMPY_MIN_BATCH * 2)
+
+        # WHEN / THEN
+        assert checksum_many(buffers) == [reference_fletcher8(buffer) for buffer in buffers]
+
+    def test_checksum_many_pure_python_fallback(self, monkeypatch):
+        # GIVEN
+        monkeypatch.setattr(checksum_module, "np", None)
+        buffers = random_buffers(checksum_module.NUMPY_MIN_BATCH * 2)
+
+        # WHEN / THEN
+        assert checksum_many(buffers) == [reference_fletcher8(buffer) for buffer in buffers]
+
+    def test_checksum_many_with_empty_buffer(self):
+        # GIVEN
+        buffers = random_buffers(checksum_module.NUMPY_MIN_BATCH) + [b""]
+
+        # WHEN / THEN
+        assert checksum_many(buffers)[-1] == 0
+
+    def test_checksum_many_empty_batch(self):
+        # GIVEN / WHEN / THEN
+        assert checksum_many([]) == []
+
+
+class TestChecksummedSpan:
+    @pytest.mark.parametrize("source", ["< ACK DEV-1 7 OK > FA", b"< ACK DEV-1 7 OK > FA"])
+    def test_span_stops_at_etx(self, source):
+        # GIVEN / WHEN / THEN
+        assert checksummed_span(source, "FA") == b"< ACK DEV-1 7 OK >"
+        assert bytes(checksummed_span(memoryview(b"< ACK DEV-1 7 OK > FA"), b"FA")) == b"< ACK DEV-1 7 OK >"
+
+    def test_parsed_and_built_frames_are_verified_over_the_same_span(self, device_frame):
+        # GIVEN
+        built = device_frame("< ACK DEV-1 7 OK 21.5 >")
+        recv = f"{built.source_frame_from_device}\n"
+
+        # WHEN
+        parsed = [FrameParser.parse_from_device(recv), FrameParser.parse_from_device_bytes(recv.encode())]
+
+        # THEN
+        assert [frame.computed_checksum for frame in parsed] == [int(built.checksum, 16)] * 2
+        assert built.verify_checksum() is True
+        assert verify_many([built, *parsed]) == [True, True, True]
+
+
+class TestVerifyMany:
+    def test_verify_many_matches_verify_checksum(self, device_frame):
+        # GIVEN
+        frames = [device_frame(f"< ACK DEV-{i} 7 OK {i} >") for i in range(100)]
+        frames += [device_frame("< ACK DEV-X 7 OK 1 >", checksum="00")]
+
+        # WHEN
+        results = verify_many(frames)
+
+        # THEN
+        assert results == [frame.verify_checksum() for frame in frames]
+        assert results[:-1] == [True] * 100
+        assert results[-1] is False
+
+    def test_verify_many_uses_computed_checksum(self):
+        # GIVEN
+        frame = FrameParser.parse_from_device_bytes(b"< ACK DEV-1 7 OK 1 > 00\n")
+        frame.checksum = f"{frame.computed_checksum:02X}"
+
+        # WHEN / THEN
+        assert verify_many([frame]) == [True]
+
+    def test_verify_many_rejects_non_device_and_invalid_checksums(self, device_frame):
+        # GIVEN
+        frames = [
+            Frame(frame_type=FrameType.PING, device_uid="DEV-1", command_id=0, command_slug="", args_values=[]),
+            device_frame("< ACK DEV-1 7 OK 1 >", checksum="ZZ"),
+        ]
+
+        # WHEN / THEN
+        assert verify_many(frames) == [False, False]
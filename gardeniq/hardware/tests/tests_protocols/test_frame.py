@@ -1,5 +1,6 @@
 import pytest
 
+import gardeniq.hardware.protocols.frame as frame_module
 from gardeniq.hardware.protocols.frame import CommandState
 from gardeniq.hardware.protocols.frame import Frame
 from gardeniq.hardware.protocols.frame import FrameType
@@ -8,8 +9,9 @@ from gardeniq.hardware.protocols.frame import FrameType
 @pytest.fixture
 def device_frame_factory():
     """Return a helper to build fully populated device frames for tests."""
-    base_source_frame = "GDFW=1.2.3 MPFW=4.5.6"
-    base_checksum = f"{Frame.build_checksum(base_source_frame.encode()):02X}"
+    body = "< ACK DEV-001 0 OK GDFW=1.2.3 MPFW=4.5.6 >"
+    base_checksum = f"{Frame.build_checksum(body.encode()):02X}"
+    base_source_frame = f"{body} {base_checksum}"
 
     def _factory(**overrides):
         data = {
@@ -174,3 +176,30 @@ class TestFrameModel:
 
         # WHEN / THEN
         assert frame.is_init_response() is False
+
+    def test_frame_is_slotted(self, device_frame_factory):
+        # GIVEN
+        frame = Frame(**device_frame_factory())
+
+        # WHEN / THEN
+        assert not hasattr(frame, "__dict__")
+        with pytest.raises(AttributeError):
+            frame.unknown_field = True
+
+    def test_has_fw_versions_runs_regex_once(self, device_frame_factory, monkeypatch):
+        # GIVEN
+        frame = Frame(**device_frame_factory())
+        assert frame.has_fw_versions() is True
+
+        # WHEN
+        monkeypatch.setattr(frame_module, "pattern_recv_frame_version", None)
+
+        # THEN
+        assert frame.is_ping_response() is True
+
+    def test_is_ping_response_uses_flag_set_at_parse_time(self, device_frame_factory):
+        # GIVEN
+        frame = Frame(**device_frame_factory(), fw_versions_matched=False)
+
+        # WHEN / THEN
+        assert frame.is_ping_response() is False
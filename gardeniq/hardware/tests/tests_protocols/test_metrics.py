@@ -0,0 +1,126 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+import pytest
+
+from gardeniq.hardware.protocols.benchmarks import build_device_frame
+from gardeniq.hardware.protocols.errors import FrameParsingError
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameType
+from gardeniq.hardware.protocols.metrics import LatencyHistogram
+from gardeniq.hardware.protocols.metrics import load_snapshot
+from gardeniq.hardware.protocols.metrics import pipeline_metrics
+from gardeniq.hardware.protocols.usb import FrameHandler
+from gardeniq.hardware.protocols.usb import FrameParser
+
+
+@pytest.fixture
+def metrics():
+    pipeline_metrics.reset()
+    pipeline_metrics.enabled = True
+    yield pipeline_metrics
+    pipeline_metrics.enabled = False
+    pipeline_metrics.reset()
+
+
+def stage(snapshot, name):
+    return {label: histogram["count"] for label, histogram in snapshot["stages"].get(name, {}).items()}
+
+
+class TestLatencyHistogram:
+    def test_quantiles_are_bucket_upper_bounds(self):
+        # GIVEN
+        histogram = LatencyHistogram()
+
+        # WHEN
+        for elapsed_us in [3] * 90 + [150] * 9 + [4000]:
+            histogram.observe(elapsed_us * 1000)
+
+        # THEN
+        assert (histogram.quantile(0.5), histogram.quantile(0.9), histogram.quantile(0.99)) == (5.0, 5.0, 200.0)
+        assert histogram.quantile(1) == 4000.0
+        assert histogram.snapshot()["count"] == 100
+
+    def test_empty_histogram(self):
+        # GIVEN / WHEN
+        snapshot = LatencyHistogram().snapshot()
+
+        # THEN
+        assert (snapshot["count"], snapshot["mean_us"], snapshot["p99_us"]) == (0, None, None)
+
+
+class TestPipelineMetrics:
+    def test_disabled_metrics_record_nothing(self):
+        # GIVEN
+        pipeline_metrics.reset()
+
+        # WHEN
+        FrameParser.parse_from_device_bytes(build_device_frame("ACK DEV0000 12 OK 21.5"))
+
+        # THEN
+        assert pipeline_metrics.snapshot()["stages"] == {}
+
+    def test_parse_and_serialize_are_timed_per_frame_kind(self, metrics):
+        # GIVEN
+        ping = Frame(FrameType.PING, "DEV0000", 0, "", [])
+
+        # WHEN
+        FrameParser.parse_from_device_bytes(build_device_frame("ACK DEV0000 12 OK 21.5"))
+        FrameParser.parse_from_device(build_device_frame("ACK DEV0000 0 OK GDFW=1.2.3 MPFW=1.24.0").decode())
+        FrameParser.encode(ping)
+
+        # THEN
+        snapshot = metrics.snapshot()
+        assert stage(snapshot, "parse") == {"ACK_DATA": 1, "ACK_PING": 1}
+        assert stage(snapshot, "serialize") == {"PING": 1}
+
+    def test_parsing_errors_are_counted(self, metrics):
+        # WHEN
+        with pytest.raises((FrameParsingError, ValueError)):
+            FrameParser.parse_from_device_bytes(b"< ACK DEV0000 12 > 00\n")
+
+        # THEN
+        snapshot = metrics.snapshot()
+        assert sum(snapshot["parsing_errors"].values()) == 1
+        assert all(key.startswith("parse:") for key in snapshot["parsing_errors"])
+        assert stage(snapshot, "parse") == {}
+
+    def test_handler_stages_and_command_errors(self, metrics):
+        # GIVEN
+        frame = FrameParser.parse_from_device_bytes(build_device_frame("ACK DEV0000 15 ERR BUSY"))
+
+        # WHEN
+        FrameHandler().handle_device_response(frame)
+
+        # THEN
+        snapshot = metrics.snapshot()
+        assert stage(snapshot, "checksum") == stage(snapshot, "route") == stage(snapshot, "handle") == {"ACK_ERR": 1}
+        assert snapshot["command_errors"] == {"BUSY": 1}
+
+    def test_published_snapshot_is_read_back(self, metrics, tmp_path):
+        # GIVEN
+        FrameParser.parse_from_device_bytes(build_device_frame("ACK DEV0000 12 OK 21.5"))
+        path = tmp_path / "metrics.json"
+
+        # WHEN
+        metrics.publish(path)
+
+        # THEN
+        snapshot = load_snapshot(path)
+        assert stage(snapshot, "parse") == {"ACK_DATA": 1}
+        assert load_snapshot(tmp_path / "missing.json") is None
+
+    def test_protocol_metrics_command_prints_the_stages(self, metrics, tmp_path):
+        # GIVEN
+        FrameParser.parse_from_device_bytes(build_device_frame("ACK DEV0000 12 OK 21.5"))
+        path = tmp_path / "metrics.json"
+        metrics.publish(path)
+        out = StringIO()
+
+        # WHEN
+        call_command("protocol_metrics", path=path, stdout=out)
+
+        # THEN
+        assert "parse" in out.getvalue()
+        assert "ACK_DATA" in out.getvalue()
@@ -0,0 +1,123 @@
+import asyncio
+import os
+import time
+
+import pytest
+import serial
+
+from gardeniq.hardware.protocols.settings import ETX
+from gardeniq.hardware.protocols.settings import STX
+from gardeniq.hardware.protocols.usb.transport import SerialTransport
+from gardeniq.hardware.utils.tests import SerialPortTestMixin
+from gardeniq.hardware.utils.tests import read_fd
+from gardeniq.hardware.utils.tests import wait_for
+
+ORDER_FRAME = f"{STX} ACK hw-02 7 OK 24.5C {ETX} 00\n".encode()
+
+
+@pytest.fixture(autouse=True)
+def fast_reconnect(settings):
+    settings.GATEWAY_RECONNECT_DELAY = 0.01
+
+
+class TestSerialTransport(SerialPortTestMixin):
+    def test_received_bytes_are_decoded_into_frames(self, pty_port):
+        # GIVEN
+        master, path = pty_port
+        received = []
+        transport = SerialTransport(path, lambda port, frame: received.append((port, frame)))
+
+        async def scenario():
+            task = asyncio.create_task(transport.run())
+            await wait_for(lambda: transport.is_open)
+            os.write(master, ORDER_FRAME[:10])
+            os.write(master, ORDER_FRAME[10:] + ORDER_FRAME)
+            await wait_for(lambda: len(received) == 2)
+            transport.stop()
+            await task
+
+        # WHEN
+        before = time.time_ns() // 1_000_000
+        asyncio.run(scenario())
+        after = time.time_ns() // 1_000_000
+
+        # THEN
+        assert [(port, frame.device_uid) for port, frame in received] == [(path, "hw-02"), (path, "hw-02")]
+        assert all(before <= frame.received_ts <= after for _, frame in received)
+        assert transport.bytes_read == 2 * len(ORDER_FRAME)
+        assert transport.is_open is False
+
+    def test_queued_bytes_are_written_in_order(self, pty_port):
+        # GIVEN
+        master, path = pty_port
+        transport = SerialTransport(path, lambda port, frame: None)
+
+        async def scenario():
+            task = asyncio.create_task(transport.run())
+            transport.write(b"first\n")
+            transport.write(b"second\n")
+            data = await read_fd(master, len(b"first\nsecond\n"))
+            transport.stop()
+            await task
+            return data
+
+        # WHEN
+        data = asyncio.run(scenario())
+
+        # THEN
+        assert data == b"first\nsecond\n"
+        assert transport.bytes_written == len(data)
+
+    def test_callback_error_does_not_stop_the_transport(self, pty_port):
+        # GIVEN
+        master, path = pty_port
+        calls = []
+
+        def on_frame(port, frame):
+            calls.append(frame)
+            raise RuntimeError("boom")
+
+        transport = SerialTransport(path, on_frame)
+
+        async def scenario():
+            task = asyncio.create_task(transport.run())
+            await wait_for(lambda: transport.is_open)
+            os.write(master, ORDER_FRAME + ORDER_FRAME)
+            await wait_for(lambda: len(calls) == 2)
+            transport.stop()
+            await task
+
+        # WHEN
+        asyncio.run(scenario())
+
+        # THEN
+        assert len(calls) == 2
+
+    def test_port_is_reopened_after_open_failure(self, pty_port):
+        # GIVEN
+        _, path = pty_port
+        attempts = []
+
+        def flaky_serial(**kwargs):
+            attempts.append(kwargs["port"])
+            if len(attempts) == 1:
+                raise serial.SerialException("port busy")
+            return serial.Serial(**kwargs)
+
+        transport = SerialTransport(path, lambda port, frame: None, serial_factory=flaky_serial)
+
+        async def scenario():
+            task = asyncio.create_task(transport.run())
+            await wait_for(lambda: transport.is_open)
+            is_open = transport.is_open
+            transport.stop()
+            await task
+            return is_open
+
+        # WHEN
+        is_open = asyncio.run(scenario())
+
+        # THEN
+        assert is_open is True
+        assert attempts == [path, path]
+        assert transport.reconnections == 1
@@ -0,0 +1,269 @@
+from enum import Enum
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+
+from gardeniq.base.models import Status
+from gardeniq.hardware.liveness import LivenessTracker
+from gardeniq.hardware.models import Device
+from gardeniq.hardware.protocols.errors import CommandError
+from gardeniq.hardware.protocols.errors import FrameProcessingError
+from gardeniq.hardware.protocols.frame import CommandState
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameType
+from gardeniq.hardware.protocols.usb import FrameHandler
+from gardeniq.hardware.registry import device_registry
+
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    device_registry.clear()
+    yield
+    device_registry.clear()
+
+
+@pytest.fixture(autouse=True)
+def default_status_enum(settings):
+    class DummyStatus(Enum):
+        ONLINE = "En ligne"
+        OFFLINE = "Hors ligne"
+
+    settings.DEFAULT_STATUS = DummyStatus
+    return DummyStatus
+
+
+@pytest.fixture
+def statuses(db):
+    return {
+        "online": Status.objects.create(
+            name=settings.DEFAULT_STATUS.ONLINE.value, tag="device-online", color="#00FF00"
+        ),
+        "offline": Status.objects.create(
+            name=settings.DEFAULT_STATUS.OFFLINE.value, tag="device-offline", color="#FF0000"
+        ),
+    }
+
+
+@pytest.fixture
+def device_factory(statuses):
+    def _factory(count):
+        return [
+            Device.objects.create(
+                name=f"Board {i}",
+                uid=f"DEV{i:04d}",
+                path=f"/dev/ttyUSB{i}",
+                status=statuses["offline"],
+                gd_firmware_version="1.0.0",
+                mp_firmware_version="1.0.0",
+            )
+            for i in range(count)
+        ]
+
+    return _factory
+
+
+def response(
+    device_uid: str,
+    command_id: int = 0,
+    error: CommandError | None = None,
+    versions: tuple[str, str] | None = ("1.0.0", "1.0.0"),
+    checksum_ok: bool = True,
+) -> Frame:
+    return Frame(
+        frame_type=FrameType.ACK,
+        device_uid=device_uid,
+        command_id=command_id,
+        command_slug="",
+        args_values=[],
+        from_device=True,
+        command_state=CommandState.ERROR if error else CommandState.OK,
+        err_msg=error,
+        gd_fw_version=versions[0] if versions else None,
+        mp_fw_version=versions[1] if versions else None,
+        checksum="2A",
+        source_frame_from_device="< ACK >",
+        computed_checksum=0x2A if checksum_ok else 0,
+        fw_versions_matched=command_id == 0 and versions is not None,
+    )
+
+
+@pytest.mark.django_db
+class TestFrameHandlerBatch:
+    def test_ping_sweep_marks_every_device_online(self, device_factory, statuses):
+        # GIVEN
+        devices = device_factory(5)
+
+        # WHEN
+        errors = FrameHandler().handle_batch([response(device.uid) for device in devices])
+
+        # THEN
+        assert errors == []
+        assert set(Device.objects.values_list("status", flat=True)) == {statuses["online"].pk}
+
+    def test_query_count_does_not_depend_on_the_batch_size(self, device_factory):
+        # GIVEN
+        devices = device_factory(20)
+        handler = FrameHandler()
+
+        # WHEN
+        device_registry.clear()
+        with CaptureQueriesContext(connection) as small:
+            handler.handle_batch([response(device.uid) for device in devices[:2]])
+        device_registry.clear()
+        with CaptureQueriesContext(connection) as large:
+            handler.handle_batch([response(device.uid) for device in devices[2:]])
+
+        # THEN
+        assert len(large) == len(small)
+
+    def test_batch_updates_last_seen_and_firmware(self, device_factory, mocker):
+        # GIVEN
+        device = device_factory(1)[0]
+        mocker.patch.object(Device, "_check_update", return_value=True)
+        last_seen = device.last_seen
+
+        # WHEN
+        FrameHandler().handle_batch([response(device.uid, versions=("2.0.0", "3.0.0"))])
+
+        # THEN
+        device.refresh_from_db()
+        assert device.gd_firmware_version == "2.0.0"
+        assert device.mp_firmware_version == "3.0.0"
+        assert device.need_upgrade is True
+        assert device.last_seen > last_seen
+
+    def test_frames_are_applied_in_order(self, device_factory, statuses):
+        # GIVEN
+        device = device_factory(1)[0]
+        frames = [response(device.uid), response(device.uid, command_id=3, error=CommandError.TIMEOUT)]
+
+        # WHEN
+        FrameHandler().handle_batch(frames)
+
+        # THEN
+        device.refresh_from_db()
+        assert device.status == statuses["offline"]
+
+    def test_rejected_frames_do_not_stop_the_batch(self, device_factory, statuses):
+        # GIVEN
+        device = device_factory(1)[0]
+        unknown = response("UNKNOWN")
+        corrupted = response(device.uid, checksum_ok=False)
+        bad_versions = response(device.uid, versions=("x", "y"))
+        frames = [unknown, corrupted, bad_versions, response(device.uid)]
+
+        # WHEN
+        errors = FrameHandler().handle_batch(frames)
+
+        # THEN
+        assert [(frame, type(error)) for frame, error in errors] == [
+            (corrupted, ValueError),
+            (unknown, FrameProcessingError),
+            (bad_versions, ValueError),
+        ]
+        device.refresh_from_db()
+        assert device.status == statuses["online"]
+        assert device.gd_firmware_version == "1.0.0"
+
+    def test_unexpected_error_of_a_frame_does_not_stop_the_batch(self, device_factory, statuses, mocker):
+        # GIVEN
+        device = device_factory(1)[0]
+        handler = FrameHandler()
+        mocker.patch.object(handler.telemetry, "add_frame", side_effect=RuntimeError("boom"))
+        data = response(device.uid, command_id=7, versions=None)
+        data.ok_data = "24.5"
+
+        # WHEN
+        errors = handler.handle_batch([data, response(device.uid)])
+
+        # THEN
+        assert [(frame, type(error)) for frame, error in errors] == [(data, RuntimeError)]
+        device.refresh_from_db()
+        assert device.status == statuses["online"]
+
+    def test_missing_status_rejects_only_its_frames(self, device_factory, statuses):
+        # GIVEN
+        online, timed_out = device_factory(2)
+        statuses["offline"].name = "Retired"
+        statuses["offline"].save()
+        timeout = response(timed_out.uid, command_id=3, error=CommandError.TIMEOUT)
+
+        # WHEN
+        errors = FrameHandler().handle_batch([timeout, response(online.uid)])
+
+        # THEN
+        assert [(frame, type(error)) for frame, error in errors] == [(timeout, FrameProcessingError)]
+        assert Device.objects.get(pk=online.pk).status == statuses["online"]
+
+    def test_response_listeners_are_notified_after_the_batch(self, device_factory):
+        # GIVEN
+        device = device_factory(1)[0]
+        handler = FrameHandler()
+        notified = []
+        handler.add_response_listener(
+            lambda frame: notified.append((frame.command_id, Device.objects.get(pk=device.pk).status.name))
+        )
+
+        # WHEN
+        handler.handle_batch([response(device.uid), response(device.uid, command_id=4, versions=None)])
+
+        # THEN
+        assert notified == [(0, settings.DEFAULT_STATUS.ONLINE.value), (4, settings.DEFAULT_STATUS.ONLINE.value)]
+
+    def test_batch_matches_frame_by_frame_handling(self, device_factory):
+        # GIVEN
+        batch_device, single_device = device_factory(2)
+        handler = FrameHandler()
+
+        # WHEN
+        handler.handle_batch([response(batch_device.uid, versions=("1.2.0", "1.3.0"))])
+        handler.handle_device_response(response(single_device.uid, versions=("1.2.0", "1.3.0")))
+
+        # THEN
+        batch_device.refresh_from_db()
+        single_device.refresh_from_db()
+        for field in ("status", "gd_firmware_version", "mp_firmware_version", "need_upgrade"):
+            assert getattr(batch_device, field) == getattr(single_device, field)
+
+    def test_warm_registry_serves_the_batch_without_select(self, device_factory):
+        # GIVEN
+        devices = device_factory(3)
+        device_registry.warm()
+
+        # WHEN
+        with CaptureQueriesContext(connection) as queries:
+            FrameHandler().handle_batch([response(device.uid) for device in devices])
+
+        # THEN
+        assert not [query for query in queries if query["sql"].startswith("SELECT")]
+
+    def test_second_ping_sweep_only_touches_memory(self, device_factory, django_assert_num_queries):
+        # GIVEN
+        devices = device_factory(5)
+        handler = FrameHandler(liveness=LivenessTracker(flush_interval=60))
+        handler.handle_batch([response(device.uid) for device in devices])
+
+        # WHEN
+        with CaptureQueriesContext(connection) as queries:
+            errors = handler.handle_batch([response(device.uid) for device in devices])
+
+        # THEN
+        assert errors == []
+        assert not [query for query in queries if query["sql"].startswith("UPDATE")]
+        assert handler.liveness.pending == 5
+
+    def test_single_ping_of_an_online_device_is_coalesced(self, device_factory, django_assert_num_queries):
+        # GIVEN
+        device = device_factory(1)[0]
+        handler = FrameHandler(liveness=LivenessTracker(flush_interval=60))
+        handler.handle_device_response(response(device.uid))
+
+        # WHEN
+        with django_assert_num_queries(0):
+            handler.handle_device_response(response(device.uid))
+
+        # THEN
+        assert handler.liveness.pending == 1
@@ -0,0 +1,203 @@
+import pytest
+
+from gardeniq.hardware.protocols.errors import CommandError
+from gardeniq.hardware.protocols.errors import FrameParsingError
+from gardeniq.hardware.protocols.frame import CommandState
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameEncoding
+from gardeniq.hardware.protocols.frame import FrameType
+from gardeniq.hardware.protocols.settings import ETX
+from gardeniq.hardware.protocols.settings import STX
+from gardeniq.hardware.protocols.usb import FrameParser
+from gardeniq.hardware.protocols.usb import FrameStreamDecoder
+from gardeniq.hardware.protocols.usb.binary import CODECS
+from gardeniq.hardware.protocols.usb.parser import encoding_option
+
+BINARY_ENCODINGS = [FrameEncoding.MSGPACK, FrameEncoding.CBOR]
+
+
+def ack(command_id: int, **kwargs) -> Frame:
+    kwargs.setdefault("command_state", CommandState.OK)
+    return Frame(
+        frame_type=FrameType.ACK,
+        device_uid="hw-01",
+        command_id=command_id,
+        command_slug="",
+        args_values=[],
+        from_device=True,
+        checksum="00",
+        source_frame_from_device="",
+        **kwargs,
+    )
+
+
+HOST_FRAMES = {
+    "cmd": Frame(FrameType.CMD, "hw-01", 7, "open_van", ["1", "30"]),
+    "cmd_without_slug": Frame(FrameType.CMD, "hw-01", 7, "", ["1"]),
+    "ping": Frame(FrameType.PING, "hw-01", 0, "", []),
+    "ping_with_offer": Frame(FrameType.PING, "hw-01", 0, "", ["ENC=MSGPACK,CBOR"]),
+    "lg_init": Frame(FrameType.LG_INIT, "hw-01", -1, "", [], model="Order", fields_values=("1", "get_temp", "get", "")),
+}
+DEVICE_FRAMES = {
+    "ok_without_data": ack(7),
+    "ok_str": ack(7, ok_data="24.5C"),
+    "ok_int": ack(7, ok_data=512),
+    "ok_float": ack(7, ok_data=24.5),
+    "ok_bool": ack(7, ok_data=True),
+    "error": ack(7, command_state=CommandState.ERROR, err_msg=CommandError.BUSY),
+    "ping": ack(0, gd_fw_version="1.2.3", mp_fw_version="4.5.6", encoding=FrameEncoding.CBOR),
+    "ping_without_encoding": ack(0, gd_fw_version="1.2.3", mp_fw_version="4.5.6"),
+    "lg_init": ack(-1),
+}
+DEVICE_FIELDS = (
+    "frame_type",
+    "device_uid",
+    "command_id",
+    "command_state",
+    "ok_data",
+    "err_msg",
+    "gd_fw_version",
+    "mp_fw_version",
+    "encoding",
+)
+
+
+class TestBinaryFrameCodec:
+    @pytest.mark.parametrize("encoding", BINARY_ENCODINGS)
+    @pytest.mark.parametrize("frame", HOST_FRAMES.values(), ids=HOST_FRAMES.keys())
+    def test_host_frames_round_trip(self, encoding, frame):
+        # GIVEN
+        codec = CODECS[encoding]
+
+        # WHEN
+        decoded = codec.decode(codec.encode(frame))
+
+        # THEN
+        assert decoded == frame
+
+    @pytest.mark.parametrize("encoding", BINARY_ENCODINGS)
+    @pytest.mark.parametrize("frame", DEVICE_FRAMES.values(), ids=DEVICE_FRAMES.keys())
+    def test_device_frames_round_trip(self, encoding, frame):
+        # GIVEN
+        data = CODECS[encoding].encode(frame)
+
+        # WHEN
+        decoded = FrameParser.decode(data)
+
+        # THEN
+        assert [getattr(decoded, name) for name in DEVICE_FIELDS] == [getattr(frame, name) for name in DEVICE_FIELDS]
+        assert type(decoded.ok_data) is type(frame.ok_data)
+        assert decoded.from_device is True
+        assert decoded.verify_checksum() is True
+        assert decoded.is_ping_response() is (frame.gd_fw_version is not None)
+
+    @pytest.mark.parametrize("encoding", BINARY_ENCODINGS)
+    def test_binary_frame_is_smaller_than_the_text_frame(self, encoding):
+        # GIVEN
+        frame = HOST_FRAMES["cmd"]
+
+        # WHEN
+        binary = FrameParser.encode(frame, encoding)
+        text = FrameParser.encode(frame)
+
+        # THEN
+        assert len(binary) < len(text)
+
+    @pytest.mark.parametrize("encoding", BINARY_ENCODINGS)
+    def test_corrupted_frame_is_rejected(self, encoding):
+        # GIVEN
+        data = bytearray(CODECS[encoding].encode(DEVICE_FRAMES["ok_int"]))
+        data[5] ^= 0x01
+
+        # WHEN / THEN
+        with pytest.raises(FrameParsingError, match="checksum"):
+            FrameParser.decode(bytes(data))
+
+    def test_decode_rejects_unknown_marker(self):
+        # WHEN / THEN
+        with pytest.raises(FrameParsingError, match="Unknown frame marker"):
+            FrameParser.decode(b"\x00\x00\x01\x00")
+
+
+class TestEncodingNegotiation:
+    def test_ping_offers_the_encodings(self):
+        # GIVEN
+        frame = Frame(FrameType.PING, "hw-01", 0, "", [encoding_option([FrameEncoding.MSGPACK, FrameEncoding.CBOR])])
+
+        # WHEN
+        built = FrameParser.parse_from_frame_klass(frame)
+
+        # THEN
+        assert built.startswith(f"{STX} PING hw-01 0 ENC=MSGPACK,CBOR {ETX} ")
+
+    @pytest.mark.parametrize(
+        "options, expected",
+        [("ENC=MSGPACK ", FrameEncoding.MSGPACK), ("ENC=ZIP ", None), ("", None)],
+    )
+    def test_ping_response_names_the_accepted_encoding(self, options, expected):
+        # GIVEN
+        recv = f"{STX} ACK hw-01 0 OK GDFW=1.2.3 MPFW=4.5.6 {options}{ETX} 00\n"
+
+        # WHEN
+        from_str = FrameParser.parse_from_device(recv)
+        from_bytes = FrameParser.parse_from_device_bytes(recv.encode())
+
+        # THEN
+        assert from_str.encoding is expected
+        assert from_bytes.encoding is expected
+        assert from_bytes.is_ping_response() is True
+
+
+class TestMixedStreamDecoding:
+    def test_text_and_binary_frames_share_the_stream(self):
+        # GIVEN
+        decoder = FrameStreamDecoder()
+        text = f"{STX} ACK hw-01 7 OK 24.5C {ETX} 00\n".encode()
+        msgpack = FrameParser.encode(DEVICE_FRAMES["ok_int"], FrameEncoding.MSGPACK)
+        cbor = FrameParser.encode(DEVICE_FRAMES["ok_float"], FrameEncoding.CBOR)
+        stream = text + msgpack + cbor + text
+
+        # WHEN
+        frames = [frame for i in range(0, len(stream), 3) for frame in decoder.feed(stream[i : i + 3])]
+
+        # THEN
+        assert [frame.ok_data for frame in frames] == ["24.5C", 512, 24.5, "24.5C"]
+        assert decoder.pending == 0
+
+    def test_payload_bytes_do_not_break_the_framing(self):
+        # GIVEN
+        decoder = FrameStreamDecoder()
+        frame = ack(7, ok_data=f"{STX} \n{STX} ")
+
+        # WHEN
+        frames = list(decoder.feed(FrameParser.encode(frame, FrameEncoding.MSGPACK)))
+
+        # THEN
+        assert [decoded.ok_data for decoded in frames] == [f"{STX} \n{STX} "]
+
+    def test_corrupted_binary_frame_does_not_lose_the_next_one(self):
+        # GIVEN
+        decoder = FrameStreamDecoder()
+        corrupted = bytearray(FrameParser.encode(DEVICE_FRAMES["ok_int"], FrameEncoding.CBOR))
+        # A wrong length: the frame would swallow the next one if it was trusted.
+        corrupted[2] += 40
+        valid = FrameParser.encode(DEVICE_FRAMES["ok_str"], FrameEncoding.CBOR)
+
+        # WHEN
+        frames = list(decoder.feed(bytes(corrupted) + valid + b"\x00" * 64))
+
+        # THEN
+        assert [frame.ok_data for frame in frames] == ["24.5C"]
+        assert decoder.parsing_errors >= 1
+
+    def test_text_frame_truncated_by_a_binary_frame_is_skipped(self):
+        # GIVEN
+        decoder = FrameStreamDecoder()
+        truncated = f"{STX} ACK hw-01 7 OK".encode()
+        binary = FrameParser.encode(DEVICE_FRAMES["ok_bool"], FrameEncoding.MSGPACK)
+
+        # WHEN
+        frames = list(decoder.feed(truncated + binary + f"{STX} ACK hw-01 7 OK 1 {ETX} 00\n".encode()))
+
+        # THEN
+        assert [frame.ok_data for frame in frames] == [True, "1"]
@@ -1,3 +1,5 @@
+from dataclasses import replace
+
 import pytest
 
 import gardeniq.hardware.protocols.usb.parser as parser_module
@@ -138,6 +140,31 @@ class TestFrameParser:
         expected_checksum = Frame.build_checksum(expected_frame.encode())
         assert built == f"{expected_frame} {expected_checksum:02X}\n"
 
+    def test_parse_from_frame_klass_lg_init_body_is_shared_between_devices(self):
+        # GIVEN
+        parser_module._lg_init_body.cache_clear()
+        frames = [
+            Frame(
+                frame_type=FrameType.LG_INIT,
+                device_uid=uid,
+                command_id=-1,
+                command_slug="",
+                args_values=[],
+                model="Order",
+                fields_values=("1", "get_temp", "get"),
+            )
+            for uid in ("device-1", "device-2")
+        ]
+
+        # WHEN
+        built = [FrameParser.parse_from_frame_klass(frame) for frame in frames]
+
+        # THEN
+        assert " device-1 -1 Order 1;get_temp;get " in built[0]
+        assert " device-2 -1 Order 1;get_temp;get " in built[1]
+        assert parser_module._lg_init_body.cache_info().misses == 1
+        assert parser_module._lg_init_body.cache_info().hits == 1
+
     def test_parse_from_frame_klass_ping(self):
         # GIVEN
         frame_obj = Frame(
@@ -185,3 +212,124 @@ class TestFrameParser:
         assert frame.command_state is CommandState.ERROR
         assert frame.err_msg is CommandError.UNKNOW_CMD
         assert frame.ok_data is None
+
+    def test_parse_from_device_ping_response_extracts_versions_from_real_frame(self):
+        # GIVEN
+        recv = f"{STX} ACK hw-01 0 OK GDFW=1.2.3 MPFW=4.5.6 {ETX} FF\n"
+
+        # WHEN
+        frame = FrameParser.parse_from_device(recv)
+
+        # THEN
+        assert frame.gd_fw_version == "1.2.3"
+        assert frame.mp_fw_version == "4.5.6"
+        assert frame.is_ping_response() is True
+
+
+class TestFrameParserBytes:
+    @pytest.mark.parametrize(
+        "recv",
+        [
+            f"{STX} ACK device-42 7 OK 24.5C {ETX} 00\n",
+            f"{STX} ACK device-99 3 ERR {CommandError.UNKNOW_CMD.value} {ETX} AA\n",
+            f"{STX} ACK hw-01 0 OK GDFW=1.2.3 MPFW=4.5.6 {ETX} FF\n",
+            f"{STX} ACK device-77 -1 OK {ETX} 5A\n",
+        ],
+    )
+    def test_parse_from_device_bytes_matches_str_path(self, recv):
+        # GIVEN
+        expected = FrameParser.parse_from_device(recv)
+
+        # WHEN
+        frame = FrameParser.parse_from_device_bytes(recv.encode())
+
+        # THEN
+        assert frame.computed_checksum == Frame.build_checksum(recv.rsplit(" ", 1)[0].encode())
+        assert frame.source_frame_from_device == recv.removesuffix("\n").encode()
+        assert replace(frame, source_frame_from_device=expected.source_frame_from_device) == expected
+
+    @pytest.mark.parametrize("parse", [FrameParser.parse_from_device, FrameParser.parse_from_device_bytes])
+    def test_checksum_covers_the_frame_up_to_etx(self, parse):
+        # GIVEN
+        body = f"{STX} ACK device-42 7 OK 24.5C {ETX}"
+        recv = f"{body} {Frame.build_checksum(body.encode()):02X}\n"
+
+        # WHEN
+        frame = parse(recv if parse is FrameParser.parse_from_device else recv.encode())
+
+        # THEN
+        assert frame.verify_checksum() is True
+
+    @pytest.mark.parametrize("parse", [FrameParser.parse_from_device, FrameParser.parse_from_device_bytes])
+    def test_order_response_without_data(self, parse):
+        # GIVEN
+        recv = f"{STX} ACK device-42 7 OK {ETX} 00\n"
+
+        # WHEN
+        frame = parse(recv if parse is FrameParser.parse_from_device else recv.encode())
+
+        # THEN
+        assert frame.ok_data is None
+        assert frame.is_order_response_without_data() is True
+
+    def test_raw_source_frame_is_verified_without_decoding(self):
+        # GIVEN
+        body = f"{STX} ACK hw-01 0 OK GDFW=1.2.3 MPFW=4.5.6 {ETX}"
+        frame = FrameParser.parse_from_device_bytes(f"{body} {Frame.build_checksum(body.encode()):02X}\n".encode())
+        frame.computed_checksum = None
+        frame.fw_versions_matched = None
+
+        # WHEN / THEN
+        assert frame.verify_checksum() is True
+        assert frame.is_ping_response() is True
+
+    def test_parse_from_device_bytes_accepts_memoryview(self):
+        # GIVEN
+        recv = f"{STX} ACK device-42 7 OK 24.5C {ETX} 00\n".encode()
+
+        # WHEN
+        frame = FrameParser.parse_from_device_bytes(memoryview(recv))
+
+        # THEN
+        assert frame.device_uid == "device-42"
+        assert frame.ok_data == "24.5C"
+
+    def test_parse_from_device_bytes_checksum_is_verified_without_encoding(self, monkeypatch):
+        # GIVEN
+        body = f"{STX} ACK device-42 7 OK 24.5C {ETX}"
+        frame = FrameParser.parse_from_device_bytes(f"{body} 00\n".encode())
+        frame.checksum = f"{frame.computed_checksum:02X}"
+
+        def _fail(data):
+            raise AssertionError("checksum must not be computed again")
+
+        monkeypatch.setattr(Frame, "build_checksum", staticmethod(_fail))
+
+        # WHEN / THEN
+        assert frame.verify_checksum() is True
+
+    @pytest.mark.parametrize(
+        ("recv", "match"),
+        [
+            (f"{STX} ACK device-42 7 OK 24.5C {ETX} 00".encode(), "newline"),
+            (f"{STX} ACK device-42 7 OK\n".encode(), "too short"),
+            (f"[ ACK device-42 7 OK 24.5C {ETX} 00\n".encode(), "Invalid STX"),
+            (f"{STX} ACK device-42 7 OK 24.5C ] 00\n".encode(), "Invalid ETX"),
+            (f"{STX} NOPE device-42 7 OK 24.5C {ETX} 00\n".encode(), "Invalid frame type"),
+            (f"{STX} ACK device-42 7 NOPE 24.5C {ETX} 00\n".encode(), "Invalid command state"),
+            (f"{STX} ACK device-42 7 ERR NOPE {ETX} 00\n".encode(), "Invalid command error"),
+        ],
+    )
+    def test_parse_from_device_bytes_rejects_invalid_frames(self, recv, match):
+        # GIVEN / WHEN / THEN
+        with pytest.raises(FrameParsingError, match=match):
+            FrameParser.parse_from_device_bytes(recv)
+
+    def test_parse_from_device_bytes_sets_fw_versions_flag(self):
+        # GIVEN
+        ping = f"{STX} ACK hw-01 0 OK GDFW=1.2.3 MPFW=4.5.6 {ETX} FF\n".encode()
+        order = f"{STX} ACK hw-01 7 OK 1 {ETX} FF\n".encode()
+
+        # WHEN / THEN
+        assert FrameParser.parse_from_device_bytes(ping).fw_versions_matched is True
+        assert FrameParser.parse_from_device_bytes(order).fw_versions_matched is False
@@ -0,0 +1,139 @@
+import pytest
+
+from gardeniq.hardware.protocols.frame import CommandState
+from gardeniq.hardware.protocols.settings import ETX
+from gardeniq.hardware.protocols.settings import STX
+from gardeniq.hardware.protocols.usb import FrameStreamDecoder
+
+PING_FRAME = f"{STX} ACK hw-01 0 OK GDFW=1.2.3 MPFW=4.5.6 {ETX} 1F\n".encode()
+ORDER_FRAME = f"{STX} ACK hw-02 7 OK 24.5C {ETX} 00\n".encode()
+
+
+class TestFrameStreamDecoder:
+    def test_feed_complete_frame_yields_frame(self):
+        # GIVEN
+        decoder = FrameStreamDecoder()
+
+        # WHEN
+        frames = list(decoder.feed(ORDER_FRAME))
+
+        # THEN
+        assert len(frames) == 1
+        assert frames[0].device_uid == "hw-02"
+        assert frames[0].ok_data == "24.5C"
+        assert decoder.pending == 0
+        assert decoder.frames_decoded == 1
+
+    def test_feed_reassembles_frame_split_across_chunks(self):
+        # GIVEN
+        decoder = FrameStreamDecoder()
+
+        # WHEN
+        first = list(decoder.feed(ORDER_FRAME[:5]))
+        second = list(decoder.feed(ORDER_FRAME[5:20]))
+        third = list(decoder.feed(ORDER_FRAME[20:]))
+
+        # THEN
+        assert first == []
+        assert second == []
+        assert len(third) == 1
+        assert third[0].command_id == 7
+
+    def test_feed_yields_every_frame_of_a_chunk_in_order(self):
+        # GIVEN
+        decoder = FrameStreamDecoder()
+
+        # WHEN
+        frames = list(decoder.feed(PING_FRAME + ORDER_FRAME + PING_FRAME[:10]))
+
+        # THEN
+        assert [frame.device_uid for frame in frames] == ["hw-01", "hw-02"]
+        assert decoder.pending == 10
+
+    def test_feed_drops_garbage_before_stx(self):
+        # GIVEN
+        decoder = FrameStreamDecoder()
+        garbage = b"\x00\xffnoise\n"
+
+        # WHEN
+        frames = list(decoder.feed(garbage + ORDER_FRAME))
+
+        # THEN
+        assert len(frames) == 1
+        assert decoder.bytes_discarded == len(garbage)
+
+    def test_feed_resynchronises_after_truncated_frame(self):
+        # GIVEN
+        decoder = FrameStreamDecoder()
+        truncated = PING_FRAME[:15]
+
+        # WHEN
+        frames = list(decoder.feed(truncated + ORDER_FRAME))
+
+        # THEN
+        assert len(frames) == 1
+        assert frames[0].device_uid == "hw-02"
+        assert decoder.bytes_discarded == len(truncated)
+
+    def test_feed_counts_invalid_frame_and_continues(self):
+        # GIVEN
+        decoder = FrameStreamDecoder()
+        invalid = f"{STX} ACK hw-03 7 NOPE 1 {ETX} 00\n".encode()
+
+        # WHEN
+        frames = list(decoder.feed(invalid + ORDER_FRAME))
+
+        # THEN
+        assert len(frames) == 1
+        assert frames[0].command_state is CommandState.OK
+        assert decoder.parsing_errors == 1
+
+    def test_feed_counts_non_ascii_frame_as_parsing_error(self):
+        # GIVEN
+        decoder = FrameStreamDecoder()
+
+        # WHEN
+        frames = list(decoder.feed(f"{STX} ACK hw-\xe9 7 OK 1 {ETX} 00\n".encode("latin-1")))
+
+        # THEN
+        assert frames == []
+        assert decoder.parsing_errors == 1
+
+    def test_feed_bounds_buffer_without_end_of_frame(self):
+        # GIVEN
+        decoder = FrameStreamDecoder(max_frame_size=32)
+
+        # WHEN
+        frames = list(decoder.feed(f"{STX} ".encode() + b"A" * 64))
+
+        # THEN
+        assert frames == []
+        assert decoder.overflows == 1
+        assert decoder.pending <= 32
+
+    def test_feed_keeps_partial_stx_marker(self):
+        # GIVEN
+        decoder = FrameStreamDecoder()
+
+        # WHEN
+        list(decoder.feed(b"noise" + ORDER_FRAME[:1]))
+        frames = list(decoder.feed(ORDER_FRAME[1:]))
+
+        # THEN
+        assert len(frames) == 1
+
+    def test_reset_drops_pending_bytes(self):
+        # GIVEN
+        decoder = FrameStreamDecoder()
+        list(decoder.feed(ORDER_FRAME[:10]))
+
+        # WHEN
+        decoder.reset()
+
+        # THEN
+        assert decoder.pending == 0
+
+    def test_init_rejects_too_small_buffer(self):
+        # GIVEN / WHEN / THEN
+        with pytest.raises(ValueError, match="max_frame_size"):
+            FrameStreamDecoder(max_frame_size=1)
@@ -439,6 +439,8 @@ class TestSensorListReadOnlySerializer:
                 "pin_number": pin.pin_number,
                 "channel_choiced": channel.name,
             },
+            "latest_value": None,
+            "latest_ts": None,
         }
 
         # WHEN
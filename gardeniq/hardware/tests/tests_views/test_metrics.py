@@ -0,0 +1,42 @@
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+import pytest
+
+from gardeniq.base.utils import ViewSetTestMixin
+from gardeniq.hardware.protocols.metrics import PipelineMetrics
+
+
+@pytest.mark.django_db
+class TestProtocolMetricsAPIView(ViewSetTestMixin):
+    @pytest.fixture
+    def published(self, settings, tmp_path):
+        settings.PROTOCOL_METRICS_PATH = tmp_path / "metrics.json"
+        metrics = PipelineMetrics(enabled=True)
+        metrics.observe("parse", "ACK_DATA", 12_000)
+        metrics.publish(settings.PROTOCOL_METRICS_PATH)
+
+    def test_admin_gets_the_published_snapshot(self, admin_client, published):
+        # WHEN
+        response = admin_client.get(reverse("protocol-metrics"))
+
+        # THEN
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["stages"]["parse"]["ACK_DATA"]["count"] == 1
+
+    def test_regular_user_is_forbidden(self, authenticated_client, published):
+        # WHEN
+        response = authenticated_client.get(reverse("protocol-metrics"))
+
+        # THEN
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_not_found_without_published_snapshot(self, admin_client, settings, tmp_path):
+        # GIVEN
+        settings.PROTOCOL_METRICS_PATH = tmp_path / "missing.json"
+
+        # WHEN
+        response = admin_client.get(reverse("protocol-metrics"))
+
+        # THEN
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -9,6 +9,7 @@ from gardeniq.hardware.models import Device
 from gardeniq.hardware.models import Pin
 from gardeniq.hardware.models import Sensor
 from gardeniq.hardware.models import SensorCategory
+from gardeniq.telemetry.models import LatestReading
 
 # ─── SensorCategory View Tests ────────────────────────────────────────────────
 
@@ -243,6 +244,26 @@ class TestSensorAPIModelView(SensorViewSetTestConf):
         assert "pin_number" in first["pin"]
         assert "channel_choiced" in first["pin"]
 
+    def test_list_latest_values(self, authenticated_client, obj, django_assert_num_queries):
+        """
+        GIVEN: two existing Sensors, one with a latest reading
+        WHEN: sending a GET request to the list endpoint
+        THEN: each sensor carries its latest value, without a query per sensor
+        """
+        # GIVEN
+        sensor1, sensor2 = obj
+        LatestReading.objects.create(sensor=sensor1, ts=1_700_000_000_000, value=21.5)
+        url = self.get_url_list()
+
+        # WHEN
+        with django_assert_num_queries(2):  # count, page
+            response = authenticated_client.get(url)
+
+        # THEN
+        assert response.status_code == status.HTTP_200_OK
+        latest = {item["id"]: (item["latest_value"], item["latest_ts"]) for item in response.data["results"]}
+        assert latest == {sensor1.pk: (21.5, 1_700_000_000_000), sensor2.pk: (None, None)}
+
     def test_retrieve(self, authenticated_client, obj):
         """
         GIVEN: an existing Sensor
@@ -1 +1,2 @@
 from .devices import list_connected_devices
+from .tests import SerialPortTestMixin
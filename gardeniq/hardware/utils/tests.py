@@ -0,0 +1,46 @@
+import asyncio
+import os
+from typing import Callable
+from typing import Iterator
+from typing import Tuple
+
+import pytest
+
+
+class SerialPortTestMixin:
+    """A mixin class providing a fake serial port for tests of the serial transport and gateway.
+
+    Fixtures:
+        pty_port() -> Tuple[int, str]:
+            Pseudo-terminal pair standing for a serial device. Yields the non-blocking master fd,
+            played by the test as the device, and the slave path opened by the code under test.
+    """
+
+    @pytest.fixture
+    def pty_port(self) -> Iterator[Tuple[int, str]]:
+        master, slave = os.openpty()
+        os.set_blocking(master, False)
+        yield master, os.ttyname(slave)
+        os.close(master)
+        os.close(slave)
+
+
+async def read_fd(fd: int, size: int, timeout: float = 2.0) -> bytes:
+    """Read `size` bytes from a non-blocking fd, or what was received before the timeout."""
+    data = b""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while len(data) < size and loop.time() < deadline:
+        try:
+            data += os.read(fd, size - len(data))
+        except BlockingIOError:
+            await asyncio.sleep(0.01)
+    return data
+
+
+async def wait_for(predicate: Callable[[], bool], timeout: float = 2.0) -> None:
+    """Poll `predicate` until it is true or the timeout expires."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate() and loop.time() < deadline:
+        await asyncio.sleep(0.01)
@@ -1,6 +1,7 @@
 from .controller import ControllerAPIModelView
 from .controller import ControllerCategoryAPIModelView
 from .device import DeviceAPIModelView
+from .metrics import ProtocolMetricsAPIView
 from .pin import ChannelAPIModelView
 from .pin import PinAPIModelView
 from .sensor import SensorAPIModelView
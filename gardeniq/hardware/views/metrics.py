@@ -0,0 +1,28 @@
+from django.conf import settings
+
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+
+from gardeniq.hardware.protocols.metrics import load_snapshot
+
+
+class ProtocolMetricsAPIView(APIView):
+    """
+    Per-stage metrics of the frame pipeline, as published by the gateway (admin only).
+    GET /api/protocol-metrics/
+    Returns: the snapshot of hardware.protocols.metrics.PipelineMetrics
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request, format=None):
+        snapshot = load_snapshot(settings.PROTOCOL_METRICS_PATH)
+        if snapshot is None:
+            raise NotFound("No protocol metrics published: the gateway does not record them.")
+        return Response(snapshot)
@@ -1,3 +1,5 @@
+from django.db.models import F
+
 from gardeniq.base.views import BaseAPIModelViewSet
 from gardeniq.hardware.models import Sensor
 from gardeniq.hardware.models import SensorCategory
@@ -28,5 +30,9 @@ class SensorAPIModelView(BaseAPIModelViewSet):
                 "device",
                 "device__status",
                 "pin",
+                "pin__channel_choiced",
+            ).annotate(
+                latest_value=F("latest_reading__value"),
+                latest_ts=F("latest_reading__ts"),
             )
         return qs
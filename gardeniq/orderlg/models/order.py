@@ -96,8 +96,8 @@ class Order(
 
     def register_response_data(self, data: Any) -> None:
         # TODO: register the device response data into log system
-        #   OR database telemetry
         #   OR SSE system for display data to user dashboard.
+        # The values measured by the sensors are stored by the frame handler, see telemetry.ingest.
         # e.g: back send `get_temp` order, device response with temp data.
         pass
 
@@ -9,6 +9,9 @@ from gardeniq.settings.django.storages import *
 from gardeniq.settings.django.templates import *
 from gardeniq.settings.project.cards import *
 from gardeniq.settings.project.fixtures import *
+from gardeniq.settings.project.gateway import *
+from gardeniq.settings.project.protocol import *
 from gardeniq.settings.project.status import *
+from gardeniq.settings.project.telemetry import *
 from gardeniq.settings.third_party.knox import *
 from gardeniq.settings.third_party.rest_framework import *
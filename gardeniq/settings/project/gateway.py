@@ -0,0 +1,146 @@
+from gardeniq.settings.django.paths import PROJECT_ROOT_DIR
+
+__all__ = [
+    "GATEWAY_COMMAND_RETRIES",
+    "GATEWAY_COMMAND_TIMEOUT",
+    "GATEWAY_FRAME_ENCODINGS",
+    "GATEWAY_FRAME_QUEUE_SIZE",
+    "GATEWAY_HANDLE_BATCH_SIZE",
+    "GATEWAY_HEARTBEAT_BACKOFF",
+    "GATEWAY_HEARTBEAT_ENABLED",
+    "GATEWAY_HEARTBEAT_INTERVAL",
+    "GATEWAY_HEARTBEAT_JITTER",
+    "GATEWAY_HEARTBEAT_MAX_INTERVAL",
+    "GATEWAY_HEARTBEAT_MAX_MISSES",
+    "GATEWAY_HEARTBEAT_MIN_INTERVAL",
+    "GATEWAY_HEARTBEAT_TICK",
+    "GATEWAY_INFLIGHT_WINDOW",
+    "GATEWAY_LANGUAGE_SYNC_ENABLED",
+    "GATEWAY_LANGUAGE_SYNC_INTERVAL",
+    "GATEWAY_LIVENESS_FLUSH_INTERVAL",
+    "GATEWAY_OUTBOUND_COMMIT_INTERVAL",
+    "GATEWAY_OUTBOUND_COMMIT_SIZE",
+    "GATEWAY_OUTBOUND_PRUNE_INTERVAL",
+    "GATEWAY_OUTBOUND_REPLAY_ENABLED",
+    "GATEWAY_OUTBOUND_RETENTION_DAYS",
+    "GATEWAY_OUTBOUND_SQLITE_WAL",
+    "GATEWAY_READ_CHUNK_SIZE",
+    "GATEWAY_RECONNECT_DELAY",
+    "GATEWAY_REGISTRY_TTL",
+    "GATEWAY_RETRY_BACKOFF",
+    "GATEWAY_SCHEDULER_QUEUE_SIZE",
+    "GATEWAY_SCHEDULER_WEIGHTS",
+    "GATEWAY_SUPERVISOR_HEALTH_INTERVAL",
+    "GATEWAY_SUPERVISOR_HEALTH_PATH",
+    "GATEWAY_SUPERVISOR_HEALTH_TIMEOUT",
+    "GATEWAY_SUPERVISOR_QUEUE_SIZE",
+    "GATEWAY_SUPERVISOR_QUEUE_TIMEOUT",
+    "GATEWAY_SUPERVISOR_RESCAN_INTERVAL",
+    "GATEWAY_SUPERVISOR_RESTART_DELAY",
+    "GATEWAY_SUPERVISOR_RING_REPLICAS",
+    "GATEWAY_SUPERVISOR_STOP_TIMEOUT",
+    "GATEWAY_SUPERVISOR_WORKERS",
+]
+
+# Maximum number of decoded frames waiting to be handled. Frames received when it is full are dropped.
+GATEWAY_FRAME_QUEUE_SIZE = 1024
+
+# Binary frame encodings offered to the devices in every PING, by order of preference ("MSGPACK", "CBOR").
+# A device that does not answer with one of them keeps the text encoding. Empty: text only.
+GATEWAY_FRAME_ENCODINGS = []
+
+# Maximum number of queued frames handled together by `FrameHandler.handle_batch`.
+GATEWAY_HANDLE_BATCH_SIZE = 256
+
+# Maximum number of bytes read from a serial port at once.
+GATEWAY_READ_CHUNK_SIZE = 4096
+
+# Seconds to wait before reopening a serial port that failed or was unplugged.
+GATEWAY_RECONNECT_DELAY = 5.0
+
+# Seconds a device (or device status) is served from the in-process registry before it is loaded again:
+# the longest an edit made by another process (the admin, the API) goes unseen by the gateway.
+GATEWAY_REGISTRY_TTL = 60.0
+
+# Maximum number of commands sent to one device and still waiting for their ACK.
+GATEWAY_INFLIGHT_WINDOW = 4
+
+# Seconds to wait for the ACK of a command before sending it again.
+GATEWAY_COMMAND_TIMEOUT = 2.0
+
+# Number of times a command is sent again after a timeout (or a BUSY answer) before giving up.
+GATEWAY_COMMAND_RETRIES = 2
+
+# Base delay in seconds before a retry, doubled at each attempt.
+GATEWAY_RETRY_BACKOFF = 0.5
+
+# Weighted fair queuing weights of the outbound command classes (see gateway.scheduler.CommandClass).
+# A class with twice the weight gets twice the share of a busy device.
+GATEWAY_SCHEDULER_WEIGHTS = {
+    "ACTUATOR": 8,
+    "HOUSEKEEPING": 2,
+    "TELEMETRY": 1,
+}
+
+# Maximum number of queued commands per device and class. Callers wait when it is full.
+GATEWAY_SCHEDULER_QUEUE_SIZE = 64
+
+# Seconds between two writes of the `last_seen` of the devices that answered without changing status.
+# A status change (ONLINE <-> OFFLINE) is always written right away.
+GATEWAY_LIVENESS_FLUSH_INTERVAL = 30.0
+
+# Heartbeat (PING) of the devices, see gateway.heartbeat.HeartbeatScheduler.
+GATEWAY_HEARTBEAT_ENABLED = True
+# Seconds between two pings of a new device, then adapted per device between the min and max intervals.
+GATEWAY_HEARTBEAT_INTERVAL = 60.0
+GATEWAY_HEARTBEAT_MIN_INTERVAL = 10.0
+GATEWAY_HEARTBEAT_MAX_INTERVAL = 600.0
+# Factor applied to the interval of a device after each answered ping.
+GATEWAY_HEARTBEAT_BACKOFF = 1.5
+# Random part of each interval (0.1 = +/- 10 %), so pings do not synchronize.
+GATEWAY_HEARTBEAT_JITTER = 0.1
+# Pings without answer in a row before a device is marked offline.
+GATEWAY_HEARTBEAT_MAX_MISSES = 3
+# Resolution of the heartbeat timing wheel, in seconds.
+GATEWAY_HEARTBEAT_TICK = 1.0
+
+# Push of the order language (LG_INIT) to the devices, see gateway.language.LanguageSync.
+GATEWAY_LANGUAGE_SYNC_ENABLED = True
+# Seconds between two checks for orders added, changed or removed since the last sync of each device.
+GATEWAY_LANGUAGE_SYNC_INTERVAL = 300.0
+
+# Durable outbound command queue, see gateway.outbound.OutboundJournal.
+# Seconds a write waits for others before they are committed together in one transaction.
+GATEWAY_OUTBOUND_COMMIT_INTERVAL = 0.02
+# Pending writes committed right away, without waiting for the interval.
+GATEWAY_OUTBOUND_COMMIT_SIZE = 256
+# Send again the commands still queued or sent (not acknowledged) when the gateway starts.
+GATEWAY_OUTBOUND_REPLAY_ENABLED = True
+# Days the acknowledged and failed commands are kept, deleted by the gateway. None: forever.
+GATEWAY_OUTBOUND_RETENTION_DAYS = 30
+# Seconds between two deletions of the finished commands older than GATEWAY_OUTBOUND_RETENTION_DAYS.
+GATEWAY_OUTBOUND_PRUNE_INTERVAL = 3600.0
+# Switch a SQLite database to WAL journaling at startup: commits no longer block the readers.
+GATEWAY_OUTBOUND_SQLITE_WAL = True
+
+# Multi-process gateway (`run_gateway --workers`), see hardware.supervisor.GatewaySupervisor.
+# Number of worker processes sharing the ports. None: one per CPU core but one, left to the database writer.
+GATEWAY_SUPERVISOR_WORKERS = None
+# Virtual nodes per worker on the consistent hashing ring of the device paths.
+GATEWAY_SUPERVISOR_RING_REPLICAS = 64
+# Maximum number of messages (batches of frames) waiting for the database writer process.
+GATEWAY_SUPERVISOR_QUEUE_SIZE = 1024
+# Seconds a worker waits for room in the full writer queue before dropping a batch of frames.
+GATEWAY_SUPERVISOR_QUEUE_TIMEOUT = 5.0
+# Seconds between two health reports of each process, and two publications of the health of all of them.
+GATEWAY_SUPERVISOR_HEALTH_INTERVAL = 5.0
+# Seconds without health report after which a process is considered stuck and terminated (then restarted).
+GATEWAY_SUPERVISOR_HEALTH_TIMEOUT = 30.0
+# JSON file where the supervisor publishes the health of its processes.
+GATEWAY_SUPERVISOR_HEALTH_PATH = PROJECT_ROOT_DIR / "gateway_health.json"
+# Seconds to wait before starting again a process that exited.
+GATEWAY_SUPERVISOR_RESTART_DELAY = 2.0
+# Seconds between two reloads of the devices, to rebalance the ports of the devices added, moved or removed.
+GATEWAY_SUPERVISOR_RESCAN_INTERVAL = 10.0
+# Seconds given to each process to stop before it is terminated.
+GATEWAY_SUPERVISOR_STOP_TIMEOUT = 10.0
@@ -0,0 +1,18 @@
+from gardeniq.settings.django.paths import PROJECT_ROOT_DIR
+
+__all__ = [
+    "PROTOCOL_METRICS_ENABLED",
+    "PROTOCOL_METRICS_PATH",
+    "PROTOCOL_METRICS_PUBLISH_INTERVAL",
+]
+
+# Per-stage timers and error counters of the frame pipeline, see hardware.protocols.metrics.
+# Disabled: the instrumented functions only check this flag.
+PROTOCOL_METRICS_ENABLED = False
+
+# File where the gateway publishes the snapshot of its metrics, read by the `protocol_metrics` command
+# and the admin API.
+PROTOCOL_METRICS_PATH = PROJECT_ROOT_DIR / "protocol_metrics.json"
+
+# Seconds between two snapshots published by the gateway.
+PROTOCOL_METRICS_PUBLISH_INTERVAL = 10.0
@@ -1,6 +1,9 @@
 from enum import Enum
 
-__all__ = ["DefaultStatus"]
+__all__ = [
+    "DEFAULT_STATUS",
+    "DefaultStatus",
+]
 
 
 class DefaultStatus(Enum):
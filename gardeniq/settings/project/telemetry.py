@@ -0,0 +1,58 @@
+__all__ = [
+    "TELEMETRY_BATCH_SIZE",
+    "TELEMETRY_BUFFER_POLICY",
+    "TELEMETRY_BUFFER_SIZE",
+    "TELEMETRY_FLUSH_INTERVAL_MS",
+    "TELEMETRY_PARTITIONS_AHEAD",
+    "TELEMETRY_PARTITION_INTERVAL",
+    "TELEMETRY_RETENTION_ANALYZE_MIN_ROWS",
+    "TELEMETRY_RETENTION_CHUNK_PAUSE",
+    "TELEMETRY_RETENTION_CHUNK_SIZE",
+    "TELEMETRY_RETENTION_DAYS",
+    "TELEMETRY_RETENTION_VACUUM_RATIO",
+    "TELEMETRY_SERIES_DEFAULT_PERIOD",
+    "TELEMETRY_SERIES_DEFAULT_POINTS",
+    "TELEMETRY_SERIES_MAX_POINTS",
+    "TELEMETRY_SERIES_MAX_ROWS",
+]
+
+# Time partitions of the sensor readings on PostgreSQL ("day" or "month"), see telemetry.partitions.
+# Monthly partitions suit a few hundred sensors sampled every 10 seconds, daily ones a larger fleet.
+TELEMETRY_PARTITION_INTERVAL = "month"
+# Partitions created ahead of the current one by the `telemetry_partitions` command.
+TELEMETRY_PARTITIONS_AHEAD = 2
+
+# Buffered ingestion of the readings, see telemetry.ingest.TelemetryWriter.
+# Rows per INSERT: the buffer is written as soon as that many readings are waiting...
+TELEMETRY_BATCH_SIZE = 500
+# ... or when the oldest one waited that long (milliseconds).
+TELEMETRY_FLUSH_INTERVAL_MS = 1000
+# Most readings kept in memory while the database is slow or unavailable.
+TELEMETRY_BUFFER_SIZE = 50_000
+# When the buffer is full: "block" (write it in the caller thread first), "drop_oldest" or "drop_newest".
+TELEMETRY_BUFFER_POLICY = "block"
+
+# Series of the charts, see telemetry.series (GET /api/telemetry/sensors/{id}/series/).
+# Range of a query without `from`, in seconds before `to`.
+TELEMETRY_SERIES_DEFAULT_PERIOD = 24 * 60 * 60
+# Points returned without `points`, and the most points a query may ask.
+TELEMETRY_SERIES_DEFAULT_POINTS = 500
+TELEMETRY_SERIES_MAX_POINTS = 5000
+# Most rows read for a query: longer ranges are read from a coarser rollup level.
+TELEMETRY_SERIES_MAX_ROWS = 20_000
+
+# Retention of the telemetry, see telemetry.retention (`telemetry_retention` command).
+# Days each level is kept when the RetentionPolicy of the sensor category does not say (None: forever).
+TELEMETRY_RETENTION_DAYS = {
+    "raw": 30,
+    "minute": 90,
+    "hour": 2 * 365,
+    "day": None,
+}
+# Rows deleted per transaction, and the pause between two transactions (seconds) to let the other writers in.
+TELEMETRY_RETENTION_CHUNK_SIZE = 5000
+TELEMETRY_RETENTION_CHUNK_PAUSE = 0.05
+# Rows deleted from a table before its statistics are refreshed (ANALYZE).
+TELEMETRY_RETENTION_ANALYZE_MIN_ROWS = 10_000
+# Share of free pages of the SQLite database file before it is rebuilt (VACUUM locks the whole database).
+TELEMETRY_RETENTION_VACUUM_RATIO = 0.25
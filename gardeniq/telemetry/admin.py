@@ -1,3 +1,26 @@
-# from django.contrib import admin
+from django.contrib import admin
 
-# Register your models here.
+from gardeniq.telemetry.models import LatestReading
+from gardeniq.telemetry.models import RetentionPolicy
+
+
+@admin.register(RetentionPolicy)
+class RetentionPolicyAdmin(admin.ModelAdmin):
+    """Admin interface for the RetentionPolicy model."""
+
+    list_display = ("id", "category", "raw_days", "minute_days", "hour_days", "day_days")
+    list_select_related = ("category",)
+
+
+@admin.register(LatestReading)
+class LatestReadingAdmin(admin.ModelAdmin):
+    """Read-only admin interface for the LatestReading model, written by the ingestion."""
+
+    list_display = ("sensor", "time", "value")
+    list_select_related = ("sensor",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from gardeniq.telemetry.views import LatestReadingsAPIView
+from gardeniq.telemetry.views import SensorSeriesAPIView
+
+__all__ = ["urlpatterns"]
+
+urlpatterns = [
+    path("telemetry/latest/", LatestReadingsAPIView.as_view(), name="telemetry-latest"),
+    path("telemetry/sensors/<int:pk>/series/", SensorSeriesAPIView.as_view(), name="telemetry-sensor-series"),
+]
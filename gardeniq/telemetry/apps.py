@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TelemetryConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "gardeniq.telemetry"
+
+    def ready(self) -> None:
+        # Keep the order -> sensor cache of the ingestion in sync with the database.
+        from . import signals  # noqa: F401
@@ -0,0 +1,64 @@
+"""
+Largest-Triangle-Three-Buckets (LTTB) downsampling of a time series, with NumPy.
+
+LTTB keeps the first and last points and splits the others into `threshold - 2` buckets of equal
+count. From each bucket it keeps the point forming the largest triangle with the point kept in the
+previous bucket and the average of the next bucket: peaks and troughs survive, unlike a plain
+average or a decimation. See S. Steinarsson, "Downsampling Time Series for Visual Representation".
+
+The buckets are walked in order (each choice depends on the previous one), the areas of a bucket
+and the averages of every bucket are computed with vectorized operations.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce a series to `threshold` points.
+
+    Args:
+        x (np.ndarray): The times, increasing.
+        y (np.ndarray): The values, same length as `x`.
+        threshold (int): Number of points kept. The series is returned as is if it has at most
+            `threshold` points or if `threshold` is lower than 3.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The times and values of the points kept, in order.
+
+    Raises:
+        ValueError: If `x` and `y` have different lengths.
+    """
+    if len(x) != len(y):
+        raise ValueError(f"x and y have different lengths: {len(x)} and {len(y)}")
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    # Times relative to the first one: smaller products in the areas.
+    fx = (x - x[0]).astype(np.float64)
+    fy = y.astype(np.float64)
+
+    # Bucket i holds the points edges[i] to edges[i + 1] (excluded), each at least one point.
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    starts, ends = edges[:-1], edges[1:]
+    sum_x = np.concatenate(([0.0], np.cumsum(fx)))
+    sum_y = np.concatenate(([0.0], np.cumsum(fy)))
+    counts = ends - starts
+    # The point after bucket i is the average of bucket i + 1, the last point for the last bucket.
+    next_x = np.append(((sum_x[ends] - sum_x[starts]) / counts)[1:], fx[-1])
+    next_y = np.append(((sum_y[ends] - sum_y[starts]) / counts)[1:], fy[-1])
+
+    kept = np.empty(threshold, dtype=np.intp)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = starts[i], ends[i]
+        ax, ay = fx[a], fy[a]
+        # Twice the area of the triangles (a, point, next average).
+        areas = np.abs((ax - next_x[i]) * (fy[start:end] - ay) - (ax - fx[start:end]) * (next_y[i] - ay))
+        a = start + int(np.argmax(areas))
+        kept[i + 1] = a
+    return x[kept], y[kept]
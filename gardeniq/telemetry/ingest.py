@@ -0,0 +1,313 @@
+"""
+Buffered ingestion of the sensor readings answered by the devices.
+
+The frame handler hands every ACK carrying data to a TelemetryWriter (`add_frame`): the value is
+resolved to its sensor (the order of the frame, see OrderSensors) and kept in a bounded in-memory
+buffer. The buffer is written with one INSERT per `batch_size` rows, when `batch_size` rows
+are waiting or the oldest one waited `flush_interval_ms` (`flush_due`), and on shutdown (`flush`):
+the cost of the ingestion depends on the number of batches, not on the number of readings.
+The readings actually inserted (a reading of a sensor already stored at the same millisecond is
+a duplicate, skipped) are merged into the rollups (see telemetry.rollups) and the latest reading of
+each sensor (see telemetry.latest) in the same transaction, so the three always agree.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import deque
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from django.conf import settings
+from django.db import connection as default_connection
+from django.db import transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import OkData
+from gardeniq.hardware.protocols.metrics import instrumented
+from gardeniq.orderlg.models import Order
+
+from .latest import update_latest
+from .models import SensorReading
+from .rollups import update_rollups
+
+logger = logging.getLogger(__name__)
+
+# What `add` does when the buffer is full.
+BLOCK = "block"  # Flush in the caller thread first (backpressure), drop the new reading if the flush fails.
+DROP_OLDEST = "drop_oldest"  # Drop the oldest buffered reading.
+DROP_NEWEST = "drop_newest"  # Drop the new reading.
+BUFFER_POLICIES = (BLOCK, DROP_OLDEST, DROP_NEWEST)
+
+# Leading number of a text value, e.g. "24.5" in "24.5C".
+NUMBER_PATTERN = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+# (sensor_id, ts, value)
+Row = Tuple[int, int, float]
+
+
+def parse_value(data: OkData) -> Optional[float]:
+    """Return the numeric value of the data of a frame, None if it has none (e.g. "OPEN")."""
+    if isinstance(data, bool):
+        return float(data)
+    if isinstance(data, (int, float)):
+        return float(data)
+    match = NUMBER_PATTERN.match(data.strip())
+    return float(match.group()) if match else None
+
+
+def insert_readings(
+    rows: List[Row],
+    batch_size: int,
+    connection: BaseDatabaseWrapper = default_connection,
+) -> List[Row]:
+    """
+    Insert readings, `batch_size` rows per query, skipping the ones already stored (same sensor and millisecond).
+
+    Returns:
+        List[Row]: The rows inserted: the first of the duplicates of a batch, none of the rows already stored.
+    """
+    quote = connection.ops.quote_name
+    table = quote(SensorReading._meta.db_table)
+    columns = ", ".join(quote(column) for column in ("sensor_id", "ts", "value"))
+    inserted: List[Row] = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start : start + batch_size]
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) VALUES {', '.join(['(%s, %s, %s)'] * len(chunk))} "
+                f"ON CONFLICT ({quote('sensor_id')}, {quote('ts')}) DO NOTHING RETURNING {columns}",
+                [param for row in chunk for param in row],
+            )
+            inserted.extend(cursor.fetchall())
+    return inserted
+
+
+class OrderSensors:
+    """
+    In-process cache of the sensor measured by each order (by pk, the command id of its frames).
+
+    Only the getter orders of a sensor measure it: the other orders map to None. An order is loaded
+    on first use, then served from memory. Entries are dropped by the `post_save`/`post_delete`
+    signals of Order (see `gardeniq.telemetry.signals`); call `clear` after writes done by another process.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sensors: Dict[int, Optional[int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, order_id: int) -> Optional[int]:
+        """Return the pk of the sensor measured by the order, None if it measures no sensor (or does not exist)."""
+        try:
+            sensor_id = self._sensors[order_id]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            return sensor_id
+
+        self.misses += 1
+        sensor_id = (
+            Order.objects.filter(pk=order_id, action_type="get", sensor__isnull=False)
+            .values_list("sensor_id", flat=True)
+            .first()
+        )
+        with self._lock:
+            self._sensors[order_id] = sensor_id
+        return sensor_id
+
+    def forget(self, order_id: int) -> None:
+        with self._lock:
+            self._sensors.pop(order_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sensors.clear()
+
+
+order_sensors = OrderSensors()
+
+
+class TelemetryWriter:
+    """
+    Bounded buffer of sensor readings, written to the database in batches.
+
+    `add` only appends to the buffer; the writes happen in `flush_due` (called by the frame handler
+    after each batch and by the periodic flushers of the gateway) and `flush` (on shutdown), in the
+    thread of the caller. A failed write keeps its rows in the buffer, and the next attempt waits
+    `flush_interval_ms`. When the database is too slow and the buffer is full, `policy` decides:
+    block the producer while the buffer is written, or drop a reading.
+
+    Counters: `buffered` (readings accepted), `flushed` (rows written), `dropped` (readings lost to a
+    full buffer), `skipped` (data frames without a sensor or a numeric value), `duplicates` (readings
+    already stored), `flushes`, `failures`.
+
+    Args:
+        batch_size (int, optional): Rows per INSERT, and rows waiting that trigger a flush.
+            Defaults to settings.TELEMETRY_BATCH_SIZE.
+        flush_interval_ms (int, optional): Longest wait of a buffered reading before a flush, in
+            milliseconds. Defaults to settings.TELEMETRY_FLUSH_INTERVAL_MS.
+        capacity (int, optional): Most readings kept in memory. Defaults to settings.TELEMETRY_BUFFER_SIZE.
+        policy (str, optional): One of BUFFER_POLICIES. Defaults to settings.TELEMETRY_BUFFER_POLICY.
+
+    Raises:
+        ValueError: If the policy is unknown.
+    """
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None,
+        capacity: Optional[int] = None,
+        policy: Optional[str] = None,
+    ) -> None:
+        self.batch_size = batch_size or settings.TELEMETRY_BATCH_SIZE
+        self.flush_interval_ms = (
+            flush_interval_ms if flush_interval_ms is not None else settings.TELEMETRY_FLUSH_INTERVAL_MS
+        )
+        self.capacity = max(capacity or settings.TELEMETRY_BUFFER_SIZE, self.batch_size)
+        self.policy = policy or settings.TELEMETRY_BUFFER_POLICY
+        if self.policy not in BUFFER_POLICIES:
+            raise ValueError(f"Unknown telemetry buffer policy: {self.policy}, expected one of {BUFFER_POLICIES}")
+
+        self._lock = threading.Lock()
+        self._buffer: Deque[Row] = deque()
+        # Monotonic time of the oldest buffered reading, and of the next write allowed after a failure.
+        self._oldest = 0.0
+        self._retry_at = 0.0
+        self.buffered = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.duplicates = 0
+        self.flushes = 0
+        self.failures = 0
+
+    @property
+    def flush_interval(self) -> float:
+        """Seconds between two flushes, for the periodic flushers."""
+        return self.flush_interval_ms / 1000
+
+    @property
+    def pending(self) -> int:
+        """Number of readings not written yet."""
+        return len(self._buffer)
+
+    def add_frame(self, frame: Frame) -> bool:
+        """
+        Buffer the value answered by a device to a getter order of a sensor, at the time the frame
+        was received (now if the transport did not stamp it).
+
+        Returns:
+            bool: Whether the reading was buffered.
+        """
+        sensor_id = order_sensors.get(frame.command_id)
+        value = parse_value(frame.ok_data) if sensor_id is not None else None
+        if value is None:
+            self.skipped += 1
+            logger.debug(f"Data of command {frame.command_id} from {frame.device_uid} is not a sensor reading")
+            return False
+        return self.add(sensor_id, value, ts=frame.received_ts)
+
+    def add(self, sensor_id: int, value: float, ts: Optional[int] = None) -> bool:
+        """
+        Buffer a reading.
+
+        Args:
+            sensor_id (int): The sensor measured.
+            value (float): The value measured.
+            ts (int, optional): Time of the measure, epoch in milliseconds. Defaults to now.
+
+        Returns:
+            bool: Whether the reading was buffered (False if dropped by the policy).
+        """
+        row = (sensor_id, ts if ts is not None else time.time_ns() // 1_000_000, value)
+        if self.policy == BLOCK and len(self._buffer) >= self.capacity and time.monotonic() >= self._retry_at:
+            self.flush()
+
+        with self._lock:
+            if len(self._buffer) >= self.capacity:
+                if self.policy != DROP_OLDEST:
+                    self.dropped += 1
+                    return False
+                self._buffer.popleft()
+                self.dropped += 1
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append(row)
+            self.buffered += 1
+        return True
+
+    def flush_due(self) -> int:
+        """Flush if `batch_size` readings are waiting or the oldest one waited `flush_interval_ms`."""
+        if not self._buffer:
+            return 0
+        now = time.monotonic()
+        if now < self._retry_at:
+            return 0
+        if len(self._buffer) < self.batch_size and (now - self._oldest) * 1000 < self.flush_interval_ms:
+            return 0
+        return self.flush()
+
+    @instrumented("telemetry_flush")
+    def flush(self) -> int:
+        """
+        Write the buffered readings, `batch_size` rows per query, merge the ones inserted into the
+        rollups and the latest readings, in one transaction.
+
+        Returns:
+            int: The number of readings inserted (0 if the write failed, the readings stay buffered).
+        """
+        with self._lock:
+            rows: List[Row] = list(self._buffer)
+            self._buffer.clear()
+        if not rows:
+            return 0
+
+        try:
+            with transaction.atomic():
+                # A reading already stored (same sensor and millisecond) is the same reading: only the
+                # rows inserted are merged, the rollups stay equal to what `rebuild_rollups` computes.
+                inserted = insert_readings(rows, self.batch_size)
+                update_rollups(inserted)
+                update_latest(inserted)
+        except Exception:
+            self.failures += 1
+            logger.exception(f"Failed to write {len(rows)} sensor readings, kept for the next flush")
+            self._restore(rows)
+            return 0
+
+        self.flushes += 1
+        self.flushed += len(inserted)
+        self.duplicates += len(rows) - len(inserted)
+        return len(inserted)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self.pending,
+            "buffered": self.buffered,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "skipped": self.skipped,
+            "duplicates": self.duplicates,
+            "flushes": self.flushes,
+            "failures": self.failures,
+        }
+
+    def _restore(self, rows: List[Row]) -> None:
+        # Put the rows back before the readings buffered meanwhile, dropping the oldest beyond the capacity.
+        with self._lock:
+            self._buffer.extendleft(reversed(rows))
+            overflow = len(self._buffer) - self.capacity
+            for _ in range(max(overflow, 0)):
+                self._buffer.popleft()
+            self.dropped += max(overflow, 0)
+            self._oldest = time.monotonic()
+            self._retry_at = self._oldest + self.flush_interval
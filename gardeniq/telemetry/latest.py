@@ -0,0 +1,67 @@
+"""
+Latest reading of each sensor (LatestReading), kept by the ingestion.
+
+`update_latest` upserts the newest reading of each sensor of a batch with one statement per
+`LATEST_UPSERT_BATCH_SIZE` sensors, in the transaction of the readings: a reading older than the
+stored one (a late batch) does not replace it.
+"""
+
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from django.db import connection as default_connection
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+from .models import LatestReading
+
+# Sensors per INSERT statement (3 parameters each).
+LATEST_UPSERT_BATCH_SIZE = 500
+
+# (sensor_id, ts, value)
+Row = Tuple[int, int, float]
+
+
+def newest(rows: Iterable[Row]) -> Dict[int, Tuple[int, float]]:
+    """Return the newest (ts, value) of each sensor of the rows."""
+    latest: Dict[int, Tuple[int, float]] = {}
+    for sensor_id, ts, value in rows:
+        current = latest.get(sensor_id)
+        if current is None or ts >= current[0]:
+            latest[sensor_id] = (ts, value)
+    return latest
+
+
+def update_latest(rows: List[Row], connection: BaseDatabaseWrapper = default_connection) -> None:
+    """Store the newest reading of each sensor of a batch, unless a newer one is already stored."""
+    latest = list(newest(rows).items())
+    if not latest:
+        return
+    quote = connection.ops.quote_name
+    table = quote(LatestReading._meta.db_table)
+    sensor_id, ts, value = quote("sensor_id"), quote("ts"), quote("value")
+    with connection.cursor() as cursor:
+        for start in range(0, len(latest), LATEST_UPSERT_BATCH_SIZE):
+            chunk = latest[start : start + LATEST_UPSERT_BATCH_SIZE]
+            params: List = []
+            for sensor, (timestamp, reading) in chunk:
+                params.extend([sensor, timestamp, reading])
+            cursor.execute(
+                f"INSERT INTO {table} ({sensor_id}, {ts}, {value}) "
+                f"VALUES {', '.join(['(%s, %s, %s)'] * len(chunk))} "
+                f"ON CONFLICT ({sensor_id}) DO UPDATE SET {ts} = EXCLUDED.{ts}, {value} = EXCLUDED.{value} "
+                f"WHERE EXCLUDED.{ts} >= {table}.{ts}",
+                params,
+            )
+
+
+def latest_readings(device_id: Optional[int] = None, sensor_ids: Optional[Iterable[int]] = None):
+    """Latest readings of the sensors of a device and/or of a list of sensors, by sensor pk, with one query."""
+    queryset = LatestReading.objects.order_by("sensor_id")
+    if device_id is not None:
+        queryset = queryset.filter(sensor__device_id=device_id)
+    if sensor_ids is not None:
+        queryset = queryset.filter(sensor_id__in=list(sensor_ids))
+    return queryset
@@ -0,0 +1,27 @@
+from django.core.management import BaseCommand
+
+from gardeniq.telemetry.partitions import ensure_partitions
+from gardeniq.telemetry.partitions import list_partitions
+from gardeniq.telemetry.partitions import supports_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the time partitions of the sensor readings (PostgreSQL only) up to "
+        "settings.TELEMETRY_PARTITIONS_AHEAD partitions ahead. Run it daily, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--list", action="store_true", help="List the existing partitions.")
+
+    def handle(self, *args, **options):
+        if not supports_partitions():
+            self.stdout.write("The database has no table partitions: nothing to do.")
+            return
+
+        for partition in ensure_partitions():
+            self.stdout.write(self.style.SUCCESS(f"Partition {partition.name} created"))
+
+        if options["list"]:
+            for partition in list_partitions():
+                self.stdout.write(f"{partition.name}\t{partition.start.isoformat()}\t{partition.end.isoformat()}")
@@ -0,0 +1,26 @@
+from django.core.management import BaseCommand
+
+from gardeniq.telemetry.retention import apply_retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the expired telemetry (raw readings and rollups) by the retention policies of the sensor "
+        "categories, then ANALYZE/VACUUM when worth it. "
+        "Run it daily, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--no-compact", action="store_true", help="Do not run ANALYZE/VACUUM afterwards.")
+
+    def handle(self, *args, **options):
+        report = apply_retention(compaction=not options["no_compact"])
+        for name in report.dropped_partitions:
+            self.stdout.write(f"Partition {name} dropped")
+        for level, deleted in report.deleted.items():
+            self.stdout.write(f"{level}: {deleted} rows deleted")
+        if report.analyzed:
+            self.stdout.write(f"Analyzed: {', '.join(report.analyzed)}")
+        if report.vacuumed:
+            self.stdout.write("Database vacuumed")
+        self.stdout.write(self.style.SUCCESS("Telemetry retention applied"))
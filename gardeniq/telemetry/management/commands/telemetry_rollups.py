@@ -0,0 +1,42 @@
+from django.core.management import BaseCommand
+from django.core.management import CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from gardeniq.telemetry.rollups import rebuild_rollups
+
+
+def parse_moment(value: str):
+    moment = parse_datetime(value) if "T" in value or " " in value else parse_datetime(f"{value}T00:00")
+    if moment is None:
+        raise CommandError(f"Invalid date: {value}, expected YYYY-MM-DD or an ISO 8601 datetime")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the minute, hour and day rollups of the sensor readings from the raw readings, "
+        "from --from to --to widened to whole days (UTC). The days whose raw readings may have expired "
+        "(see telemetry_retention) keep their rollups."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="start", required=True, help="Start date, e.g. 2026-10-01.")
+        parser.add_argument("--to", dest="end", required=True, help="End date (excluded), e.g. 2026-11-01.")
+        parser.add_argument(
+            "--sensor",
+            dest="sensors",
+            type=int,
+            action="append",
+            help="Pk of a sensor to rebuild (repeatable). Defaults to the sensors with readings in the range.",
+        )
+
+    def handle(self, *args, **options):
+        start, end = parse_moment(options["start"]), parse_moment(options["end"])
+        if start >= end:
+            raise CommandError("--from must be before --to")
+
+        total = rebuild_rollups(start, end, options["sensors"])
+        self.stdout.write(self.style.SUCCESS(f"Rollups rebuilt from {total} readings"))
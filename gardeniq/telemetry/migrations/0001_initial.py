@@ -0,0 +1,78 @@
+# Generated by Django 6.0.6 on 2026-10-17 04:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The storage layout of the readings depends on the database, see SensorReading.
+SQLITE_TABLE = """
+CREATE TABLE "telemetry_sensorreading" (
+    "sensor_id" bigint NOT NULL REFERENCES "hardware_sensor" ("id") DEFERRABLE INITIALLY DEFERRED,
+    "ts" bigint NOT NULL,
+    "value" real NOT NULL,
+    PRIMARY KEY ("sensor_id", "ts")
+) WITHOUT ROWID
+"""
+
+POSTGRESQL_TABLE = [
+    """
+    CREATE TABLE "telemetry_sensorreading" (
+        "sensor_id" bigint NOT NULL,
+        "ts" bigint NOT NULL,
+        "value" double precision NOT NULL,
+        CONSTRAINT "telemetry_sensorreading_pk" PRIMARY KEY ("sensor_id", "ts") INCLUDE ("value")
+    ) PARTITION BY RANGE ("ts")
+    """,
+    """
+    ALTER TABLE "telemetry_sensorreading" ADD CONSTRAINT "telemetry_sensorreading_sensor_id_fk"
+        FOREIGN KEY ("sensor_id") REFERENCES "hardware_sensor" ("id") DEFERRABLE INITIALLY DEFERRED
+    """,
+    'CREATE TABLE "telemetry_sensorreading_default" PARTITION OF "telemetry_sensorreading" DEFAULT',
+]
+
+
+def create_reading_table(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(SQLITE_TABLE)
+    elif vendor == "postgresql":
+        for statement in POSTGRESQL_TABLE:
+            schema_editor.execute(statement)
+    else:
+        schema_editor.create_model(apps.get_model("telemetry", "SensorReading"))
+
+
+def drop_reading_table(apps, schema_editor):
+    # Drops the partitions along on PostgreSQL.
+    schema_editor.delete_model(apps.get_model("telemetry", "SensorReading"))
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('hardware', '0004_outboundcommand'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='SensorReading',
+                    fields=[
+                        ('pk', models.CompositePrimaryKey('sensor_id', 'ts', blank=True, editable=False, primary_key=True, serialize=False)),
+                        ('ts', models.BigIntegerField(help_text='Time of the measure, epoch in milliseconds.', verbose_name='timestamp')),
+                        ('value', models.FloatField(verbose_name='value')),
+                        ('sensor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='readings', to='hardware.sensor', verbose_name='sensor')),
+                    ],
+                    options={
+                        'verbose_name': 'sensor reading',
+                        'verbose_name_plural': 'sensor readings',
+                    },
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_reading_table, drop_reading_table),
+            ],
+        ),
+    ]
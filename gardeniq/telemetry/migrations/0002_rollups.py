@@ -0,0 +1,69 @@
+# Generated by Django 6.0.6 on 2026-10-17 04:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hardware', '0004_outboundcommand'),
+        ('telemetry', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DayRollup',
+            fields=[
+                ('pk', models.CompositePrimaryKey('sensor_id', 'bucket', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('bucket', models.BigIntegerField(help_text='Start of the bucket, epoch in milliseconds.', verbose_name='bucket')),
+                ('count', models.PositiveIntegerField(verbose_name='count')),
+                ('sum', models.FloatField(verbose_name='sum')),
+                ('min', models.FloatField(verbose_name='minimum')),
+                ('max', models.FloatField(verbose_name='maximum')),
+                ('last', models.FloatField(verbose_name='last value')),
+                ('last_ts', models.BigIntegerField(help_text='Time of the last value.', verbose_name='last timestamp')),
+                ('sensor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)ss', to='hardware.sensor', verbose_name='sensor')),
+            ],
+            options={
+                'verbose_name': 'day rollup',
+                'verbose_name_plural': 'day rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='HourRollup',
+            fields=[
+                ('pk', models.CompositePrimaryKey('sensor_id', 'bucket', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('bucket', models.BigIntegerField(help_text='Start of the bucket, epoch in milliseconds.', verbose_name='bucket')),
+                ('count', models.PositiveIntegerField(verbose_name='count')),
+                ('sum', models.FloatField(verbose_name='sum')),
+                ('min', models.FloatField(verbose_name='minimum')),
+                ('max', models.FloatField(verbose_name='maximum')),
+                ('last', models.FloatField(verbose_name='last value')),
+                ('last_ts', models.BigIntegerField(help_text='Time of the last value.', verbose_name='last timestamp')),
+                ('sensor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)ss', to='hardware.sensor', verbose_name='sensor')),
+            ],
+            options={
+                'verbose_name': 'hour rollup',
+                'verbose_name_plural': 'hour rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='MinuteRollup',
+            fields=[
+                ('pk', models.CompositePrimaryKey('sensor_id', 'bucket', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('bucket', models.BigIntegerField(help_text='Start of the bucket, epoch in milliseconds.', verbose_name='bucket')),
+                ('count', models.PositiveIntegerField(verbose_name='count')),
+                ('sum', models.FloatField(verbose_name='sum')),
+                ('min', models.FloatField(verbose_name='minimum')),
+                ('max', models.FloatField(verbose_name='maximum')),
+                ('last', models.FloatField(verbose_name='last value')),
+                ('last_ts', models.BigIntegerField(help_text='Time of the last value.', verbose_name='last timestamp')),
+                ('sensor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)ss', to='hardware.sensor', verbose_name='sensor')),
+            ],
+            options={
+                'verbose_name': 'minute rollup',
+                'verbose_name_plural': 'minute rollups',
+            },
+        ),
+    ]
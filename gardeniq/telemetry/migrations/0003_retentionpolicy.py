@@ -0,0 +1,30 @@
+# Generated by Django 6.0.6 on 2026-10-17 04:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hardware', '0004_outboundcommand'),
+        ('telemetry', '0002_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RetentionPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('raw_days', models.PositiveIntegerField(blank=True, help_text='Days the raw readings are kept. Empty: the default retention.', null=True, verbose_name='raw readings retention')),
+                ('minute_days', models.PositiveIntegerField(blank=True, help_text='Days the minute rollups are kept. Empty: the default retention.', null=True, verbose_name='minute rollups retention')),
+                ('hour_days', models.PositiveIntegerField(blank=True, help_text='Days the hour rollups are kept. Empty: the default retention.', null=True, verbose_name='hour rollups retention')),
+                ('day_days', models.PositiveIntegerField(blank=True, help_text='Days the day rollups are kept. Empty: the default retention.', null=True, verbose_name='day rollups retention')),
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='retention_policy', to='hardware.sensorcategory', verbose_name='sensor category')),
+            ],
+            options={
+                'verbose_name': 'retention policy',
+                'verbose_name_plural': 'retention policies',
+            },
+        ),
+    ]
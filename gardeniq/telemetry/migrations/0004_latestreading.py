@@ -0,0 +1,39 @@
+# Generated by Django 6.0.6 on 2026-10-17 05:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_latest_readings(apps, schema_editor):
+    SensorReading = apps.get_model("telemetry", "SensorReading")
+    LatestReading = apps.get_model("telemetry", "LatestReading")
+    sensor_ids = SensorReading.objects.values_list("sensor_id", flat=True).distinct()
+    latest = []
+    for sensor_id in sensor_ids:
+        ts, value = SensorReading.objects.filter(sensor_id=sensor_id).order_by("-ts").values_list("ts", "value")[0]
+        latest.append(LatestReading(sensor_id=sensor_id, ts=ts, value=value))
+    LatestReading.objects.bulk_create(latest, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hardware', '0004_outboundcommand'),
+        ('telemetry', '0003_retentionpolicy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatestReading',
+            fields=[
+                ('sensor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='latest_reading', serialize=False, to='hardware.sensor', verbose_name='sensor')),
+                ('ts', models.BigIntegerField(help_text='Time of the measure, epoch in milliseconds.', verbose_name='timestamp')),
+                ('value', models.FloatField(verbose_name='value')),
+            ],
+            options={
+                'verbose_name': 'latest reading',
+                'verbose_name_plural': 'latest readings',
+            },
+        ),
+        migrations.RunPython(fill_latest_readings, migrations.RunPython.noop),
+    ]
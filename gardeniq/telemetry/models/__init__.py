@@ -0,0 +1,7 @@
+from .latest import LatestReading
+from .reading import SensorReading
+from .retention import RetentionPolicy
+from .rollup import DayRollup
+from .rollup import HourRollup
+from .rollup import MinuteRollup
+from .rollup import Rollup
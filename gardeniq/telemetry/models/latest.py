@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from django.db import models
+
+from gardeniq.hardware.models import Sensor
+
+from ..timestamps import to_datetime
+
+
+class LatestReading(models.Model):
+    """
+    The latest reading of each sensor, denormalised from SensorReading: one row per sensor, written
+    by the ingestion in the transaction of the readings (see telemetry.latest). The current values
+    of any number of sensors are read with one query, without scanning the readings.
+    """
+
+    sensor = models.OneToOneField(
+        Sensor,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="latest_reading",
+        verbose_name="sensor",
+    )
+    ts = models.BigIntegerField(verbose_name="timestamp", help_text="Time of the measure, epoch in milliseconds.")
+    value = models.FloatField(verbose_name="value")
+
+    class Meta:
+        verbose_name = "latest reading"
+        verbose_name_plural = "latest readings"
+
+    def __str__(self) -> str:
+        return f"Sensor {self.sensor_id} : {self.time.isoformat()} : {self.value}"
+
+    @property
+    def time(self) -> datetime:
+        return to_datetime(self.ts)
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from django.db import models
+
+from gardeniq.hardware.models import Sensor
+
+from ..timestamps import to_datetime
+from ..timestamps import to_timestamp
+
+
+class SensorReadingQuerySet(models.QuerySet):
+    def between(self, sensor_id: int, start: datetime, end: datetime) -> "SensorReadingQuerySet":
+        """Readings of one sensor from `start` (included) to `end` (excluded), oldest first."""
+        return self.filter(sensor_id=sensor_id, ts__gte=to_timestamp(start), ts__lt=to_timestamp(end)).order_by("ts")
+
+
+class SensorReading(models.Model):
+    """
+    A value measured by a sensor. `ts` is the time of the measure in epoch milliseconds (see telemetry.timestamps).
+
+    The primary key (sensor, ts) is the only index: the readings of one sensor over a time range are
+    consecutive entries, found in O(log n) whatever the size of the table. Two readings of a sensor
+    at the same millisecond are the same reading.
+
+    Storage layout (see migration 0001_initial):
+      - SQLite: a WITHOUT ROWID table, stored in primary key order: the table is the index, and a range
+        scan reads consecutive pages.
+      - PostgreSQL: a table partitioned by range of `ts` (see telemetry.partitions), the primary key
+        index includes `value` so range scans are index-only.
+    """
+
+    pk = models.CompositePrimaryKey("sensor_id", "ts")
+    sensor = models.ForeignKey(
+        Sensor,
+        on_delete=models.CASCADE,
+        related_name="readings",
+        verbose_name="sensor",
+    )
+    ts = models.BigIntegerField(verbose_name="timestamp", help_text="Time of the measure, epoch in milliseconds.")
+    value = models.FloatField(verbose_name="value")
+
+    objects = SensorReadingQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "sensor reading"
+        verbose_name_plural = "sensor readings"
+
+    def __str__(self) -> str:
+        return f"Sensor {self.sensor_id} : {self.time.isoformat()} : {self.value}"
+
+    @property
+    def time(self) -> datetime:
+        return to_datetime(self.ts)
+
+    @time.setter
+    def time(self, moment: datetime) -> None:
+        self.ts = to_timestamp(moment)
@@ -0,0 +1,61 @@
+from typing import Optional
+
+from django.conf import settings
+from django.db import models
+
+from gardeniq.hardware.models import SensorCategory
+
+
+class RetentionPolicy(models.Model):
+    """
+    How long the telemetry of the sensors of a category is kept, per level: the raw readings and
+    each rollup level (see telemetry.retention). An empty duration falls back to
+    settings.TELEMETRY_RETENTION_DAYS; a category without policy uses that setting for every level.
+    """
+
+    category = models.OneToOneField(
+        SensorCategory,
+        on_delete=models.CASCADE,
+        related_name="retention_policy",
+        verbose_name="sensor category",
+    )
+    raw_days = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="raw readings retention",
+        help_text="Days the raw readings are kept. Empty: the default retention.",
+    )
+    minute_days = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="minute rollups retention",
+        help_text="Days the minute rollups are kept. Empty: the default retention.",
+    )
+    hour_days = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="hour rollups retention",
+        help_text="Days the hour rollups are kept. Empty: the default retention.",
+    )
+    day_days = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="day rollups retention",
+        help_text="Days the day rollups are kept. Empty: the default retention.",
+    )
+
+    class Meta:
+        verbose_name = "retention policy"
+        verbose_name_plural = "retention policies"
+
+    def __str__(self) -> str:
+        return f"Retention of {self.category}"
+
+    def days(self, level: str) -> Optional[int]:
+        """Days the rows of a level ("raw", "minute", "hour" or "day") are kept, None to keep them forever."""
+        days = getattr(self, f"{level}_days")
+        return days if days is not None else default_retention_days(level)
+
+
+def default_retention_days(level: str) -> Optional[int]:
+    return settings.TELEMETRY_RETENTION_DAYS.get(level)
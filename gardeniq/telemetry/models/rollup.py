@@ -0,0 +1,87 @@
+from datetime import datetime
+from typing import Optional
+
+from django.db import models
+
+from gardeniq.hardware.models import Sensor
+
+from ..timestamps import DAY_MS
+from ..timestamps import HOUR_MS
+from ..timestamps import MINUTE_MS
+from ..timestamps import to_datetime
+from ..timestamps import to_timestamp
+
+
+class RollupQuerySet(models.QuerySet):
+    def between(self, sensor_id: int, start: datetime, end: datetime) -> "RollupQuerySet":
+        """Buckets of one sensor starting from `start` (included) to `end` (excluded), oldest first."""
+        return self.filter(sensor_id=sensor_id, bucket__gte=to_timestamp(start), bucket__lt=to_timestamp(end)).order_by(
+            "bucket"
+        )
+
+
+class Rollup(models.Model):
+    """
+    Aggregate of the readings of a sensor over a time bucket of `interval` milliseconds.
+
+    `bucket` is the start of the bucket in epoch milliseconds. The aggregates are mergeable, so a
+    bucket is updated in place by each batch of readings (see telemetry.rollups): `count`, `sum`,
+    `min`, `max`, and `last`, the value of the latest reading (at `last_ts`).
+    """
+
+    interval: int
+
+    pk = models.CompositePrimaryKey("sensor_id", "bucket")
+    sensor = models.ForeignKey(
+        Sensor,
+        on_delete=models.CASCADE,
+        related_name="%(class)ss",
+        verbose_name="sensor",
+    )
+    bucket = models.BigIntegerField(verbose_name="bucket", help_text="Start of the bucket, epoch in milliseconds.")
+    count = models.PositiveIntegerField(verbose_name="count")
+    sum = models.FloatField(verbose_name="sum")
+    min = models.FloatField(verbose_name="minimum")
+    max = models.FloatField(verbose_name="maximum")
+    last = models.FloatField(verbose_name="last value")
+    last_ts = models.BigIntegerField(verbose_name="last timestamp", help_text="Time of the last value.")
+
+    objects = RollupQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def __str__(self) -> str:
+        return f"Sensor {self.sensor_id} : {self.time.isoformat()} : {self.count} readings"
+
+    @property
+    def time(self) -> datetime:
+        return to_datetime(self.bucket)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+
+class MinuteRollup(Rollup):
+    interval = MINUTE_MS
+
+    class Meta:
+        verbose_name = "minute rollup"
+        verbose_name_plural = "minute rollups"
+
+
+class HourRollup(Rollup):
+    interval = HOUR_MS
+
+    class Meta:
+        verbose_name = "hour rollup"
+        verbose_name_plural = "hour rollups"
+
+
+class DayRollup(Rollup):
+    interval = DAY_MS
+
+    class Meta:
+        verbose_name = "day rollup"
+        verbose_name_plural = "day rollups"
@@ -0,0 +1,158 @@
+"""
+Time partitions of the SensorReading table on PostgreSQL.
+
+The table is partitioned by range of `ts` (see migration 0001_initial), one partition per day or per
+month (settings.TELEMETRY_PARTITION_INTERVAL), named after the period it holds, e.g.
+`telemetry_sensorreading_p202610` or `telemetry_sensorreading_p20261017`. A DEFAULT partition takes
+the readings without partition, so an insert never fails; `ensure_partitions` moves them to their
+partition when it is created. The retention drops whole partitions instead of deleting rows.
+
+Other databases have no partitions: every function is a no-op there.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import List
+from typing import Optional
+
+from django.conf import settings
+from django.db import connection as default_connection
+from django.db import transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.utils import timezone as django_timezone
+
+from .models import SensorReading
+from .timestamps import to_timestamp
+
+logger = logging.getLogger(__name__)
+
+DAY = "day"
+MONTH = "month"
+PARTITION_INTERVALS = (DAY, MONTH)
+# Name of the DEFAULT partition, created with the table.
+DEFAULT_PARTITION_SUFFIX = "default"
+
+
+@dataclass(frozen=True, slots=True)
+class Partition:
+    """A partition of the readings table, holding the readings from `start` (included) to `end` (excluded)."""
+
+    start: datetime
+    end: datetime
+    interval: str
+
+    @property
+    def name(self) -> str:
+        suffix = self.start.strftime("%Y%m%d" if self.interval == DAY else "%Y%m")
+        return f"{SensorReading._meta.db_table}_p{suffix}"
+
+    @classmethod
+    def from_name(cls, name: str) -> Optional["Partition"]:
+        """Return the partition named `name`, None if it is not a partition name (e.g. the DEFAULT partition)."""
+        prefix = f"{SensorReading._meta.db_table}_p"
+        suffix = name.removeprefix(prefix)
+        if suffix == name or not suffix.isdigit() or len(suffix) not in (6, 8):
+            return None
+        if len(suffix) == 8:
+            return cls.containing(datetime.strptime(suffix, "%Y%m%d").replace(tzinfo=timezone.utc), DAY)
+        return cls.containing(datetime.strptime(suffix, "%Y%m").replace(tzinfo=timezone.utc), MONTH)
+
+    @classmethod
+    def containing(cls, moment: datetime, interval: Optional[str] = None) -> "Partition":
+        """
+        Return the partition of a time.
+
+        Raises:
+            ValueError: If the interval is not "day" or "month".
+        """
+        interval = interval or settings.TELEMETRY_PARTITION_INTERVAL
+        moment = moment.astimezone(timezone.utc)
+        if interval == DAY:
+            start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+            return cls(start, start + timedelta(days=1), interval)
+        if interval == MONTH:
+            start = moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            if start.month == 12:
+                end = start.replace(year=start.year + 1, month=1)
+            else:
+                end = start.replace(month=start.month + 1)
+            return cls(start, end, interval)
+        raise ValueError(f"Unknown partition interval: {interval}, expected one of {PARTITION_INTERVALS}")
+
+    def next(self) -> "Partition":
+        return Partition.containing(self.end, self.interval)
+
+    def ddl(self) -> List[str]:
+        """
+        Return the statements creating the partition: an empty table is filled with the readings of
+        its range waiting in the DEFAULT partition, then attached.
+        """
+        table = SensorReading._meta.db_table
+        start, end = to_timestamp(self.start), to_timestamp(self.end)
+        return [
+            f'CREATE TABLE IF NOT EXISTS "{self.name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+            f'WITH moved AS (DELETE FROM "{table}_{DEFAULT_PARTITION_SUFFIX}" WHERE "ts" >= {start} AND "ts" < {end} '
+            f'RETURNING *) INSERT INTO "{self.name}" SELECT * FROM moved',
+            f'ALTER TABLE "{table}" ATTACH PARTITION "{self.name}" FOR VALUES FROM ({start}) TO ({end})',
+        ]
+
+
+def supports_partitions(connection: BaseDatabaseWrapper = default_connection) -> bool:
+    return connection.vendor == "postgresql"
+
+
+def list_partitions(connection: BaseDatabaseWrapper = default_connection) -> List[Partition]:
+    """Return the time partitions of the readings table, oldest first (empty without partitions)."""
+    if not supports_partitions(connection):
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = %s",
+            [SensorReading._meta.db_table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = [Partition.from_name(name) for name in names]
+    return sorted((partition for partition in partitions if partition), key=lambda partition: partition.start)
+
+
+def ensure_partitions(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    connection: BaseDatabaseWrapper = default_connection,
+) -> List[Partition]:
+    """
+    Create the missing partitions from `start` to `end`.
+
+    Args:
+        start (datetime, optional): Defaults to now.
+        end (datetime, optional): Defaults to settings.TELEMETRY_PARTITIONS_AHEAD partitions after the current one.
+        connection (optional): Defaults to the default database.
+
+    Returns:
+        List[Partition]: The partitions created (empty without partitions).
+    """
+    if not supports_partitions(connection):
+        return []
+    partition = Partition.containing(start or django_timezone.now())
+    if end is None:
+        end = partition.end
+        for _ in range(settings.TELEMETRY_PARTITIONS_AHEAD):
+            end = Partition.containing(end).end
+
+    existing = {existing.name for existing in list_partitions(connection)}
+    created = []
+    while partition.start < end:
+        if partition.name not in existing:
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                for statement in partition.ddl():
+                    cursor.execute(statement)
+            logger.info(f"Telemetry partition {partition.name} created")
+            created.append(partition)
+        partition = partition.next()
+    return created
@@ -0,0 +1,183 @@
+"""
+Deletion of the expired telemetry, by the retention policies of the sensor categories.
+
+Each level (raw readings, minute, hour and day rollups) of each sensor is kept for the days of the
+RetentionPolicy of its category. Expired rows are deleted by primary key ranges of one sensor,
+`TELEMETRY_RETENTION_CHUNK_SIZE` rows per transaction with a pause between two, so the writers
+(the gateway, the API) never wait long for the database lock.
+
+On PostgreSQL, the time partitions of the raw readings expired for every category are dropped
+first (see telemetry.partitions): no row to delete, no table bloat. The remaining rows are deleted
+by chunks as above.
+
+Afterwards, the statistics of the tables that lost many rows are refreshed (ANALYZE), and the
+SQLite database file is rebuilt (VACUUM) when enough of its pages are free.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from datetime import timedelta
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Type
+
+from django.conf import settings
+from django.db import connection as default_connection
+from django.db import models
+from django.db import transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.utils import timezone
+
+from gardeniq.hardware.models import Sensor
+from gardeniq.hardware.models import SensorCategory
+
+from .models import RetentionPolicy
+from .partitions import list_partitions
+from .partitions import supports_partitions
+from .series import RAW
+from .series import SOURCES
+from .timestamps import to_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class RetentionReport:
+    """Rows deleted per level, partitions dropped, and the maintenance run afterwards."""
+
+    deleted: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(SOURCES, 0))
+    dropped_partitions: List[str] = field(default_factory=list)
+    analyzed: List[str] = field(default_factory=list)
+    vacuumed: bool = False
+
+
+def expiry_cutoffs(level: str, now: Optional[datetime] = None) -> Dict[int, int]:
+    """Return the time (epoch milliseconds) before which the rows of a level expire, by sensor category pk."""
+    now = now or timezone.now()
+    policies = {policy.category_id: policy for policy in RetentionPolicy.objects.all()}
+    cutoffs = {}
+    for category_id in SensorCategory.objects.values_list("pk", flat=True):
+        policy = policies.get(category_id)
+        days = policy.days(level) if policy else settings.TELEMETRY_RETENTION_DAYS.get(level)
+        if days is not None:
+            cutoffs[category_id] = to_timestamp(now - timedelta(days=days))
+    return cutoffs
+
+
+def delete_expired(
+    model: Type[models.Model],
+    sensor_id: int,
+    cutoff: int,
+    chunk_size: Optional[int] = None,
+    pause: Optional[float] = None,
+) -> int:
+    """
+    Delete the rows of a sensor older than `cutoff`, oldest first, `chunk_size` rows per transaction.
+
+    Returns:
+        int: The number of rows deleted.
+    """
+    chunk_size = chunk_size or settings.TELEMETRY_RETENTION_CHUNK_SIZE
+    pause = pause if pause is not None else settings.TELEMETRY_RETENTION_CHUNK_PAUSE
+    time_field = "ts" if model is SOURCES[RAW] else "bucket"
+    expired = model.objects.filter(sensor_id=sensor_id)
+    total = 0
+    while True:
+        # The primary key is (sensor_id, time): the chunk is a range of the index.
+        last = (
+            expired.filter(**{f"{time_field}__lt": cutoff})
+            .order_by(time_field)
+            .values_list(time_field, flat=True)[chunk_size - 1 : chunk_size]
+        )
+        bound = last[0] + 1 if last else cutoff
+        with transaction.atomic():
+            deleted, _ = expired.filter(**{f"{time_field}__lt": bound}).delete()
+        total += deleted
+        if bound == cutoff:
+            return total
+        time.sleep(pause)
+
+
+def drop_expired_partitions(cutoffs: Dict[int, int], connection: BaseDatabaseWrapper = default_connection) -> List[str]:
+    """Drop the partitions of the raw readings expired for every category. Returns their names."""
+    if not supports_partitions(connection) or not cutoffs:
+        return []
+    # A category keeping its readings forever has no cutoff: nothing expires for every category.
+    if set(cutoffs) != set(SensorCategory.objects.values_list("pk", flat=True)):
+        return []
+    cutoff = min(cutoffs.values())
+    dropped = []
+    for partition in list_partitions(connection):
+        if to_timestamp(partition.end) > cutoff:
+            break
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS "{partition.name}"')
+        logger.info(f"Telemetry partition {partition.name} dropped")
+        dropped.append(partition.name)
+    return dropped
+
+
+def compact(report: RetentionReport, connection: BaseDatabaseWrapper = default_connection) -> None:
+    """Refresh the statistics of the tables that lost many rows, rebuild the SQLite file if worth it."""
+    tables = [
+        SOURCES[level]._meta.db_table
+        for level, deleted in report.deleted.items()
+        if deleted >= settings.TELEMETRY_RETENTION_ANALYZE_MIN_ROWS
+    ]
+    if not tables:
+        return
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for table in tables:
+            cursor.execute(f"ANALYZE {quote(table)}")
+        report.analyzed = tables
+        # VACUUM cannot run in a transaction.
+        if connection.in_atomic_block:
+            return
+        if connection.vendor == "sqlite":
+            cursor.execute("PRAGMA freelist_count")
+            free = cursor.fetchone()[0]
+            cursor.execute("PRAGMA page_count")
+            pages = cursor.fetchone()[0]
+            if pages and free / pages >= settings.TELEMETRY_RETENTION_VACUUM_RATIO:
+                logger.info(f"Rebuilding the database file: {free} free pages out of {pages}")
+                cursor.execute("VACUUM")
+                report.vacuumed = True
+        elif connection.vendor == "postgresql":
+            for table in tables:
+                cursor.execute(f"VACUUM {quote(table)}")
+            report.vacuumed = True
+
+
+def apply_retention(
+    now: Optional[datetime] = None,
+    compaction: bool = True,
+    connection: BaseDatabaseWrapper = default_connection,
+) -> RetentionReport:
+    """
+    Delete the telemetry expired at `now` (default: now), every level, every sensor.
+
+    Args:
+        compaction (bool, optional): Run `compact` afterwards. Defaults to True.
+    """
+    report = RetentionReport()
+    sensors: Dict[int, List[int]] = {}
+    for sensor_id, category_id in Sensor.objects.values_list("pk", "category_id"):
+        sensors.setdefault(category_id, []).append(sensor_id)
+
+    for level, model in SOURCES.items():
+        cutoffs = expiry_cutoffs(level, now)
+        if level == RAW:
+            report.dropped_partitions = drop_expired_partitions(cutoffs, connection)
+        for category_id, cutoff in cutoffs.items():
+            for sensor_id in sensors.get(category_id, []):
+                report.deleted[level] += delete_expired(model, sensor_id, cutoff)
+        logger.info(f"Telemetry retention: {report.deleted[level]} {level} rows deleted")
+
+    if compaction:
+        compact(report, connection)
+    return report
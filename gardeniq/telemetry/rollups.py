@@ -0,0 +1,211 @@
+"""
+Minute, hour and day rollups of the sensor readings.
+
+The rollups are maintained incrementally: each batch written by the TelemetryWriter is aggregated
+in memory per (sensor, bucket) and merged into the rollup tables with one upsert per level and per
+`ROLLUP_UPSERT_BATCH_SIZE` buckets (`update_rollups`), in the transaction of the readings. The raw
+readings are never read again, except by `rebuild_rollups` (the `telemetry_rollups` command), which
+recomputes the rollups of a time range from them. The raw readings expire before the rollups (see
+telemetry.retention): a rebuild never goes back past the raw retention of a sensor, whose older
+rollups could not be recomputed.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Type
+
+from django.db import connection as default_connection
+from django.db import transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+from gardeniq.hardware.models import Sensor
+
+from .models import DayRollup
+from .models import HourRollup
+from .models import MinuteRollup
+from .models import Rollup
+from .models import SensorReading
+from .retention import expiry_cutoffs
+from .series import RAW
+from .timestamps import DAY_MS
+from .timestamps import floor_timestamp
+from .timestamps import to_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Finest level first.
+ROLLUP_LEVELS: Tuple[Type[Rollup], ...] = (MinuteRollup, HourRollup, DayRollup)
+# Buckets per INSERT statement (8 parameters each).
+ROLLUP_UPSERT_BATCH_SIZE = 500
+
+# (sensor_id, ts, value)
+Row = Tuple[int, int, float]
+
+
+@dataclass(slots=True)
+class Aggregate:
+    """Mergeable aggregate of the readings of a bucket."""
+
+    count: int
+    sum: float
+    min: float
+    max: float
+    last: float
+    last_ts: int
+
+    @classmethod
+    def of(cls, ts: int, value: float) -> "Aggregate":
+        return cls(1, value, value, value, value, ts)
+
+    def add(self, ts: int, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if ts >= self.last_ts:
+            self.last, self.last_ts = value, ts
+
+
+def aggregate(rows: Iterable[Row], interval: int) -> Dict[Tuple[int, int], Aggregate]:
+    """Aggregate readings by (sensor_id, bucket) for buckets of `interval` milliseconds."""
+    buckets: Dict[Tuple[int, int], Aggregate] = {}
+    for sensor_id, ts, value in rows:
+        key = (sensor_id, floor_timestamp(ts, interval))
+        bucket = buckets.get(key)
+        if bucket is None:
+            buckets[key] = Aggregate.of(ts, value)
+        else:
+            bucket.add(ts, value)
+    return buckets
+
+
+def upsert(
+    model: Type[Rollup],
+    buckets: Dict[Tuple[int, int], Aggregate],
+    connection: BaseDatabaseWrapper = default_connection,
+) -> None:
+    """Merge aggregates into the buckets of a rollup table, creating the missing buckets."""
+    if not buckets:
+        return
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = ["sensor_id", "bucket", "count", "sum", "min", "max", "last", "last_ts"]
+    least, greatest = ("LEAST", "GREATEST") if connection.vendor == "postgresql" else ("MIN", "MAX")
+
+    def current(column: str) -> str:
+        return f"{table}.{quote(column)}"
+
+    def new(column: str) -> str:
+        return f"EXCLUDED.{quote(column)}"
+
+    updates = ", ".join(
+        [
+            f"{quote('count')} = {current('count')} + {new('count')}",
+            f"{quote('sum')} = {current('sum')} + {new('sum')}",
+            f"{quote('min')} = {least}({current('min')}, {new('min')})",
+            f"{quote('max')} = {greatest}({current('max')}, {new('max')})",
+            f"{quote('last')} = CASE WHEN {new('last_ts')} >= {current('last_ts')} "
+            f"THEN {new('last')} ELSE {current('last')} END",
+            f"{quote('last_ts')} = {greatest}({current('last_ts')}, {new('last_ts')})",
+        ]
+    )
+    placeholders = f"({', '.join(['%s'] * len(columns))})"
+    items = list(buckets.items())
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), ROLLUP_UPSERT_BATCH_SIZE):
+            chunk = items[start : start + ROLLUP_UPSERT_BATCH_SIZE]
+            params: List = []
+            for (sensor_id, bucket), agg in chunk:
+                params.extend([sensor_id, bucket, agg.count, agg.sum, agg.min, agg.max, agg.last, agg.last_ts])
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(quote(column) for column in columns)}) "
+                f"VALUES {', '.join([placeholders] * len(chunk))} "
+                f"ON CONFLICT ({quote('sensor_id')}, {quote('bucket')}) DO UPDATE SET {updates}",
+                params,
+            )
+
+
+def update_rollups(rows: List[Row], connection: BaseDatabaseWrapper = default_connection) -> None:
+    """
+    Merge a batch of new readings into every rollup level.
+
+    Call it in the transaction writing the readings, with the readings actually inserted: a reading
+    merged twice is counted twice (`rebuild_rollups` repairs the range).
+    """
+    for model in ROLLUP_LEVELS:
+        upsert(model, aggregate(rows, model.interval), connection)
+
+
+def rebuild_rollups(
+    start: datetime,
+    end: datetime,
+    sensor_ids: Optional[Iterable[int]] = None,
+    chunk_size: int = 10_000,
+    now: Optional[datetime] = None,
+) -> int:
+    """
+    Recompute the rollups from the raw readings, from `start` to `end` widened to whole days.
+
+    Each sensor is rebuilt in its own transaction: its buckets in the range are deleted, then its
+    readings are streamed in `ts` order and merged `chunk_size` at a time.
+
+    The range of a sensor starts at the latest at the first whole day whose raw readings are still
+    kept by the retention policy of its category (`expiry_cutoffs`): the older buckets are left as
+    they are, their readings may be gone.
+
+    Args:
+        start (datetime): Start of the range (aware).
+        end (datetime): End of the range (aware, excluded).
+        sensor_ids (Iterable[int], optional): The sensors to rebuild. Defaults to the sensors with
+            readings in the range.
+        chunk_size (int, optional): Readings aggregated per upsert. Defaults to 10 000.
+        now (datetime, optional): Time of the raw retention cutoffs. Defaults to now.
+
+    Returns:
+        int: The number of readings aggregated.
+    """
+    start_ts = floor_timestamp(to_timestamp(start), DAY_MS)
+    end_ts = -floor_timestamp(-to_timestamp(end), DAY_MS)
+    readings = SensorReading.objects.filter(ts__gte=start_ts, ts__lt=end_ts)
+    if sensor_ids is None:
+        sensor_ids = readings.values_list("sensor_id", flat=True).distinct().order_by("sensor_id")
+
+    sensor_ids = list(sensor_ids)
+    # category pk -> first whole day whose raw readings are all kept
+    kept_from = {
+        category_id: -floor_timestamp(-cutoff, DAY_MS) for category_id, cutoff in expiry_cutoffs(RAW, now).items()
+    }
+    categories = dict(Sensor.objects.filter(pk__in=sensor_ids).values_list("pk", "category_id"))
+
+    total = 0
+    for sensor_id in sensor_ids:
+        sensor_start_ts = max(start_ts, kept_from.get(categories.get(sensor_id), start_ts))
+        if sensor_start_ts > start_ts:
+            logger.warning(f"Rollups of sensor {sensor_id} rebuilt from {sensor_start_ts} only, older readings expired")
+        if sensor_start_ts >= end_ts:
+            continue
+        with transaction.atomic():
+            for model in ROLLUP_LEVELS:
+                model.objects.filter(sensor_id=sensor_id, bucket__gte=sensor_start_ts, bucket__lt=end_ts).delete()
+            chunk: List[Row] = []
+            rows = (
+                readings.filter(sensor_id=sensor_id, ts__gte=sensor_start_ts)
+                .order_by("ts")
+                .values_list("sensor_id", "ts", "value")
+            )
+            for row in rows.iterator(chunk_size=chunk_size):
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    update_rollups(chunk)
+                    total += len(chunk)
+                    chunk = []
+            update_rollups(chunk)
+            total += len(chunk)
+        logger.info(f"Rollups of sensor {sensor_id} rebuilt")
+    return total
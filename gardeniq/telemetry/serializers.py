@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from rest_framework import serializers
+
+from .series import SOURCES
+from .series import source_rows
+
+
+class SeriesQuerySerializer(serializers.Serializer):
+    """
+    Query of a sensor series: `from` (default: `to` minus settings.TELEMETRY_SERIES_DEFAULT_PERIOD),
+    `to` (default: now), `points` (default: settings.TELEMETRY_SERIES_DEFAULT_POINTS) and `source`
+    (default: picked from the range, see telemetry.series). A `source` with more than
+    settings.TELEMETRY_SERIES_MAX_ROWS rows in the range of the `sensor` of the context is rejected.
+    """
+
+    start = serializers.DateTimeField(required=False)
+    to = serializers.DateTimeField(required=False)
+    points = serializers.IntegerField(required=False, min_value=3)
+    source = serializers.ChoiceField(choices=list(SOURCES), required=False)
+
+    def get_fields(self):
+        # `from` is a Python keyword: the field is declared as `start`.
+        fields = super().get_fields()
+        fields["from"] = fields.pop("start")
+        return fields
+
+    def validate_points(self, value: int) -> int:
+        if value > settings.TELEMETRY_SERIES_MAX_POINTS:
+            raise serializers.ValidationError(
+                f"Ensure this value is less than or equal to {settings.TELEMETRY_SERIES_MAX_POINTS}."
+            )
+        return value
+
+    def validate(self, attrs):
+        attrs.setdefault("to", timezone.now())
+        attrs.setdefault("from", attrs["to"] - timedelta(seconds=settings.TELEMETRY_SERIES_DEFAULT_PERIOD))
+        attrs.setdefault("points", settings.TELEMETRY_SERIES_DEFAULT_POINTS)
+        if attrs["from"] >= attrs["to"]:
+            raise serializers.ValidationError({"from": "Must be before `to`."})
+        # An explicit source is held to the limit of `choose_source`.
+        source, max_rows = attrs.get("source"), settings.TELEMETRY_SERIES_MAX_ROWS
+        if source and source_rows(self.context["sensor"].pk, attrs["from"], attrs["to"], source) > max_rows:
+            raise serializers.ValidationError(
+                {"source": f"More than {max_rows} rows in the range, use a coarser source."}
+            )
+        return attrs
+
+
+class SeriesSerializer(serializers.Serializer):
+    sensor = serializers.IntegerField()
+    source = serializers.ChoiceField(choices=list(SOURCES))
+    start = serializers.DateTimeField()
+    to = serializers.DateTimeField()
+    points = serializers.ListField(
+        child=serializers.ListField(child=serializers.FloatField(), min_length=2, max_length=2),
+        help_text="[timestamp in epoch milliseconds, value] pairs, oldest first.",
+    )
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields["from"] = fields.pop("start")
+        return fields
+
+
+class LatestQuerySerializer(serializers.Serializer):
+    """Query of the latest readings: the sensors of a `device` and/or the listed `sensor` pks (default: all)."""
+
+    device = serializers.IntegerField(required=False)
+    sensor = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+
+class LatestReadingSerializer(serializers.Serializer):
+    sensor = serializers.IntegerField()
+    ts = serializers.IntegerField(help_text="Time of the latest value, epoch in milliseconds.")
+    value = serializers.FloatField()
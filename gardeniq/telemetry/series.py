@@ -0,0 +1,118 @@
+"""
+Time series of a sensor for the charts: read from the finest source small enough, then reduced by LTTB.
+
+The sources are the raw readings and the minute, hour and day rollups (whose value is the mean of
+the bucket). The raw readings are used when the hour rollups count at most settings.TELEMETRY_SERIES_MAX_ROWS
+readings in the range, a rollup level when it has at most that many buckets in the range: a year
+of data is read from a few hundred day buckets, not from millions of readings. When the hour
+rollups are missing (before a backfill, or once they expired), the raw readings are counted up to
+the limit, never further. A source asked explicitly is held to the same limit (see `source_rows`).
+
+The rows are streamed from the database (`values_list(...).iterator()`) into NumPy arrays, no model
+instance is created.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from django.conf import settings
+from django.db import models
+from django.db.models import ExpressionWrapper
+from django.db.models import F
+from django.db.models import Sum
+
+import numpy as np
+
+from .downsampling import lttb
+from .models import DayRollup
+from .models import HourRollup
+from .models import MinuteRollup
+from .models import SensorReading
+from .timestamps import HOUR_MS
+from .timestamps import floor_timestamp
+from .timestamps import to_timestamp
+
+RAW = "raw"
+SOURCES = {RAW: SensorReading, "minute": MinuteRollup, "hour": HourRollup, "day": DayRollup}
+# Rows of the database streamed per fetch.
+SERIES_CHUNK_SIZE = 2000
+POINT_DTYPE = np.dtype([("ts", np.int64), ("value", np.float64)])
+
+
+@dataclass(slots=True)
+class Series:
+    """Points of a sensor series: `ts` in epoch milliseconds, `source` is one of SOURCES."""
+
+    source: str
+    ts: np.ndarray
+    values: np.ndarray
+
+    def points(self) -> List[Tuple[int, float]]:
+        return list(zip(self.ts.tolist(), self.values.tolist()))
+
+
+def source_rows(sensor_id: int, start: datetime, end: datetime, source: str, max_rows: Optional[int] = None) -> int:
+    """
+    Return the number of rows a source holds in the range, at most (an estimate, without reading them).
+
+    Args:
+        max_rows (int, optional): Above this many raw readings, the count may stop at `max_rows + 1`.
+            Defaults to settings.TELEMETRY_SERIES_MAX_ROWS.
+    """
+    start_ts, end_ts = to_timestamp(start), to_timestamp(end)
+    if source == RAW:
+        max_rows = max_rows or settings.TELEMETRY_SERIES_MAX_ROWS
+        # The hour rollups count the readings: a few rows per day instead of a scan of the raw readings.
+        readings = HourRollup.objects.filter(
+            sensor_id=sensor_id, bucket__gte=floor_timestamp(start_ts, HOUR_MS), bucket__lt=end_ts
+        ).aggregate(total=Sum("count"))["total"]
+        if readings is not None and readings > max_rows:
+            return readings
+        # Hours without rollups (not backfilled yet, or expired) hide their readings: count them, but
+        # only up to the limit (COUNT over a LIMIT subquery), a few more rows than the series would read.
+        return SensorReading.objects.between(sensor_id, start, end)[: max_rows + 1].count()
+    return (end_ts - start_ts) // SOURCES[source].interval + 1
+
+
+def choose_source(sensor_id: int, start: datetime, end: datetime, max_rows: Optional[int] = None) -> str:
+    """Return the finest source with at most `max_rows` rows in the range (the day rollups at worst)."""
+    max_rows = max_rows or settings.TELEMETRY_SERIES_MAX_ROWS
+    for name in SOURCES:
+        if source_rows(sensor_id, start, end, name, max_rows) <= max_rows:
+            return name
+    return "day"
+
+
+def load_series(sensor_id: int, start: datetime, end: datetime, source: str) -> Series:
+    """Read the points of a sensor from a source, oldest first."""
+    model = SOURCES[source]
+    if source == RAW:
+        rows = model.objects.between(sensor_id, start, end).values_list("ts", "value")
+    else:
+        mean = ExpressionWrapper(F("sum") / F("count"), output_field=models.FloatField())
+        rows = model.objects.between(sensor_id, start, end).annotate(mean=mean).values_list("bucket", "mean")
+    data = np.fromiter(rows.iterator(chunk_size=SERIES_CHUNK_SIZE), dtype=POINT_DTYPE)
+    return Series(source, data["ts"], data["value"])
+
+
+def sensor_series(
+    sensor_id: int,
+    start: datetime,
+    end: datetime,
+    points: int,
+    source: Optional[str] = None,
+) -> Series:
+    """
+    Return the series of a sensor from `start` (included) to `end` (excluded), reduced to at most `points` points.
+
+    Args:
+        source (str, optional): One of SOURCES. Defaults to the source picked by `choose_source`.
+            The caller checks its size with `source_rows`.
+    """
+    source = source or choose_source(sensor_id, start, end)
+    series = load_series(sensor_id, start, end, source)
+    series.ts, series.values = lttb(series.ts, series.values, points)
+    return series
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from gardeniq.orderlg.models import Order
+from gardeniq.telemetry.ingest import order_sensors
+
+
+@receiver(post_save, sender=Order, dispatch_uid="telemetry_order_sensors_save")
+@receiver(post_delete, sender=Order, dispatch_uid="telemetry_order_sensors_delete")
+def forget_order_sensor(sender, instance: Order, **kwargs) -> None:
+    order_sensors.forget(instance.pk)
@@ -0,0 +1,265 @@
+import pytest
+
+from gardeniq.hardware.protocols.frame import CommandState
+from gardeniq.hardware.protocols.frame import Frame
+from gardeniq.hardware.protocols.frame import FrameType
+from gardeniq.hardware.protocols.usb import FrameHandler
+from gardeniq.orderlg.models import Order
+from gardeniq.telemetry.ingest import BLOCK
+from gardeniq.telemetry.ingest import DROP_NEWEST
+from gardeniq.telemetry.ingest import DROP_OLDEST
+from gardeniq.telemetry.ingest import TelemetryWriter
+from gardeniq.telemetry.ingest import order_sensors
+from gardeniq.telemetry.ingest import parse_value
+from gardeniq.telemetry.models import MinuteRollup
+from gardeniq.telemetry.models import SensorReading
+from gardeniq.telemetry.utils.tests import SensorTestMixin
+
+
+@pytest.fixture(autouse=True)
+def empty_order_sensors():
+    order_sensors.clear()
+    yield
+    order_sensors.clear()
+
+
+def data_response(order_id: int, data) -> Frame:
+    return Frame(
+        frame_type=FrameType.ACK,
+        device_uid="TELEMETRY0001",
+        command_id=order_id,
+        command_slug="",
+        args_values=[],
+        from_device=True,
+        command_state=CommandState.OK,
+        ok_data=data,
+        checksum="2A",
+        source_frame_from_device="< ACK >",
+        computed_checksum=0x2A,
+    )
+
+
+class TestParseValue:
+    @pytest.mark.parametrize(
+        "data, expected",
+        [("24.5C", 24.5), (" -3 %", -3.0), ("1e3", 1000.0), (12, 12.0), (0.5, 0.5), (True, 1.0), ("OPEN", None)],
+    )
+    def test_parse_value(self, data, expected):
+        assert parse_value(data) == expected
+
+
+@pytest.mark.django_db
+class TestTelemetryWriter(SensorTestMixin):
+    def test_readings_wait_for_a_full_batch(self, sensor):
+        # GIVEN
+        writer = TelemetryWriter(batch_size=3, flush_interval_ms=60_000)
+
+        # WHEN
+        writer.add(sensor.pk, 1.0, ts=1)
+        writer.add(sensor.pk, 2.0, ts=2)
+        waiting = writer.flush_due()
+        writer.add(sensor.pk, 3.0, ts=3)
+        written = writer.flush_due()
+
+        # THEN
+        assert (waiting, written) == (0, 3)
+        assert list(SensorReading.objects.values_list("ts", "value")) == [(1, 1.0), (2, 2.0), (3, 3.0)]
+        assert writer.stats() == {
+            "pending": 0,
+            "buffered": 3,
+            "flushed": 3,
+            "dropped": 0,
+            "skipped": 0,
+            "duplicates": 0,
+            "flushes": 1,
+            "failures": 0,
+        }
+
+    def test_old_readings_are_flushed_after_the_interval(self, sensor):
+        # GIVEN
+        writer = TelemetryWriter(batch_size=100, flush_interval_ms=0)
+        writer.add(sensor.pk, 1.0, ts=1)
+
+        # WHEN
+        written = writer.flush_due()
+
+        # THEN
+        assert written == 1
+        assert SensorReading.objects.count() == 1
+
+    def test_query_count_depends_on_the_batches(self, sensor_factory, django_assert_max_num_queries):
+        # GIVEN
+        sensors = sensor_factory(4)
+        writer = TelemetryWriter(batch_size=1000, capacity=2000)
+        for ts in range(500):
+            for sensor in sensors:
+                writer.add(sensor.pk, float(ts), ts=ts)
+
+        # WHEN
+        # savepoint, 2 INSERT, 1 upsert per rollup level, 1 upsert of the latest readings, release
+        with django_assert_max_num_queries(8):
+            written = writer.flush()
+
+        # THEN
+        assert written == 2000
+        assert SensorReading.objects.count() == 2000
+
+    def test_duplicates_are_merged_once(self, sensor):
+        # GIVEN
+        writer = TelemetryWriter(batch_size=10, flush_interval_ms=0)
+        writer.add(sensor.pk, 10.0, ts=500)
+        writer.flush()
+        writer.add(sensor.pk, 20.0, ts=1000)
+        writer.add(sensor.pk, 30.0, ts=1000)
+        writer.add(sensor.pk, 40.0, ts=500)
+
+        # WHEN
+        written = writer.flush()
+
+        # THEN
+        assert written == 1
+        assert writer.duplicates == 2
+        assert list(SensorReading.objects.values_list("ts", "value")) == [(500, 10.0), (1000, 20.0)]
+        rollup = MinuteRollup.objects.get(sensor=sensor)
+        assert (rollup.count, rollup.sum, rollup.last) == (2, 30.0, 20.0)
+        assert (sensor.latest_reading.ts, sensor.latest_reading.value) == (1000, 20.0)
+
+    def test_failed_flush_keeps_the_readings(self, sensor, mocker):
+        # GIVEN
+        writer = TelemetryWriter(batch_size=10, flush_interval_ms=0)
+        writer.add(sensor.pk, 1.0, ts=1)
+        mocker.patch("gardeniq.telemetry.ingest.insert_readings", side_effect=RuntimeError("database is locked"))
+
+        # WHEN
+        written = writer.flush()
+
+        # THEN
+        assert written == 0
+        assert writer.pending == 1
+        assert writer.failures == 1
+        mocker.stopall()
+        assert writer.flush() == 1
+        assert SensorReading.objects.count() == 1
+
+    def test_failed_flush_is_not_retried_before_the_interval(self, sensor, mocker):
+        # GIVEN
+        writer = TelemetryWriter(batch_size=1, flush_interval_ms=60_000)
+        insert_readings = mocker.patch("gardeniq.telemetry.ingest.insert_readings", side_effect=RuntimeError)
+        writer.add(sensor.pk, 1.0, ts=1)
+        writer.flush_due()
+
+        # WHEN
+        writer.add(sensor.pk, 2.0, ts=2)
+        writer.flush_due()
+
+        # THEN
+        assert insert_readings.call_count == 1
+        assert writer.pending == 2
+
+    def test_blocking_policy_writes_the_full_buffer_first(self, sensor):
+        # GIVEN
+        writer = TelemetryWriter(batch_size=2, capacity=2, flush_interval_ms=60_000, policy=BLOCK)
+        writer.add(sensor.pk, 1.0, ts=1)
+        writer.add(sensor.pk, 2.0, ts=2)
+
+        # WHEN
+        accepted = writer.add(sensor.pk, 3.0, ts=3)
+
+        # THEN
+        assert accepted
+        assert SensorReading.objects.count() == 2
+        assert writer.pending == 1
+        assert writer.dropped == 0
+
+    def test_blocking_policy_drops_when_the_database_fails(self, sensor, mocker):
+        # GIVEN
+        writer = TelemetryWriter(batch_size=2, capacity=2, flush_interval_ms=60_000, policy=BLOCK)
+        mocker.patch("gardeniq.telemetry.ingest.insert_readings", side_effect=RuntimeError)
+        writer.add(sensor.pk, 1.0, ts=1)
+        writer.add(sensor.pk, 2.0, ts=2)
+
+        # WHEN
+        accepted = writer.add(sensor.pk, 3.0, ts=3)
+
+        # THEN
+        assert not accepted
+        assert writer.pending == 2
+        assert writer.dropped == 1
+
+    @pytest.mark.parametrize("policy, kept, buffered", [(DROP_OLDEST, [2, 3], 3), (DROP_NEWEST, [1, 2], 2)])
+    def test_dropping_policies(self, sensor, policy, kept, buffered):
+        # GIVEN
+        writer = TelemetryWriter(batch_size=2, capacity=2, flush_interval_ms=60_000, policy=policy)
+
+        # WHEN
+        for ts in (1, 2, 3):
+            writer.add(sensor.pk, float(ts), ts=ts)
+        writer.flush()
+
+        # THEN
+        assert list(SensorReading.objects.values_list("ts", flat=True)) == kept
+        assert writer.dropped == 1
+        assert writer.buffered == buffered
+
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            TelemetryWriter(policy="spill")
+
+
+@pytest.mark.django_db
+class TestFrameIngestion(SensorTestMixin):
+    @pytest.fixture
+    def sensor_order(self, sensor) -> Order:
+        return Order.objects.create(name="Get temperature", slug="get-temperature", action_type="get", sensor=sensor)
+
+    def test_sensor_value_is_stored(self, sensor, sensor_order):
+        # GIVEN
+        handler = FrameHandler(telemetry=TelemetryWriter(flush_interval_ms=0))
+
+        # WHEN
+        errors = handler.handle_batch([data_response(sensor_order.pk, "24.5C")])
+
+        # THEN
+        assert errors == []
+        reading = SensorReading.objects.get()
+        assert (reading.sensor_id, reading.value) == (sensor.pk, 24.5)
+
+    def test_reading_is_stamped_with_the_reception_time(self, sensor, sensor_order):
+        # GIVEN
+        writer = TelemetryWriter()
+        frame = data_response(sensor_order.pk, "24.5C")
+        frame.received_ts = 1_700_000_000_123
+
+        # WHEN
+        writer.add_frame(frame)
+        writer.flush()
+
+        # THEN
+        assert SensorReading.objects.get().ts == 1_700_000_000_123
+
+    def test_data_of_other_orders_is_skipped(self, sensor_order):
+        # GIVEN
+        writer = TelemetryWriter()
+
+        # WHEN
+        writer.add_frame(data_response(sensor_order.pk, "OPEN"))
+        writer.add_frame(data_response(sensor_order.pk + 1, "12"))
+
+        # THEN
+        assert writer.pending == 0
+        assert writer.skipped == 2
+
+    def test_order_sensors_follow_the_orders(self, sensor, sensor_factory, sensor_order, django_assert_num_queries):
+        # GIVEN
+        other = sensor_factory(1)[0]
+        order_sensors.get(sensor_order.pk)
+
+        # WHEN
+        with django_assert_num_queries(0):
+            cached = order_sensors.get(sensor_order.pk)
+        sensor_order.sensor = other
+        sensor_order.save()
+
+        # THEN
+        assert cached == sensor.pk
+        assert order_sensors.get(sensor_order.pk) == other.pk
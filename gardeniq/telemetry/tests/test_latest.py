@@ -0,0 +1,62 @@
+import pytest
+
+from gardeniq.telemetry.ingest import TelemetryWriter
+from gardeniq.telemetry.latest import latest_readings
+from gardeniq.telemetry.latest import update_latest
+from gardeniq.telemetry.models import LatestReading
+from gardeniq.telemetry.utils.tests import SensorTestMixin
+
+
+def latest() -> dict:
+    return {reading.sensor_id: (reading.ts, reading.value) for reading in LatestReading.objects.all()}
+
+
+@pytest.mark.django_db
+class TestUpdateLatest(SensorTestMixin):
+    def test_newest_reading_of_each_sensor_is_kept(self, sensor_factory, django_assert_num_queries):
+        # GIVEN
+        sensor, other = sensor_factory(2)
+
+        # WHEN
+        with django_assert_num_queries(1):
+            update_latest([(sensor.pk, 2000, 2.0), (other.pk, 1000, 5.0), (sensor.pk, 1000, 1.0)])
+
+        # THEN
+        assert latest() == {sensor.pk: (2000, 2.0), other.pk: (1000, 5.0)}
+
+    def test_late_batch_does_not_replace_a_newer_reading(self, sensor_factory):
+        # GIVEN
+        sensor, other = sensor_factory(2)
+        update_latest([(sensor.pk, 2000, 2.0), (other.pk, 1000, 5.0)])
+
+        # WHEN
+        update_latest([(sensor.pk, 1500, 1.5), (other.pk, 3000, 6.0)])
+
+        # THEN
+        assert latest() == {sensor.pk: (2000, 2.0), other.pk: (3000, 6.0)}
+
+    def test_empty_batch(self, db, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            update_latest([])
+
+    def test_flush_updates_the_latest_readings(self, sensor):
+        # GIVEN
+        writer = TelemetryWriter(batch_size=10, flush_interval_ms=0)
+        writer.add(sensor.pk, 20.0, ts=1000)
+        writer.add(sensor.pk, 21.0, ts=2000)
+
+        # WHEN
+        writer.flush()
+
+        # THEN
+        assert latest() == {sensor.pk: (2000, 21.0)}
+
+    def test_latest_readings_filters(self, sensor_factory):
+        # GIVEN
+        first, second, third = sensor_factory(3)
+        update_latest([(first.pk, 1000, 1.0), (second.pk, 1000, 2.0), (third.pk, 1000, 3.0)])
+
+        # WHEN / THEN
+        assert [r.sensor_id for r in latest_readings(sensor_ids=[third.pk, first.pk])] == [first.pk, third.pk]
+        assert latest_readings(device_id=first.device_id).count() == 3
+        assert not latest_readings(device_id=first.device_id + 1).exists()
@@ -0,0 +1,122 @@
+from contextlib import contextmanager
+from datetime import datetime
+from datetime import timezone
+
+import pytest
+
+from gardeniq.telemetry.partitions import DAY
+from gardeniq.telemetry.partitions import MONTH
+from gardeniq.telemetry.partitions import Partition
+from gardeniq.telemetry.partitions import ensure_partitions
+from gardeniq.telemetry.partitions import list_partitions
+from gardeniq.telemetry.timestamps import to_timestamp
+
+
+class FakePostgreSQL:
+    """Records the statements run against a partitioned PostgreSQL database."""
+
+    vendor = "postgresql"
+    alias = "default"
+
+    def __init__(self, partitions=()):
+        self.partitions = list(partitions)
+        self.statements = []
+
+    @contextmanager
+    def cursor(self):
+        yield self
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+
+    def fetchall(self):
+        return [(name,) for name in self.partitions]
+
+
+class TestPartition:
+    def test_monthly_partition(self):
+        # WHEN
+        partition = Partition.containing(datetime(2026, 12, 17, 4, 35, tzinfo=timezone.utc), MONTH)
+
+        # THEN
+        assert partition.start == datetime(2026, 12, 1, tzinfo=timezone.utc)
+        assert partition.end == datetime(2027, 1, 1, tzinfo=timezone.utc)
+        assert partition.name == "telemetry_sensorreading_p202612"
+        assert partition.next().name == "telemetry_sensorreading_p202701"
+
+    def test_daily_partition(self):
+        # WHEN
+        partition = Partition.containing(datetime(2026, 10, 17, 23, 59, tzinfo=timezone.utc), DAY)
+
+        # THEN
+        assert partition.name == "telemetry_sensorreading_p20261017"
+        assert partition.end == datetime(2026, 10, 18, tzinfo=timezone.utc)
+
+    def test_partition_is_found_back_from_its_name(self):
+        # GIVEN
+        monthly = Partition.containing(datetime(2026, 10, 17, tzinfo=timezone.utc), MONTH)
+        daily = Partition.containing(datetime(2026, 10, 17, tzinfo=timezone.utc), DAY)
+
+        # WHEN / THEN
+        assert Partition.from_name(monthly.name) == monthly
+        assert Partition.from_name(daily.name) == daily
+        assert Partition.from_name("telemetry_sensorreading_default") is None
+
+    def test_unknown_interval(self):
+        with pytest.raises(ValueError):
+            Partition.containing(datetime(2026, 10, 17, tzinfo=timezone.utc), "week")
+
+    def test_ddl_moves_the_readings_of_the_default_partition(self):
+        # GIVEN
+        partition = Partition.containing(datetime(2026, 10, 17, tzinfo=timezone.utc), MONTH)
+        start, end = to_timestamp(partition.start), to_timestamp(partition.end)
+
+        # WHEN
+        create, move, attach = partition.ddl()
+
+        # THEN
+        assert create.startswith('CREATE TABLE IF NOT EXISTS "telemetry_sensorreading_p202610"')
+        assert f'DELETE FROM "telemetry_sensorreading_default" WHERE "ts" >= {start} AND "ts" < {end}' in move
+        assert attach.endswith(f"FOR VALUES FROM ({start}) TO ({end})")
+
+
+@pytest.mark.django_db
+class TestEnsurePartitions:
+    def test_missing_partitions_are_created_ahead(self, settings):
+        # GIVEN
+        settings.TELEMETRY_PARTITION_INTERVAL = MONTH
+        settings.TELEMETRY_PARTITIONS_AHEAD = 2
+        database = FakePostgreSQL(partitions=["telemetry_sensorreading_default", "telemetry_sensorreading_p202611"])
+
+        # WHEN
+        created = ensure_partitions(datetime(2026, 10, 17, tzinfo=timezone.utc), connection=database)
+
+        # THEN
+        assert [partition.name for partition in created] == [
+            "telemetry_sensorreading_p202610",
+            "telemetry_sensorreading_p202612",
+        ]
+        assert sum(statement.startswith("ALTER TABLE") for statement in database.statements) == 2
+
+    def test_partitions_are_listed_oldest_first(self):
+        # GIVEN
+        database = FakePostgreSQL(
+            partitions=[
+                "telemetry_sensorreading_p202611",
+                "telemetry_sensorreading_default",
+                "telemetry_sensorreading_p202610",
+            ]
+        )
+
+        # WHEN
+        partitions = list_partitions(database)
+
+        # THEN
+        assert [partition.name for partition in partitions] == [
+            "telemetry_sensorreading_p202610",
+            "telemetry_sensorreading_p202611",
+        ]
+
+    def test_nothing_to_do_without_partitions(self):
+        assert ensure_partitions() == []
+        assert list_partitions() == []
@@ -0,0 +1,171 @@
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+from django.core.management import call_command
+from django.db import connection
+
+import pytest
+
+from gardeniq.hardware.models import SensorCategory
+from gardeniq.telemetry.models import DayRollup
+from gardeniq.telemetry.models import HourRollup
+from gardeniq.telemetry.models import MinuteRollup
+from gardeniq.telemetry.models import RetentionPolicy
+from gardeniq.telemetry.models import SensorReading
+from gardeniq.telemetry.partitions import MONTH
+from gardeniq.telemetry.partitions import Partition
+from gardeniq.telemetry.retention import RetentionReport
+from gardeniq.telemetry.retention import apply_retention
+from gardeniq.telemetry.retention import compact
+from gardeniq.telemetry.retention import delete_expired
+from gardeniq.telemetry.retention import drop_expired_partitions
+from gardeniq.telemetry.retention import expiry_cutoffs
+from gardeniq.telemetry.rollups import update_rollups
+from gardeniq.telemetry.tests.test_partitions import FakePostgreSQL
+from gardeniq.telemetry.timestamps import to_timestamp
+from gardeniq.telemetry.utils.tests import SensorTestMixin
+
+NOW = datetime(2026, 10, 17, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def retention_settings(settings):
+    settings.TELEMETRY_RETENTION_DAYS = {"raw": 10, "minute": 20, "hour": 30, "day": None}
+    settings.TELEMETRY_RETENTION_CHUNK_PAUSE = 0
+
+
+def days_ago(days: int) -> int:
+    return to_timestamp(NOW - timedelta(days=days))
+
+
+@pytest.mark.django_db
+class TestRetentionPolicy(SensorTestMixin):
+    def test_policy_falls_back_to_the_settings(self, sensor_category):
+        # GIVEN
+        policy = RetentionPolicy.objects.create(category=sensor_category, raw_days=3, day_days=400)
+
+        # WHEN / THEN
+        assert [policy.days(level) for level in ("raw", "minute", "hour", "day")] == [3, 20, 30, 400]
+
+    def test_cutoffs_by_category(self, sensor_category):
+        # GIVEN
+        kept_forever = SensorCategory.objects.create(name="Rain", unity_value="mm")
+        RetentionPolicy.objects.create(category=sensor_category, raw_days=3)
+        RetentionPolicy.objects.create(category=kept_forever, day_days=None)
+
+        # WHEN
+        raw, day = expiry_cutoffs("raw", NOW), expiry_cutoffs("day", NOW)
+
+        # THEN
+        assert raw == {sensor_category.pk: days_ago(3), kept_forever.pk: days_ago(10)}
+        assert day == {}
+
+
+@pytest.mark.django_db
+class TestDeleteExpired(SensorTestMixin):
+    def test_expired_rows_are_deleted_by_chunks(self, sensor_factory, django_assert_num_queries):
+        # GIVEN
+        sensor, other = sensor_factory(2)
+        SensorReading.objects.bulk_create(
+            [SensorReading(sensor_id=s.pk, ts=ts, value=1.0) for s in (sensor, other) for ts in range(10)]
+        )
+
+        # WHEN
+        # 3 chunks of 4, 4 and 1 rows: a bound and a DELETE (with its savepoint) each.
+        with django_assert_num_queries(3 * 4):
+            deleted = delete_expired(SensorReading, sensor.pk, cutoff=9, chunk_size=4)
+
+        # THEN
+        assert deleted == 9
+        assert list(SensorReading.objects.filter(sensor=sensor).values_list("ts", flat=True)) == [9]
+        assert SensorReading.objects.filter(sensor=other).count() == 10
+
+    def test_apply_retention(self, sensor_factory, sensor_category):
+        # GIVEN
+        sensor, strict = sensor_factory(2)
+        strict.category = SensorCategory.objects.create(name="Soil", unity_value="%")
+        strict.save()
+        RetentionPolicy.objects.create(category=strict.category, raw_days=1, hour_days=5)
+        rows = [(s.pk, days_ago(days), float(days)) for s in (sensor, strict) for days in (0, 2, 15, 25, 40)]
+        SensorReading.objects.bulk_create([SensorReading(sensor_id=s, ts=ts, value=v) for s, ts, v in rows])
+        update_rollups(rows)
+
+        # WHEN
+        report = apply_retention(NOW)
+
+        # THEN
+        assert report.deleted == {"raw": 3 + 4, "minute": 2 + 2, "hour": 1 + 3, "day": 0}
+        assert SensorReading.objects.filter(sensor=sensor).count() == 2
+        assert SensorReading.objects.filter(sensor=strict).count() == 1
+        assert MinuteRollup.objects.count() == 2 * 3
+        assert HourRollup.objects.filter(sensor=strict).count() == 2
+        assert DayRollup.objects.count() == 2 * 5
+        assert report.analyzed == []
+
+    def test_command(self, sensor):
+        # GIVEN
+        SensorReading.objects.create(sensor=sensor, ts=to_timestamp(datetime(2020, 1, 1, tzinfo=timezone.utc)), value=1)
+
+        # WHEN
+        call_command("telemetry_retention")
+
+        # THEN
+        assert not SensorReading.objects.exists()
+
+
+@pytest.mark.django_db
+class TestPartitionsAndCompaction(SensorTestMixin):
+    def test_partitions_expired_for_every_category_are_dropped(self, sensor_category):
+        # GIVEN
+        partitions = [
+            Partition.containing(datetime(2026, month, 1, tzinfo=timezone.utc), MONTH).name for month in (8, 9, 10)
+        ]
+        database = FakePostgreSQL(partitions=partitions)
+        cutoffs = {sensor_category.pk: to_timestamp(datetime(2026, 10, 7, tzinfo=timezone.utc))}
+
+        # WHEN
+        dropped = drop_expired_partitions(cutoffs, database)
+
+        # THEN
+        assert dropped == partitions[:2]
+        assert database.statements[-1] == f'DROP TABLE IF EXISTS "{partitions[1]}"'
+
+    def test_no_partition_is_dropped_while_a_category_keeps_everything(self, sensor_category):
+        # GIVEN
+        SensorCategory.objects.create(name="Rain", unity_value="mm")
+        database = FakePostgreSQL(partitions=["telemetry_sensorreading_p202608"])
+
+        # WHEN
+        dropped = drop_expired_partitions({sensor_category.pk: days_ago(0)}, database)
+
+        # THEN
+        assert dropped == []
+
+    def test_large_deletions_are_analyzed(self, settings, sensor):
+        # GIVEN
+        settings.TELEMETRY_RETENTION_ANALYZE_MIN_ROWS = 100
+        report = RetentionReport()
+        report.deleted.update(raw=100, minute=99)
+
+        # WHEN
+        compact(report)
+
+        # THEN
+        assert report.analyzed == ["telemetry_sensorreading"]
+        assert not report.vacuumed  # VACUUM cannot run in the transaction of the test
+
+    @pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite file")
+    @pytest.mark.django_db(transaction=True)
+    def test_sqlite_file_is_vacuumed_when_mostly_free(self, settings, sensor):
+        # GIVEN
+        settings.TELEMETRY_RETENTION_ANALYZE_MIN_ROWS = 1
+        settings.TELEMETRY_RETENTION_VACUUM_RATIO = 0.0
+        report = RetentionReport()
+        report.deleted["raw"] = 1
+
+        # WHEN
+        compact(report)
+
+        # THEN
+        assert report.vacuumed
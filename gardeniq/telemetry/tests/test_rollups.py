@@ -0,0 +1,177 @@
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+from django.core.management import CommandError
+from django.core.management import call_command
+from django.utils import timezone as django_timezone
+
+import pytest
+
+from gardeniq.telemetry.ingest import TelemetryWriter
+from gardeniq.telemetry.models import DayRollup
+from gardeniq.telemetry.models import HourRollup
+from gardeniq.telemetry.models import MinuteRollup
+from gardeniq.telemetry.models import SensorReading
+from gardeniq.telemetry.retention import apply_retention
+from gardeniq.telemetry.rollups import Aggregate
+from gardeniq.telemetry.rollups import aggregate
+from gardeniq.telemetry.rollups import rebuild_rollups
+from gardeniq.telemetry.rollups import update_rollups
+from gardeniq.telemetry.timestamps import DAY_MS
+from gardeniq.telemetry.timestamps import HOUR_MS
+from gardeniq.telemetry.timestamps import MINUTE_MS
+from gardeniq.telemetry.timestamps import to_timestamp
+from gardeniq.telemetry.utils.tests import SensorTestMixin
+
+START = datetime(2026, 10, 17, tzinfo=timezone.utc)
+T0 = to_timestamp(START)
+
+
+def rollup_values(model, sensor_id):
+    return list(
+        model.objects.filter(sensor_id=sensor_id)
+        .order_by("bucket")
+        .values_list("bucket", "count", "sum", "min", "max", "last", "last_ts")
+    )
+
+
+class TestAggregate:
+    def test_readings_are_aggregated_by_sensor_and_bucket(self):
+        # GIVEN
+        rows = [(1, T0 + 10, 3.0), (1, T0, 5.0), (2, T0, 7.0), (1, T0 + MINUTE_MS, 1.0)]
+
+        # WHEN
+        buckets = aggregate(rows, MINUTE_MS)
+
+        # THEN
+        assert buckets == {
+            (1, T0): Aggregate(count=2, sum=8.0, min=3.0, max=5.0, last=3.0, last_ts=T0 + 10),
+            (2, T0): Aggregate(count=1, sum=7.0, min=7.0, max=7.0, last=7.0, last_ts=T0),
+            (1, T0 + MINUTE_MS): Aggregate(count=1, sum=1.0, min=1.0, max=1.0, last=1.0, last_ts=T0 + MINUTE_MS),
+        }
+
+
+@pytest.mark.django_db
+class TestUpdateRollups(SensorTestMixin):
+    def test_batches_are_merged_into_every_level(self, sensor):
+        # GIVEN
+        first = [(sensor.pk, T0 + 1000, 20.0), (sensor.pk, T0 + 2000, 22.0)]
+        second = [(sensor.pk, T0 + 500, 18.0), (sensor.pk, T0 + HOUR_MS, 30.0)]
+
+        # WHEN
+        update_rollups(first)
+        update_rollups(second)
+
+        # THEN
+        assert rollup_values(MinuteRollup, sensor.pk) == [
+            (T0, 3, 60.0, 18.0, 22.0, 22.0, T0 + 2000),
+            (T0 + HOUR_MS, 1, 30.0, 30.0, 30.0, 30.0, T0 + HOUR_MS),
+        ]
+        assert rollup_values(HourRollup, sensor.pk) == rollup_values(MinuteRollup, sensor.pk)
+        assert rollup_values(DayRollup, sensor.pk) == [(T0, 4, 90.0, 18.0, 30.0, 30.0, T0 + HOUR_MS)]
+        assert DayRollup.objects.get().mean == 22.5
+
+    def test_incremental_rollups_match_a_single_pass(self, sensor_factory):
+        # GIVEN
+        incremental, single = sensor_factory(2)
+        values = [(ts * 7919 % 97) / 4 for ts in range(300)]  # sums are exact
+
+        # WHEN
+        for start in range(0, 300, 40):
+            update_rollups([(incremental.pk, T0 + ts * 1000, values[ts]) for ts in range(start, min(start + 40, 300))])
+        update_rollups([(single.pk, T0 + ts * 1000, values[ts]) for ts in range(300)])
+
+        # THEN
+        for model in (MinuteRollup, HourRollup, DayRollup):
+            assert rollup_values(model, incremental.pk) == rollup_values(model, single.pk)
+
+    def test_flushed_readings_update_the_rollups(self, sensor):
+        # GIVEN
+        writer = TelemetryWriter()
+        writer.add(sensor.pk, 10.0, ts=T0)
+        writer.add(sensor.pk, 12.0, ts=T0 + 1)
+
+        # WHEN
+        writer.flush()
+
+        # THEN
+        assert rollup_values(HourRollup, sensor.pk) == [(T0, 2, 22.0, 10.0, 12.0, 12.0, T0 + 1)]
+
+    def test_month_of_hour_rollups(self, sensor):
+        # GIVEN
+        update_rollups([(sensor.pk, T0 + minute * MINUTE_MS, 1.0) for minute in range(0, 31 * 24 * 60, 10)])
+
+        # WHEN
+        buckets = HourRollup.objects.between(sensor.pk, START, START + timedelta(days=31))
+
+        # THEN
+        assert buckets.count() == 31 * 24
+        assert {bucket.count for bucket in buckets} == {6}
+
+
+@pytest.mark.django_db
+class TestRebuildRollups(SensorTestMixin):
+    def test_rollups_are_rebuilt_from_the_readings(self, sensor_factory):
+        # GIVEN
+        sensor, other = sensor_factory(2)
+        readings = [(sensor.pk, T0 + i * MINUTE_MS, float(i)) for i in range(5)]
+        SensorReading.objects.bulk_create([SensorReading(sensor_id=s, ts=ts, value=v) for s, ts, v in readings])
+        update_rollups(readings)
+        update_rollups(readings[:2])  # merged twice
+        update_rollups([(other.pk, T0, 1.0)])  # not rebuilt
+
+        # WHEN
+        total = rebuild_rollups(
+            START + timedelta(hours=3), START + timedelta(hours=4), [sensor.pk], chunk_size=2, now=START
+        )
+
+        # THEN
+        assert total == 5
+        assert rollup_values(DayRollup, sensor.pk) == [(T0, 5, 10.0, 0.0, 4.0, 4.0, T0 + 4 * MINUTE_MS)]
+        assert MinuteRollup.objects.filter(sensor=sensor).count() == 5
+        assert rollup_values(DayRollup, other.pk) == [(T0, 1, 1.0, 1.0, 1.0, 1.0, T0)]
+
+    def test_rollups_older_than_the_raw_readings_survive_a_rebuild(self, sensor, settings):
+        # GIVEN
+        settings.TELEMETRY_RETENTION_DAYS = {"raw": 10, "minute": 20, "hour": 30, "day": None}
+        settings.TELEMETRY_RETENTION_CHUNK_PAUSE = 0
+        now = START + timedelta(days=40, hours=12)
+        rows = [(sensor.pk, T0 + days * DAY_MS, float(days)) for days in (0, 20, 35, 40)]
+        SensorReading.objects.bulk_create([SensorReading(sensor_id=s, ts=ts, value=v) for s, ts, v in rows])
+        update_rollups(rows)
+        apply_retention(now)
+
+        # WHEN
+        total = rebuild_rollups(START - timedelta(days=365), now, now=now)
+
+        # THEN
+        assert total == 2
+        assert [bucket for bucket, *_ in rollup_values(DayRollup, sensor.pk)] == [
+            T0 + days * DAY_MS for days in (0, 20, 35, 40)
+        ]
+        assert [bucket for bucket, *_ in rollup_values(HourRollup, sensor.pk)] == [
+            T0 + days * DAY_MS for days in (20, 35, 40)
+        ]
+
+    def test_command(self, sensor):
+        # GIVEN
+        today = django_timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        ts = to_timestamp(today)
+        SensorReading.objects.create(sensor=sensor, ts=ts, value=4.0)
+
+        # WHEN
+        call_command(
+            "telemetry_rollups",
+            "--from",
+            today.date().isoformat(),
+            "--to",
+            (today + timedelta(days=1)).date().isoformat(),
+        )
+
+        # THEN
+        assert rollup_values(DayRollup, sensor.pk) == [(ts, 1, 4.0, 4.0, 4.0, 4.0, ts)]
+
+    def test_command_rejects_an_empty_range(self):
+        with pytest.raises(CommandError):
+            call_command("telemetry_rollups", "--from", "2026-10-18", "--to", "2026-10-17")
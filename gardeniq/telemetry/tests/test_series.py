@@ -0,0 +1,135 @@
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+import numpy as np
+import pytest
+
+from gardeniq.telemetry.downsampling import lttb
+from gardeniq.telemetry.models import SensorReading
+from gardeniq.telemetry.rollups import update_rollups
+from gardeniq.telemetry.series import RAW
+from gardeniq.telemetry.series import choose_source
+from gardeniq.telemetry.series import load_series
+from gardeniq.telemetry.series import sensor_series
+from gardeniq.telemetry.series import source_rows
+from gardeniq.telemetry.timestamps import HOUR_MS
+from gardeniq.telemetry.timestamps import MINUTE_MS
+from gardeniq.telemetry.timestamps import to_timestamp
+from gardeniq.telemetry.utils.tests import SensorTestMixin
+
+START = datetime(2026, 10, 1, tzinfo=timezone.utc)
+T0 = to_timestamp(START)
+
+
+class TestLTTB:
+    def test_series_is_reduced_to_the_threshold(self):
+        # GIVEN
+        x = np.arange(1000, dtype=np.int64) * 1000
+        y = np.sin(np.arange(1000) / 50)
+
+        # WHEN
+        rx, ry = lttb(x, y, 100)
+
+        # THEN
+        assert len(rx) == len(ry) == 100
+        assert (rx[0], rx[-1]) == (x[0], x[-1])
+        assert np.all(np.diff(rx) > 0)
+        assert rx.dtype == np.int64
+
+    def test_peaks_are_kept(self):
+        # GIVEN
+        x = np.arange(500, dtype=np.int64)
+        y = np.zeros(500)
+        y[137], y[388] = 50.0, -40.0
+
+        # WHEN
+        rx, ry = lttb(x, y, 10)
+
+        # THEN
+        assert 137 in rx and 388 in rx
+        assert ry.max() == 50.0 and ry.min() == -40.0
+
+    @pytest.mark.parametrize("threshold", [2, 10, 20])
+    def test_short_series_is_returned_as_is(self, threshold):
+        # GIVEN
+        x, y = np.arange(10), np.arange(10.0)
+
+        # WHEN
+        rx, ry = lttb(x, y, threshold)
+
+        # THEN
+        assert rx is x and ry is y
+
+    def test_lengths_must_match(self):
+        with pytest.raises(ValueError):
+            lttb(np.arange(5), np.arange(4.0), 3)
+
+
+@pytest.mark.django_db
+class TestSensorSeries(SensorTestMixin):
+    @pytest.fixture
+    def minute_samples(self, sensor):
+        # One reading per minute for 3 days.
+        rows = [(sensor.pk, T0 + minute * MINUTE_MS, float(minute % 60)) for minute in range(3 * 24 * 60)]
+        SensorReading.objects.bulk_create([SensorReading(sensor_id=s, ts=ts, value=v) for s, ts, v in rows])
+        update_rollups(rows)
+        return rows
+
+    @pytest.mark.parametrize(
+        "period, source",
+        [
+            (timedelta(hours=6), RAW),  # 360 readings
+            (timedelta(days=3), "hour"),  # 4320 minutes, 72 hours
+            (timedelta(days=365), "day"),
+        ],
+    )
+    def test_finest_source_under_the_row_limit(self, sensor, minute_samples, period, source):
+        assert choose_source(sensor.pk, START, START + period, max_rows=1000) == source
+
+    def test_minute_rollups_for_sparse_ranges(self, sensor):
+        # GIVEN
+        rows = [(sensor.pk, T0 + second * 1000, 1.0) for second in range(0, 2 * 60 * 60, 2)]  # 3600 readings
+        update_rollups(rows)
+
+        # WHEN / THEN
+        assert choose_source(sensor.pk, START, START + timedelta(hours=2), max_rows=1000) == "minute"
+
+    def test_raw_readings_without_rollups_are_counted_up_to_the_limit(self, sensor):
+        # GIVEN
+        # 3 hours of readings, one per second, never rolled up.
+        SensorReading.objects.bulk_create(
+            [SensorReading(sensor_id=sensor.pk, ts=T0 + second * 1000, value=1.0) for second in range(3 * 60 * 60)]
+        )
+        end = START + timedelta(hours=3)
+
+        # WHEN
+        rows = source_rows(sensor.pk, START, end, RAW, max_rows=1000)
+
+        # THEN
+        assert rows == 1001
+        assert choose_source(sensor.pk, START, end, max_rows=1000) != RAW
+
+    def test_rollup_series_is_the_mean_of_the_buckets(self, sensor, minute_samples):
+        # WHEN
+        series = load_series(sensor.pk, START, START + timedelta(hours=2), "hour")
+
+        # THEN
+        assert series.points() == [(T0, 29.5), (T0 + HOUR_MS, 29.5)]
+
+    def test_series_is_reduced_to_the_points(self, sensor, minute_samples):
+        # WHEN
+        series = sensor_series(sensor.pk, START, START + timedelta(days=1), points=100, source=RAW)
+
+        # THEN
+        assert len(series.ts) == 100
+        assert series.ts[0] == T0
+        assert series.ts[-1] == T0 + (24 * 60 - 1) * MINUTE_MS
+
+    def test_no_readings(self, sensor):
+        # WHEN
+        series = sensor_series(sensor.pk, START, START + timedelta(days=1), points=100)
+
+        # THEN
+        assert series.source == RAW
+        assert series.points() == []
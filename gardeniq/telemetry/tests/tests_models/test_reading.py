@@ -0,0 +1,126 @@
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+from django.db import IntegrityError
+from django.db import connection
+from django.db import transaction
+
+import pytest
+
+from gardeniq.telemetry.models import SensorReading
+from gardeniq.telemetry.timestamps import HOUR_MS
+from gardeniq.telemetry.timestamps import floor_timestamp
+from gardeniq.telemetry.timestamps import to_datetime
+from gardeniq.telemetry.timestamps import to_timestamp
+from gardeniq.telemetry.utils.tests import SensorTestMixin
+
+START = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+class TestTimestamps:
+    def test_round_trip(self):
+        # GIVEN
+        moment = datetime(2026, 10, 17, 4, 35, 12, 345000, tzinfo=timezone.utc)
+
+        # WHEN
+        timestamp = to_timestamp(moment)
+
+        # THEN
+        assert timestamp == 1792211712345
+        assert to_datetime(timestamp) == moment
+
+    def test_naive_datetime_is_rejected(self):
+        with pytest.raises(ValueError):
+            to_timestamp(datetime(2026, 10, 17))
+
+    def test_floor_timestamp(self):
+        # GIVEN
+        timestamp = to_timestamp(datetime(2026, 10, 17, 4, 35, tzinfo=timezone.utc))
+
+        # WHEN
+        bucket = floor_timestamp(timestamp, HOUR_MS)
+
+        # THEN
+        assert to_datetime(bucket) == datetime(2026, 10, 17, 4, tzinfo=timezone.utc)
+
+
+@pytest.mark.django_db
+class TestSensorReading(SensorTestMixin):
+    def test_time_is_stored_in_epoch_milliseconds(self, sensor):
+        # GIVEN
+        reading = SensorReading(sensor=sensor, value=21.5)
+
+        # WHEN
+        reading.time = START
+        reading.save()
+
+        # THEN
+        stored = SensorReading.objects.get(sensor=sensor)
+        assert stored.ts == to_timestamp(START)
+        assert stored.time == START
+        assert str(stored) == f"Sensor {sensor.pk} : 2026-10-01T00:00:00+00:00 : 21.5"
+
+    def test_between_returns_the_range_of_one_sensor_in_order(self, sensor_factory):
+        # GIVEN
+        first, second = sensor_factory(2)
+        readings = [
+            SensorReading(sensor=sensor, ts=to_timestamp(START + timedelta(seconds=10 * i)), value=i)
+            for sensor in (first, second)
+            for i in reversed(range(10))
+        ]
+        SensorReading.objects.bulk_create(readings)
+
+        # WHEN
+        values = list(
+            SensorReading.objects.between(
+                first.pk, START + timedelta(seconds=20), START + timedelta(seconds=60)
+            ).values_list("value", flat=True)
+        )
+
+        # THEN
+        assert values == [2, 3, 4, 5]
+
+    def test_a_sensor_has_one_reading_per_millisecond(self, sensor):
+        # GIVEN
+        SensorReading.objects.create(sensor=sensor, ts=1000, value=1)
+
+        # WHEN
+        with pytest.raises(IntegrityError), transaction.atomic():
+            SensorReading.objects.create(sensor=sensor, ts=1000, value=2)
+        SensorReading.objects.bulk_create([SensorReading(sensor=sensor, ts=1000, value=3)], ignore_conflicts=True)
+
+        # THEN
+        assert list(SensorReading.objects.values_list("value", flat=True)) == [1]
+
+    def test_readings_are_deleted_with_their_sensor(self, sensor_factory):
+        # GIVEN
+        kept, deleted = sensor_factory(2)
+        SensorReading.objects.bulk_create(
+            [SensorReading(sensor=kept, ts=1000, value=1), SensorReading(sensor=deleted, ts=1000, value=2)]
+        )
+
+        # WHEN
+        deleted.delete()
+
+        # THEN
+        assert list(SensorReading.objects.values_list("sensor_id", flat=True)) == [kept.pk]
+
+    @pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite layout")
+    def test_sqlite_table_is_clustered_by_sensor_and_time(self):
+        # GIVEN
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'telemetry_sensorreading'")
+            table_sql = cursor.fetchone()[0]
+
+            # WHEN
+            cursor.execute(
+                "EXPLAIN QUERY PLAN SELECT ts, value FROM telemetry_sensorreading "
+                "WHERE sensor_id = 1 AND ts >= 0 AND ts < 1000 ORDER BY ts"
+            )
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+
+        # THEN
+        assert table_sql.rstrip().endswith("WITHOUT ROWID")
+        assert "USING PRIMARY KEY (sensor_id=? AND ts>? AND ts<?)" in plan
+        assert "TEMP B-TREE" not in plan
@@ -0,0 +1,52 @@
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+import pytest
+
+from gardeniq.base.utils import ViewSetTestMixin
+from gardeniq.telemetry.latest import update_latest
+from gardeniq.telemetry.utils.tests import SensorTestMixin
+
+
+@pytest.mark.django_db
+class TestLatestReadingsAPIView(ViewSetTestMixin, SensorTestMixin):
+    URL = reverse("telemetry-latest")
+
+    @pytest.fixture
+    def sensors(self, sensor_factory):
+        sensors = sensor_factory(3)
+        update_latest([(sensor.pk, 1000 * sensor.pk, float(sensor.pk)) for sensor in sensors[:2]])
+        return sensors
+
+    def test_all_latest_readings_in_one_query(self, authenticated_client, sensors, django_assert_num_queries):
+        # GIVEN
+        first, second, _ = sensors
+
+        # WHEN
+        with django_assert_num_queries(1):
+            response = authenticated_client.get(self.URL)
+
+        # THEN
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == [
+            {"sensor": first.pk, "ts": 1000 * first.pk, "value": float(first.pk)},
+            {"sensor": second.pk, "ts": 1000 * second.pk, "value": float(second.pk)},
+        ]
+
+    def test_filters(self, authenticated_client, sensors):
+        # GIVEN
+        first, second, third = sensors
+
+        # WHEN
+        by_sensor = authenticated_client.get(self.URL, {"sensor": [second.pk, third.pk]})
+        by_device = authenticated_client.get(self.URL, {"device": first.device_id + 1})
+
+        # THEN
+        assert [reading["sensor"] for reading in by_sensor.data] == [second.pk]
+        assert by_device.data == []
+
+    def test_invalid_query(self, authenticated_client, db):
+        assert authenticated_client.get(self.URL, {"sensor": "first"}).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_authentication_is_required(self, unauthenticated_client, db):
+        assert unauthenticated_client.get(self.URL).status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,91 @@
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+import pytest
+
+from gardeniq.base.utils import ViewSetTestMixin
+from gardeniq.telemetry.models import SensorReading
+from gardeniq.telemetry.rollups import update_rollups
+from gardeniq.telemetry.timestamps import to_timestamp
+from gardeniq.telemetry.utils.tests import SensorTestMixin
+
+START = datetime(2026, 10, 1, tzinfo=timezone.utc)
+T0 = to_timestamp(START)
+
+
+@pytest.mark.django_db
+class TestSensorSeriesAPIView(ViewSetTestMixin, SensorTestMixin):
+    @pytest.fixture
+    def readings(self, sensor):
+        rows = [(sensor.pk, T0 + i * 10_000, float(i % 7)) for i in range(1000)]
+        SensorReading.objects.bulk_create([SensorReading(sensor_id=s, ts=ts, value=v) for s, ts, v in rows])
+        update_rollups(rows)
+
+    @staticmethod
+    def url(sensor_id):
+        return reverse("telemetry-sensor-series", kwargs={"pk": sensor_id})
+
+    def test_series_is_downsampled(self, authenticated_client, sensor, readings):
+        # WHEN
+        response = authenticated_client.get(
+            self.url(sensor.pk),
+            {"from": START.isoformat(), "to": (START + timedelta(hours=3)).isoformat(), "points": 50},
+        )
+
+        # THEN
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["sensor"] == sensor.pk
+        assert response.data["source"] == "raw"
+        assert len(response.data["points"]) == 50
+        assert response.data["points"][0] == (T0, 0.0)
+
+    def test_default_range_ends_now(self, authenticated_client, sensor, readings):
+        # WHEN
+        response = authenticated_client.get(self.url(sensor.pk))
+
+        # THEN
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["points"] == []
+        assert response.data["to"] - response.data["from"] == timedelta(days=1)
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"points": 2},
+            {"points": 100_000},
+            {"from": "2026-10-02T00:00:00Z", "to": "2026-10-01T00:00:00Z"},
+            {"from": "yesterday"},
+            {"source": "week"},
+        ],
+    )
+    def test_invalid_query(self, authenticated_client, sensor, params):
+        # WHEN
+        response = authenticated_client.get(self.url(sensor.pk), params)
+
+        # THEN
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_source_over_the_row_limit_is_rejected(self, settings, authenticated_client, sensor, readings):
+        # GIVEN
+        settings.TELEMETRY_SERIES_MAX_ROWS = 100
+        query = {"from": START.isoformat(), "to": (START + timedelta(days=1)).isoformat()}
+
+        # WHEN
+        raw = authenticated_client.get(self.url(sensor.pk), {**query, "source": "raw"})
+        minute = authenticated_client.get(self.url(sensor.pk), {**query, "source": "minute"})
+        hour = authenticated_client.get(self.url(sensor.pk), {**query, "source": "hour"})
+
+        # THEN
+        assert raw.status_code == minute.status_code == status.HTTP_400_BAD_REQUEST
+        assert "source" in raw.data
+        assert hour.status_code == status.HTTP_200_OK
+
+    def test_unknown_sensor(self, authenticated_client, db):
+        assert authenticated_client.get(self.url(404)).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_authentication_is_required(self, unauthenticated_client, sensor):
+        assert unauthenticated_client.get(self.url(sensor.pk)).status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,35 @@
+"""
+Telemetry times are stored as integers: Unix epoch in milliseconds, UTC. An integer key is smaller
+than a datetime column (8 bytes instead of a 26 characters text on SQLite) and the time buckets of
+the rollups are plain integer arithmetic on every database.
+"""
+
+from datetime import datetime
+from datetime import timezone
+
+SECOND_MS = 1000
+MINUTE_MS = 60 * SECOND_MS
+HOUR_MS = 60 * MINUTE_MS
+DAY_MS = 24 * HOUR_MS
+
+
+def to_timestamp(moment: datetime) -> int:
+    """
+    Convert an aware datetime to epoch milliseconds.
+
+    Raises:
+        ValueError: If the datetime is naive.
+    """
+    if moment.tzinfo is None:
+        raise ValueError(f"Naive datetime: {moment.isoformat()}")
+    return round(moment.timestamp() * SECOND_MS)
+
+
+def to_datetime(timestamp: int) -> datetime:
+    """Convert epoch milliseconds to an aware UTC datetime."""
+    return datetime.fromtimestamp(timestamp / SECOND_MS, timezone.utc)
+
+
+def floor_timestamp(timestamp: int, interval: int) -> int:
+    """Return the start of the `interval` (milliseconds) long bucket holding a timestamp."""
+    return timestamp - timestamp % interval
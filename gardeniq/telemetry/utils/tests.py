@@ -0,0 +1,52 @@
+from typing import Callable
+from typing import List
+
+import pytest
+
+from gardeniq.base.models import Status
+from gardeniq.hardware.models import Channel
+from gardeniq.hardware.models import Device
+from gardeniq.hardware.models import Pin
+from gardeniq.hardware.models import Sensor
+from gardeniq.hardware.models import SensorCategory
+
+
+class SensorTestMixin:
+    """A mixin class providing sensors for tests of the telemetry.
+
+    Fixtures:
+        sensor_category() -> SensorCategory:
+            A "Temperature" category, in °C.
+
+        sensor_factory() -> Callable[[int], List[Sensor]]:
+            Creates `count` sensors of the category, on one device, one pin per sensor.
+
+        sensor() -> Sensor:
+            A single sensor made by `sensor_factory`.
+    """
+
+    @pytest.fixture
+    def sensor_category(self, db) -> SensorCategory:
+        return SensorCategory.objects.create(name="Temperature", unity_value="°C")
+
+    @pytest.fixture
+    def sensor_factory(self, sensor_category) -> Callable[[int], List[Sensor]]:
+        status = Status.objects.create(name="Generic", tag="device-generic", color="#123456")
+        device = Device.objects.create(name="Board", uid="TELEMETRY0001", path="/dev/ttyUSB0", status=status)
+        channel = Channel.objects.create(name="Analog")
+
+        def _factory(count: int) -> List[Sensor]:
+            start = Sensor.objects.count()
+            sensors = []
+            for number in range(start, start + count):
+                pin = Pin.objects.create(device=device, channel_choiced=channel, pin_number=number)
+                sensors.append(
+                    Sensor.objects.create(name=f"Sensor {number}", category=sensor_category, device=device, pin=pin)
+                )
+            return sensors
+
+        return _factory
+
+    @pytest.fixture
+    def sensor(self, sensor_factory) -> Sensor:
+        return sensor_factory(1)[0]
@@ -1,3 +1,53 @@
-# from django.shortcuts import render
+from django.shortcuts import get_object_or_404
 
-# Create your views here.
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from drf_spectacular.utils import extend_schema
+
+from gardeniq.hardware.models import Sensor
+
+from .latest import latest_readings
+from .serializers import LatestQuerySerializer
+from .serializers import LatestReadingSerializer
+from .serializers import SeriesQuerySerializer
+from .serializers import SeriesSerializer
+from .series import sensor_series
+
+
+class SensorSeriesAPIView(APIView):
+    """
+    Values of a sensor over a time range, reduced to at most `points` points for a chart.
+    GET /api/telemetry/sensors/{id}/series/?from=&to=&points=N
+    Returns: {"sensor", "source", "from", "to", "points": [[timestamp ms, value], ...]}
+    """
+
+    @extend_schema(parameters=[SeriesQuerySerializer], responses=SeriesSerializer)
+    def get(self, request, pk, format=None):
+        sensor = get_object_or_404(Sensor, pk=pk)
+        query = SeriesQuerySerializer(data=request.query_params, context={"sensor": sensor})
+        query.is_valid(raise_exception=True)
+        start, end = query.validated_data["from"], query.validated_data["to"]
+
+        series = sensor_series(
+            sensor.pk, start, end, query.validated_data["points"], query.validated_data.get("source")
+        )
+        return Response(
+            {"sensor": sensor.pk, "source": series.source, "from": start, "to": end, "points": series.points()}
+        )
+
+
+class LatestReadingsAPIView(APIView):
+    """
+    Latest value of many sensors, for a dashboard, with one query.
+    GET /api/telemetry/latest/?device=ID&sensor=ID&sensor=ID
+    Returns: [{"sensor", "ts", "value"}, ...], by sensor pk; sensors without reading are left out.
+    """
+
+    @extend_schema(parameters=[LatestQuerySerializer], responses=LatestReadingSerializer(many=True))
+    def get(self, request, format=None):
+        query = LatestQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        readings = latest_readings(query.validated_data.get("device"), query.validated_data.get("sensor"))
+        return Response(list(readings.values("sensor", "ts", "value")))